@@ -1,4 +1,5 @@
 import copy
+import gzip
 import json
 import traceback
 from typing import Any, Callable, Dict, List
@@ -21,12 +22,25 @@ config = Config()
 
 SUPPORTED_VERSIONS: List[str] = ["v1"]
 
+# Responses smaller than this aren't worth compressing.
+GZIP_MINIMUM_SIZE: int = 1024
+
 
 def jsonify_response(data: Dict[str, Any], code: int = 200) -> Response:
+    body = json.dumps(data).encode("utf8")
+    headers: Dict[str, str] = {}
+
+    # Record sets can be large and compress very well, so compress them for clients that allow it.
+    if len(body) >= GZIP_MINIMUM_SIZE and "gzip" in request.headers.get("Accept-Encoding", "").lower():
+        body = gzip.compress(body, compresslevel=6)
+        headers["Content-Encoding"] = "gzip"
+        headers["Vary"] = "Accept-Encoding"
+
     return Response(
-        json.dumps(data).encode("utf8"),
+        body,
         content_type="application/json; charset=utf-8",
         status=code,
+        headers=headers,
     )
 
 
@@ -90,48 +90,43 @@ class ProfileObject(BaseObject):
                 405,
             )
         elif idtype == APIConstants.ID_TYPE_CARD:
-            users: Set[UserID] = set()
+            card_to_id = self.data.local.user.from_cardids(ids)
+            users: List[UserID] = []
+            seen: Set[UserID] = set()
             for cardid in ids:
-                userid = self.data.local.user.from_cardid(cardid)
-                if userid is not None:
-                    # Don't duplicate loads for users with multiple card IDs if multiples
-                    # of those IDs are requested.
-                    if userid in users:
-                        continue
-                    users.add(userid)
-
-                    # We can possibly find another profile for this user. This is important
-                    # in the case that we returned scores for a user that doesn't have a
-                    # profile on a particular version. We allow that on this network, so in
-                    # order to not break remote networks, try our best to return any profile.
-                    profile = self.data.local.user.get_any_profile(self.game, self.version, userid)
-                    if profile is not None:
-                        profiles.append((userid, profile))
+                userid = card_to_id.get(cardid.upper())
+                # Don't duplicate loads for users with multiple card IDs if multiples
+                # of those IDs are requested.
+                if userid is not None and userid not in seen:
+                    seen.add(userid)
+                    users.append(userid)
+
+            # We can possibly find another profile for this user. This is important
+            # in the case that we returned scores for a user that doesn't have a
+            # profile on a particular version. We allow that on this network, so in
+            # order to not break remote networks, try our best to return any profile.
+            for userid, profile in self.data.local.user.get_any_profiles(self.game, self.version, users):
+                if profile is not None:
+                    profiles.append((userid, profile))
         else:
             raise APIException("Invalid ID type!")
 
         # Now, fetch the users, and filter out profiles belonging to orphaned users
         retval: List[Dict[str, Any]] = []
-        id_to_cards: Dict[UserID, List[str]] = {}
+        userids = sorted({userid for userid, _ in profiles})
+        id_to_cards = self.data.local.user.get_cards_for_users(userids)
+        id_to_settings = self.data.local.game.get_settings_for_users(self.game, userids)
         for userid, profile in profiles:
-            if userid not in id_to_cards:
-                cards = self.data.local.user.get_cards(userid)
-                if len(cards) == 0:
-                    # Can't add this user, skip the profile
-                    continue
-
-                id_to_cards[userid] = cards
+            if len(id_to_cards[userid]) == 0:
+                # Can't add this user, skip the profile
+                continue
 
             # Format the profile and add it
-            settings = self.data.local.game.get_settings(self.game, userid)
-            if settings is None:
-                settings = ValidatedDict({})
-
             retval.append(
                 self.__format_profile(
                     id_to_cards[userid],
                     profile,
-                    settings,
+                    id_to_settings.get(userid, ValidatedDict({})),
                     profile.version == self.version,
                 )
             )
@@ -1,4 +1,4 @@
-from typing import Any, Dict, List, Set, Tuple
+from typing import Any, Dict, List, Tuple
 
 from bemani.api.exceptions import APIException
 from bemani.api.objects.base import BaseObject
@@ -273,50 +273,40 @@ class RecordsObject(BaseObject):
                 if score is not None:
                     records.append((userid, score))
         elif idtype == APIConstants.ID_TYPE_CARD:
-            users: Set[UserID] = set()
+            # Look up every requested card at once. Users with multiple card IDs only get
+            # loaded once if multiples of those IDs are requested.
+            card_to_id = self.data.local.user.from_cardids(ids)
+            users: List[UserID] = []
             for cardid in ids:
-                userid = self.data.local.user.from_cardid(cardid)
-                if userid is not None:
-                    # Don't duplicate loads for users with multiple card IDs if multiples
-                    # of those IDs are requested.
-                    if userid in users:
-                        continue
-                    users.add(userid)
+                userid = card_to_id.get(cardid.upper())
+                if userid is not None and userid not in users:
+                    users.append(userid)
 
-                    records.extend(
-                        [
-                            (userid, score)
-                            for score in self.data.local.music.get_scores(
-                                self.game,
-                                self.music_version,
-                                userid,
-                                since=since,
-                                until=until,
-                            )
-                        ]
-                    )
+            records.extend(
+                self.data.local.music.get_scores_for_users(
+                    self.game,
+                    self.music_version,
+                    users,
+                    since=since,
+                    until=until,
+                )
+            )
         else:
             raise APIException("Invalid ID type!")
 
+        # Postfilter for queries that can't filter. This will save on data transferred.
+        if since is not None:
+            records = [(userid, record) for userid, record in records if record.update >= since]
+        if until is not None:
+            records = [(userid, record) for userid, record in records if record.update < until]
+
         # Now, fetch the users, and filter out scores belonging to orphaned users
-        id_to_cards: Dict[UserID, List[str]] = {}
+        id_to_cards = self.data.local.user.get_cards_for_users(sorted({userid for userid, _ in records}))
         retval: List[Dict[str, Any]] = []
         for userid, record in records:
-            # Postfilter for queries that can't filter. This will save on data transferred.
-            if since is not None:
-                if record.update < since:
-                    continue
-            if until is not None:
-                if record.update >= until:
-                    continue
-
-            if userid not in id_to_cards:
-                cards = self.data.local.user.get_cards(userid)
-                if len(cards) == 0:
-                    # Can't add this user, skip the score
-                    continue
-
-                id_to_cards[userid] = cards
+            if len(id_to_cards[userid]) == 0:
+                # Can't add this user, skip the score
+                continue
 
             # Format the score and add it
             retval.append(self.__format_record(id_to_cards[userid], record))
@@ -151,7 +151,7 @@ class StatisticsObject(BaseObject):
         return retval
 
     def __aggregate_local(
-        self, cards: Dict[int, List[str]], attempts: List[Tuple[UserID, Attempt]]
+        self, cards: Dict[UserID, List[str]], attempts: List[Tuple[UserID, Attempt]]
     ) -> List[Dict[str, Any]]:
         stats: Dict[UserID, Dict[int, Dict[int, Dict[str, int]]]] = {}
 
@@ -225,21 +225,14 @@ class StatisticsObject(BaseObject):
                     ),
                 )
         elif idtype == APIConstants.ID_TYPE_CARD:
-            id_to_cards: Dict[int, List[str]] = {}
-            attempts: List[Tuple[UserID, Attempt]] = []
-            for cardid in ids:
-                userid = self.data.local.user.from_cardid(cardid)
-                if userid is not None:
-                    # Don't duplicate loads for users with multiple card IDs if multiples
-                    # of those IDs are requested.
-                    if userid in id_to_cards:
-                        continue
-
-                    id_to_cards[userid] = self.data.local.user.get_cards(userid)
-                    attempts.extend(
-                        self.data.local.music.get_all_attempts(self.game, self.music_version, userid=userid)
-                    )
-            retval = self.__aggregate_local(id_to_cards, attempts)
+            # Look up every requested card at once. Users with multiple card IDs only get
+            # loaded once if multiples of those IDs are requested.
+            card_to_id = self.data.local.user.from_cardids(ids)
+            userids = sorted(set(card_to_id.values()))
+            retval = self.__aggregate_local(
+                self.data.local.user.get_cards_for_users(userids),
+                self.data.local.music.get_all_attempts(self.game, self.music_version, userids=userids),
+            )
         else:
             raise APIException("Invalid ID type!")
 
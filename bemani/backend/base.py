@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+import time
 import traceback
-from typing import Any, Dict, Iterator, List, Optional, Set, Tuple, Type
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Type, TypeVar
 from typing_extensions import Final
 
 from bemani.common import (
@@ -13,7 +15,10 @@ from bemani.common import (
     Time,
     cache,
 )
-from bemani.data import Config, Data, Arcade, Machine, UserID, RemoteUser
+from bemani.data import Config, Data, Arcade, Attempt, Machine, Score, ScoreSaveException, UserID, RemoteUser
+from bemani.protocol import Node
+
+T = TypeVar("T")
 
 
 class ProfileCreationException(Exception):
@@ -133,6 +138,33 @@ class Base(ABC):
 
     __registered_games: Dict[str, Type[Factory]] = {}
     __registered_handlers: Set[Type[Factory]] = set()
+    __registered_routes: Dict[Type["Base"], Dict[str, Callable[["Base", Node], Optional[Node]]]] = {}
+    __result_cache_stats: Dict[str, Dict[str, int]] = {}
+
+    """
+    How many seconds results shared between every machine, such as hit charts and rankings,
+    are reused for before being recomputed. Override this in your subclass if needed.
+    """
+    RESULT_CACHE_TIMEOUT: int = 15
+
+    """
+    How many seconds to wait for another worker that is computing a shared result before
+    giving up and computing it ourselves.
+    """
+    RESULT_CACHE_LOCK_TIMEOUT: int = 10
+
+    """
+    How many times to retry an attempt from a score_batch() block one second further in the
+    future when it collides with an attempt that was already saved.
+    """
+    ATTEMPT_SAVE_RETRIES: int = 10
+
+    """
+    Top-level profile fields that should be indexed whenever a profile is saved, so that users can
+    be looked up by them with get_userids_by_profile_field() instead of loading every profile. Only
+    string and integer values are indexed. Override this in your subclass if needed.
+    """
+    PROFILE_FIELDS: Tuple[str, ...] = ()
 
     """
     Override this in your subclass.
@@ -149,6 +181,15 @@ class Base(ABC):
     """
     name: str
 
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+
+        # Profiles can be saved from outside of game classes, such as from the frontend, so the
+        # data layer needs to know about indexed fields as soon as a game class is defined.
+        game = getattr(cls, "game", None)
+        if game is not None and cls.PROFILE_FIELDS:
+            Data.register_profile_fields(game, cls.PROFILE_FIELDS)
+
     @property
     def extra_services(self) -> List[str]:
         """
@@ -191,6 +232,11 @@ class Base(ABC):
         # in order to use the object for decorators such as @cache.memoize.
         self.cache = cache
 
+        # Scores and attempts waiting to be written at the end of a score_batch() block.
+        self.__batched_scores: Optional[List[Tuple[int, UserID, Attempt]]] = None
+        self.__batched_attempts: List[Tuple[int, Optional[UserID], Attempt]] = []
+        self.__batched_attempt_keys: Set[Tuple[int, Optional[UserID], int, int, int]] = set()
+
     @classmethod
     def create(
         cls,
@@ -241,6 +287,45 @@ class Base(ABC):
         cls.__registered_games[gamecode] = handler
         cls.__registered_handlers.add(handler)
 
+        # Resolve handlers for every game this factory manages now, so that
+        # requests never have to introspect game classes themselves.
+        for game in handler.MANAGED_CLASSES:
+            game.routes()
+
+    @classmethod
+    def routes(cls) -> Dict[str, Callable[["Base", Node], Optional[Node]]]:
+        """
+        Return every handle_<call>_request and handle_<call>_requests method that this
+        game class provides, keyed by method name. This is computed once per game class
+        and cached for the lifetime of the process.
+
+        Returns:
+            A dictionary of unbound handler methods keyed by their name.
+        """
+        routes = Base.__registered_routes.get(cls)
+        if routes is None:
+            routes = {
+                name: getattr(cls, name)
+                for name in dir(cls)
+                if name.startswith("handle_")
+                and (name.endswith("_request") or name.endswith("_requests"))
+                and callable(getattr(cls, name))
+            }
+            Base.__registered_routes[cls] = routes
+        return routes
+
+    @classmethod
+    def all_routes(cls) -> Iterator[Tuple[str, Type["Base"], str]]:
+        """
+        Given all registered factories, iterate over every game code, game class and
+        handler method name that requests can be routed to. Useful for auditing which
+        calls are handled by which games.
+        """
+        for gamecode, factory in sorted(cls.__registered_games.items()):
+            for game in factory.MANAGED_CLASSES:
+                for name in sorted(game.routes()):
+                    yield (gamecode, game, name)
+
     @classmethod
     def run_scheduled_work(cls, data: Data, config: Config) -> List[Tuple[str, Dict[str, Any]]]:
         """
@@ -368,6 +453,324 @@ class Base(ABC):
             raise Exception("Trying to save a remote profile locally!")
         self.data.local.user.put_profile(self.game, self.version, userid, profile)
 
+    @contextmanager
+    def score_batch(self) -> Iterator[None]:
+        """
+        Defer writing any scores and attempts saved with put_score() and put_attempt() until
+        the end of this block, and then write them all at once. Games that save more than one
+        chart in a single request should wrap the loop that saves them in this.
+        """
+        if self.__batched_scores is not None:
+            # Already batching, the outermost block will write everything.
+            yield
+            return
+
+        self.__batched_scores = []
+        try:
+            yield
+            self.__flush_scores()
+        finally:
+            self.__batched_scores = None
+            self.__batched_attempts = []
+            self.__batched_attempt_keys = set()
+
+    def __flush_scores(self) -> None:
+        """
+        Write out any scores and attempts saved in the current score_batch() block.
+        """
+        scores: Dict[Tuple[int, UserID], List[Attempt]] = {}
+        for version, userid, score in self.__batched_scores or []:
+            scores.setdefault((version, userid), []).append(score)
+        attempts: Dict[Tuple[int, Optional[UserID]], List[Attempt]] = {}
+        for version, attemptuserid, attempt in self.__batched_attempts:
+            attempts.setdefault((version, attemptuserid), []).append(attempt)
+
+        with self.data.local.music.transaction():
+            for (version, userid), userscores in scores.items():
+                self.data.local.music.put_scores(self.game, version, userid, userscores)
+            for (version, attemptuserid), userattempts in attempts.items():
+                try:
+                    self.data.local.music.put_attempts(self.game, version, attemptuserid, userattempts)
+                except ScoreSaveException:
+                    # At least one of these collides with an attempt that was already saved before
+                    # this batch, so write them one at a time, retrying any that collide.
+                    for attempt in userattempts:
+                        self.__put_attempt_retrying(version, attemptuserid, attempt)
+        for (version, _), userscores in scores.items():
+            for score in userscores:
+                if score.new_record:
+                    self.__invalidate_score_results(version, score.id, score.chart, score.points)
+
+        if self.__batched_scores is not None:
+            self.__batched_scores = []
+        self.__batched_attempts = []
+
+    def __put_attempt_retrying(self, version: int, userid: Optional[UserID], attempt: Attempt) -> None:
+        """
+        Write a single attempt from a score_batch() block. Games that save more than one
+        attempt per request retry duplicate attempts one second in the future, but can't
+        see duplicates that were only found once the batch was written, so do the same here.
+        """
+        for bump in range(self.ATTEMPT_SAVE_RETRIES):
+            try:
+                self.data.local.music.put_attempt(
+                    self.game,
+                    version,
+                    userid,
+                    attempt.id,
+                    attempt.chart,
+                    attempt.location,
+                    attempt.points,
+                    attempt.data,
+                    attempt.new_record,
+                    timestamp=attempt.timestamp + bump,
+                )
+                return
+            except ScoreSaveException:
+                if bump == self.ATTEMPT_SAVE_RETRIES - 1:
+                    raise
+
+    def cached_result(self, name: str, compute: Callable[..., T], *params: Any) -> T:
+        """
+        Look up a result that is the same for every machine that asks for it, such as a hit chart
+        or a ranking, computing it and saving it to the shared cache if it isn't there. Results are
+        reused for RESULT_CACHE_TIMEOUT seconds, or until a new record that changes them is saved.
+        Only one worker recomputes a result at a time. Others keep serving the old result while
+        that happens, or wait for the new one if there is no old result.
+
+        Parameters:
+            name - A name for this result, unique within this game and version.
+            compute - A function that computes the result given params. It must return something that can be pickled.
+            params - Any parameters that the result depends on, such as a song ID or location.
+
+        Returns:
+            The result, either from the cache or freshly computed.
+        """
+        key = self.__result_key(name, *params)
+        lock = f"{key}-lock"
+        stats = Base.__result_cache_stats.setdefault(name, {"hits": 0, "stale": 0, "waits": 0, "misses": 0})
+
+        entry = self.cache.get(key)
+        if entry is not None:
+            expiration, value = entry
+            if expiration > Time.now() or not self.cache.add(lock, True, timeout=self.RESULT_CACHE_LOCK_TIMEOUT):
+                # Either still fresh, or somebody else is already recomputing it.
+                stats["hits" if expiration > Time.now() else "stale"] += 1
+                return value
+        elif not self.cache.add(lock, True, timeout=self.RESULT_CACHE_LOCK_TIMEOUT):
+            # Somebody else is computing it right now, so wait for them to finish.
+            deadline = time.monotonic() + self.RESULT_CACHE_LOCK_TIMEOUT
+            while time.monotonic() < deadline:
+                time.sleep(0.05)
+                entry = self.cache.get(key)
+                if entry is not None:
+                    stats["waits"] += 1
+                    return entry[1]
+                if self.cache.get(lock) is None:
+                    break
+
+        try:
+            value = compute(*params)
+            # Keep the result around for a while after it expires, so that there's something
+            # to serve while it is being recomputed.
+            self.cache.set(
+                key,
+                (Time.now() + self.RESULT_CACHE_TIMEOUT, value),
+                timeout=self.RESULT_CACHE_TIMEOUT * 2 + self.RESULT_CACHE_LOCK_TIMEOUT,
+            )
+        finally:
+            self.cache.delete(lock)
+        stats["misses"] += 1
+        return value
+
+    def __result_key(self, name: str, *params: Any) -> str:
+        return "-".join(str(part) for part in ["result", self.game.value, self.version, name, *params])
+
+    def __invalidate_score_results(self, version: int, songid: int, chart: int, points: int) -> None:
+        """
+        Throw away only the shared results that a new record for a song/chart changes. Every
+        user's scores for that song are always affected. The network's top scores are only
+        affected when the new record beats the current top score for that chart, which is rare
+        compared to personal bests, so that result keeps being shared otherwise.
+        """
+        self.cache.delete_many(
+            self.__result_key("all_scores", version, songid, chart),
+            self.__result_key("all_scores", version, songid, None),
+        )
+
+        key = self.__result_key("all_records", version)
+        entry = self.cache.get(key)
+        if entry is not None and not any(
+            score.id == songid and score.chart == chart and score.points >= points for _, score in entry[1]
+        ):
+            self.cache.delete(key)
+
+    @classmethod
+    def cached_result_stats(cls) -> Dict[str, Dict[str, int]]:
+        """
+        Return how often each result looked up with cached_result() was found in the cache
+        by this process, keyed by the result's name. Each entry has the number of fresh
+        hits, stale hits served while another worker recomputed, hits after waiting for
+        another worker, and misses that had to be computed.
+        """
+        return {name: dict(stats) for name, stats in Base.__result_cache_stats.items()}
+
+    def get_hit_chart(self, version: int, count: int, days: Optional[int] = None) -> List[Tuple[int, int]]:
+        """
+        Look up a game's most played songs, sharing the result between every machine that asks
+        for it within a short period. Parameters are identical to MusicData.get_hit_chart().
+        """
+        return self.cached_result(
+            "hit_chart",
+            lambda version, count, days: self.data.local.music.get_hit_chart(self.game, version, count, days),
+            version,
+            count,
+            days,
+        )
+
+    def get_all_scores(self, version: int, songid: int, chart: Optional[int] = None) -> List[Tuple[UserID, Score]]:
+        """
+        Look up every user's high score for a song/chart, sharing the result between every machine
+        that asks for it within a short period. Useful for rankings.
+
+        Parameters:
+            version - The version of the game to look up scores for.
+            songid - ID of the song according to the game.
+            chart - Chart number according to the game, or None for every chart.
+
+        Returns:
+            A list of UserID, Score tuples.
+        """
+        return self.cached_result(
+            "all_scores",
+            lambda version, songid, chart: self.data.local.music.get_all_scores(
+                self.game, version, songid=songid, songchart=chart
+            ),
+            version,
+            songid,
+            chart,
+        )
+
+    def get_all_records(self, version: int) -> List[Tuple[UserID, Score]]:
+        """
+        Look up the top score for every song/chart on the network, sharing the result between
+        every machine that asks for it within a short period. Useful for high score lists.
+
+        Parameters:
+            version - The version of the game to look up records for.
+
+        Returns:
+            A list of UserID, Score tuples.
+        """
+        return self.cached_result(
+            "all_records",
+            lambda version: self.data.remote.music.get_all_records(self.game, version),
+            version,
+        )
+
+    def get_score(self, version: int, userid: UserID, songid: int, chart: int) -> Optional[Score]:
+        """
+        Look up a user's high score for a song/chart, seeing any scores saved in the current
+        score_batch() block as well.
+
+        Parameters:
+            version - The version of the game this score is for.
+            userid - The user ID we are looking up the score for.
+            songid - ID of the song according to the game.
+            chart - Chart number according to the game.
+
+        Returns:
+            A Score object if the user has a score for this song/chart, or None otherwise.
+        """
+        if self.__batched_scores and any(
+            batchversion == version and batchuserid == userid and score.id == songid and score.chart == chart
+            for batchversion, batchuserid, score in self.__batched_scores
+        ):
+            # This chart was already saved in this batch, so write it out before reading it back.
+            self.__flush_scores()
+        return self.data.local.music.get_score(self.game, version, userid, songid, chart)
+
+    def put_score(
+        self,
+        version: int,
+        userid: UserID,
+        songid: int,
+        chart: int,
+        location: int,
+        points: int,
+        data: Dict[str, Any],
+        new_record: bool,
+        timestamp: Optional[int] = None,
+    ) -> None:
+        """
+        Save a new/updated high score for a user, or defer it to the end of the current
+        score_batch() block. Parameters are identical to MusicData.put_score().
+        """
+        if self.__batched_scores is None:
+            self.data.local.music.put_score(
+                self.game,
+                version,
+                userid,
+                songid,
+                chart,
+                location,
+                points,
+                data,
+                new_record,
+                timestamp=timestamp,
+            )
+            if new_record:
+                self.__invalidate_score_results(version, songid, chart, points)
+            return
+
+        ts = timestamp if timestamp is not None else Time.now()
+        self.__batched_scores.append(
+            (version, userid, Attempt(0, songid, chart, points, ts, location, new_record, data)),
+        )
+
+    def put_attempt(
+        self,
+        version: int,
+        userid: Optional[UserID],
+        songid: int,
+        chart: int,
+        location: int,
+        points: int,
+        data: Dict[str, Any],
+        new_record: bool,
+        timestamp: Optional[int] = None,
+    ) -> None:
+        """
+        Save a single score attempt for a user, or defer it to the end of the current
+        score_batch() block. Parameters are identical to MusicData.put_attempt().
+        """
+        if self.__batched_scores is None:
+            self.data.local.music.put_attempt(
+                self.game,
+                version,
+                userid,
+                songid,
+                chart,
+                location,
+                points,
+                data,
+                new_record,
+                timestamp=timestamp,
+            )
+            return
+
+        # Games rely on a duplicate attempt failing right away so they can retry it at a
+        # different time, so catch duplicates within this batch before they're written.
+        ts = timestamp if timestamp is not None else Time.now()
+        if (version, userid, songid, chart, ts) in self.__batched_attempt_keys:
+            raise ScoreSaveException(
+                f"There is already an attempt by {userid if userid is not None else 0} for song {songid} chart {chart} at {ts}"
+            )
+        self.__batched_attempt_keys.add((version, userid, songid, chart, ts))
+        self.__batched_attempts.append(
+            (version, userid, Attempt(0, songid, chart, points, ts, location, new_record, data)),
+        )
+
     def update_play_statistics(self, userid: UserID, stats: Optional[PlayStatistics] = None) -> None:
         """
         Given a user ID, calculate new play statistics.
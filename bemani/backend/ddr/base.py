@@ -321,8 +321,7 @@ class DDRBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
 
             if userid is not None:
                 # Write the new score back
-                self.data.local.music.put_score(
-                    self.game,
+                self.put_score(
                     self.music_version,
                     userid,
                     songid,
@@ -54,7 +54,7 @@ class DDRGameRecorderHandler(DDRBase):
 
 class DDRGameHiscoreHandler(DDRBase):
     def handle_game_hiscore_request(self, request: Node) -> Node:
-        records = self.data.remote.music.get_all_records(self.game, self.music_version)
+        records = self.get_all_records(self.music_version)
 
         sortedrecords: Dict[int, Dict[int, Tuple[UserID, Score]]] = {}
         missing_profiles = []
@@ -171,7 +171,7 @@ class DDR2013(
             flag.set_attribute("area", str(self.get_machine_region()))
             flag.set_attribute("is_final", "1")
 
-        hit_chart = self.data.local.music.get_hit_chart(self.game, self.music_version, self.GAME_MAX_SONGS)
+        hit_chart = self.get_hit_chart(self.music_version, self.GAME_MAX_SONGS)
         counts_by_reflink = [0] * self.GAME_MAX_SONGS
         for reflink, plays in hit_chart:
             if reflink >= 0 and reflink < self.GAME_MAX_SONGS:
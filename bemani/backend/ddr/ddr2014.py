@@ -166,7 +166,7 @@ class DDR2014(
             flag.set_attribute("is_final", "0")
 
         # Last month's hit chart
-        hit_chart = self.data.local.music.get_hit_chart(self.game, self.music_version, self.GAME_MAX_SONGS, 30)
+        hit_chart = self.get_hit_chart(self.music_version, self.GAME_MAX_SONGS, 30)
         counts_by_reflink = [0] * self.GAME_MAX_SONGS
         for reflink, plays in hit_chart:
             if reflink >= 0 and reflink < self.GAME_MAX_SONGS:
@@ -174,7 +174,7 @@ class DDR2014(
         game.add_child(Node.u32_array("cnt_music_monthly", counts_by_reflink))
 
         # Last week's hit chart
-        hit_chart = self.data.local.music.get_hit_chart(self.game, self.music_version, self.GAME_MAX_SONGS, 7)
+        hit_chart = self.get_hit_chart(self.music_version, self.GAME_MAX_SONGS, 7)
         counts_by_reflink = [0] * self.GAME_MAX_SONGS
         for reflink, plays in hit_chart:
             if reflink >= 0 and reflink < self.GAME_MAX_SONGS:
@@ -182,7 +182,7 @@ class DDR2014(
         game.add_child(Node.u32_array("cnt_music_weekly", counts_by_reflink))
 
         # Last day's hit chart
-        hit_chart = self.data.local.music.get_hit_chart(self.game, self.music_version, self.GAME_MAX_SONGS, 1)
+        hit_chart = self.get_hit_chart(self.music_version, self.GAME_MAX_SONGS, 1)
         counts_by_reflink = [0] * self.GAME_MAX_SONGS
         for reflink, plays in hit_chart:
             if reflink >= 0 and reflink < self.GAME_MAX_SONGS:
@@ -538,7 +538,7 @@ class DDRAce(
 
         if loadkind == self.GAME_RIVAL_TYPE_WORLD:
             # Just load all scores for this network
-            scores = self.data.remote.music.get_all_records(self.game, self.music_version)
+            scores = self.get_all_records(self.music_version)
         elif loadkind == self.GAME_RIVAL_TYPE_AREA:
             if thismachine.arcade is not None:
                 match_arcade = thismachine.arcade
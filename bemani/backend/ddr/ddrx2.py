@@ -156,7 +156,7 @@ class DDRX2(
             flag.set_attribute("s1", "0")
             flag.set_attribute("t", "0")
 
-        hit_chart = self.data.local.music.get_hit_chart(self.game, self.music_version, self.GAME_MAX_SONGS)
+        hit_chart = self.get_hit_chart(self.music_version, self.GAME_MAX_SONGS)
         counts_by_reflink = [0] * self.GAME_MAX_SONGS
         for reflink, plays in hit_chart:
             if reflink >= 0 and reflink < self.GAME_MAX_SONGS:
@@ -169,7 +169,7 @@ class DDRX2(
         # This is almost identical to X3 and above, except X3 added a 'code' field
         # that isn't present here. In the interest of correctness, keep a separate
         # implementation here.
-        records = self.data.remote.music.get_all_records(self.game, self.music_version)
+        records = self.get_all_records(self.music_version)
 
         sortedrecords: Dict[int, Dict[int, Tuple[UserID, Score]]] = {}
         missing_profiles = []
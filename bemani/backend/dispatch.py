@@ -1,4 +1,4 @@
-from typing import Optional, Any
+from typing import Any, Callable, Dict, Optional, Tuple, Type
 
 from bemani.backend.base import Base, Status
 from bemani.common import Model
@@ -20,6 +20,18 @@ class Dispatch:
     class and then returning a response.
     """
 
+    # Upper bound on resolved routes, since service and method names come straight from the client.
+    MAX_RESOLVED_HANDLERS = 8192
+
+    # Handlers resolved by game class, service and method, shared by every request in this process.
+    __resolved_handlers: Dict[
+        Tuple[Type[Base], str, str],
+        Tuple[
+            Optional[Callable[[Base, Node], Optional[Node]]],
+            Optional[Callable[[Base, Node], Optional[Node]]],
+        ],
+    ] = {}
+
     def __init__(self, config: Config, data: Data, verbose: bool) -> None:
         """
         Initialize the Dispatch object.
@@ -47,6 +59,36 @@ class Dispatch:
         if self.__verbose:
             print(msg.format(*args, **kwargs))
 
+    @staticmethod
+    def resolve(game: Type[Base], service: str, method: str) -> Tuple[
+        Optional[Callable[[Base, Node], Optional[Node]]],
+        Optional[Callable[[Base, Node], Optional[Node]]],
+    ]:
+        """
+        Given a game class, a service and a method, look up the handlers for this call.
+
+        Parameters:
+            game - A subclass of Base that is handling the request.
+            service - The name of the service node of the request.
+            method - The method attribute of the request.
+
+        Returns:
+            A tuple of the unbound handle_<service>_<method>_request method and the unbound
+            handle_<service>_requests method, either of which can be None if the game class
+            does not provide it.
+        """
+        key = (game, service, method)
+        handlers = Dispatch.__resolved_handlers.get(key)
+        if handlers is None:
+            routes = game.routes()
+            handlers = (
+                routes.get(f"handle_{service}_{method}_request"),
+                routes.get(f"handle_{service}_requests"),
+            )
+            if len(Dispatch.__resolved_handlers) < Dispatch.MAX_RESOLVED_HANDLERS:
+                Dispatch.__resolved_handlers[key] = handlers
+        return handlers
+
     def handle(self, tree: Node) -> Optional[Node]:
         """
         Given a packet from a game, handle it and return a response.
@@ -87,7 +129,7 @@ class Dispatch:
 
         request = tree.children[0]
 
-        config = self.__config.clone()
+        config = self.__config.overlay()
         config["machine"] = {
             "pcbid": pcbid,
             "arcade": pcb.arcade,
@@ -105,6 +147,11 @@ class Dispatch:
                     config["server"]["uri"] = None
 
         game = Base.create(self.__data, config, model)
+        if game is None:
+            # A factory is registered for this game, but it can't handle this model
+            self.log("Unrecognized model {}", modelstring)
+            return None
+
         method = request.attribute("method")
         response = None
 
@@ -141,22 +188,16 @@ class Dispatch:
                     )
                     raise UnrecognizedPCBIDException(pcbid, modelstring, config.client.address)
 
+        method_handler, service_handler = Dispatch.resolve(type(game), request.name, method)
+
         # First, try to handle with specific service/method function
-        try:
-            handler = getattr(game, f"handle_{request.name}_{method}_request")
-        except AttributeError:
-            handler = None
-        if handler is not None:
-            response = handler(request)
+        if method_handler is not None:
+            response = method_handler(game, request)
 
         if response is None:
             # Now, try to pass it off to a generic service handler
-            try:
-                handler = getattr(game, f"handle_{request.name}_requests")
-            except AttributeError:
-                handler = None
-            if handler is not None:
-                response = handler(request)
+            if service_handler is not None:
+                response = service_handler(game, request)
 
         if response is None:
             # Unrecognized handler
@@ -445,12 +445,7 @@ class IIDXCannonBallers(IIDXCourse, IIDXBase):
         totalscores: Dict[UserID, int] = {}
         profiles: Dict[UserID, Profile] = {}
         for songid in songids:
-            scores = self.data.local.music.get_all_scores(
-                self.game,
-                self.music_version,
-                songid=songid,
-                songchart=chart,
-            )
+            scores = self.get_all_scores(self.music_version, songid, chart)
 
             for score in scores:
                 # Exclude scores not achieved here
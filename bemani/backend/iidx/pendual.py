@@ -300,12 +300,7 @@ class IIDXPendual(IIDXCourse, IIDXBase):
         totalscores: Dict[UserID, int] = {}
         profiles: Dict[UserID, Profile] = {}
         for songid in songids:
-            scores = self.data.local.music.get_all_scores(
-                self.game,
-                self.music_version,
-                songid=songid,
-                songchart=chart,
-            )
+            scores = self.get_all_scores(self.music_version, songid, chart)
 
             for score in scores:
                 if score[0] not in totalscores:
@@ -1250,7 +1245,7 @@ class IIDXPendual(IIDXCourse, IIDXBase):
 
         # Ranking details in title screen
         rankingcharts = []
-        for mid, _plays in self.data.local.music.get_hit_chart(self.game, self.music_version, 20):
+        for mid, _plays in self.get_hit_chart(self.music_version, 20):
             rankingcharts.append(mid)
         root.add_child(Node.u16_array("monthly_mranking", rankingcharts))
         root.add_child(Node.u16_array("total_mranking", rankingcharts))
@@ -230,8 +230,7 @@ class JubeatBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
         ]:
             raise Exception(f"Invalid medal value {medal}")
 
-        oldscore = self.data.local.music.get_score(
-            self.game,
+        oldscore = self.get_score(
             self.music_version,
             userid,
             songid,
@@ -292,8 +291,7 @@ class JubeatBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
         lid = self.get_machine_id()
 
         # Write the new score back
-        self.data.local.music.put_score(
-            self.game,
+        self.put_score(
             self.music_version,
             userid,
             songid,
@@ -306,8 +304,7 @@ class JubeatBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
         )
 
         # Save the history of this score too
-        self.data.local.music.put_attempt(
-            self.game,
+        self.put_attempt(
             self.music_version,
             userid,
             songid,
@@ -2202,51 +2202,52 @@ class JubeatClan(
 
         # Grab scores and save those
         if result is not None:
-            for tune in result.children:
-                if tune.name != "tune":
-                    continue
-                result = tune.child("player")
-
-                # Fix mapping to song IDs for the song with seven billion charts
-                # due to the prefecture unlock event.
-                songid = tune.child_value("music")
-                if songid in self.FIVE_PLAYS_UNLOCK_EVENT_SONG_IDS:
-                    songid = 80000301
-
-                timestamp = tune.child_value("timestamp") / 1000
-                chart = int(result.child("score").attribute("seq"))
-                points = result.child_value("score")
-                flags = int(result.child("score").attribute("clear"))
-                combo = int(result.child("score").attribute("combo"))
-                ghost = result.child_value("mbar")
-
-                stats = {
-                    "perfect": result.child_value("nr_perfect"),
-                    "great": result.child_value("nr_great"),
-                    "good": result.child_value("nr_good"),
-                    "poor": result.child_value("nr_poor"),
-                    "miss": result.child_value("nr_miss"),
-                }
-
-                # Miscelaneous last data for echoing to profile get
-                last.replace_int("music_id", songid)
-                last.replace_int("seq_id", chart)
-
-                mapping = {
-                    self.GAME_FLAG_BIT_CLEARED: self.PLAY_MEDAL_CLEARED,
-                    self.GAME_FLAG_BIT_FULL_COMBO: self.PLAY_MEDAL_FULL_COMBO,
-                    self.GAME_FLAG_BIT_EXCELLENT: self.PLAY_MEDAL_EXCELLENT,
-                    self.GAME_FLAG_BIT_NEARLY_FULL_COMBO: self.PLAY_MEDAL_NEARLY_FULL_COMBO,
-                    self.GAME_FLAG_BIT_NEARLY_EXCELLENT: self.PLAY_MEDAL_NEARLY_EXCELLENT,
-                }
-
-                # Figure out the highest medal based on bits passed in
-                medal = self.PLAY_MEDAL_FAILED
-                for bit in mapping:
-                    if flags & bit > 0:
-                        medal = max(medal, mapping[bit])
-
-                self.update_score(userid, timestamp, songid, chart, points, medal, combo, ghost, stats)
+            with self.score_batch():
+                for tune in result.children:
+                    if tune.name != "tune":
+                        continue
+                    result = tune.child("player")
+
+                    # Fix mapping to song IDs for the song with seven billion charts
+                    # due to the prefecture unlock event.
+                    songid = tune.child_value("music")
+                    if songid in self.FIVE_PLAYS_UNLOCK_EVENT_SONG_IDS:
+                        songid = 80000301
+
+                    timestamp = tune.child_value("timestamp") / 1000
+                    chart = int(result.child("score").attribute("seq"))
+                    points = result.child_value("score")
+                    flags = int(result.child("score").attribute("clear"))
+                    combo = int(result.child("score").attribute("combo"))
+                    ghost = result.child_value("mbar")
+
+                    stats = {
+                        "perfect": result.child_value("nr_perfect"),
+                        "great": result.child_value("nr_great"),
+                        "good": result.child_value("nr_good"),
+                        "poor": result.child_value("nr_poor"),
+                        "miss": result.child_value("nr_miss"),
+                    }
+
+                    # Miscelaneous last data for echoing to profile get
+                    last.replace_int("music_id", songid)
+                    last.replace_int("seq_id", chart)
+
+                    mapping = {
+                        self.GAME_FLAG_BIT_CLEARED: self.PLAY_MEDAL_CLEARED,
+                        self.GAME_FLAG_BIT_FULL_COMBO: self.PLAY_MEDAL_FULL_COMBO,
+                        self.GAME_FLAG_BIT_EXCELLENT: self.PLAY_MEDAL_EXCELLENT,
+                        self.GAME_FLAG_BIT_NEARLY_FULL_COMBO: self.PLAY_MEDAL_NEARLY_FULL_COMBO,
+                        self.GAME_FLAG_BIT_NEARLY_EXCELLENT: self.PLAY_MEDAL_NEARLY_EXCELLENT,
+                    }
+
+                    # Figure out the highest medal based on bits passed in
+                    medal = self.PLAY_MEDAL_FAILED
+                    for bit in mapping:
+                        if flags & bit > 0:
+                            medal = max(medal, mapping[bit])
+
+                    self.update_score(userid, timestamp, songid, chart, points, medal, combo, ghost, stats)
 
         # Born stuff
         born = player.child("born")
@@ -2929,60 +2929,61 @@ class JubeatFesto(
 
         # Grab scores and save those
         if result is not None:
-            for tune in result.children:
-                if tune.name != "tune":
-                    continue
-                result = tune.child("player")
-                songid = tune.child_value("music")
-                timestamp = tune.child_value("timestamp") / 1000
-                chart = self.game_to_db_chart(
-                    int(result.child("score").attribute("seq")),
-                    bool(result.child_value("is_hard_mode")),
-                )
-                points = result.child_value("score")
-                flags = int(result.child("score").attribute("clear"))
-                combo = int(result.child("score").attribute("combo"))
-                ghost = result.child_value("mbar")
-                music_rate = result.child_value("music_rate")
-
-                stats = {
-                    "perfect": result.child_value("nr_perfect"),
-                    "great": result.child_value("nr_great"),
-                    "good": result.child_value("nr_good"),
-                    "poor": result.child_value("nr_poor"),
-                    "miss": result.child_value("nr_miss"),
-                }
-
-                # Miscelaneous last data for echoing to profile get
-                last.replace_int("music_id", songid)
-                last.replace_int("seq_id", int(result.child("score").attribute("seq")))
-
-                mapping = {
-                    self.GAME_FLAG_BIT_CLEARED: self.PLAY_MEDAL_CLEARED,
-                    self.GAME_FLAG_BIT_FULL_COMBO: self.PLAY_MEDAL_FULL_COMBO,
-                    self.GAME_FLAG_BIT_EXCELLENT: self.PLAY_MEDAL_EXCELLENT,
-                    self.GAME_FLAG_BIT_NEARLY_FULL_COMBO: self.PLAY_MEDAL_NEARLY_FULL_COMBO,
-                    self.GAME_FLAG_BIT_NEARLY_EXCELLENT: self.PLAY_MEDAL_NEARLY_EXCELLENT,
-                }
-
-                # Figure out the highest medal based on bits passed in
-                medal = self.PLAY_MEDAL_FAILED
-                for bit in mapping:
-                    if flags & bit > 0:
-                        medal = max(medal, mapping[bit])
-
-                self.update_score(
-                    userid,
-                    timestamp,
-                    songid,
-                    chart,
-                    points,
-                    medal,
-                    combo,
-                    ghost,
-                    stats,
-                    music_rate,
-                )
+            with self.score_batch():
+                for tune in result.children:
+                    if tune.name != "tune":
+                        continue
+                    result = tune.child("player")
+                    songid = tune.child_value("music")
+                    timestamp = tune.child_value("timestamp") / 1000
+                    chart = self.game_to_db_chart(
+                        int(result.child("score").attribute("seq")),
+                        bool(result.child_value("is_hard_mode")),
+                    )
+                    points = result.child_value("score")
+                    flags = int(result.child("score").attribute("clear"))
+                    combo = int(result.child("score").attribute("combo"))
+                    ghost = result.child_value("mbar")
+                    music_rate = result.child_value("music_rate")
+
+                    stats = {
+                        "perfect": result.child_value("nr_perfect"),
+                        "great": result.child_value("nr_great"),
+                        "good": result.child_value("nr_good"),
+                        "poor": result.child_value("nr_poor"),
+                        "miss": result.child_value("nr_miss"),
+                    }
+
+                    # Miscelaneous last data for echoing to profile get
+                    last.replace_int("music_id", songid)
+                    last.replace_int("seq_id", int(result.child("score").attribute("seq")))
+
+                    mapping = {
+                        self.GAME_FLAG_BIT_CLEARED: self.PLAY_MEDAL_CLEARED,
+                        self.GAME_FLAG_BIT_FULL_COMBO: self.PLAY_MEDAL_FULL_COMBO,
+                        self.GAME_FLAG_BIT_EXCELLENT: self.PLAY_MEDAL_EXCELLENT,
+                        self.GAME_FLAG_BIT_NEARLY_FULL_COMBO: self.PLAY_MEDAL_NEARLY_FULL_COMBO,
+                        self.GAME_FLAG_BIT_NEARLY_EXCELLENT: self.PLAY_MEDAL_NEARLY_EXCELLENT,
+                    }
+
+                    # Figure out the highest medal based on bits passed in
+                    medal = self.PLAY_MEDAL_FAILED
+                    for bit in mapping:
+                        if flags & bit > 0:
+                            medal = max(medal, mapping[bit])
+
+                    self.update_score(
+                        userid,
+                        timestamp,
+                        songid,
+                        chart,
+                        points,
+                        medal,
+                        combo,
+                        ghost,
+                        stats,
+                        music_rate,
+                    )
 
         # Born stuff
         born = player.child("born")
@@ -1379,39 +1379,40 @@ class JubeatProp(
 
         # Grab scores and save those
         if result is not None:
-            for tune in result.children:
-                if tune.name != "tune":
-                    continue
-                result = tune.child("player")
-
-                entry = int(tune.attribute("id"))
-                songid = tune.child_value("music")
-                timestamp = timestamps.get(entry, Time.now())
-                chart = int(result.child("score").attribute("seq"))
-                points = result.child_value("score")
-                flags = int(result.child("score").attribute("clear"))
-                combo = int(result.child("score").attribute("combo"))
-                ghost = result.child_value("mbar")
-
-                # Miscelaneous last data for echoing to profile get
-                last.replace_int("music_id", songid)
-                last.replace_int("seq_id", chart)
-
-                mapping = {
-                    self.GAME_FLAG_BIT_CLEARED: self.PLAY_MEDAL_CLEARED,
-                    self.GAME_FLAG_BIT_FULL_COMBO: self.PLAY_MEDAL_FULL_COMBO,
-                    self.GAME_FLAG_BIT_EXCELLENT: self.PLAY_MEDAL_EXCELLENT,
-                    self.GAME_FLAG_BIT_NEARLY_FULL_COMBO: self.PLAY_MEDAL_NEARLY_FULL_COMBO,
-                    self.GAME_FLAG_BIT_NEARLY_EXCELLENT: self.PLAY_MEDAL_NEARLY_EXCELLENT,
-                }
-
-                # Figure out the highest medal based on bits passed in
-                medal = self.PLAY_MEDAL_FAILED
-                for bit in mapping:
-                    if flags & bit > 0:
-                        medal = max(medal, mapping[bit])
-
-                self.update_score(userid, timestamp, songid, chart, points, medal, combo, ghost)
+            with self.score_batch():
+                for tune in result.children:
+                    if tune.name != "tune":
+                        continue
+                    result = tune.child("player")
+
+                    entry = int(tune.attribute("id"))
+                    songid = tune.child_value("music")
+                    timestamp = timestamps.get(entry, Time.now())
+                    chart = int(result.child("score").attribute("seq"))
+                    points = result.child_value("score")
+                    flags = int(result.child("score").attribute("clear"))
+                    combo = int(result.child("score").attribute("combo"))
+                    ghost = result.child_value("mbar")
+
+                    # Miscelaneous last data for echoing to profile get
+                    last.replace_int("music_id", songid)
+                    last.replace_int("seq_id", chart)
+
+                    mapping = {
+                        self.GAME_FLAG_BIT_CLEARED: self.PLAY_MEDAL_CLEARED,
+                        self.GAME_FLAG_BIT_FULL_COMBO: self.PLAY_MEDAL_FULL_COMBO,
+                        self.GAME_FLAG_BIT_EXCELLENT: self.PLAY_MEDAL_EXCELLENT,
+                        self.GAME_FLAG_BIT_NEARLY_FULL_COMBO: self.PLAY_MEDAL_NEARLY_FULL_COMBO,
+                        self.GAME_FLAG_BIT_NEARLY_EXCELLENT: self.PLAY_MEDAL_NEARLY_EXCELLENT,
+                    }
+
+                    # Figure out the highest medal based on bits passed in
+                    medal = self.PLAY_MEDAL_FAILED
+                    for bit in mapping:
+                        if flags & bit > 0:
+                            medal = max(medal, mapping[bit])
+
+                    self.update_score(userid, timestamp, songid, chart, points, medal, combo, ghost)
 
         # If this was a course save, grab and save that info too
         course = player.child("course")
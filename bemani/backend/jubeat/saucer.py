@@ -781,48 +781,49 @@ class JubeatSaucer(
         # Grab scores and save those
         result = data.child("result")
         if result is not None:
-            for tune in result.children:
-                if tune.name != "tune":
-                    continue
-                result = tune.child("player")
-
-                last.replace_int("marker", tune.child_value("marker"))
-                last.replace_int("title", tune.child_value("title"))
-                last.replace_int("parts", tune.child_value("parts"))
-                last.replace_int("theme", tune.child_value("theme"))
-                last.replace_int("sort", tune.child_value("sort"))
-                last.replace_int("category", tune.child_value("category"))
-                last.replace_int("rank_sort", tune.child_value("rank_sort"))
-                last.replace_int("combo_disp", tune.child_value("combo_disp"))
-
-                songid = tune.child_value("music")
-                entry = int(tune.attribute("id"))
-                timestamp = timestamps.get(entry, Time.now())
-                chart = int(result.child("score").attribute("seq"))
-                points = result.child_value("score")
-                flags = int(result.child("score").attribute("clear"))
-                combo = int(result.child("score").attribute("combo"))
-                ghost = result.child_value("mbar")
-
-                # Miscelaneous last data for echoing to profile get
-                last.replace_int("music_id", songid)
-                last.replace_int("seq_id", chart)
-
-                mapping = {
-                    self.GAME_FLAG_BIT_CLEARED: self.PLAY_MEDAL_CLEARED,
-                    self.GAME_FLAG_BIT_FULL_COMBO: self.PLAY_MEDAL_FULL_COMBO,
-                    self.GAME_FLAG_BIT_EXCELLENT: self.PLAY_MEDAL_EXCELLENT,
-                    self.GAME_FLAG_BIT_NEARLY_FULL_COMBO: self.PLAY_MEDAL_NEARLY_FULL_COMBO,
-                    self.GAME_FLAG_BIT_NEARLY_EXCELLENT: self.PLAY_MEDAL_NEARLY_EXCELLENT,
-                }
-
-                # Figure out the highest medal based on bits passed in
-                medal = self.PLAY_MEDAL_FAILED
-                for bit in mapping:
-                    if flags & bit > 0:
-                        medal = max(medal, mapping[bit])
-
-                self.update_score(userid, timestamp, songid, chart, points, medal, combo, ghost)
+            with self.score_batch():
+                for tune in result.children:
+                    if tune.name != "tune":
+                        continue
+                    result = tune.child("player")
+
+                    last.replace_int("marker", tune.child_value("marker"))
+                    last.replace_int("title", tune.child_value("title"))
+                    last.replace_int("parts", tune.child_value("parts"))
+                    last.replace_int("theme", tune.child_value("theme"))
+                    last.replace_int("sort", tune.child_value("sort"))
+                    last.replace_int("category", tune.child_value("category"))
+                    last.replace_int("rank_sort", tune.child_value("rank_sort"))
+                    last.replace_int("combo_disp", tune.child_value("combo_disp"))
+
+                    songid = tune.child_value("music")
+                    entry = int(tune.attribute("id"))
+                    timestamp = timestamps.get(entry, Time.now())
+                    chart = int(result.child("score").attribute("seq"))
+                    points = result.child_value("score")
+                    flags = int(result.child("score").attribute("clear"))
+                    combo = int(result.child("score").attribute("combo"))
+                    ghost = result.child_value("mbar")
+
+                    # Miscelaneous last data for echoing to profile get
+                    last.replace_int("music_id", songid)
+                    last.replace_int("seq_id", chart)
+
+                    mapping = {
+                        self.GAME_FLAG_BIT_CLEARED: self.PLAY_MEDAL_CLEARED,
+                        self.GAME_FLAG_BIT_FULL_COMBO: self.PLAY_MEDAL_FULL_COMBO,
+                        self.GAME_FLAG_BIT_EXCELLENT: self.PLAY_MEDAL_EXCELLENT,
+                        self.GAME_FLAG_BIT_NEARLY_FULL_COMBO: self.PLAY_MEDAL_NEARLY_FULL_COMBO,
+                        self.GAME_FLAG_BIT_NEARLY_EXCELLENT: self.PLAY_MEDAL_NEARLY_EXCELLENT,
+                    }
+
+                    # Figure out the highest medal based on bits passed in
+                    medal = self.PLAY_MEDAL_FAILED
+                    for bit in mapping:
+                        if flags & bit > 0:
+                            medal = max(medal, mapping[bit])
+
+                    self.update_score(userid, timestamp, songid, chart, points, medal, combo, ghost)
 
         # Save back last information gleaned from results
         newprofile.replace_dict("last", last)
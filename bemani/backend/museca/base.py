@@ -1,5 +1,5 @@
 # vim: set fileencoding=utf-8
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from typing_extensions import Final
 
 from bemani.backend.base import Base
@@ -23,6 +23,9 @@ class MusecaBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
 
     game: GameConstants = GameConstants.MUSECA
 
+    # Hiscore requests look players up by the location their profile was created at.
+    PROFILE_FIELDS: Tuple[str, ...] = ("loc",)
+
     CHART_TYPE_GREEN: Final[int] = 0
     CHART_TYPE_ORANGE: Final[int] = 1
     CHART_TYPE_RED: Final[int] = 2
@@ -286,8 +289,7 @@ class MusecaBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
 
         if userid is not None:
             # Write the new score back
-            self.data.local.music.put_score(
-                self.game,
+            self.put_score(
                 self.music_version,
                 userid,
                 songid,
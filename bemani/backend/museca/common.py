@@ -22,7 +22,7 @@ class MusecaGameHiscoreHandler(MusecaBase):
         game = Node.void("game_3")
 
         # First, grab hit chart
-        playcounts = self.data.local.music.get_hit_chart(self.game, self.version, 1024)
+        playcounts = self.get_hit_chart(self.version, 1024)
 
         hitchart = Node.void("hitchart")
         game.add_child(hitchart)
@@ -33,7 +33,7 @@ class MusecaGameHiscoreHandler(MusecaBase):
             info.add_child(Node.u32("cnt", count))
 
         # Now, grab user records
-        records = self.data.remote.music.get_all_records(self.game, self.version)
+        records = self.get_all_records(self.version)
         users = {uid: prof for (uid, prof) in self.get_any_profiles([r[0] for r in records])}
 
         hiscore_allover = Node.void("hiscore_allover")
@@ -57,11 +57,7 @@ class MusecaGameHiscoreHandler(MusecaBase):
             hiscore_allover.add_child(info)
 
         # Now, grab local records
-        area_users = [
-            uid
-            for (uid, prof) in self.data.local.user.get_all_profiles(self.game, self.version)
-            if prof.get_int("loc", -1) == locid
-        ]
+        area_users = self.data.local.user.get_userids_by_profile_field(self.game, self.version, "loc", locid)
         records = self.data.local.music.get_all_records(self.game, self.version, userlist=area_users)
         missing_players = [uid for (uid, _) in records if uid not in users]
         for uid, prof in self.get_any_profiles(missing_players):
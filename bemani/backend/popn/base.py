@@ -223,8 +223,7 @@ class PopnMusicBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
         ]:
             raise Exception(f"Invalid medal value {medal}")
 
-        oldscore = self.data.local.music.get_score(
-            self.game,
+        oldscore = self.get_score(
             self.music_version,
             userid,
             songid,
@@ -277,8 +276,7 @@ class PopnMusicBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
             timestamp = now + bump
 
             # Write the new score back
-            self.data.local.music.put_score(
-                self.game,
+            self.put_score(
                 self.music_version,
                 userid,
                 songid,
@@ -292,8 +290,7 @@ class PopnMusicBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
 
             try:
                 # Save the history of this score too
-                self.data.local.music.put_attempt(
-                    self.game,
+                self.put_attempt(
                     self.music_version,
                     userid,
                     songid,
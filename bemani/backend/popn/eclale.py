@@ -209,7 +209,7 @@ class PopnMusicEclale(PopnMusicBase):
             rank = rank + 1
 
         # Output the hit chart
-        for songid, _plays in self.data.local.music.get_hit_chart(self.game, self.music_version, 500):
+        for songid, _plays in self.get_hit_chart(self.music_version, 500):
             popular_music = Node.void("popular_music")
             root.add_child(popular_music)
             popular_music.add_child(Node.s16("music_num", songid))
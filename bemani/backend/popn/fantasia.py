@@ -389,35 +389,36 @@ class PopnMusicFantasia(PopnMusicBase):
                 break
 
         # Extract scores
-        for node in request.children:
-            if node.name == "stage":
-                songid = node.child_value("no")
-                chart = {
-                    self.GAME_CHART_TYPE_EASY: self.CHART_TYPE_EASY,
-                    self.GAME_CHART_TYPE_NORMAL: self.CHART_TYPE_NORMAL,
-                    self.GAME_CHART_TYPE_HYPER: self.CHART_TYPE_HYPER,
-                    self.GAME_CHART_TYPE_EX: self.CHART_TYPE_EX,
-                }.get(node.child_value("sheet"))
-                if chart is None:
-                    # Some old versions of Fantasia still send empty chart data for Tune Street
-                    # charts that don't exist in the game. Ignore these or we end up crashing on
-                    # profile save.
-                    continue
-                medal = (node.child_value("n_data") >> (chart * 4)) & 0x000F
-                medal = {
-                    self.GAME_PLAY_MEDAL_CIRCLE_FAILED: self.PLAY_MEDAL_CIRCLE_FAILED,
-                    self.GAME_PLAY_MEDAL_DIAMOND_FAILED: self.PLAY_MEDAL_DIAMOND_FAILED,
-                    self.GAME_PLAY_MEDAL_STAR_FAILED: self.PLAY_MEDAL_STAR_FAILED,
-                    self.GAME_PLAY_MEDAL_CIRCLE_CLEARED: self.PLAY_MEDAL_CIRCLE_CLEARED,
-                    self.GAME_PLAY_MEDAL_DIAMOND_CLEARED: self.PLAY_MEDAL_DIAMOND_CLEARED,
-                    self.GAME_PLAY_MEDAL_STAR_CLEARED: self.PLAY_MEDAL_STAR_CLEARED,
-                    self.GAME_PLAY_MEDAL_CIRCLE_FULL_COMBO: self.PLAY_MEDAL_CIRCLE_FULL_COMBO,
-                    self.GAME_PLAY_MEDAL_DIAMOND_FULL_COMBO: self.PLAY_MEDAL_DIAMOND_FULL_COMBO,
-                    self.GAME_PLAY_MEDAL_STAR_FULL_COMBO: self.PLAY_MEDAL_STAR_FULL_COMBO,
-                    self.GAME_PLAY_MEDAL_PERFECT: self.PLAY_MEDAL_PERFECT,
-                }[medal]
-                points = node.child_value("score")
-                self.update_score(userid, songid, chart, points, medal)
+        with self.score_batch():
+            for node in request.children:
+                if node.name == "stage":
+                    songid = node.child_value("no")
+                    chart = {
+                        self.GAME_CHART_TYPE_EASY: self.CHART_TYPE_EASY,
+                        self.GAME_CHART_TYPE_NORMAL: self.CHART_TYPE_NORMAL,
+                        self.GAME_CHART_TYPE_HYPER: self.CHART_TYPE_HYPER,
+                        self.GAME_CHART_TYPE_EX: self.CHART_TYPE_EX,
+                    }.get(node.child_value("sheet"))
+                    if chart is None:
+                        # Some old versions of Fantasia still send empty chart data for Tune Street
+                        # charts that don't exist in the game. Ignore these or we end up crashing on
+                        # profile save.
+                        continue
+                    medal = (node.child_value("n_data") >> (chart * 4)) & 0x000F
+                    medal = {
+                        self.GAME_PLAY_MEDAL_CIRCLE_FAILED: self.PLAY_MEDAL_CIRCLE_FAILED,
+                        self.GAME_PLAY_MEDAL_DIAMOND_FAILED: self.PLAY_MEDAL_DIAMOND_FAILED,
+                        self.GAME_PLAY_MEDAL_STAR_FAILED: self.PLAY_MEDAL_STAR_FAILED,
+                        self.GAME_PLAY_MEDAL_CIRCLE_CLEARED: self.PLAY_MEDAL_CIRCLE_CLEARED,
+                        self.GAME_PLAY_MEDAL_DIAMOND_CLEARED: self.PLAY_MEDAL_DIAMOND_CLEARED,
+                        self.GAME_PLAY_MEDAL_STAR_CLEARED: self.PLAY_MEDAL_STAR_CLEARED,
+                        self.GAME_PLAY_MEDAL_CIRCLE_FULL_COMBO: self.PLAY_MEDAL_CIRCLE_FULL_COMBO,
+                        self.GAME_PLAY_MEDAL_DIAMOND_FULL_COMBO: self.PLAY_MEDAL_DIAMOND_FULL_COMBO,
+                        self.GAME_PLAY_MEDAL_STAR_FULL_COMBO: self.PLAY_MEDAL_STAR_FULL_COMBO,
+                        self.GAME_PLAY_MEDAL_PERFECT: self.PLAY_MEDAL_PERFECT,
+                    }[medal]
+                    points = node.child_value("score")
+                    self.update_score(userid, songid, chart, points, medal)
 
         return newprofile
 
@@ -411,80 +411,81 @@ class PopnMusicTuneStreet(PopnMusicBase):
         self.update_play_statistics(userid)
 
         # Extract scores
-        for node in request.children:
-            if node.name == "music":
-                songid = int(node.attribute("music_num"))
-                chart = int(node.attribute("sheet_num"))
-                points = int(node.attribute("score"))
-                data = int(node.attribute("data"))
-
-                # We never save battle scores
-                if chart in [
-                    self.GAME_CHART_TYPE_BATTLE_NORMAL,
-                    self.GAME_CHART_TYPE_BATTLE_HYPER,
-                ]:
-                    continue
-
-                # Arrange order to be compatible with future mixes
-                if playmode in {
-                    self.GAME_PLAY_MODE_CHO_CHALLENGE,
-                    self.GAME_PLAY_MODE_TOWN_CHO_CHALLENGE,
-                }:
+        with self.score_batch():
+            for node in request.children:
+                if node.name == "music":
+                    songid = int(node.attribute("music_num"))
+                    chart = int(node.attribute("sheet_num"))
+                    points = int(node.attribute("score"))
+                    data = int(node.attribute("data"))
+
+                    # We never save battle scores
                     if chart in [
-                        self.GAME_CHART_TYPE_5_BUTTON,
-                        self.GAME_CHART_TYPE_ENJOY_5_BUTTON,
-                        self.GAME_CHART_TYPE_ENJOY_9_BUTTON,
+                        self.GAME_CHART_TYPE_BATTLE_NORMAL,
+                        self.GAME_CHART_TYPE_BATTLE_HYPER,
                     ]:
-                        # We don't save 5 button for cho scores, or enjoy modes
                         continue
-                    chart = {
-                        self.GAME_CHART_TYPE_NORMAL: self.CHART_TYPE_NORMAL,
-                        self.GAME_CHART_TYPE_HYPER: self.CHART_TYPE_HYPER,
-                        self.GAME_CHART_TYPE_EX: self.CHART_TYPE_EX,
-                    }[chart]
-                else:
-                    chart = {
-                        self.GAME_CHART_TYPE_NORMAL: self.CHART_TYPE_OLD_NORMAL,
-                        self.GAME_CHART_TYPE_HYPER: self.CHART_TYPE_OLD_HYPER,
-                        self.GAME_CHART_TYPE_5_BUTTON: self.CHART_TYPE_5_BUTTON,
-                        self.GAME_CHART_TYPE_EX: self.CHART_TYPE_OLD_EX,
-                        self.GAME_CHART_TYPE_ENJOY_5_BUTTON: self.CHART_TYPE_ENJOY_5_BUTTON,
-                        self.GAME_CHART_TYPE_ENJOY_9_BUTTON: self.CHART_TYPE_ENJOY_9_BUTTON,
+
+                    # Arrange order to be compatible with future mixes
+                    if playmode in {
+                        self.GAME_PLAY_MODE_CHO_CHALLENGE,
+                        self.GAME_PLAY_MODE_TOWN_CHO_CHALLENGE,
+                    }:
+                        if chart in [
+                            self.GAME_CHART_TYPE_5_BUTTON,
+                            self.GAME_CHART_TYPE_ENJOY_5_BUTTON,
+                            self.GAME_CHART_TYPE_ENJOY_9_BUTTON,
+                        ]:
+                            # We don't save 5 button for cho scores, or enjoy modes
+                            continue
+                        chart = {
+                            self.GAME_CHART_TYPE_NORMAL: self.CHART_TYPE_NORMAL,
+                            self.GAME_CHART_TYPE_HYPER: self.CHART_TYPE_HYPER,
+                            self.GAME_CHART_TYPE_EX: self.CHART_TYPE_EX,
+                        }[chart]
+                    else:
+                        chart = {
+                            self.GAME_CHART_TYPE_NORMAL: self.CHART_TYPE_OLD_NORMAL,
+                            self.GAME_CHART_TYPE_HYPER: self.CHART_TYPE_OLD_HYPER,
+                            self.GAME_CHART_TYPE_5_BUTTON: self.CHART_TYPE_5_BUTTON,
+                            self.GAME_CHART_TYPE_EX: self.CHART_TYPE_OLD_EX,
+                            self.GAME_CHART_TYPE_ENJOY_5_BUTTON: self.CHART_TYPE_ENJOY_5_BUTTON,
+                            self.GAME_CHART_TYPE_ENJOY_9_BUTTON: self.CHART_TYPE_ENJOY_9_BUTTON,
+                        }[chart]
+
+                    # Extract play flags
+                    shift = {
+                        self.CHART_TYPE_5_BUTTON: 4,
+                        self.CHART_TYPE_OLD_NORMAL: 0,
+                        self.CHART_TYPE_OLD_HYPER: 2,
+                        self.CHART_TYPE_OLD_EX: 6,
+                        self.CHART_TYPE_NORMAL: 0,
+                        self.CHART_TYPE_HYPER: 2,
+                        self.CHART_TYPE_EX: 6,
+                        self.CHART_TYPE_ENJOY_5_BUTTON: 9,
+                        self.CHART_TYPE_ENJOY_9_BUTTON: 8,
                     }[chart]
 
-                # Extract play flags
-                shift = {
-                    self.CHART_TYPE_5_BUTTON: 4,
-                    self.CHART_TYPE_OLD_NORMAL: 0,
-                    self.CHART_TYPE_OLD_HYPER: 2,
-                    self.CHART_TYPE_OLD_EX: 6,
-                    self.CHART_TYPE_NORMAL: 0,
-                    self.CHART_TYPE_HYPER: 2,
-                    self.CHART_TYPE_EX: 6,
-                    self.CHART_TYPE_ENJOY_5_BUTTON: 9,
-                    self.CHART_TYPE_ENJOY_9_BUTTON: 8,
-                }[chart]
-
-                if chart in [
-                    self.CHART_TYPE_ENJOY_5_BUTTON,
-                    self.CHART_TYPE_ENJOY_9_BUTTON,
-                ]:
-                    # We only store cleared or not played for enjoy mode
-                    mask = 0x1
-                else:
-                    # We store all data for regular charts
-                    mask = 0x3
-
-                # Grab flags, map to medals in DB. Choose lowest one for each so
-                # a newer pop'n can still improve scores and medals.
-                flags = (data >> shift) & mask
-                medal = {
-                    self.GAME_PLAY_FLAG_FAILED: self.PLAY_MEDAL_CIRCLE_FAILED,
-                    self.GAME_PLAY_FLAG_CLEARED: self.PLAY_MEDAL_CIRCLE_CLEARED,
-                    self.GAME_PLAY_FLAG_FULL_COMBO: self.PLAY_MEDAL_CIRCLE_FULL_COMBO,
-                    self.GAME_PLAY_FLAG_PERFECT_COMBO: self.PLAY_MEDAL_PERFECT,
-                }[flags]
-                self.update_score(userid, songid, chart, points, medal)
+                    if chart in [
+                        self.CHART_TYPE_ENJOY_5_BUTTON,
+                        self.CHART_TYPE_ENJOY_9_BUTTON,
+                    ]:
+                        # We only store cleared or not played for enjoy mode
+                        mask = 0x1
+                    else:
+                        # We store all data for regular charts
+                        mask = 0x3
+
+                    # Grab flags, map to medals in DB. Choose lowest one for each so
+                    # a newer pop'n can still improve scores and medals.
+                    flags = (data >> shift) & mask
+                    medal = {
+                        self.GAME_PLAY_FLAG_FAILED: self.PLAY_MEDAL_CIRCLE_FAILED,
+                        self.GAME_PLAY_FLAG_CLEARED: self.PLAY_MEDAL_CIRCLE_CLEARED,
+                        self.GAME_PLAY_FLAG_FULL_COMBO: self.PLAY_MEDAL_CIRCLE_FULL_COMBO,
+                        self.GAME_PLAY_FLAG_PERFECT_COMBO: self.PLAY_MEDAL_PERFECT,
+                    }[flags]
+                    self.update_score(userid, songid, chart, points, medal)
 
         # Update town mode data.
         town = newprofile.get_dict("town")
@@ -152,8 +152,7 @@ class ReflecBeatBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
         ]:
             raise Exception(f"Invalid combo_type value {combo_type}")
 
-        oldscore = self.data.local.music.get_score(
-            self.game,
+        oldscore = self.get_score(
             self.version,
             userid,
             songid,
@@ -245,8 +244,7 @@ class ReflecBeatBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
             timestamp = now + bump
 
             # Write the new score back
-            self.data.local.music.put_score(
-                self.game,
+            self.put_score(
                 self.version,
                 userid,
                 songid,
@@ -260,8 +258,7 @@ class ReflecBeatBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
 
             try:
                 # Save the history of this score too
-                self.data.local.music.put_attempt(
-                    self.game,
+                self.put_attempt(
                     self.version,
                     userid,
                     songid,
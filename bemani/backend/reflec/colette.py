@@ -176,7 +176,7 @@ class ReflecBeatColette(ReflecBeatBase):
             "weekly",
             Time.now() - Time.SECONDS_IN_WEEK,
             Time.now(),
-            self.data.local.music.get_hit_chart(self.game, self.version, 1024, 7),
+            self.get_hit_chart(self.version, 1024, 7),
         )
 
         # Monthly hit chart
@@ -184,7 +184,7 @@ class ReflecBeatColette(ReflecBeatBase):
             "monthly",
             Time.now() - Time.SECONDS_IN_DAY * 30,
             Time.now(),
-            self.data.local.music.get_hit_chart(self.game, self.version, 1024, 30),
+            self.get_hit_chart(self.version, 1024, 30),
         )
 
         # All time hit chart
@@ -192,7 +192,7 @@ class ReflecBeatColette(ReflecBeatBase):
             "total",
             Time.now() - Time.SECONDS_IN_DAY * 365,
             Time.now(),
-            self.data.local.music.get_hit_chart(self.game, self.version, 1024, 365),
+            self.get_hit_chart(self.version, 1024, 365),
         )
 
         return root
@@ -1198,33 +1198,34 @@ class ReflecBeatColette(ReflecBeatBase):
         # Grab any new records set during this play session
         songplays = request.child("pdata/stglog")
         if songplays:
-            for child in songplays.children:
-                if child.name != "log":
-                    continue
-
-                songid = child.child_value("mid")
-                chart = child.child_value("ng")
-                clear_type = child.child_value("ct")
-                if songid == 0 and chart == 0 and clear_type == -1:
-                    # Dummy song save during profile create
-                    continue
-
-                points = child.child_value("sc")
-                achievement_rate = child.child_value("ar")
-                clear_type, combo_type = self.__game_to_db_clear_type(clear_type)
-                combo = child.child_value("cmb")
-                miss_count = child.child_value("jt_ms")
-                self.update_score(
-                    userid,
-                    songid,
-                    chart,
-                    points,
-                    achievement_rate,
-                    clear_type,
-                    combo_type,
-                    miss_count,
-                    combo=combo,
-                )
+            with self.score_batch():
+                for child in songplays.children:
+                    if child.name != "log":
+                        continue
+
+                    songid = child.child_value("mid")
+                    chart = child.child_value("ng")
+                    clear_type = child.child_value("ct")
+                    if songid == 0 and chart == 0 and clear_type == -1:
+                        # Dummy song save during profile create
+                        continue
+
+                    points = child.child_value("sc")
+                    achievement_rate = child.child_value("ar")
+                    clear_type, combo_type = self.__game_to_db_clear_type(clear_type)
+                    combo = child.child_value("cmb")
+                    miss_count = child.child_value("jt_ms")
+                    self.update_score(
+                        userid,
+                        songid,
+                        chart,
+                        points,
+                        achievement_rate,
+                        clear_type,
+                        combo_type,
+                        miss_count,
+                        combo=combo,
+                    )
 
         # Keep track of play statistics
         self.update_play_statistics(userid)
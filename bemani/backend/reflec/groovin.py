@@ -392,7 +392,7 @@ class ReflecBeatGroovin(ReflecBeatBase):
             "weekly",
             Time.now() - Time.SECONDS_IN_WEEK,
             Time.now(),
-            self.data.local.music.get_hit_chart(self.game, self.version, 1024, 7),
+            self.get_hit_chart(self.version, 1024, 7),
         )
 
         # Monthly hit chart
@@ -400,7 +400,7 @@ class ReflecBeatGroovin(ReflecBeatBase):
             "monthly",
             Time.now() - Time.SECONDS_IN_DAY * 30,
             Time.now(),
-            self.data.local.music.get_hit_chart(self.game, self.version, 1024, 30),
+            self.get_hit_chart(self.version, 1024, 30),
         )
 
         # All time hit chart
@@ -408,7 +408,7 @@ class ReflecBeatGroovin(ReflecBeatBase):
             "total",
             Time.now() - Time.SECONDS_IN_DAY * 365,
             Time.now(),
-            self.data.local.music.get_hit_chart(self.game, self.version, 1024, 365),
+            self.get_hit_chart(self.version, 1024, 365),
         )
 
         return root
@@ -1472,39 +1472,40 @@ class ReflecBeatGroovin(ReflecBeatBase):
         # Grab any new records set during this play session
         songplays = request.child("pdata/stglog")
         if songplays:
-            for child in songplays.children:
-                if child.name != "log":
-                    continue
-
-                songid = child.child_value("mid")
-                chart = child.child_value("ng")
-                clear_type = child.child_value("ct")
-                if songid == 0 and chart == 0 and clear_type == -1:
-                    # Dummy song save during profile create
-                    continue
-
-                points = child.child_value("sc")
-                achievement_rate = child.child_value("ar")
-                param = child.child_value("param")
-                miss_count = child.child_value("jt_ms")
-
-                # Param is some random bits along with the combo type
-                combo_type = param & 0x3
-                param = param ^ combo_type
-
-                clear_type = self.__game_to_db_clear_type(clear_type)
-                combo_type = self.__game_to_db_combo_type(combo_type, miss_count)
-                self.update_score(
-                    userid,
-                    songid,
-                    chart,
-                    points,
-                    achievement_rate,
-                    clear_type,
-                    combo_type,
-                    miss_count,
-                    param=param,
-                )
+            with self.score_batch():
+                for child in songplays.children:
+                    if child.name != "log":
+                        continue
+
+                    songid = child.child_value("mid")
+                    chart = child.child_value("ng")
+                    clear_type = child.child_value("ct")
+                    if songid == 0 and chart == 0 and clear_type == -1:
+                        # Dummy song save during profile create
+                        continue
+
+                    points = child.child_value("sc")
+                    achievement_rate = child.child_value("ar")
+                    param = child.child_value("param")
+                    miss_count = child.child_value("jt_ms")
+
+                    # Param is some random bits along with the combo type
+                    combo_type = param & 0x3
+                    param = param ^ combo_type
+
+                    clear_type = self.__game_to_db_clear_type(clear_type)
+                    combo_type = self.__game_to_db_combo_type(combo_type, miss_count)
+                    self.update_score(
+                        userid,
+                        songid,
+                        chart,
+                        points,
+                        achievement_rate,
+                        clear_type,
+                        combo_type,
+                        miss_count,
+                        param=param,
+                    )
 
         # Keep track of play statistics
         self.update_play_statistics(userid)
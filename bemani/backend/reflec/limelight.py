@@ -160,7 +160,7 @@ class ReflecBeatLimelight(ReflecBeatBase):
         licenses.add_child(Node.time("time", Time.now()))
         originals.add_child(Node.time("time", Time.now()))
 
-        hitchart = self.data.local.music.get_hit_chart(self.game, self.version, 10)
+        hitchart = self.get_hit_chart(self.version, 10)
         rank = 1
         for mid, _plays in hitchart:
             record = Node.void("record")
@@ -936,51 +936,52 @@ class ReflecBeatLimelight(ReflecBeatBase):
         # rate and score, so we know for a fact that that record was generated by this battle.
         battlelogs = request.child("pdata/blog")
         if battlelogs:
-            for child in battlelogs.children:
-                if child.name != "log":
-                    continue
-
-                songid = child.child_value("mid")
-                chart = child.child_value("ng")
-
-                clear_type = child.child_value("myself/ct")
-                achievement_rate = child.child_value("myself/ar") * 10
-                points = child.child_value("myself/s")
-
-                clear_type, combo_type = self.__game_to_db_clear_type(clear_type)
-
-                combo = None
-                miss_count = -1
-                stats = None
-
-                if songid in savedrecords:
-                    if chart in savedrecords[songid]:
-                        data = savedrecords[songid][chart]
-
-                        if data["achievement_rate"] == achievement_rate and data["points"] == points:
-                            # This is the same record! Use the stats from it to update our
-                            # internal representation.
-                            combo = data["combo"]
-                            miss_count = data["miss_count"]
-                            stats = {
-                                "win": data["win"],
-                                "lose": data["lose"],
-                                "draw": data["draw"],
-                                "earned_points": data["earned_points"],
-                            }
-
-                self.update_score(
-                    userid,
-                    songid,
-                    chart,
-                    points,
-                    achievement_rate,
-                    clear_type,
-                    combo_type,
-                    miss_count,
-                    combo=combo,
-                    stats=stats,
-                )
+            with self.score_batch():
+                for child in battlelogs.children:
+                    if child.name != "log":
+                        continue
+
+                    songid = child.child_value("mid")
+                    chart = child.child_value("ng")
+
+                    clear_type = child.child_value("myself/ct")
+                    achievement_rate = child.child_value("myself/ar") * 10
+                    points = child.child_value("myself/s")
+
+                    clear_type, combo_type = self.__game_to_db_clear_type(clear_type)
+
+                    combo = None
+                    miss_count = -1
+                    stats = None
+
+                    if songid in savedrecords:
+                        if chart in savedrecords[songid]:
+                            data = savedrecords[songid][chart]
+
+                            if data["achievement_rate"] == achievement_rate and data["points"] == points:
+                                # This is the same record! Use the stats from it to update our
+                                # internal representation.
+                                combo = data["combo"]
+                                miss_count = data["miss_count"]
+                                stats = {
+                                    "win": data["win"],
+                                    "lose": data["lose"],
+                                    "draw": data["draw"],
+                                    "earned_points": data["earned_points"],
+                                }
+
+                    self.update_score(
+                        userid,
+                        songid,
+                        chart,
+                        points,
+                        achievement_rate,
+                        clear_type,
+                        combo_type,
+                        miss_count,
+                        combo=combo,
+                        stats=stats,
+                    )
 
         # Keep track of glass points so unlocks work
         glass = request.child("pdata/glass")
@@ -485,50 +485,51 @@ class ReflecBeat(ReflecBeatBase):
         # rate and score, so we know for a fact that that record was generated by this battle.
         battlelogs = request.child("pdata/blog")
         if battlelogs:
-            for child in battlelogs.children:
-                if child.name != "log":
-                    continue
-
-                songid = child.child_value("mid")
-                chart = child.child_value("ng")
-
-                clear_type = child.child_value("myself/ct")
-                achievement_rate = child.child_value("myself/ar") * 10
-                points = child.child_value("myself/s")
-
-                clear_type, combo_type = self.__game_to_db_clear_type(clear_type, achievement_rate)
-
-                combo = None
-                miss_count = -1
-                stats = None
-
-                if songid in savedrecords:
-                    if chart in savedrecords[songid]:
-                        data = savedrecords[songid][chart]
-
-                        if data["achievement_rate"] == achievement_rate and data["points"] == points:
-                            # This is the same record! Use the stats from it to update our
-                            # internal representation.
-                            combo = data["combo"]
-                            miss_count = data["miss_count"]
-                            stats = {
-                                "win": data["win"],
-                                "lose": data["lose"],
-                                "draw": data["draw"],
-                            }
-
-                self.update_score(
-                    userid,
-                    songid,
-                    chart,
-                    points,
-                    achievement_rate,
-                    clear_type,
-                    combo_type,
-                    miss_count,
-                    combo=combo,
-                    stats=stats,
-                )
+            with self.score_batch():
+                for child in battlelogs.children:
+                    if child.name != "log":
+                        continue
+
+                    songid = child.child_value("mid")
+                    chart = child.child_value("ng")
+
+                    clear_type = child.child_value("myself/ct")
+                    achievement_rate = child.child_value("myself/ar") * 10
+                    points = child.child_value("myself/s")
+
+                    clear_type, combo_type = self.__game_to_db_clear_type(clear_type, achievement_rate)
+
+                    combo = None
+                    miss_count = -1
+                    stats = None
+
+                    if songid in savedrecords:
+                        if chart in savedrecords[songid]:
+                            data = savedrecords[songid][chart]
+
+                            if data["achievement_rate"] == achievement_rate and data["points"] == points:
+                                # This is the same record! Use the stats from it to update our
+                                # internal representation.
+                                combo = data["combo"]
+                                miss_count = data["miss_count"]
+                                stats = {
+                                    "win": data["win"],
+                                    "lose": data["lose"],
+                                    "draw": data["draw"],
+                                }
+
+                    self.update_score(
+                        userid,
+                        songid,
+                        chart,
+                        points,
+                        achievement_rate,
+                        clear_type,
+                        combo_type,
+                        miss_count,
+                        combo=combo,
+                        stats=stats,
+                    )
 
         # Keep track of play statistics
         self.update_play_statistics(userid)
@@ -846,41 +846,42 @@ class ReflecBeatVolzza2(ReflecBeatVolzzaBase):
         # Grab any new records set during this play session
         songplays = request.child("pdata/stglog")
         if songplays:
-            for child in songplays.children:
-                if child.name != "log":
-                    continue
-
-                songid = child.child_value("mid")
-                chart = child.child_value("ng")
-                clear_type = child.child_value("ct")
-                if songid == 0 and chart == 0 and clear_type == -1:
-                    # Dummy song save during profile create
-                    continue
-
-                points = child.child_value("sc")
-                achievement_rate = child.child_value("ar")
-                param = child.child_value("param")
-                miss_count = child.child_value("jt_ms")
-                k_flag = child.child_value("k_flag")
-
-                # Param is some random bits along with the combo type
-                combo_type = param & 0x3
-                param = param ^ combo_type
-
-                clear_type = self._game_to_db_clear_type(clear_type)
-                combo_type = self._game_to_db_combo_type(combo_type, miss_count)
-                self.update_score(
-                    userid,
-                    songid,
-                    chart,
-                    points,
-                    achievement_rate,
-                    clear_type,
-                    combo_type,
-                    miss_count,
-                    param=param,
-                    kflag=k_flag,
-                )
+            with self.score_batch():
+                for child in songplays.children:
+                    if child.name != "log":
+                        continue
+
+                    songid = child.child_value("mid")
+                    chart = child.child_value("ng")
+                    clear_type = child.child_value("ct")
+                    if songid == 0 and chart == 0 and clear_type == -1:
+                        # Dummy song save during profile create
+                        continue
+
+                    points = child.child_value("sc")
+                    achievement_rate = child.child_value("ar")
+                    param = child.child_value("param")
+                    miss_count = child.child_value("jt_ms")
+                    k_flag = child.child_value("k_flag")
+
+                    # Param is some random bits along with the combo type
+                    combo_type = param & 0x3
+                    param = param ^ combo_type
+
+                    clear_type = self._game_to_db_clear_type(clear_type)
+                    combo_type = self._game_to_db_combo_type(combo_type, miss_count)
+                    self.update_score(
+                        userid,
+                        songid,
+                        chart,
+                        points,
+                        achievement_rate,
+                        clear_type,
+                        combo_type,
+                        miss_count,
+                        param=param,
+                        kflag=k_flag,
+                    )
 
         # Grab any new rivals added during this play session
         rivalnode = request.child("pdata/rival")
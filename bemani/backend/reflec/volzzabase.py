@@ -176,7 +176,7 @@ class ReflecBeatVolzzaBase(ReflecBeatBase):
             "weekly",
             Time.now() - Time.SECONDS_IN_WEEK,
             Time.now(),
-            self.data.local.music.get_hit_chart(self.game, self.version, 1024, 7),
+            self.get_hit_chart(self.version, 1024, 7),
         )
 
         # Monthly hit chart
@@ -184,7 +184,7 @@ class ReflecBeatVolzzaBase(ReflecBeatBase):
             "monthly",
             Time.now() - Time.SECONDS_IN_DAY * 30,
             Time.now(),
-            self.data.local.music.get_hit_chart(self.game, self.version, 1024, 30),
+            self.get_hit_chart(self.version, 1024, 30),
         )
 
         # All time hit chart
@@ -192,7 +192,7 @@ class ReflecBeatVolzzaBase(ReflecBeatBase):
             "total",
             Time.now() - Time.SECONDS_IN_DAY * 365,
             Time.now(),
-            self.data.local.music.get_hit_chart(self.game, self.version, 1024, 365),
+            self.get_hit_chart(self.version, 1024, 365),
         )
 
         return root
@@ -208,11 +208,7 @@ class ReflecBeatVolzzaBase(ReflecBeatBase):
 
         profiles: Dict[UserID, Profile] = {}
         for songid in range(start_music_id, end_music_id + 1):
-            allscores = self.data.local.music.get_all_scores(
-                self.game,
-                self.version,
-                songid=songid,
-            )
+            allscores = self.get_all_scores(self.version, songid)
 
             for ng in [
                 self.CHART_TYPE_BASIC,
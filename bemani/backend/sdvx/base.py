@@ -1,11 +1,11 @@
 # vim: set fileencoding=utf-8
-from typing import Dict, Optional
+from typing import Dict, Optional, Tuple
 from typing_extensions import Final
 
 from bemani.backend.base import Base
 from bemani.backend.core import CoreHandler, CardManagerHandler, PASELIHandler
 from bemani.common import Profile, ValidatedDict, GameConstants, DBConstants, Parallel
-from bemani.data import UserID
+from bemani.data import ClearRates, UserID
 from bemani.protocol import Node
 
 
@@ -16,6 +16,9 @@ class SoundVoltexBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
 
     game: GameConstants = GameConstants.SDVX
 
+    # Hiscore requests look players up by the location their profile was created at.
+    PROFILE_FIELDS: Tuple[str, ...] = ("loc",)
+
     CLEAR_TYPE_NO_PLAY: Final[int] = DBConstants.SDVX_CLEAR_TYPE_NO_PLAY
     CLEAR_TYPE_FAILED: Final[int] = DBConstants.SDVX_CLEAR_TYPE_FAILED
     CLEAR_TYPE_CLEAR: Final[int] = DBConstants.SDVX_CLEAR_TYPE_CLEAR
@@ -109,7 +112,8 @@ class SoundVoltexBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
 
     def get_clear_rates(self) -> Dict[int, Dict[int, Dict[str, int]]]:
         """
-        Returns a dictionary similar to the following:
+        Look up clear rates for every song on the network, shared between every machine with
+        cached_result(). Returns a dictionary similar to the following:
 
         {
             musicid: {
@@ -121,9 +125,12 @@ class SoundVoltexBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
             },
         }
         """
-        all_attempts, remote_attempts = Parallel.execute(
+        return self.cached_result("clear_rates", self.__get_clear_rates)
+
+    def __get_clear_rates(self) -> Dict[int, Dict[int, Dict[str, int]]]:
+        local_rates, remote_attempts = Parallel.execute(
             [
-                lambda: self.data.local.music.get_all_attempts(
+                lambda: self.data.local.music.get_clear_rates(
                     game=self.game,
                     version=self.version,
                 ),
@@ -134,37 +141,16 @@ class SoundVoltexBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
             ]
         )
         attempts: Dict[int, Dict[int, Dict[str, int]]] = {}
-        for _, attempt in all_attempts:
-            # Terrible temporary structure is terrible.
-            if attempt.id not in attempts:
-                attempts[attempt.id] = {}
-            if attempt.chart not in attempts[attempt.id]:
-                attempts[attempt.id][attempt.chart] = {
-                    "total": 0,
-                    "clears": 0,
-                    "average": 0,
+        for songid in local_rates:
+            attempts[songid] = {}
+
+            for songchart, rate in local_rates[songid].items():
+                attempts[songid][songchart] = {
+                    "total": rate["plays"],
+                    "clears": rate["clears"],
+                    "average": int(rate["points"] / rate["plays"]) if rate["plays"] > 0 else 0,
                 }
 
-            # We saw an attempt, keep the total attempts in sync.
-            attempts[attempt.id][attempt.chart]["average"] = int(
-                (
-                    (attempts[attempt.id][attempt.chart]["average"] * attempts[attempt.id][attempt.chart]["total"])
-                    + attempt.points
-                )
-                / (attempts[attempt.id][attempt.chart]["total"] + 1)
-            )
-            attempts[attempt.id][attempt.chart]["total"] += 1
-
-            if attempt.data.get_int("clear_type", self.CLEAR_TYPE_NO_PLAY) in [
-                self.CLEAR_TYPE_NO_PLAY,
-                self.CLEAR_TYPE_FAILED,
-            ]:
-                # This attempt was a failure, so don't count it against clears of full combos
-                continue
-
-            # It was at least a clear
-            attempts[attempt.id][attempt.chart]["clears"] += 1
-
         # Merge in remote attempts
         for songid in remote_attempts:
             if songid not in attempts:
@@ -275,8 +261,7 @@ class SoundVoltexBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
 
         if userid is not None:
             # Write the new score back
-            self.data.local.music.put_score(
-                self.game,
+            self.put_score(
                 self.version,
                 userid,
                 songid,
@@ -287,7 +272,8 @@ class SoundVoltexBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
                 highscore,
             )
 
-        # Save the history of this score too
+        # Save the history of this score too, keeping clear rates up to date
+        cleared, full_combo = ClearRates.sdvx(history)
         self.data.local.music.put_attempt(
             self.game,
             self.version,
@@ -298,4 +284,6 @@ class SoundVoltexBase(CoreHandler, CardManagerHandler, PASELIHandler, Base):
             oldpoints,
             history,
             raised,
+            cleared=cleared,
+            full_combo=full_combo,
         )
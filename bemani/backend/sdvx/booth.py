@@ -214,7 +214,7 @@ class SoundVoltexBooth(
         game.add_child(hiscore)
         hiscore.set_attribute("type", "1")
 
-        records = self.data.remote.music.get_all_records(self.game, self.version)
+        records = self.get_all_records(self.version)
 
         # Organize by song->chart
         records_by_id: Dict[int, Dict[int, Tuple[UserID, Score]]] = {}
@@ -3094,14 +3094,11 @@ class SoundVoltexExceedGear(
         game = Node.void("game")
 
         # Now, grab global and local scores as well as clear rates
-        global_records = self.data.remote.music.get_all_records(self.game, self.version)
-        users = {
-            uid: prof
-            for (uid, prof) in self.data.local.user.get_all_profiles(
-                self.game, self.version
-            )
-        }
-        area_users = [uid for uid in users if users[uid].get_int("loc", -1) == locid]
+        global_records = self.get_all_records(self.version)
+        users: Dict[UserID, Profile] = {}
+        area_users = self.data.local.user.get_userids_by_profile_field(
+            self.game, self.version, "loc", locid
+        )
         area_records = self.data.local.music.get_all_records(
             self.game, self.version, userlist=area_users
         )
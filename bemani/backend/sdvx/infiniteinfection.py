@@ -1966,7 +1966,7 @@ class SoundVoltexInfiniteInfection(
         game = Node.void("game_2")
 
         # First, grab hit chart
-        playcounts = self.data.local.music.get_hit_chart(self.game, self.version, 1024)
+        playcounts = self.get_hit_chart(self.version, 1024)
 
         hitchart = Node.void("hitchart")
         game.add_child(hitchart)
@@ -1977,7 +1977,7 @@ class SoundVoltexInfiniteInfection(
             info.add_child(Node.u32("cnt", count))
 
         # Now, grab user records
-        records = self.data.remote.music.get_all_records(self.game, self.version)
+        records = self.get_all_records(self.version)
         missing_users = [userid for (userid, _) in records]
         users = {userid: profile for (userid, profile) in self.get_any_profiles(missing_users)}
 
@@ -2002,11 +2002,7 @@ class SoundVoltexInfiniteInfection(
             hiscore_allover.add_child(info)
 
         # Now, grab local records
-        area_users = [
-            uid
-            for (uid, prof) in self.data.local.user.get_all_profiles(self.game, self.version)
-            if prof.get_int("loc", -1) == locid
-        ]
+        area_users = self.data.local.user.get_userids_by_profile_field(self.game, self.version, "loc", locid)
         records = self.data.local.music.get_all_records(self.game, self.version, userlist=area_users)
         missing_users = [userid for (userid, _) in records if userid not in users]
         for userid, profile in self.get_any_profiles(missing_users):
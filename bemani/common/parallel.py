@@ -1,5 +1,10 @@
 import concurrent.futures
-from typing import Any, Callable, List, TypeVar
+import functools
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+from typing_extensions import Final
 
 T = TypeVar("T")
 
@@ -9,70 +14,202 @@ class Parallel:
     Utilities for executing parallel operations. This is used as a convenience
     so that we don't have to plumb async/await support (yuck) through the network,
     but we can still make multiple queries at once to remote services and the DB.
+
+    Work is run on a single thread pool shared by the whole process, so that a large
+    number of parallel operations doesn't mean a large number of new threads. The
+    thread that asks for the work helps run it as well, so that operations nested
+    inside other operations still make progress when every pool thread is busy.
     """
 
+    # Most threads the shared pool will ever start.
+    MAX_WORKERS: Final[int] = 32
+
+    # Most callables a single operation will run at once, unless told otherwise.
+    DEFAULT_CONCURRENCY: Final[int] = 16
+
+    __executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+    __executor_pid: int = 0
+    __lock = threading.Lock()
+    __local = threading.local()
+    __stats: Dict[str, float] = {
+        "tasks": 0,
+        "inline": 0,
+        "timeouts": 0,
+        "wait_total": 0.0,
+        "wait_max": 0.0,
+    }
+
     @staticmethod
-    def execute(lambdas: List[Callable[[], Any]]) -> List[Any]:
+    def __mark_worker() -> None:
+        Parallel.__local.worker = True
+
+    @staticmethod
+    def __pool() -> concurrent.futures.ThreadPoolExecutor:
+        with Parallel.__lock:
+            # Threads don't survive a fork, so a forked child needs its own pool.
+            if Parallel.__executor is None or Parallel.__executor_pid != os.getpid():
+                Parallel.__executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=Parallel.MAX_WORKERS,
+                    thread_name_prefix="parallel",
+                    initializer=Parallel.__mark_worker,
+                )
+                Parallel.__executor_pid = os.getpid()
+            return Parallel.__executor
+
+    @staticmethod
+    def __run(
+        lambdas: List[Callable[[], Any]],
+        concurrency: Optional[int],
+        timeout: Optional[float],
+        default: Any,
+    ) -> List[Any]:
         """
-        Given a list of callables, execute them and return a list of their returns.
-        Guarantees order of return based on order of callable.
+        Run a list of callables and return their results in order. At most concurrency callables
+        run at once. If timeout is given, stops waiting after that many seconds and returns
+        default in place of anything that hadn't finished.
         """
-
         if len(lambdas) == 0:
             return []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(lambdas)) as executor:
-            futures = {executor.submit(lambdas[pos]): pos for pos in range(len(lambdas))}
-            results = []  # List: Tuple[Any, int]
 
-            for future in concurrent.futures.as_completed(futures):
-                pos = futures[future]
-                data = future.result()
-                results.append((data, pos))
+        start = time.monotonic()
+        deadline = None if timeout is None else start + timeout
+        results: List[Any] = [default] * len(lambdas)
+        errors: List[Optional[BaseException]] = [None] * len(lambdas)
+        state = {"next": 0, "finished": 0}
+        cond = threading.Condition()
+
+        def runner(inline: bool) -> None:
+            while True:
+                with cond:
+                    pos = state["next"]
+                    if pos >= len(lambdas) or (deadline is not None and time.monotonic() >= deadline):
+                        return
+                    state["next"] += 1
+
+                wait = time.monotonic() - start
+                with Parallel.__lock:
+                    Parallel.__stats["tasks"] += 1
+                    Parallel.__stats["inline"] += 1 if inline else 0
+                    Parallel.__stats["wait_total"] += wait
+                    Parallel.__stats["wait_max"] = max(Parallel.__stats["wait_max"], wait)
+
+                try:
+                    result = lambdas[pos]()
+                    error = None
+                except BaseException as e:
+                    result = default
+                    error = e
+
+                with cond:
+                    results[pos] = result
+                    errors[pos] = error
+                    state["finished"] += 1
+                    cond.notify_all()
+
+        # A pool thread waiting on pool threads could wait forever if the pool is full, so it
+        # always helps. Otherwise we help unless we have a deadline, since we can't stop running
+        # a callable partway through to return on time.
+        helping = getattr(Parallel.__local, "worker", False) or deadline is None
+        runners = min(concurrency or Parallel.DEFAULT_CONCURRENCY, len(lambdas))
+        pool = Parallel.__pool()
+        for _ in range(runners - 1 if helping else runners):
+            pool.submit(runner, False)
+        if helping:
+            runner(True)
+
+        with cond:
+            while state["finished"] < len(lambdas):
+                if deadline is None:
+                    cond.wait()
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                cond.wait(remaining)
+
+            missing = len(lambdas) - state["finished"]
+            ordered = list(results)
+            failures = [error for error in errors if error is not None]
+
+        if missing > 0:
+            with Parallel.__lock:
+                Parallel.__stats["timeouts"] += missing
+        if failures:
+            raise failures[0]
+        return ordered
+
+    @staticmethod
+    def stats() -> Dict[str, float]:
+        """
+        Returns statistics about work run since the process started, including how
+        many callables were run, how many were run by the thread asking for them,
+        how many didn't finish by their deadline, and how long callables waited
+        before they were started.
+        """
+        with Parallel.__lock:
+            stats = dict(Parallel.__stats)
+        stats["wait_avg"] = stats["wait_total"] / stats["tasks"] if stats["tasks"] else 0.0
+        return stats
+
+    @staticmethod
+    def execute(
+        lambdas: List[Callable[[], Any]],
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        default: Any = None,
+    ) -> List[Any]:
+        """
+        Given a list of callables, execute them and return a list of their returns.
+        Guarantees order of return based on order of callable. At most concurrency
+        callables run at once. If timeout is given, returns after that many seconds
+        with default in place of any returns that aren't available yet.
+        """
 
-            return [r[0] for r in sorted(results, key=lambda r: r[1])]
+        return Parallel.__run(lambdas, concurrency, timeout, default)
 
     @staticmethod
-    def map(lam: Callable[[T], Any], params: List[T]) -> List[Any]:
+    def map(
+        lam: Callable[[T], Any],
+        params: List[T],
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        default: Any = None,
+    ) -> List[Any]:
         """
         Given a callable and a list of params, executes that callable with each set
         of params in the list and returns a list of their returns. Guarantees order
-        of return.
+        of return. Concurrency, timeout and default behave as they do for execute.
         """
 
-        if len(params) == 0:
-            return []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(params)) as executor:
-            futures = {executor.submit(lam, params[pos]): pos for pos in range(len(params))}
-            results = []  # List: Tuple[Any, int]
-
-            for future in concurrent.futures.as_completed(futures):
-                pos = futures[future]
-                data = future.result()
-                results.append((data, pos))
-
-            return [r[0] for r in sorted(results, key=lambda r: r[1])]
+        return Parallel.__run(
+            [functools.partial(lam, param) for param in params],
+            concurrency,
+            timeout,
+            default,
+        )
 
     @staticmethod
-    def call(lambdas: "List[Callable[..., Any]]", *params: Any) -> List[Any]:
+    def call(
+        lambdas: "List[Callable[..., Any]]",
+        *params: Any,
+        concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        default: Any = None,
+    ) -> List[Any]:
         """
         Given a list of callables and zero or more params, calls each callable in
         parallel with the params specified. Essentially a map of params to multiple
         callables in parallel. Returns a list of returns, garanteed to be in the
-        same order as the lambdas.
+        same order as the lambdas. Concurrency, timeout and default behave as they
+        do for execute.
         """
 
-        if len(lambdas) == 0:
-            return []
-        with concurrent.futures.ThreadPoolExecutor(max_workers=len(lambdas)) as executor:
-            futures = {executor.submit(lambdas[pos], *params): pos for pos in range(len(lambdas))}
-            results = []  # List: Tuple[Any, int]
-
-            for future in concurrent.futures.as_completed(futures):
-                pos = futures[future]
-                data = future.result()
-                results.append((data, pos))
-
-            return [r[0] for r in sorted(results, key=lambda r: r[1])]
+        return Parallel.__run(
+            [functools.partial(lam, *params) for lam in lambdas],
+            concurrency,
+            timeout,
+            default,
+        )
 
     @staticmethod
     def flatten(lists: List[List[Any]]) -> List[Any]:
@@ -1,3 +1,4 @@
+from bemani.data.clearrates import ClearRates
 from bemani.data.config import Config
 from bemani.data.data import Data, DBCreateException
 from bemani.data.exceptions import ScoreSaveException
@@ -14,14 +15,15 @@ from bemani.data.types import (
     Event,
     Server,
     Client,
+    Webhook,
     UserID,
     ArcadeID,
 )
 from bemani.data.remoteuser import RemoteUser
 from bemani.data.triggers import Triggers
 
-
 __all__ = [
+    "ClearRates",
     "Config",
     "Data",
     "DBCreateException",
@@ -38,6 +40,7 @@ __all__ = [
     "Event",
     "Server",
     "Client",
+    "Webhook",
     "UserID",
     "ArcadeID",
     "RemoteUser",
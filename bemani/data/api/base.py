@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
 from bemani.data.api.client import APIClient
 from bemani.data.interfaces import APIProviderInterface
@@ -8,13 +8,30 @@ class BaseGlobalData:
     def __init__(self, api: APIProviderInterface) -> None:
         self.__localapi = api
         self.__apiclients: Optional[List[APIClient]] = None
+        self.__serverids: List[int] = []
+
+    def reset(self) -> None:
+        """
+        Drop the cached list of remote servers, so that it is looked up again on next use.
+        """
+        self.__apiclients = None
 
     @property
     def clients(self) -> List[APIClient]:
         if self.__apiclients is None:
             servers = self.__localapi.get_all_servers()
+            self.__serverids = [server.id for server in servers]
             self.__apiclients = [
                 APIClient(server.uri, server.token, server.allow_stats, server.allow_scores) for server in servers
             ]
 
         return self.__apiclients
+
+    @property
+    def servers(self) -> List[Tuple[int, APIClient]]:
+        """
+        The remote servers along with their server IDs, for callers that keep track of
+        results from each server separately.
+        """
+        clients = self.clients
+        return list(zip(self.__serverids, clients))
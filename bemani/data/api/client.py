@@ -1,5 +1,8 @@
+import hashlib
 import json
+import os
 import requests
+import threading
 from typing import Tuple, Dict, List, Any, Optional
 from typing_extensions import Final
 
@@ -45,6 +48,33 @@ class APIClient:
 
     API_VERSION: Final[str] = "v1"
 
+    # How long to wait for a remote server to respond, in seconds.
+    TIMEOUT: Final[int] = 10
+
+    # How many connections to keep open to each remote server, which should be at least as many
+    # as the number of simultaneous requests we make to a single server.
+    POOL_SIZE: Final[int] = 16
+
+    # How many times in a row a remote server can fail to respond before we stop asking it for
+    # a while, and how long in seconds to wait before asking it again.
+    CIRCUIT_FAILURES: Final[int] = 3
+    CIRCUIT_RESET: Final[int] = 30
+
+    # How long in seconds to keep updating a set of remote records with only what has changed
+    # since we last fetched it, before fetching the whole set again.
+    RECORDS_REFRESH: Final[int] = Time.SECONDS_IN_HOUR
+
+    # Sessions are shared by every client talking to the same server in a process, so that
+    # connections are kept alive between requests. They are thrown away in a forked child
+    # since the connections would otherwise be shared with the parent.
+    __sessions: Dict[str, requests.Session] = {}
+    __sessions_pid: int = 0
+
+    # Consecutive failures and the time we can next try, for each remote server.
+    __failures: Dict[str, Tuple[int, int]] = {}
+
+    __lock = threading.Lock()
+
     def __init__(self, base_uri: str, token: str, allow_stats: bool, allow_scores: bool) -> None:
         self.base_uri = base_uri
         self.token = token
@@ -80,12 +110,54 @@ class APIClient:
                     return True
         return False
 
+    def __session(self) -> requests.Session:
+        with APIClient.__lock:
+            if APIClient.__sessions_pid != os.getpid():
+                APIClient.__sessions = {}
+                APIClient.__sessions_pid = os.getpid()
+
+            session = APIClient.__sessions.get(self.base_uri)
+            if session is None:
+                session = requests.Session()
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.POOL_SIZE)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({"Accept-Encoding": "gzip"})
+                APIClient.__sessions[self.base_uri] = session
+            return session
+
+    def __circuit_closed(self) -> bool:
+        with APIClient.__lock:
+            failures, retry_at = APIClient.__failures.get(self.base_uri, (0, 0))
+            if failures < self.CIRCUIT_FAILURES:
+                return True
+            if Time.now() < retry_at:
+                return False
+
+            # Let this request through to see if the server is back, but keep failing
+            # everything else quickly until we know.
+            APIClient.__failures[self.base_uri] = (failures, Time.now() + self.CIRCUIT_RESET)
+            return True
+
+    def __circuit_failure(self) -> None:
+        with APIClient.__lock:
+            failures, _ = APIClient.__failures.get(self.base_uri, (0, 0))
+            APIClient.__failures[self.base_uri] = (failures + 1, Time.now() + self.CIRCUIT_RESET)
+
+    def __circuit_success(self) -> None:
+        with APIClient.__lock:
+            APIClient.__failures.pop(self.base_uri, None)
+
     def __exchange_data(self, request_uri: str, request_args: Dict[str, Any]) -> Dict[str, Any]:
         if self.base_uri[-1:] != "/":
             uri = f"{self.base_uri}/{request_uri}"
         else:
             uri = f"{self.base_uri}{request_uri}"
 
+        # Don't make every request wait out the timeout on a server that isn't responding.
+        if not self.__circuit_closed():
+            raise APIException("Remote server is not responding!")
+
         headers = {
             "Authorization": f"Token {self.token}",
             "Content-Type": "application/json; charset=utf-8",
@@ -93,22 +165,31 @@ class APIClient:
         data = json.dumps(request_args).encode("utf8")
 
         try:
-            r = requests.request(
+            r = self.__session().request(
                 "GET",
                 uri,
                 headers=headers,
                 data=data,
                 allow_redirects=False,
-                timeout=10,
+                timeout=self.TIMEOUT,
             )
         except Exception:
+            self.__circuit_failure()
             raise APIException("Failed to query remote server!")
 
         # Verify that content type is in the form of "application/json; charset=utf-8".
-        if not self._content_type_valid(r.headers["content-type"]):
-            raise APIException(f'API returned invalid content type \'{r.headers["content-type"]}\'!')
+        if not self._content_type_valid(r.headers.get("content-type", "")):
+            self.__circuit_failure()
+            raise APIException(f'API returned invalid content type \'{r.headers.get("content-type")}\'!')
 
-        jsondata = r.json()
+        try:
+            jsondata = r.json()
+        except ValueError:
+            self.__circuit_failure()
+            raise APIException("API returned invalid JSON!")
+
+        # The server is up and talking BEMAPI, even if it didn't like this request.
+        self.__circuit_success()
 
         if r.status_code == 200:
             return jsondata
@@ -276,6 +357,9 @@ class APIClient:
 
         try:
             servergame, serverversion = self.__translate(game, version)
+            if since is None and until is None and idtype != APIConstants.ID_TYPE_INSTANCE:
+                return self.__get_records_incremental(servergame, serverversion, idtype, ids)
+
             data: Dict[str, Any] = {
                 "ids": ids,
                 "type": idtype.value,
@@ -294,6 +378,95 @@ class APIClient:
             # Couldn't talk to server, assume empty records
             return []
 
+    def get_updated_records(
+        self,
+        game: GameConstants,
+        version: int,
+        idtype: APIConstants,
+        ids: List[str],
+        since: Optional[int],
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Fetch records updated since a certain time, bypassing any caching. Unlike get_records(),
+        this returns None when the remote server couldn't be asked, so that callers keeping their
+        own copy of remote records can tell a failure apart from there being no new records.
+        """
+        if not self.allow_scores:
+            return []
+
+        try:
+            servergame, serverversion = self.__translate(game, version)
+        except APIException:
+            # We can't ask for this game at all, so there are never any records.
+            return []
+
+        data: Dict[str, Any] = {
+            "ids": ids,
+            "type": idtype.value,
+            "objects": ["records"],
+        }
+        if since is not None:
+            data["since"] = since
+        try:
+            resp = self.__exchange_data(f"{self.API_VERSION}/{servergame}/{serverversion}", data)
+        except UnsupportedRequestAPIException:
+            # The remote server doesn't support this game or version, so there are never any records.
+            return []
+        except APIException:
+            return None
+        return resp["records"]
+
+    def __get_records_incremental(
+        self, servergame: str, serverversion: str, idtype: APIConstants, ids: List[str]
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch a full set of records, but only ask the remote server for records that were updated
+        since the last time we fetched the same set, merging them into what we already had.
+        """
+        # The list of IDs can be as long as every card a player has, so hash it down to keep the key
+        # short and free of the spaces that memcached doesn't allow.
+        idhash = hashlib.sha1(",".join(ids).encode("utf-8")).hexdigest()
+        key = f"records-{self.base_uri}-{servergame}-{serverversion}-{idtype.value}-{idhash}"
+        previous = cache.get(key)
+        now = Time.now()
+        if previous is not None and previous["expires"] <= now:
+            previous = None
+
+        data: Dict[str, Any] = {
+            "ids": ids,
+            "type": idtype.value,
+            "objects": ["records"],
+        }
+        if previous is not None and previous["since"] is not None:
+            data["since"] = previous["since"]
+        records = self.__exchange_data(f"{self.API_VERSION}/{servergame}/{serverversion}", data)["records"]
+
+        if "since" in data:
+
+            def record_key(record: Dict[str, Any]) -> Tuple[Any, ...]:
+                if idtype == APIConstants.ID_TYPE_SERVER:
+                    # There is only one record per chart, so a new one replaces whoever held it before.
+                    return (record["song"], record["chart"])
+                return (tuple(sorted(record["cards"])), record["song"], record["chart"])
+
+            merged = {record_key(record): record for record in previous["records"]}
+            merged.update({record_key(record): record for record in records})
+            records = list(merged.values())
+            expires = previous["expires"]
+        else:
+            expires = now + self.RECORDS_REFRESH
+
+        # Use the remote server's own update times to know what to ask for next, so that we don't
+        # miss anything if our clocks disagree. Asking for this second again just re-fetches a few
+        # records we already have.
+        updates = [int(record["updated"]) for record in records if "updated" in record]
+        cache.set(
+            key,
+            {"since": max(updates) if updates else None, "expires": expires, "records": records},
+            timeout=max(expires - now, 1),
+        )
+        return records
+
     @cache.memoize(Time.SECONDS_IN_MINUTE * 5)
     def get_statistics(
         self, game: GameConstants, version: int, idtype: APIConstants, ids: List[str]
@@ -1,4 +1,5 @@
 from typing import List, Optional, Dict, Any, Tuple, Set
+from typing_extensions import Final
 
 from bemani.common import (
     APIConstants,
@@ -6,20 +7,34 @@ from bemani.common import (
     VersionConstants,
     DBConstants,
     Parallel,
+    Time,
+    cache,
 )
 from bemani.data.interfaces import APIProviderInterface
 from bemani.data.api.base import BaseGlobalData
+from bemani.data.api.client import APIClient
 from bemani.data.mysql.user import UserData
 from bemani.data.mysql.music import MusicData
+from bemani.data.mysql.mirror import MirrorData
 from bemani.data.remoteuser import RemoteUser
 from bemani.data.types import UserID, Score, Song
 
 
 class GlobalMusicData(BaseGlobalData):
-    def __init__(self, api: APIProviderInterface, user: UserData, music: MusicData) -> None:
+    # How often to copy every remote record again instead of only what changed, so that
+    # anything removed on a remote server eventually goes away here as well.
+    MIRROR_FULL_REFRESH: Final[int] = Time.SECONDS_IN_DAY
+
+    # How long to keep copying remote records that nobody has asked for.
+    MIRROR_EXPIRY: Final[int] = Time.SECONDS_IN_WEEK
+
+    def __init__(
+        self, api: APIProviderInterface, user: UserData, music: MusicData, mirror: Optional[MirrorData] = None
+    ) -> None:
         super().__init__(api)
         self.user = user
         self.music = music
+        self.mirror = mirror
 
     def __get_cardids(self, userid: UserID) -> List[str]:
         if RemoteUser.is_remote(userid):
@@ -711,6 +726,101 @@ class GlobalMusicData(BaseGlobalData):
 
         return finalscores
 
+    def __get_remote_records(
+        self,
+        game: GameConstants,
+        version: int,
+        songid: Optional[int] = None,
+        songchart: Optional[int] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Look up records from every remote server when songid is None, or every score on every remote
+        server for a song otherwise. These come from the local copy kept up to date by refresh_mirror()
+        when there is one, so that nothing waits on a remote server.
+        """
+        if self.mirror is None:
+            if songid is None:
+                idtype, ids = APIConstants.ID_TYPE_SERVER, []
+            else:
+                idtype, ids = APIConstants.ID_TYPE_SONG, [songid] if songchart is None else [songid, songchart]
+            return Parallel.flatten(
+                Parallel.call(
+                    [client.get_records for client in self.clients],
+                    game,
+                    version,
+                    idtype,
+                    ids,
+                    since,
+                    until,
+                )
+            )
+
+        if not self.clients:
+            return []
+
+        # Make sure refresh_mirror() keeps copying these, but don't write that down on every request.
+        if cache.add(f"remote-sync-{game.value}-{version}-{songid}", True, timeout=Time.SECONDS_IN_HOUR):
+            self.mirror.want(game, version, songid)
+        return self.mirror.get_records(game, version, songid, songchart, since, until)
+
+    def refresh_mirror(self) -> None:
+        """
+        Update the local copy of remote records and scores with whatever changed on each remote
+        server since the last time this was called. Should be called from scheduled work.
+        """
+        if self.mirror is None:
+            return
+
+        servers = [(serverid, client) for serverid, client in self.servers if client.allow_scores]
+        self.mirror.delete_servers([serverid for serverid, _ in servers])
+        self.mirror.delete_unused(Time.now() - self.MIRROR_EXPIRY)
+
+        for game, version, songid, progress in self.mirror.get_syncs():
+            self.__refresh_mirror(servers, game, version, songid, progress)
+
+    def __refresh_mirror(
+        self,
+        servers: List[Tuple[int, APIClient]],
+        game: GameConstants,
+        version: int,
+        songid: Optional[int],
+        progress: Dict[str, Any],
+    ) -> None:
+        now = Time.now()
+        if songid is None:
+            idtype, ids = APIConstants.ID_TYPE_SERVER, []
+        else:
+            idtype, ids = APIConstants.ID_TYPE_SONG, [str(songid)]
+
+        def fetch(server: Tuple[int, APIClient]) -> Tuple[int, bool, Optional[List[Dict[str, Any]]]]:
+            serverid, client = server
+            serverprogress = progress.get(str(serverid), {})
+            since = serverprogress.get("since")
+            if since is None or serverprogress.get("full", 0) + self.MIRROR_FULL_REFRESH <= now:
+                return (serverid, True, client.get_updated_records(game, version, idtype, ids, None))
+            return (serverid, False, client.get_updated_records(game, version, idtype, ids, since))
+
+        for serverid, replace, records in Parallel.map(fetch, servers):
+            if records is None:
+                # Couldn't reach the server, so try again next time.
+                continue
+
+            self.mirror.put_records(serverid, game, version, songid, records, replace)
+
+            # Use the remote server's own update times to know what to ask for next, so that we
+            # don't miss anything if our clocks disagree. Asking for this second again just
+            # fetches a few records we already have.
+            serverprogress = progress.get(str(serverid), {})
+            updates = [int(record["updated"]) for record in records if "updated" in record]
+            serverprogress["since"] = max(updates + [serverprogress.get("since") or 0])
+            if replace:
+                serverprogress["full"] = now
+            progress[str(serverid)] = serverprogress
+
+        self.mirror.put_sync(game, version, songid, progress)
+
     def get_all_scores(
         self,
         game: GameConstants,
@@ -725,28 +835,12 @@ class GlobalMusicData(BaseGlobalData):
         if version is None or userid is not None or songid is None:
             return self.music.get_all_scores(game, version, userid, songid, songchart, since, until)
 
-        # Now, figure out the request key based on passed in parameters
-        if songchart is None:
-            songkey = [songid]
-        else:
-            songkey = [songid, songchart]
-
         # Now, fetch all the scores remotely and locally
         localcards, localscores, remotescores = Parallel.execute(
             [
                 self.user.get_all_cards,
                 lambda: self.music.get_all_scores(game, version, userid, songid, songchart, since, until),
-                lambda: Parallel.flatten(
-                    Parallel.call(
-                        [client.get_records for client in self.clients],
-                        game,
-                        version,
-                        APIConstants.ID_TYPE_SONG,
-                        songkey,
-                        since,
-                        until,
-                    )
-                ),
+                lambda: self.__get_remote_records(game, version, songid, songchart, since, until),
             ]
         )
 
@@ -829,15 +923,7 @@ class GlobalMusicData(BaseGlobalData):
             [
                 self.user.get_all_cards,
                 lambda: self.music.get_all_records(game, version, userlist, locationlist),
-                lambda: Parallel.flatten(
-                    Parallel.call(
-                        [client.get_records for client in self.clients],
-                        game,
-                        version,
-                        APIConstants.ID_TYPE_SERVER,
-                        [],
-                    )
-                ),
+                lambda: self.__get_remote_records(game, version),
             ]
         )
 
@@ -1,4 +1,4 @@
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 
 from bemani.common import APIConstants, GameConstants, Profile, Parallel
 from bemani.data.interfaces import APIProviderInterface
@@ -182,6 +182,7 @@ class GlobalUserData(BaseGlobalData):
                 ]
             )
 
+            matched: List[Tuple[UserID, Dict[str, Any]]] = []
             for profile in remote_profiles:
                 cards = [card.upper() for card in profile.get("cards", [])]
                 for card in cards:
@@ -189,31 +190,36 @@ class GlobalUserData(BaseGlobalData):
                     userid = card_to_userid.get(card)
                     if userid is None:
                         continue
-
-                    # Sanitize the returned data
-                    exact_match = profile.get("match", "partial") == "exact"
-                    refid = self.user.get_refid(game, version, userid)
-                    extid = self.user.get_extid(game, version, userid)
-
-                    # Add in our defaults we always provide
-                    local_profiles.append(
-                        (
-                            userid,
-                            self.__format_profile(
-                                Profile(
-                                    game,
-                                    version if exact_match else 0,
-                                    refid,
-                                    extid,
-                                    profile,
-                                ),
-                            ),
-                        ),
-                    )
+                    matched.append((userid, profile))
 
                     # Mark that we saw this card/user
                     del card_to_userid[card]
 
+            # Look up the refid/extid for every matched remote user at once instead of once per
+            # profile. Users that no remote server knows about don't need any, so don't create them.
+            ids = self.user.get_refids_and_extids(game, version, [userid for userid, _ in matched])
+
+            for userid, profile in matched:
+                # Sanitize the returned data
+                exact_match = profile.get("match", "partial") == "exact"
+                refid, extid = ids[userid]
+
+                # Add in our defaults we always provide
+                local_profiles.append(
+                    (
+                        userid,
+                        self.__format_profile(
+                            Profile(
+                                game,
+                                version if exact_match else 0,
+                                refid,
+                                extid,
+                                profile,
+                            ),
+                        ),
+                    ),
+                )
+
             # Finally, mark all missing remote profiles as None
             for card in card_to_userid:
                 local_profiles.append((card_to_userid[card], None))
@@ -0,0 +1,25 @@
+from typing import Any, Dict, Tuple
+
+from bemani.common import DBConstants, ValidatedDict
+
+
+class ClearRates:
+    """
+    Decides whether an attempt counts as a clear and whether it counts as a full combo for
+    games that keep running clear rate totals. These are shared between the game backends,
+    which update the totals as attempts are saved, and dbutils, which rebuilds them from
+    score history.
+    """
+
+    @staticmethod
+    def sdvx(data: Dict[str, Any]) -> Tuple[bool, bool]:
+        """
+        Given the data stored with a Sound Voltex attempt, return a tuple of whether the
+        attempt counts as a clear and whether it counts as a full combo.
+        """
+        clear_type = ValidatedDict(data).get_int("clear_type", DBConstants.SDVX_CLEAR_TYPE_NO_PLAY)
+        return (
+            clear_type not in [DBConstants.SDVX_CLEAR_TYPE_NO_PLAY, DBConstants.SDVX_CLEAR_TYPE_FAILED],
+            clear_type
+            in [DBConstants.SDVX_CLEAR_TYPE_ULTIMATE_CHAIN, DBConstants.SDVX_CLEAR_TYPE_PERFECT_ULTIMATE_CHAIN],
+        )
@@ -1,7 +1,7 @@
 import copy
 import os
 from sqlalchemy.engine import Engine
-from typing import Any, Dict, Optional, Set
+from typing import Any, Dict, List, Optional, Set
 
 from bemani.common import GameConstants, RegionConstants
 from bemani.data.types import ArcadeID
@@ -140,8 +140,13 @@ class PASELI:
 
 class WebHooks:
     def __init__(self, parent_config: "Config") -> None:
+        self.__config = parent_config
         self.discord = DiscordWebHooks(parent_config)
 
+    @property
+    def send_from_services(self) -> bool:
+        return bool(self.__config.get("webhooks", {}).get("send_from_services", True))
+
 
 class DiscordWebHooks:
     def __init__(self, parent_config: "Config") -> None:
@@ -151,6 +156,10 @@ class DiscordWebHooks:
         uri = self.__config.get("webhooks", {}).get("discord", {}).get(key.value)
         return str(uri) if uri else None
 
+    @property
+    def destinations(self) -> List[str]:
+        return [str(uri) for uri in (self.__config.get("webhooks", {}).get("discord") or {}).values() if uri]
+
 
 class Assets:
     def __init__(self, parent_config: "Config") -> None:
@@ -194,6 +203,16 @@ class Config(dict):
 
         return clone
 
+    def overlay(self) -> "Config":
+        """
+        Return a copy-on-write view of this config, for layering per-request keys such as
+        the client or machine on top of a long-lived config without deep-copying it. Top-level
+        keys can be set freely on the overlay. Any section looked up with [] is copied into
+        the overlay the first time, so sections can also be modified in place, one level
+        deep. Sections read through properties or .get() are shared with this config.
+        """
+        return ConfigOverlay(self)
+
     @property
     def filename(self) -> str:
         filename = self.get("filename")
@@ -244,3 +263,22 @@ class Config(dict):
     def event_log_duration(self) -> Optional[int]:
         duration = self.get("event_log_duration")
         return int(duration) if duration else None
+
+
+class ConfigOverlay(Config):
+    def __init__(self, parent: Config) -> None:
+        super().__init__(parent)
+        self.__copied: Set[str] = set()
+
+    def __getitem__(self, key: str) -> Any:
+        value = super().__getitem__(key)
+        if key not in self.__copied and isinstance(value, dict):
+            # First time this section has been asked for, copy it so writes stay local.
+            value = dict(value)
+            super().__setitem__(key, value)
+            self.__copied.add(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        super().__setitem__(key, value)
+        self.__copied.add(key)
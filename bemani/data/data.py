@@ -9,6 +9,9 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.engine import Engine
 from sqlalchemy.sql import text
 from sqlalchemy.exc import ProgrammingError
+from typing import Tuple
+
+from bemani.common import GameConstants
 
 from bemani.data.api.user import GlobalUserData
 from bemani.data.api.game import GlobalGameData
@@ -22,6 +25,7 @@ from bemani.data.mysql.game import GameData
 from bemani.data.mysql.network import NetworkData
 from bemani.data.mysql.lobby import LobbyData
 from bemani.data.mysql.api import APIData
+from bemani.data.mysql.mirror import MirrorData
 from bemani.data.triggers import Triggers
 
 
@@ -44,6 +48,7 @@ class LocalProvider:
         network: NetworkData,
         lobby: LobbyData,
         api: APIData,
+        mirror: MirrorData,
     ) -> None:
         self.user = user
         self.music = music
@@ -52,6 +57,7 @@ class LocalProvider:
         self.network = network
         self.lobby = lobby
         self.api = api
+        self.mirror = mirror
 
 
 class GlobalProvider:
@@ -73,6 +79,7 @@ class GlobalProvider:
             local.api,
             local.user,
             local.music,
+            local.mirror,
         )
         self.game = GlobalGameData(
             local.api,
@@ -109,6 +116,7 @@ class Data:
         self.__network = NetworkData(config, self.__session)
         self.__lobby = LobbyData(config, self.__session)
         self.__api = APIData(config, self.__session)
+        self.__mirror = MirrorData(config, self.__session)
         self.local = LocalProvider(
             self.__user,
             self.__music,
@@ -117,9 +125,18 @@ class Data:
             self.__network,
             self.__lobby,
             self.__api,
+            self.__mirror,
         )
         self.remote = GlobalProvider(self.local)
-        self.triggers = Triggers(config)
+        self.triggers = Triggers(config, self.__network)
+
+    @classmethod
+    def register_profile_fields(cls, game: GameConstants, fields: Tuple[str, ...]) -> None:
+        """
+        Ask for some top-level profile fields for a game series to be indexed whenever
+        a profile is saved. See UserData.register_profile_fields() for details.
+        """
+        UserData.register_profile_fields(game, fields)
 
     @classmethod
     def sqlalchemy_url(cls, config: Config) -> str:
@@ -206,6 +223,27 @@ class Data:
             "head",
         )
 
+    def reset(self) -> None:
+        """
+        Release the DB session for the current thread and drop any per-request state, so that
+        this object can be reused for another request instead of constructing a new one. A new
+        session is opened from the connection pool the next time a query is made.
+        """
+        self.__session.remove()
+        for local in [
+            self.local.user,
+            self.local.music,
+            self.local.machine,
+            self.local.game,
+            self.local.network,
+            self.local.lobby,
+            self.local.api,
+            self.local.mirror,
+        ]:
+            local.reset()
+        for remote in [self.remote.user, self.remote.music, self.remote.game]:
+            remote.reset()
+
     def close(self) -> None:
         """
         Close any open data connection.
@@ -1,6 +1,7 @@
 import json
 import random
-from typing import Dict, Any, Optional
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
 from typing_extensions import Final
 
 from bemani.common import Time
@@ -87,6 +88,25 @@ class BaseData:
             params if params is not None else {},
         )
 
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """
+        Execute every statement within this block in a single transaction, committing at
+        the end of the block or rolling back if an exception is raised. Blocks that are
+        nested inside another transaction become part of that transaction instead.
+        """
+        if self.__conn.is_active:
+            yield
+        else:
+            with self.__conn.begin():
+                yield
+
+    def reset(self) -> None:
+        """
+        Drop any state that was kept for the current request. Called by Data when it is
+        reused for another request. Override this in subclasses that keep such state.
+        """
+
     def serialize(self, data: Dict[str, Any]) -> str:
         """
         Given an arbitrary dict, serialize it to JSON.
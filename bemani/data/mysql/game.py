@@ -99,6 +99,25 @@ class GameData(BaseData):
         result = cursor.fetchone()
         return ValidatedDict(self.deserialize(result["data"]))
 
+    def get_settings_for_users(self, game: GameConstants, userids: List[UserID]) -> Dict[UserID, ValidatedDict]:
+        """
+        Does the exact same thing as get_settings but across a list of users instead of one,
+        in a single query.
+
+        Parameters:
+            game - Enum value identifying a game series.
+            userids - List of integers identifying users, as possibly looked up by UserData.
+
+        Returns:
+            A dictionary mapping each user ID to a dictionary representing game settings stored
+            by a game class. Users without settings for this game are left out.
+        """
+        if not userids:
+            return {}
+        sql = "SELECT userid, data FROM game_settings WHERE game = :game AND userid IN :userids"
+        cursor = self.execute(sql, {"game": game.value, "userids": userids})
+        return {UserID(result["userid"]): ValidatedDict(self.deserialize(result["data"])) for result in cursor}
+
     def put_settings(self, game: GameConstants, userid: UserID, settings: Dict[str, Any]) -> None:
         """
         Given a game and a user ID, save game-wide settings to the DB.
@@ -1,10 +1,13 @@
+import time
 from sqlalchemy import Table, Column, UniqueConstraint
-from sqlalchemy.types import String, Integer, JSON
 from sqlalchemy.dialects.mysql import BIGINT as BigInteger
+from sqlalchemy.orm import scoped_session
+from sqlalchemy.types import String, Integer, JSON
 from typing import Optional, Dict, List, Tuple, Any
 from typing_extensions import Final
 
 from bemani.common import GameConstants, ValidatedDict
+from bemani.data.config import Config
 from bemani.data.mysql.base import BaseData, metadata
 from bemani.data.types import Machine, Arcade, UserID, ArcadeID
 
@@ -85,6 +88,86 @@ class MachineData(BaseData):
     # and thus will start at 1.
     DEFAULT_SETTINGS_ARCADE: Final[ArcadeID] = ArcadeID(-1)
 
+    # Machines, arcades and arcade settings are looked up several times for every packet,
+    # so rows are cached both for the life of this object (usually a single request) and
+    # for a short time across requests in this process. Writes made through this class
+    # invalidate both, while writes from other processes are seen after this many seconds.
+    CACHE_TTL: int = 5
+
+    __cache: Dict[Tuple[str, Any], Tuple[float, Any]] = {}
+    __cache_generation: int = 0
+    __cache_stats: Dict[str, Dict[str, int]] = {
+        kind: {"hits": 0, "misses": 0} for kind in ["machine", "arcade", "settings"]
+    }
+
+    def __init__(self, config: Config, conn: scoped_session) -> None:
+        super().__init__(config, conn)
+        self.__local_cache: Dict[Tuple[str, Any], Tuple[float, Any]] = {}
+        self.__local_generation = MachineData.__cache_generation
+
+    def __cache_get(self, kind: str, key: Any) -> Tuple[bool, Any]:
+        """
+        Look up a cached row, first in this object's cache and then in the process-wide
+        cache. Returns a tuple of whether the row was found and the cached row itself.
+        """
+        if self.__local_generation != MachineData.__cache_generation:
+            # Something was written in this process since we last looked.
+            self.__local_cache.clear()
+            self.__local_generation = MachineData.__cache_generation
+
+        now = time.monotonic()
+        entry = self.__local_cache.get((kind, key))
+        if entry is None or entry[0] < now:
+            entry = MachineData.__cache.get((kind, key))
+            if entry is not None and entry[0] >= now:
+                self.__local_cache[(kind, key)] = entry
+
+        stats = MachineData.__cache_stats[kind]
+        if entry is None or entry[0] < now:
+            stats["misses"] += 1
+            return False, None
+        stats["hits"] += 1
+        return True, entry[1]
+
+    def __cache_put(self, kind: str, key: Any, row: Any) -> None:
+        entry = (time.monotonic() + MachineData.CACHE_TTL, row)
+        self.__local_cache[(kind, key)] = entry
+        MachineData.__cache[(kind, key)] = entry
+
+    def __cache_invalidate(self, kind: str, key: Optional[Any] = None) -> None:
+        """
+        Drop a cached row, or every cached row of a kind if no key is given. Any
+        other objects in this process will drop their own cached rows as well.
+        """
+        if key is not None:
+            MachineData.__cache.pop((kind, key), None)
+        else:
+            for cachekey in [k for k in list(MachineData.__cache) if k[0] == kind]:
+                MachineData.__cache.pop(cachekey, None)
+        MachineData.__cache_generation += 1
+
+    def reset(self) -> None:
+        self.__local_cache.clear()
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        """
+        Drop every machine, arcade and settings row cached in this process.
+        """
+        MachineData.__cache.clear()
+        MachineData.__cache_generation += 1
+
+    @classmethod
+    def get_cache_stats(cls) -> Dict[str, Dict[str, int]]:
+        """
+        Look up cache hit and miss counts for this process.
+
+        Returns:
+            A dictionary keyed by "machine", "arcade" and "settings", each containing
+            a dictionary with "hits" and "misses" counts.
+        """
+        return {kind: dict(stats) for kind, stats in MachineData.__cache_stats.items()}
+
     def from_port(self, port: int) -> Optional[str]:
         """
         Given a port, look up the PCBID attached to that port.
@@ -164,16 +247,24 @@ class MachineData(BaseData):
         Returns:
             A Machine object representing a machine, or None if not found.
         """
-        sql = """
-            SELECT name, description, arcadeid, id, port, game, version, data
-            FROM machine WHERE pcbid = :pcbid
-        """
-        cursor = self.execute(sql, {"pcbid": pcbid})
-        if cursor.rowcount != 1:
-            # Machine doesn't exist
-            return None
+        found, result = self.__cache_get("machine", pcbid)
+        if not found:
+            sql = """
+                SELECT name, description, arcadeid, id, port, game, version, data
+                FROM machine WHERE pcbid = :pcbid
+            """
+            cursor = self.execute(sql, {"pcbid": pcbid})
+            if cursor.rowcount != 1:
+                # Machine doesn't exist. We don't cache this, since the caller will
+                # usually create it and other processes might have already done so.
+                return None
+
+            row = cursor.fetchone()
+            result = {
+                key: row[key] for key in ["name", "description", "arcadeid", "id", "port", "game", "version", "data"]
+            }
+            self.__cache_put("machine", pcbid, result)
 
-        result = cursor.fetchone()
         return Machine(
             result["id"],
             pcbid,
@@ -248,6 +339,7 @@ class MachineData(BaseData):
                 "data": self.serialize(machine.data),
             },
         )
+        self.__cache_invalidate("machine", machine.pcbid)
 
     def create_machine(
         self,
@@ -320,6 +412,7 @@ class MachineData(BaseData):
         """
         sql = "DELETE FROM `machine` WHERE pcbid = :pcbid LIMIT 1"
         self.execute(sql, {"pcbid": pcbid})
+        self.__cache_invalidate("machine", pcbid)
 
     def create_arcade(
         self,
@@ -374,19 +467,24 @@ class MachineData(BaseData):
         Returns:
             An Arcade object if this arcade was found, or None otherwise.
         """
-        sql = """
-            SELECT name, description, pin, pref, area, data
-            FROM arcade WHERE id = :id
-        """
-        cursor = self.execute(sql, {"id": arcadeid})
-        if cursor.rowcount != 1:
-            # Arcade doesn't exist
-            return None
+        found, result = self.__cache_get("arcade", arcadeid)
+        if not found:
+            sql = """
+                SELECT name, description, pin, pref, area, data
+                FROM arcade WHERE id = :id
+            """
+            cursor = self.execute(sql, {"id": arcadeid})
+            if cursor.rowcount != 1:
+                # Arcade doesn't exist
+                return None
 
-        result = cursor.fetchone()
+            row = cursor.fetchone()
+            result = {key: row[key] for key in ["name", "description", "pin", "pref", "area", "data"]}
 
-        sql = "SELECT userid FROM arcade_owner WHERE arcadeid = :id"
-        cursor = self.execute(sql, {"id": arcadeid})
+            sql = "SELECT userid FROM arcade_owner WHERE arcadeid = :id"
+            cursor = self.execute(sql, {"id": arcadeid})
+            result["owners"] = tuple(owner["userid"] for owner in cursor)
+            self.__cache_put("arcade", arcadeid, result)
 
         return Arcade(
             arcadeid,
@@ -396,7 +494,7 @@ class MachineData(BaseData):
             result["pref"],
             result["area"] or None,
             self.deserialize(result["data"]),
-            [owner["userid"] for owner in cursor],
+            list(result["owners"]),
         )
 
     def put_arcade(self, arcade: Arcade) -> None:
@@ -438,6 +536,7 @@ class MachineData(BaseData):
                 VALUES (:userid, :arcadeid)
             """
             self.execute(sql, {"userid": owner, "arcadeid": arcade.id})
+        self.__cache_invalidate("arcade", arcade.id)
 
     def destroy_arcade(self, arcadeid: ArcadeID) -> None:
         """
@@ -453,6 +552,8 @@ class MachineData(BaseData):
         self.execute(sql, {"arcadeid": arcadeid})
         sql = "UPDATE `machine` SET arcadeid = NULL WHERE arcadeid = :arcadeid"
         self.execute(sql, {"arcadeid": arcadeid})
+        self.__cache_invalidate("arcade", arcadeid)
+        self.__cache_invalidate("machine")
 
     def get_all_arcades(self) -> List[Arcade]:
         """
@@ -502,18 +603,23 @@ class MachineData(BaseData):
         Returns:
             A dictionary representing game settings, or None if there are no settings for this game/user.
         """
-        sql = "SELECT data FROM arcade_settings WHERE arcadeid = :id AND game = :game AND version = :version AND type = :type"
-        cursor = self.execute(
-            sql,
-            {"id": arcadeid, "game": game.value, "version": version, "type": setting},
-        )
+        key = (arcadeid, game, version, setting)
+        found, data = self.__cache_get("settings", key)
+        if not found:
+            sql = "SELECT data FROM arcade_settings WHERE arcadeid = :id AND game = :game AND version = :version AND type = :type"
+            cursor = self.execute(
+                sql,
+                {"id": arcadeid, "game": game.value, "version": version, "type": setting},
+            )
 
-        if cursor.rowcount != 1:
+            # Missing settings are cached too, since most arcades never customize them.
+            data = cursor.fetchone()["data"] if cursor.rowcount == 1 else None
+            self.__cache_put("settings", key, data)
+
+        if data is None:
             # Settings doesn't exist
             return None
-
-        result = cursor.fetchone()
-        return ValidatedDict(self.deserialize(result["data"]))
+        return ValidatedDict(self.deserialize(data))
 
     def put_settings(
         self,
@@ -548,6 +654,7 @@ class MachineData(BaseData):
                 "data": self.serialize(data),
             },
         )
+        self.__cache_invalidate("settings", (arcadeid, game, version, setting))
 
     def get_balances(self, arcadeid: ArcadeID) -> List[Tuple[UserID, int]]:
         """
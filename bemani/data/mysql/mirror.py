@@ -0,0 +1,282 @@
+from sqlalchemy import Table, Column, Index, UniqueConstraint
+from sqlalchemy.types import String, Integer, JSON
+from typing import Optional, Dict, List, Tuple, Any
+from typing_extensions import Final
+
+from bemani.common import GameConstants, Time
+from bemani.data.mysql.base import BaseData, metadata
+
+"""
+Table for storing a copy of the records held on each remote server, as returned by
+the BEMAPI records object with a server ID type. There is one record per song and
+chart for each server. The data column holds the record exactly as the remote server
+returned it, so it can be merged with local scores the same way a live response is.
+"""
+remote_record = Table(
+    "remote_record",
+    metadata,
+    Column("id", Integer, nullable=False, primary_key=True),
+    Column("serverid", Integer, nullable=False),
+    Column("game", String(32), nullable=False),
+    Column("version", Integer, nullable=False),
+    Column("songid", Integer, nullable=False),
+    Column("chart", Integer, nullable=False),
+    Column("updated", Integer, nullable=False),
+    Column("data", JSON, nullable=False),
+    UniqueConstraint("serverid", "game", "version", "songid", "chart", name="serverid_game_version_songid_chart"),
+    Index("game_version", "game", "version"),
+    mysql_charset="utf8mb4",
+)
+
+"""
+Table for storing a copy of every player's score on remote servers for songs that
+have been asked about recently, as returned by the BEMAPI records object with a song
+ID type. Players are identified by the first of their card IDs, and the data column
+holds the score exactly as the remote server returned it.
+"""
+remote_score = Table(
+    "remote_score",
+    metadata,
+    Column("id", Integer, nullable=False, primary_key=True),
+    Column("serverid", Integer, nullable=False),
+    Column("game", String(32), nullable=False),
+    Column("version", Integer, nullable=False),
+    Column("songid", Integer, nullable=False),
+    Column("chart", Integer, nullable=False),
+    Column("cardid", String(16), nullable=False),
+    Column("updated", Integer, nullable=False),
+    Column("data", JSON, nullable=False),
+    UniqueConstraint(
+        "serverid", "game", "version", "songid", "chart", "cardid", name="serverid_game_version_songid_chart_cardid"
+    ),
+    Index("game_version_songid", "game", "version", "songid"),
+    mysql_charset="utf8mb4",
+)
+
+"""
+Table for keeping track of which remote records and scores should be copied, and how far
+along copying them is for each remote server. A songid of -1 means the records for every
+song. Entries which haven't been used in a while are removed along with their copies.
+"""
+remote_sync = Table(
+    "remote_sync",
+    metadata,
+    Column("id", Integer, nullable=False, primary_key=True),
+    Column("game", String(32), nullable=False),
+    Column("version", Integer, nullable=False),
+    Column("songid", Integer, nullable=False),
+    Column("last_used", Integer, nullable=False, index=True),
+    Column("data", JSON, nullable=False),
+    UniqueConstraint("game", "version", "songid", name="game_version_songid"),
+    mysql_charset="utf8mb4",
+)
+
+
+class MirrorData(BaseData):
+    # How many records to write in a single statement.
+    CHUNK_SIZE: Final[int] = 500
+
+    def want(self, game: GameConstants, version: int, songid: Optional[int]) -> None:
+        """
+        Note that remote records for a game and version, or remote scores for a single song,
+        were asked for, so that they keep getting copied. This happens while serving requests,
+        so it is allowed in read-only mode just like session bookkeeping.
+
+        Parameters:
+            game - Enum value identifying a game series.
+            version - Integer identifying the version of the game in the series.
+            songid - Integer identifying a song to copy every score for, or None for records.
+        """
+        sql = """
+            INSERT INTO remote_sync (game, version, songid, last_used, data)
+            VALUES (:game, :version, :songid, :now, '{}')
+            ON DUPLICATE KEY UPDATE last_used = VALUES(last_used)
+        """
+        self.execute(
+            sql,
+            {"game": game.value, "version": version, "songid": -1 if songid is None else songid, "now": Time.now()},
+            safe_write_operation=True,
+        )
+
+    def get_syncs(self) -> List[Tuple[GameConstants, int, Optional[int], Dict[str, Any]]]:
+        """
+        Look up everything that should be copied from remote servers.
+
+        Returns:
+            A list of tuples containing the game, version, song ID or None for records, and a
+            dictionary of copying progress keyed by server ID as previously saved with put_sync().
+        """
+        sql = "SELECT game, version, songid, data FROM remote_sync"
+        cursor = self.execute(sql)
+        syncs: List[Tuple[GameConstants, int, Optional[int], Dict[str, Any]]] = []
+        for result in cursor:
+            try:
+                game = GameConstants(result["game"])
+            except ValueError:
+                continue
+            songid = None if result["songid"] == -1 else result["songid"]
+            syncs.append((game, result["version"], songid, self.deserialize(result["data"])))
+        return syncs
+
+    def put_sync(self, game: GameConstants, version: int, songid: Optional[int], data: Dict[str, Any]) -> None:
+        """
+        Save how far along copying is for some remote records or scores.
+
+        Parameters:
+            game - Enum value identifying a game series.
+            version - Integer identifying the version of the game in the series.
+            songid - Integer identifying a song, or None for records.
+            data - Dictionary of copying progress keyed by server ID.
+        """
+        sql = "UPDATE remote_sync SET data = :data WHERE game = :game AND version = :version AND songid = :songid"
+        self.execute(
+            sql,
+            {
+                "game": game.value,
+                "version": version,
+                "songid": -1 if songid is None else songid,
+                "data": self.serialize(data),
+            },
+        )
+
+    def delete_unused(self, oldest: int) -> None:
+        """
+        Stop copying anything that hasn't been asked for recently, and remove the copies.
+
+        Parameters:
+            oldest - Integer representing unix timestamp. Anything not asked for since then is removed.
+        """
+        sql = "SELECT game, version, songid FROM remote_sync WHERE last_used < :oldest"
+        cursor = self.execute(sql, {"oldest": oldest})
+        for result in list(cursor):
+            params = {"game": result["game"], "version": result["version"], "songid": result["songid"]}
+            with self.transaction():
+                if result["songid"] == -1:
+                    sql = "DELETE FROM remote_record WHERE game = :game AND version = :version"
+                else:
+                    sql = "DELETE FROM remote_score WHERE game = :game AND version = :version AND songid = :songid"
+                self.execute(sql, params)
+                sql = "DELETE FROM remote_sync WHERE game = :game AND version = :version AND songid = :songid"
+                self.execute(sql, params)
+
+    def delete_servers(self, serverids: List[int]) -> None:
+        """
+        Remove copies of records and scores from any server except the given ones, for
+        when servers are removed or stop sharing scores.
+
+        Parameters:
+            serverids - List of integer server IDs whose copies should be kept.
+        """
+        for table in ["remote_record", "remote_score"]:
+            if serverids:
+                sql = f"DELETE FROM {table} WHERE serverid NOT IN :serverids"
+            else:
+                sql = f"DELETE FROM {table}"
+            self.execute(sql, {"serverids": serverids})
+
+    def put_records(
+        self,
+        serverid: int,
+        game: GameConstants,
+        version: int,
+        songid: Optional[int],
+        records: List[Dict[str, Any]],
+        replace: bool,
+    ) -> None:
+        """
+        Save a copy of records or scores fetched from a remote server.
+
+        Parameters:
+            serverid - Integer identifying the remote server.
+            game - Enum value identifying a game series.
+            version - Integer identifying the version of the game in the series.
+            songid - Integer identifying the song these are every score for, or None for records.
+            records - List of records as returned by the remote server.
+            replace - Whether these replace every previous copy, instead of only being updates.
+        """
+        params: Dict[str, Any] = {"serverid": serverid, "game": game.value, "version": version, "songid": songid}
+        with self.transaction():
+            if replace:
+                if songid is None:
+                    sql = "DELETE FROM remote_record WHERE serverid = :serverid AND game = :game AND version = :version"
+                else:
+                    sql = """
+                        DELETE FROM remote_score
+                        WHERE serverid = :serverid AND game = :game AND version = :version AND songid = :songid
+                    """
+                self.execute(sql, params)
+
+            for start in range(0, len(records), self.CHUNK_SIZE):
+                values: List[str] = []
+                chunk = dict(params)
+                for i, record in enumerate(records[start : start + self.CHUNK_SIZE]):
+                    cards = sorted(card.upper() for card in record.get("cards", []))
+                    if songid is None:
+                        values.append(f"(:serverid, :game, :version, :songid{i}, :chart{i}, :updated{i}, :data{i})")
+                    else:
+                        values.append(
+                            f"(:serverid, :game, :version, :songid{i}, :chart{i}, :cardid{i}, :updated{i}, :data{i})"
+                        )
+                    chunk[f"songid{i}"] = int(record["song"])
+                    chunk[f"chart{i}"] = int(record["chart"])
+                    chunk[f"cardid{i}"] = cards[0] if cards else ""
+                    chunk[f"updated{i}"] = int(record.get("updated", record.get("timestamp", 0)))
+                    chunk[f"data{i}"] = self.serialize(record)
+
+                if songid is None:
+                    sql = f"""
+                        INSERT INTO remote_record (serverid, game, version, songid, chart, updated, data)
+                        VALUES {", ".join(values)}
+                        ON DUPLICATE KEY UPDATE updated = VALUES(updated), data = VALUES(data)
+                    """
+                else:
+                    sql = f"""
+                        INSERT INTO remote_score (serverid, game, version, songid, chart, cardid, updated, data)
+                        VALUES {", ".join(values)}
+                        ON DUPLICATE KEY UPDATE updated = VALUES(updated), data = VALUES(data)
+                    """
+                self.execute(sql, chunk)
+
+    def get_records(
+        self,
+        game: GameConstants,
+        version: int,
+        songid: Optional[int] = None,
+        songchart: Optional[int] = None,
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Look up copies of remote records, or of every remote score for a song.
+
+        Parameters:
+            game - Enum value identifying a game series.
+            version - Integer identifying the version of the game in the series.
+            songid - Integer identifying a song to look up every score for, or None for records.
+            songchart - Integer identifying a chart of the song, or None for every chart.
+            since - Return only scores updated at or after this unix timestamp.
+            until - Return only scores updated before this unix timestamp.
+
+        Returns:
+            A list of records or scores, as returned by the remote servers they came from.
+        """
+        params: Dict[str, Any] = {
+            "game": game.value,
+            "version": version,
+            "songid": songid,
+            "songchart": songchart,
+            "since": since,
+            "until": until,
+        }
+        if songid is None:
+            sql = "SELECT data FROM remote_record WHERE game = :game AND version = :version"
+        else:
+            sql = "SELECT data FROM remote_score WHERE game = :game AND version = :version AND songid = :songid"
+            if songchart is not None:
+                sql += " AND chart = :songchart"
+        if since is not None:
+            sql += " AND updated >= :since"
+        if until is not None:
+            sql += " AND updated < :until"
+        cursor = self.execute(sql, params)
+        return [self.deserialize(result["data"]) for result in cursor]
@@ -2,7 +2,7 @@ from sqlalchemy import Table, Column, UniqueConstraint
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.types import String, Integer, JSON
 from sqlalchemy.dialects.mysql import BIGINT as BigInteger
-from typing import Optional, Dict, List, Tuple, Any
+from typing import Callable, Final, Optional, Dict, List, Tuple, Any
 
 from bemani.common import GameConstants, Time
 from bemani.data.exceptions import ScoreSaveException
@@ -13,7 +13,8 @@ from bemani.data.types import Score, Attempt, Song, UserID
 Table for storing a score for a particular game. This is keyed by userid and
 musicid, as a user can only have one score for a particular song/chart combo.
 This has a JSON blob for any data the game wishes to store, such as points, medals,
-ghost, etc.
+ghost, etc. The number of attempts the user has made on this song/chart is kept up to
+date by put_attempt(), so it doesn't need to be counted from score_history.
 
 Note that this is NOT keyed by game song id and chart, but by an internal musicid
 managed by the music table. This is so we can support keeping the same score across
@@ -29,6 +30,7 @@ score = Table(
     Column("timestamp", Integer, nullable=False, index=True),
     Column("update", Integer, nullable=False, index=True),
     Column("lid", Integer, nullable=False, index=True),
+    Column("plays", Integer, nullable=False),
     Column("data", JSON, nullable=False),
     UniqueConstraint("userid", "musicid", name="userid_musicid"),
     mysql_charset="utf8mb4",
@@ -79,8 +81,130 @@ music = Table(
     mysql_charset="utf8mb4",
 )
 
+"""
+Table for storing the number of attempts by all users for each musicid, so that looking up
+how many times a song has been played doesn't need to count every attempt. This is kept up
+to date by put_attempt(), and is keyed by musicid only just like score_history.
+"""
+play_count = Table(
+    "play_count",
+    metadata,
+    Column("musicid", Integer, nullable=False, primary_key=True),
+    Column("plays", Integer, nullable=False),
+    mysql_charset="utf8mb4",
+)
+
+"""
+Table for storing the number of attempts by all users for each musicid on each day, where
+the day is the number of days since the epoch. This is kept up to date by put_attempt() so
+that hit charts don't need to count every attempt. Days older than HIT_CHART_DAYS are
+merged into a single bucket for day 0 by compact_hit_chart(), since hit charts only ever
+look at recent days or all time.
+"""
+hit_chart = Table(
+    "hit_chart",
+    metadata,
+    Column("musicid", Integer, nullable=False),
+    Column("day", Integer, nullable=False),
+    Column("plays", Integer, nullable=False),
+    UniqueConstraint("musicid", "day", name="musicid_day"),
+    mysql_charset="utf8mb4",
+)
+
+"""
+Table for storing running totals of attempts for each musicid, so that games which display
+clear rates don't need to load every attempt to calculate them. This is kept up to date by
+put_attempt() for games that say whether an attempt was a clear, and can be rebuilt from
+score_history with rebuild_clear_rates(). Like score_history, this is keyed by musicid only,
+so totals are shared between versions of a game that share a song.
+"""
+clear_rate = Table(
+    "clear_rate",
+    metadata,
+    Column("musicid", Integer, nullable=False, primary_key=True),
+    Column("plays", Integer, nullable=False),
+    Column("clears", Integer, nullable=False),
+    Column("combos", Integer, nullable=False),
+    Column("points", BigInteger, nullable=False),
+    mysql_charset="utf8mb4",
+)
+
+"""
+Table for storing the current record holder for each musicid, so that looking up records
+doesn't need to look at every score. This is kept up to date by put_score() whenever a new
+record is saved. Since scores only ever go up, a new score can only take a record away from
+the current holder, never give it to somebody else.
+"""
+record = Table(
+    "record",
+    metadata,
+    Column("musicid", Integer, nullable=False, primary_key=True),
+    Column("userid", BigInteger(unsigned=True), nullable=False),
+    Column("points", Integer, nullable=False),
+    Column("timestamp", Integer, nullable=False),
+    mysql_charset="utf8mb4",
+)
+
+"""
+Table for storing the current record holder for each musicid at each location, in the same
+manner as the record table. A score belongs to the location its record was earned at, so when
+a user's record moves somewhere else, the next best score at the old location takes over.
+"""
+location_record = Table(
+    "location_record",
+    metadata,
+    Column("musicid", Integer, nullable=False),
+    Column("lid", Integer, nullable=False),
+    Column("userid", BigInteger(unsigned=True), nullable=False, index=True),
+    Column("points", Integer, nullable=False),
+    Column("timestamp", Integer, nullable=False),
+    UniqueConstraint("musicid", "lid", name="musicid_lid"),
+    mysql_charset="utf8mb4",
+)
+
 
 class MusicData(BaseData):
+    # How many days of daily plays are kept in the hit chart table before being compacted.
+    # Hit charts for longer periods than this are counted from score history instead.
+    HIT_CHART_DAYS: Final[int] = 400
+
+    # The music table only changes when the importer runs, so the musicid for every
+    # song/chart in a game version is loaded once per process and kept in a map. New songs
+    # imported by another process are picked up by looking up anything missing from the
+    # map, since the importer never changes the musicid of an existing song/chart.
+    __musicids: Dict[Tuple[str, int], Dict[Tuple[int, int], int]] = {}
+    __musicid_generation: int = 0
+
+    @classmethod
+    def invalidate_musicids(cls, game: Optional[GameConstants] = None, version: Optional[int] = None) -> None:
+        """
+        Drop cached musicids so they will be reloaded on next use. Called by the importer
+        after it modifies the music table.
+
+        Parameters:
+            game - Enum value representing a game series, or None for all games.
+            version - Integer representing which version of the game, or None for all versions.
+        """
+        for key in list(MusicData.__musicids):
+            if (game is None or key[0] == game.value) and (version is None or key[1] == version):
+                MusicData.__musicids.pop(key, None)
+        MusicData.__musicid_generation += 1
+
+    def __get_musicid_map(self, game: GameConstants, version: int) -> Dict[Tuple[int, int], int]:
+        """
+        Look up the map of songid/chart to musicid for a game version, loading it if needed.
+        """
+        musicids = MusicData.__musicids.get((game.value, version))
+        if musicids is None:
+            generation = MusicData.__musicid_generation
+            sql = "SELECT id, songid, chart FROM music WHERE game = :game AND version = :version"
+            cursor = self.execute(sql, {"game": game.value, "version": version})
+            musicids = {(result["songid"], result["chart"]): result["id"] for result in cursor}
+            if generation == MusicData.__musicid_generation:
+                # Only keep this if the music table wasn't modified while we were loading.
+                MusicData.__musicids[(game.value, version)] = musicids
+        return musicids
+
     def __get_musicid(self, game: GameConstants, version: int, songid: int, songchart: int) -> int:
         """
         Given a game/version/songid/chart, look up the unique music ID for this song.
@@ -94,6 +218,12 @@ class MusicData(BaseData):
         Returns:
             Integer representing music ID if found or raises an exception otherwise.
         """
+        musicids = self.__get_musicid_map(game, version)
+        musicid = musicids.get((songid, songchart))
+        if musicid is not None:
+            return musicid
+
+        # Possibly imported since we loaded the map.
         sql = "SELECT id FROM music WHERE songid = :songid AND chart = :chart AND game = :game AND version = :version"
         cursor = self.execute(
             sql,
@@ -108,8 +238,46 @@ class MusicData(BaseData):
             # music doesn't exist
             raise Exception(f"Song {songid} chart {songchart} doesn't exist for game {game} version {version}")
         result = cursor.fetchone()
+        musicids[(songid, songchart)] = result["id"]
         return result["id"]
 
+    def get_musicids(
+        self,
+        game: GameConstants,
+        version: int,
+        songs: List[Tuple[int, int]],
+    ) -> Dict[Tuple[int, int], int]:
+        """
+        Given a game/version and a list of songid/chart pairs, look up the unique music ID
+        for each song in bulk.
+
+        Parameters:
+            game - Enum value representing a game series.
+            version - Integer representing which version of the game.
+            songs - List of tuples of song ID and chart number according to the game.
+
+        Returns:
+            A dictionary keyed by songid/chart tuple whose values are the music ID for that
+            song. Songs that do not exist are left out.
+        """
+        musicids = self.__get_musicid_map(game, version)
+        missing = {song for song in songs if song not in musicids}
+        if missing:
+            # Possibly imported since we loaded the map.
+            sql = "SELECT id, songid, chart FROM music WHERE game = :game AND version = :version AND songid IN :songids"
+            cursor = self.execute(
+                sql,
+                {
+                    "game": game.value,
+                    "version": version,
+                    "songids": list({songid for songid, _ in missing}),
+                },
+            )
+            for result in cursor:
+                musicids[(result["songid"], result["chart"])] = result["id"]
+
+        return {song: musicids[song] for song in songs if song in musicids}
+
     def put_score(
         self,
         game: GameConstants,
@@ -142,12 +310,14 @@ class MusicData(BaseData):
         musicid = self.__get_musicid(game, version, songid, songchart)
         ts = timestamp if timestamp is not None else Time.now()
 
-        # Add to user score
+        # Add to user score. Attempts are sometimes saved before the score they belong to, so a
+        # brand new score starts out with however many attempts were already saved for it.
+        plays = "SELECT COUNT(*) FROM score_history WHERE userid = :userid AND musicid = :musicid"
         if new_record:
             # We want to update the timestamp/location to now if its a new record.
-            sql = """
-                INSERT INTO `score` (`userid`, `musicid`, `points`, `data`, `timestamp`, `update`, `lid`)
-                VALUES (:userid, :musicid, :points, :data, :timestamp, :update, :location)
+            sql = f"""
+                INSERT INTO `score` (`userid`, `musicid`, `points`, `data`, `timestamp`, `update`, `lid`, `plays`)
+                VALUES (:userid, :musicid, :points, :data, :timestamp, :update, :location, ({plays}))
                 ON DUPLICATE KEY UPDATE
                     data = VALUES(data),
                     points = VALUES(points),
@@ -158,26 +328,93 @@ class MusicData(BaseData):
         else:
             # We don't want to add the timestamp of the record since it wasn't a new high score.
             # We also don't want to update thet location since this wasn't a new record.
-            sql = """
-                INSERT INTO `score` (`userid`, `musicid`, `points`, `data`, `timestamp`, `update`, `lid`)
-                VALUES (:userid, :musicid, :points, :data, :timestamp, :update, :location)
+            sql = f"""
+                INSERT INTO `score` (`userid`, `musicid`, `points`, `data`, `timestamp`, `update`, `lid`, `plays`)
+                VALUES (:userid, :musicid, :points, :data, :timestamp, :update, :location, ({plays}))
                 ON DUPLICATE KEY UPDATE
                     data = VALUES(data),
                     points = VALUES(points),
                     `update` = VALUES(`update`)
             """
-        self.execute(
-            sql,
-            {
-                "userid": userid,
-                "musicid": musicid,
-                "points": points,
-                "data": self.serialize(data),
-                "timestamp": ts,
-                "update": ts,
-                "location": location,
-            },
+        with self.transaction():
+            self.execute(
+                sql,
+                {
+                    "userid": userid,
+                    "musicid": musicid,
+                    "points": points,
+                    "data": self.serialize(data),
+                    "timestamp": ts,
+                    "update": ts,
+                    "location": location,
+                },
+            )
+            if new_record:
+                self.__put_records(userid, [(musicid, points, ts, location)])
+
+    def __put_records(self, userid: UserID, records: List[Tuple[int, int, int, int]]) -> None:
+        """
+        Given a user and a list of musicid, points, timestamp and location tuples for new records
+        that were just saved to the score table, update the record holders for those songs, both
+        overall and at each location.
+        """
+        # King-of-the-hill rules are in effect, so a tied score earned later takes the record.
+        # MySQL assigns these left to right, so points must go last since the others compare
+        # against the old value.
+        better = "VALUES(points) > points OR (VALUES(points) = points AND VALUES(timestamp) >= timestamp)"
+        update = f"""
+            userid = IF({better}, VALUES(userid), userid),
+            timestamp = IF({better}, VALUES(timestamp), timestamp),
+            points = GREATEST(points, VALUES(points))
+        """
+
+        values: List[str] = []
+        locationvalues: List[str] = []
+        locations: Dict[int, int] = {}
+        params: Dict[str, Any] = {"userid": userid}
+        for i, (musicid, points, timestamp, location) in enumerate(records):
+            values.append(f"(:musicid{i}, :userid, :points{i}, :timestamp{i})")
+            locationvalues.append(f"(:musicid{i}, :location{i}, :userid, :points{i}, :timestamp{i})")
+            locations[musicid] = location
+            params[f"musicid{i}"] = musicid
+            params[f"points{i}"] = points
+            params[f"timestamp{i}"] = timestamp
+            params[f"location{i}"] = location
+
+        sql = f"""
+            INSERT INTO `record` (musicid, userid, points, timestamp)
+            VALUES {", ".join(values)}
+            ON DUPLICATE KEY UPDATE {update}
+        """
+        self.execute(sql, params)
+        sql = f"""
+            INSERT INTO `location_record` (musicid, lid, userid, points, timestamp)
+            VALUES {", ".join(locationvalues)}
+            ON DUPLICATE KEY UPDATE {update}
+        """
+        self.execute(sql, params)
+
+        # If this user held a record at a different location, their score no longer counts
+        # there, so find the next best score at that location.
+        cursor = self.execute(
+            "SELECT musicid, lid FROM location_record WHERE userid = :userid AND musicid IN :musicids",
+            {"userid": userid, "musicids": list(locations)},
         )
+        moved = [
+            (result["musicid"], result["lid"]) for result in cursor if result["lid"] != locations[result["musicid"]]
+        ]
+        for musicid, location in moved:
+            self.execute(
+                "DELETE FROM location_record WHERE musicid = :musicid AND lid = :location",
+                {"musicid": musicid, "location": location},
+            )
+            sql = """
+                INSERT INTO `location_record` (musicid, lid, userid, points, timestamp)
+                SELECT musicid, lid, userid, points, timestamp FROM score
+                WHERE musicid = :musicid AND lid = :location
+                ORDER BY points DESC, timestamp DESC LIMIT 1
+            """
+            self.execute(sql, {"musicid": musicid, "location": location})
 
     def put_attempt(
         self,
@@ -191,6 +428,8 @@ class MusicData(BaseData):
         data: Dict[str, Any],
         new_record: bool,
         timestamp: Optional[int] = None,
+        cleared: Optional[bool] = None,
+        full_combo: bool = False,
     ) -> None:
         """
         Given a game/version/song/chart and user ID, save a single score attempt.
@@ -209,34 +448,255 @@ class MusicData(BaseData):
             data - Optional data that the game wishes to record along with the score.
             new_record - Whether this score was a new record or not.
             timestamp - Optional integer specifying when the attempt happened.
+            cleared - Whether this attempt counts as a clear, for games that display clear rates.
+                      If this is None, clear rates are not updated for this attempt.
+            full_combo - Whether this attempt counts as a full combo, for games that display
+                         clear rates.
         """
         # First look up the song/chart from the music DB
         musicid = self.__get_musicid(game, version, songid, songchart)
         ts = timestamp if timestamp is not None else Time.now()
 
-        # Add to score history
-        sql = """
-            INSERT INTO `score_history` (userid, musicid, timestamp, lid, new_record, points, data)
-            VALUES (:userid, :musicid, :timestamp, :location, :new_record, :points, :data)
+        with self.transaction():
+            # Add to score history
+            sql = """
+                INSERT INTO `score_history` (userid, musicid, timestamp, lid, new_record, points, data)
+                VALUES (:userid, :musicid, :timestamp, :location, :new_record, :points, :data)
+            """
+            try:
+                self.execute(
+                    sql,
+                    {
+                        "userid": userid if userid is not None else 0,
+                        "musicid": musicid,
+                        "timestamp": ts,
+                        "location": location,
+                        "new_record": 1 if new_record else 0,
+                        "points": points,
+                        "data": self.serialize(data),
+                    },
+                )
+            except IntegrityError:
+                raise ScoreSaveException(
+                    f"There is already an attempt by {userid if userid is not None else 0} for music id {musicid} at {ts}"
+                )
+            self.__put_plays(userid, [(musicid, ts)])
+
+            if cleared is not None:
+                # Keep the running totals for clear rates in sync with score history.
+                sql = """
+                    INSERT INTO `clear_rate` (musicid, plays, clears, combos, points)
+                    VALUES (:musicid, 1, :clears, :combos, :points)
+                    ON DUPLICATE KEY UPDATE
+                        plays = plays + 1,
+                        clears = clears + VALUES(clears),
+                        combos = combos + VALUES(combos),
+                        points = points + VALUES(points)
+                """
+                self.execute(
+                    sql,
+                    {
+                        "musicid": musicid,
+                        "clears": 1 if cleared else 0,
+                        "combos": 1 if full_combo else 0,
+                        "points": points,
+                    },
+                )
+
+    def __get_musicids_for(
+        self,
+        game: GameConstants,
+        version: int,
+        attempts: List[Attempt],
+    ) -> Dict[Tuple[int, int], int]:
         """
-        try:
-            self.execute(
-                sql,
-                {
-                    "userid": userid if userid is not None else 0,
-                    "musicid": musicid,
-                    "timestamp": ts,
-                    "location": location,
-                    "new_record": 1 if new_record else 0,
-                    "points": points,
-                    "data": self.serialize(data),
-                },
-            )
-        except IntegrityError:
-            raise ScoreSaveException(
-                f"There is already an attempt by {userid if userid is not None else 0} for music id {musicid} at {ts}"
+        Look up the unique music ID for every song/chart in a list of scores or attempts,
+        raising an exception if any of them do not exist.
+        """
+        songs = [(attempt.id, attempt.chart) for attempt in attempts]
+        musicids = self.get_musicids(game, version, songs)
+        for songid, songchart in songs:
+            if (songid, songchart) not in musicids:
+                # music doesn't exist
+                raise Exception(f"Song {songid} chart {songchart} doesn't exist for game {game} version {version}")
+        return musicids
+
+    def put_scores(
+        self,
+        game: GameConstants,
+        version: int,
+        userid: UserID,
+        scores: List[Attempt],
+    ) -> None:
+        """
+        Given a game/version and user ID, save a new/updated high score for several song/charts
+        at once. This is equivalent to calling put_score() for each score, but all of the scores
+        are written in a single transaction using as few statements as possible.
+
+        Parameters:
+            game - Enum value representing a game series.
+            version - Integer representing which version of the game.
+            userid - Integer representing a user. Usually looked up with UserData.
+            scores - List of Attempt objects, one for each song/chart. The key is ignored and
+                     new_record has the same meaning as in put_score().
+        """
+        if not scores:
+            return
+        musicids = self.__get_musicids_for(game, version, scores)
+
+        with self.transaction():
+            for new_record in [True, False]:
+                records = [score for score in scores if score.new_record == new_record]
+                if not records:
+                    continue
+
+                values: List[str] = []
+                params: Dict[str, Any] = {"userid": userid}
+                for i, score in enumerate(records):
+                    values.append(
+                        f"(:userid, :musicid{i}, :points{i}, :data{i}, :timestamp{i}, :timestamp{i}, :location{i}, "
+                        + f"(SELECT COUNT(*) FROM score_history WHERE userid = :userid AND musicid = :musicid{i}))"
+                    )
+                    params[f"musicid{i}"] = musicids[(score.id, score.chart)]
+                    params[f"points{i}"] = score.points
+                    params[f"data{i}"] = self.serialize(score.data)
+                    params[f"timestamp{i}"] = score.timestamp
+                    params[f"location{i}"] = score.location
+
+                if new_record:
+                    # We want to update the timestamp/location to now if its a new record.
+                    update = """
+                        data = VALUES(data),
+                        points = VALUES(points),
+                        `update` = VALUES(`update`),
+                        timestamp = VALUES(timestamp),
+                        lid = VALUES(lid)
+                    """
+                else:
+                    # We don't want to add the timestamp of the record since it wasn't a new high score.
+                    # We also don't want to update thet location since this wasn't a new record.
+                    update = """
+                        data = VALUES(data),
+                        points = VALUES(points),
+                        `update` = VALUES(`update`)
+                    """
+                sql = f"""
+                    INSERT INTO `score` (`userid`, `musicid`, `points`, `data`, `timestamp`, `update`, `lid`, `plays`)
+                    VALUES {", ".join(values)}
+                    ON DUPLICATE KEY UPDATE {update}
+                """
+                self.execute(sql, params)
+
+                if new_record:
+                    self.__put_records(
+                        userid,
+                        [
+                            (musicids[(score.id, score.chart)], score.points, score.timestamp, score.location)
+                            for score in records
+                        ],
+                    )
+
+    def put_attempts(
+        self,
+        game: GameConstants,
+        version: int,
+        userid: Optional[UserID],
+        attempts: List[Attempt],
+    ) -> None:
+        """
+        Given a game/version and user ID, save several score attempts at once. This is equivalent
+        to calling put_attempt() for each attempt, but all of the attempts are written in a single
+        statement, so either all of them are saved or none of them are.
+
+        Parameters:
+            game - Enum value representing a game series.
+            version - Integer representing which version of the game.
+            userid - Integer representing a user. Usually looked up with UserData.
+            attempts - List of Attempt objects, one for each attempt. The key is ignored.
+        """
+        if not attempts:
+            return
+        musicids = self.__get_musicids_for(game, version, attempts)
+
+        values: List[str] = []
+        params: Dict[str, Any] = {"userid": userid if userid is not None else 0}
+        for i, attempt in enumerate(attempts):
+            values.append(f"(:userid, :musicid{i}, :timestamp{i}, :location{i}, :new_record{i}, :points{i}, :data{i})")
+            params[f"musicid{i}"] = musicids[(attempt.id, attempt.chart)]
+            params[f"timestamp{i}"] = attempt.timestamp
+            params[f"location{i}"] = attempt.location
+            params[f"new_record{i}"] = 1 if attempt.new_record else 0
+            params[f"points{i}"] = attempt.points
+            params[f"data{i}"] = self.serialize(attempt.data)
+
+        with self.transaction():
+            # Add to score history
+            sql = f"""
+                INSERT INTO `score_history` (userid, musicid, timestamp, lid, new_record, points, data)
+                VALUES {", ".join(values)}
+            """
+            try:
+                self.execute(sql, params)
+            except IntegrityError:
+                raise ScoreSaveException(
+                    f"There is already an attempt by {userid if userid is not None else 0} for one of {len(attempts)} attempts"
+                )
+            self.__put_plays(
+                userid, [(musicids[(attempt.id, attempt.chart)], attempt.timestamp) for attempt in attempts]
             )
 
+    def __put_plays(self, userid: Optional[UserID], attempts: List[Tuple[int, int]]) -> None:
+        """
+        Given a user and a list of musicid and timestamp tuples, one for each attempt that was just saved
+        to score_history, update the play counts for the user's scores, for each song as a whole and for
+        each song on the day it was played.
+        """
+        counts: Dict[int, int] = {}
+        daily: Dict[Tuple[int, int], int] = {}
+        for musicid, timestamp in attempts:
+            counts[musicid] = counts.get(musicid, 0) + 1
+            day = timestamp // Time.SECONDS_IN_DAY
+            daily[(musicid, day)] = daily.get((musicid, day), 0) + 1
+
+        values: List[str] = []
+        params: Dict[str, Any] = {}
+        for i, (musicid, plays) in enumerate(counts.items()):
+            values.append(f"(:musicid{i}, :plays{i})")
+            params[f"musicid{i}"] = musicid
+            params[f"plays{i}"] = plays
+        sql = f"""
+            INSERT INTO `play_count` (musicid, plays)
+            VALUES {", ".join(values)}
+            ON DUPLICATE KEY UPDATE plays = plays + VALUES(plays)
+        """
+        self.execute(sql, params)
+
+        values = []
+        params = {}
+        for i, ((musicid, day), plays) in enumerate(daily.items()):
+            values.append(f"(:musicid{i}, :day{i}, :plays{i})")
+            params[f"musicid{i}"] = musicid
+            params[f"day{i}"] = day
+            params[f"plays{i}"] = plays
+        sql = f"""
+            INSERT INTO `hit_chart` (musicid, day, plays)
+            VALUES {", ".join(values)}
+            ON DUPLICATE KEY UPDATE plays = plays + VALUES(plays)
+        """
+        self.execute(sql, params)
+
+        if userid is None:
+            # Anonymous attempts don't have a score to count them against.
+            return
+
+        # Scores that don't exist yet will pick up these attempts when they are first saved.
+        byplays: Dict[int, List[int]] = {}
+        for musicid, plays in counts.items():
+            byplays.setdefault(plays, []).append(musicid)
+        for plays, ids in byplays.items():
+            sql = "UPDATE `score` SET plays = plays + :plays WHERE userid = :userid AND musicid IN :musicids"
+            self.execute(sql, {"userid": userid, "plays": plays, "musicids": ids})
+
     def get_score(
         self,
         game: GameConstants,
@@ -266,11 +726,7 @@ class MusicData(BaseData):
                 score.timestamp AS timestamp,
                 score.update AS `update`,
                 score.lid AS lid,
-                (
-                    SELECT COUNT(score_history.timestamp)
-                    FROM score_history
-                    WHERE score_history.musicid = music.id AND score_history.userid = :userid
-                ) AS plays,
+                score.plays AS plays,
                 score.points AS points,
                 score.data AS data
             FROM score, music
@@ -330,11 +786,7 @@ class MusicData(BaseData):
                 score.update AS `update`,
                 score.userid AS userid,
                 score.lid AS lid,
-                (
-                    SELECT COUNT(score_history.timestamp)
-                    FROM score_history
-                    WHERE score_history.musicid = music.id AND score_history.userid = score.userid
-                ) AS plays,
+                score.plays AS plays,
                 score.points AS points,
                 score.data AS data
             FROM score, music
@@ -399,10 +851,7 @@ class MusicData(BaseData):
                 score.timestamp AS timestamp,
                 score.update AS `update`,
                 score.lid AS lid,
-                (
-                    select COUNT(score_history.timestamp) FROM score_history
-                    WHERE score_history.musicid = music.id AND score_history.userid = :userid
-                ) AS plays,
+                score.plays AS plays,
                 score.points AS points,
                 score.data AS data
             FROM score, music
@@ -442,6 +891,80 @@ class MusicData(BaseData):
             for result in cursor
         ]
 
+    def get_scores_for_users(
+        self,
+        game: GameConstants,
+        version: int,
+        userids: List[UserID],
+        since: Optional[int] = None,
+        until: Optional[int] = None,
+    ) -> List[Tuple[UserID, Score]]:
+        """
+        Does the exact same thing as get_scores but across a list of users instead of one,
+        in a single query.
+
+        Parameters:
+            game - Enum value representing a game series.
+            version - Integer representing which version of the game.
+            userids - List of integers representing users. Usually looked up with UserData.
+
+        Returns:
+            A list of UserID, Score tuples representing all high scores for a game for each user.
+        """
+        if not userids:
+            return []
+        sql = """
+            SELECT
+                music.songid AS songid,
+                music.chart AS chart,
+                score.id AS scorekey,
+                score.userid AS userid,
+                score.timestamp AS timestamp,
+                score.update AS `update`,
+                score.lid AS lid,
+                score.plays AS plays,
+                score.points AS points,
+                score.data AS data
+            FROM score, music
+            WHERE
+                score.userid IN :userids AND
+                score.musicid = music.id AND
+                music.game = :game AND
+                music.version = :version
+        """
+        if since is not None:
+            sql = sql + " AND score.update >= :since"
+        if until is not None:
+            sql = sql + " AND score.update < :until"
+        cursor = self.execute(
+            sql,
+            {
+                "userids": userids,
+                "game": game.value,
+                "version": version,
+                "since": since,
+                "until": until,
+            },
+        )
+
+        return [
+            (
+                UserID(result["userid"]),
+                Score(
+                    result["scorekey"],
+                    result["songid"],
+                    result["chart"],
+                    result["points"],
+                    result["timestamp"],
+                    result["update"],
+                    result["lid"],
+                    result["plays"],
+                    self.deserialize(result["data"]),
+                ),
+            )
+            for result in cursor
+        ]
+
     def get_most_played(self, game: GameConstants, version: int, userid: UserID, count: int) -> List[Tuple[int, int]]:
         """
         Look up a user's most played songs.
@@ -520,25 +1043,51 @@ class MusicData(BaseData):
             game - Enum value representing a game series.
             version - Integer representing which version of the game.
             count - Number of scores to look up.
+            days - Optional number of days to limit plays to, rounded to the start of the day.
 
         Returns:
             A list of tuples, containing the songid and the number of plays across all charts for that song.
         """
+        if days is not None and days > self.HIT_CHART_DAYS:
+            # Older days have been compacted away, so count the plays themselves.
+            sql = """
+                SELECT
+                    music.songid AS songid,
+                    COUNT(score_history.timestamp) AS plays
+                FROM score_history, music
+                WHERE
+                    score_history.musicid = music.id AND
+                    music.game = :game AND
+                    music.version = :version AND
+                    score_history.timestamp > :timestamp
+                GROUP BY songid ORDER BY plays DESC LIMIT :count
+            """
+            cursor = self.execute(
+                sql,
+                {
+                    "game": game.value,
+                    "version": version,
+                    "count": count,
+                    "timestamp": Time.now() - (Time.SECONDS_IN_DAY * days),
+                },
+            )
+            return [(result["songid"], result["plays"]) for result in cursor]
+
         sql = """
             SELECT
                 music.songid AS songid,
-                COUNT(score_history.timestamp) AS plays
-            FROM score_history, music
+                SUM(hit_chart.plays) AS plays
+            FROM hit_chart, music
             WHERE
-                score_history.musicid = music.id AND
+                hit_chart.musicid = music.id AND
                 music.game = :game AND
                 music.version = :version
         """
-        timestamp: Optional[int] = None
+        day: Optional[int] = None
         if days is not None:
             # Only select the last X days of hit chart
-            sql = sql + "AND score_history.timestamp > :timestamp "
-            timestamp = Time.now() - (Time.SECONDS_IN_DAY * days)
+            sql = sql + "AND hit_chart.day >= :day "
+            day = (Time.now() - (Time.SECONDS_IN_DAY * days)) // Time.SECONDS_IN_DAY
 
         sql = sql + "GROUP BY songid ORDER BY plays DESC LIMIT :count"
         cursor = self.execute(
@@ -547,11 +1096,29 @@ class MusicData(BaseData):
                 "game": game.value,
                 "version": version,
                 "count": count,
-                "timestamp": timestamp,
+                "day": day,
             },
         )
 
-        return [(result["songid"], result["plays"]) for result in cursor]
+        return [(result["songid"], int(result["plays"])) for result in cursor]
+
+    def compact_hit_chart(self) -> None:
+        """
+        Merge the daily play counts for days older than HIT_CHART_DAYS into a single bucket
+        for each song, so that the hit chart table doesn't grow forever. Called by the scheduler.
+        """
+        cutoff = (Time.now() // Time.SECONDS_IN_DAY) - self.HIT_CHART_DAYS
+        with self.transaction():
+            sql = """
+                INSERT INTO `hit_chart` (musicid, day, plays)
+                SELECT musicid, 0, SUM(plays) FROM hit_chart AS old
+                WHERE old.day > 0 AND old.day < :cutoff
+                GROUP BY musicid
+                ON DUPLICATE KEY UPDATE hit_chart.plays = hit_chart.plays + VALUES(plays)
+            """
+            self.execute(sql, {"cutoff": cutoff})
+            sql = "DELETE FROM hit_chart WHERE day > 0 AND day < :cutoff"
+            self.execute(sql, {"cutoff": cutoff})
 
     def get_song(
         self,
@@ -686,9 +1253,6 @@ class MusicData(BaseData):
                 "SELECT chart FROM music WHERE music.id = score.musicid AND game = :game ORDER BY version DESC LIMIT 1"
             )
 
-        # Select statement for getting play count
-        playselect = "SELECT COUNT(timestamp) FROM score_history WHERE score_history.musicid = score.musicid AND score_history.userid = score.userid"
-
         # Now, construct the inner select statement so we can choose which scores we care about
         innerselect = "SELECT DISTINCT(id) FROM music WHERE game = :game"
         if version is not None:
@@ -710,7 +1274,7 @@ class MusicData(BaseData):
                 lid,
                 data,
                 userid,
-                ({playselect}) AS plays
+                plays
             FROM score WHERE musicid IN ({innerselect})
         """
 
@@ -778,6 +1342,22 @@ class MusicData(BaseData):
         Returns:
             A list of UserID, Score objects representing all high scores for a game.
         """
+        # Records are kept up to date by put_score(), so unless we're limited to certain users
+        # there's no need to look through every score.
+        return self.__get_all_records(game, version, userlist, locationlist, userlist is None)
+
+    def __get_all_records(
+        self,
+        game: GameConstants,
+        version: Optional[int],
+        userlist: Optional[List[UserID]],
+        locationlist: Optional[List[int]],
+        use_records: bool,
+    ) -> List[Tuple[UserID, Score]]:
+        """
+        Look up all of a game's records, either from the record tables or by searching through
+        the scores themselves. Parameters are identical to get_all_records().
+        """
         # First, construct the queries for grabbing the songid/chart
         if version is not None:
             songidquery = (
@@ -795,9 +1375,12 @@ class MusicData(BaseData):
             )
 
         # Next, get a list of all songs that were played given the input criteria
-        musicid_sql = (
-            "SELECT DISTINCT(score.musicid) FROM score, music WHERE score.musicid = music.id AND music.game = :game"
-        )
+        if use_records:
+            musicid_sql = "SELECT DISTINCT(record.musicid) FROM record, music WHERE record.musicid = music.id AND music.game = :game"
+        else:
+            musicid_sql = (
+                "SELECT DISTINCT(score.musicid) FROM score, music WHERE score.musicid = music.id AND music.game = :game"
+            )
         params: Dict[str, Any] = {"game": game.value}
         if version is not None:
             musicid_sql = musicid_sql + " AND music.version = :version"
@@ -814,7 +1397,14 @@ class MusicData(BaseData):
             location_sql = ""
 
         # Figure out who got the record
-        if userlist is not None:
+        if use_records:
+            if userlist is not None:
+                raise Exception("Logic error, cannot look up records for a list of users!")
+            if locationlist is not None:
+                user_sql = "SELECT userid FROM location_record WHERE location_record.musicid = played.musicid AND location_record.lid IN :locationlist ORDER BY points DESC, timestamp DESC LIMIT 1"
+            else:
+                user_sql = "SELECT userid FROM record WHERE record.musicid = played.musicid"
+        elif userlist is not None:
             if len(userlist) == 0:
                 # We don't have any users, but SQL will shit the bed, so lets add a fake one.
                 userlist.append(UserID(-1))
@@ -839,12 +1429,10 @@ class MusicData(BaseData):
                 score.timestamp AS timestamp,
                 score.update AS `update`,
                 score.lid AS lid,
-                (
-                    SELECT COUNT(score_history.timestamp) FROM score_history
-                    WHERE score_history.musicid = score.musicid
-                ) AS plays
-            FROM score, ({records_sql}) records
-            WHERE records.userid = score.userid AND records.musicid = score.musicid
+                IFNULL(play_count.plays, 0) AS plays
+            FROM score
+            JOIN ({records_sql}) records ON records.userid = score.userid AND records.musicid = score.musicid
+            LEFT JOIN play_count ON play_count.musicid = score.musicid
         """
         cursor = self.execute(sql, params)
 
@@ -866,6 +1454,53 @@ class MusicData(BaseData):
             for result in cursor
         ]
 
+    def check_records(
+        self,
+        game: GameConstants,
+        version: Optional[int] = None,
+    ) -> List[Tuple[Optional[int], int, int, Optional[UserID], Optional[UserID]]]:
+        """
+        Compare the records kept by put_score() against records found by searching through every
+        score, both overall and for each location that has scores. Two records that have the same
+        points and timestamp are considered identical even if they belong to different users,
+        since either one could have won the tie.
+
+        Parameters:
+            game - Enum value representing a game series.
+            version - Integer representing which version of the game.
+
+        Returns:
+            A list of tuples, one for each record that doesn't match, containing the location ID
+            (or None for overall records), the songid and chart, the user ID that should hold the
+            record and the user ID that holds the record according to the record tables.
+        """
+        cursor = self.execute(
+            "SELECT DISTINCT(lid) AS lid FROM score, music WHERE score.musicid = music.id AND music.game = :game",
+            {"game": game.value},
+        )
+        locations: List[Optional[int]] = [None]
+        locations.extend(sorted(result["lid"] for result in cursor))
+
+        mismatches: List[Tuple[Optional[int], int, int, Optional[UserID], Optional[UserID]]] = []
+        for location in locations:
+            locationlist = [location] if location is not None else None
+            expected = {
+                (score.id, score.chart): (userid, score.points, score.timestamp)
+                for userid, score in self.__get_all_records(game, version, None, locationlist, False)
+            }
+            actual = {
+                (score.id, score.chart): (userid, score.points, score.timestamp)
+                for userid, score in self.__get_all_records(game, version, None, locationlist, True)
+            }
+
+            for songid, chart in sorted(set(expected) | set(actual)):
+                expecteduser, expectedpoints, expectedtimestamp = expected.get((songid, chart), (None, None, None))
+                actualuser, actualpoints, actualtimestamp = actual.get((songid, chart), (None, None, None))
+                if (expectedpoints, expectedtimestamp) != (actualpoints, actualtimestamp):
+                    mismatches.append((location, songid, chart, expecteduser, actualuser))
+
+        return mismatches
+
     def get_attempt_by_key(self, game: GameConstants, version: int, key: int) -> Optional[Tuple[UserID, Attempt]]:
         """
         Look up a previous attempt by key.
@@ -933,6 +1568,7 @@ class MusicData(BaseData):
         timelimit: Optional[int] = None,
         limit: Optional[int] = None,
         offset: Optional[int] = None,
+        userids: Optional[List[UserID]] = None,
     ) -> List[Tuple[Optional[UserID], Attempt]]:
         """
         Look up all of the attempts to score for a particular game.
@@ -940,10 +1576,15 @@ class MusicData(BaseData):
         Parameters:
             game - Enum value representing a game series.
             version - Integer representing which version of the game.
+            userids - List of integers representing users to limit attempts to, for looking
+                      up several users' attempts in a single query.
 
         Returns:
             A list of UserID, Attempt objects representing all score attempts for a game, sorted newest to oldest attempts.
         """
+        if userids is not None and not userids:
+            return []
+
         # First, construct the queries for grabbing the songid/chart
         if version is not None:
             songidquery = "SELECT songid FROM music WHERE music.id = score_history.musicid AND game = :game AND version = :version"
@@ -981,6 +1622,8 @@ class MusicData(BaseData):
         # Now, limit the query
         if userid is not None:
             sql = sql + " AND userid = :userid"
+        if userids is not None:
+            sql = sql + " AND userid IN :userids"
         if timelimit is not None:
             sql = sql + " AND timestamp >= :timestamp"
         sql = sql + " ORDER BY timestamp DESC"
@@ -996,6 +1639,7 @@ class MusicData(BaseData):
                 "game": game.value,
                 "version": version,
                 "userid": userid,
+                "userids": userids,
                 "songid": songid,
                 "songchart": songchart,
                 "timestamp": timelimit,
@@ -1021,3 +1665,109 @@ class MusicData(BaseData):
             )
             for result in cursor
         ]
+
+    def get_clear_rates(
+        self,
+        game: GameConstants,
+        version: int,
+        songid: Optional[int] = None,
+        songchart: Optional[int] = None,
+    ) -> Dict[int, Dict[int, Dict[str, int]]]:
+        """
+        Look up running totals of attempts for every song/chart in a game version, optionally
+        limited to a single song or song/chart. Only attempts saved with clear information
+        are counted.
+
+        Parameters:
+            game - Enum value representing a game series.
+            version - Integer representing which version of the game.
+            songid - Optional ID of the song according to the game.
+            songchart - Optional chart number according to the game.
+
+        Returns:
+            A dictionary keyed by songid, whos values are a dictionary keyed by chart, whos
+            values are a dictionary containing integer counts keyed by 'plays', 'clears',
+            'combos' and 'points', where 'points' is the sum of points over all plays.
+        """
+        sql = """
+            SELECT music.songid AS songid, music.chart AS chart, plays, clears, combos, points
+            FROM clear_rate, music
+            WHERE clear_rate.musicid = music.id AND music.game = :game AND music.version = :version
+        """
+        if songid is not None:
+            sql = sql + " AND music.songid = :songid"
+        if songchart is not None:
+            sql = sql + " AND music.chart = :songchart"
+        cursor = self.execute(
+            sql,
+            {
+                "game": game.value,
+                "version": version,
+                "songid": songid,
+                "songchart": songchart,
+            },
+        )
+
+        rates: Dict[int, Dict[int, Dict[str, int]]] = {}
+        for result in cursor:
+            rates.setdefault(result["songid"], {})[result["chart"]] = {
+                "plays": result["plays"],
+                "clears": result["clears"],
+                "combos": result["combos"],
+                "points": result["points"],
+            }
+        return rates
+
+    def rebuild_clear_rates(
+        self,
+        game: GameConstants,
+        classify: Callable[[Dict[str, Any]], Tuple[bool, bool]],
+        chunk: int = 100,
+    ) -> int:
+        """
+        Recalculate running totals for clear rates from score history for every song in a
+        game series, replacing anything already stored. Songs are processed a chunk at a time
+        so that the whole history never needs to be loaded at once.
+
+        Parameters:
+            game - Enum value representing a game series.
+            classify - Function taking the data stored with an attempt and returning a tuple
+                       of whether the attempt was a clear and whether it was a full combo.
+            chunk - Number of songs to recalculate at once.
+
+        Returns:
+            The number of attempts that were counted.
+        """
+        cursor = self.execute("SELECT DISTINCT(id) AS id FROM music WHERE game = :game", {"game": game.value})
+        musicids = sorted(result["id"] for result in cursor)
+        counted = 0
+
+        for start in range(0, len(musicids), chunk):
+            ids = musicids[start : (start + chunk)]
+            totals: Dict[int, Dict[str, int]] = {}
+
+            cursor = self.execute(
+                "SELECT musicid, points, data FROM score_history WHERE musicid IN :musicids",
+                {"musicids": ids},
+            )
+            for result in cursor:
+                cleared, full_combo = classify(self.deserialize(result["data"]))
+                total = totals.setdefault(result["musicid"], {"plays": 0, "clears": 0, "combos": 0, "points": 0})
+                total["plays"] += 1
+                total["clears"] += 1 if cleared else 0
+                total["combos"] += 1 if full_combo else 0
+                total["points"] += result["points"]
+                counted += 1
+
+            with self.transaction():
+                self.execute("DELETE FROM clear_rate WHERE musicid IN :musicids", {"musicids": ids})
+                for musicid, total in totals.items():
+                    self.execute(
+                        """
+                        INSERT INTO clear_rate (musicid, plays, clears, combos, points)
+                        VALUES (:musicid, :plays, :clears, :combos, :points)
+                        """,
+                        {"musicid": musicid, **total},
+                    )
+
+        return counted
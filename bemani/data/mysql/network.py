@@ -5,7 +5,7 @@ from typing import Optional, Dict, List, Tuple, Any
 
 from bemani.common import GameConstants, Time
 from bemani.data.mysql.base import BaseData, metadata
-from bemani.data.types import News, Event, UserID, ArcadeID
+from bemani.data.types import News, Event, Webhook, UserID, ArcadeID
 
 """
 Table for storing network news, as edited by an admin. This is displayed
@@ -55,6 +55,24 @@ audit = Table(
     mysql_charset="utf8mb4",
 )
 
+"""
+Table for storing messages waiting to be sent to outside services, such as score
+broadcasts to Discord. Games queue messages here while handling a request, and a
+background sender delivers them, so a slow or unreachable destination never holds
+up the game. Messages are deleted once they have been delivered or given up on.
+"""
+webhook = Table(
+    "webhook",
+    metadata,
+    Column("id", Integer, nullable=False, primary_key=True),
+    Column("timestamp", Integer, nullable=False),
+    Column("destination", String(1024), nullable=False),
+    Column("data", JSON, nullable=False),
+    Column("attempts", Integer, nullable=False),
+    Column("next_attempt", Integer, nullable=False, index=True),
+    mysql_charset="utf8mb4",
+)
+
 
 class NetworkData(BaseData):
     def get_all_news(self) -> List[News]:
@@ -327,3 +345,85 @@ class NetworkData(BaseData):
         """
         sql = "DELETE FROM audit WHERE timestamp < :ts"
         self.execute(sql, {"ts": oldest_event_ts})
+
+    def put_webhook(self, destination: str, data: Dict[str, Any]) -> None:
+        """
+        Queue a message to be sent to an outside service by the webhook sender.
+
+        Parameters:
+            destination - URI that the message should be sent to.
+            data - Dictionary representing the message body.
+        """
+        now = Time.now()
+        sql = """
+            INSERT INTO webhook (timestamp, destination, data, attempts, next_attempt)
+            VALUES (:ts, :destination, :data, 0, :ts)
+        """
+        self.execute(sql, {"ts": now, "destination": destination, "data": self.serialize(data)})
+
+    def claim_webhooks(self, limit: int, lease: int) -> List[Webhook]:
+        """
+        Grab messages that are due to be sent, oldest first, and hold on to them for a while so that
+        other senders don't send them as well. Messages that aren't deleted or retried before the
+        lease runs out will be picked up again.
+
+        Parameters:
+            limit - Maximum number of messages to return.
+            lease - Number of seconds to hold on to the returned messages for.
+
+        Returns:
+            A list of Webhook objects that this sender is now responsible for.
+        """
+        now = Time.now()
+        sql = """
+            SELECT id, timestamp, destination, data, attempts, next_attempt FROM webhook
+            WHERE next_attempt <= :now ORDER BY id LIMIT :limit
+        """
+        cursor = self.execute(sql, {"now": now, "limit": limit})
+
+        claimed: List[Webhook] = []
+        for result in list(cursor):
+            # Only take messages that another sender hasn't taken since we looked.
+            sql = "UPDATE webhook SET next_attempt = :lease WHERE id = :id AND next_attempt = :next_attempt"
+            update = self.execute(
+                sql,
+                {"id": result["id"], "next_attempt": result["next_attempt"], "lease": now + lease},
+            )
+            if update.rowcount != 1:
+                continue
+            claimed.append(
+                Webhook(
+                    result["id"],
+                    result["timestamp"],
+                    result["destination"],
+                    self.deserialize(result["data"]),
+                    result["attempts"],
+                    now + lease,
+                )
+            )
+        return claimed
+
+    def retry_webhooks(self, webhookids: List[int], next_attempt: int) -> None:
+        """
+        Record a failed attempt at sending some messages, so they are tried again later.
+
+        Parameters:
+            webhookids - List of integer identifiers of messages that failed to send.
+            next_attempt - Integer representing unix timestamp of when to next try sending them.
+        """
+        if not webhookids:
+            return
+        sql = "UPDATE webhook SET attempts = attempts + 1, next_attempt = :next_attempt WHERE id IN :ids"
+        self.execute(sql, {"ids": webhookids, "next_attempt": next_attempt})
+
+    def delete_webhooks(self, webhookids: List[int]) -> None:
+        """
+        Remove messages that were sent, or that we have given up on sending.
+
+        Parameters:
+            webhookids - List of integer identifiers of messages to remove.
+        """
+        if not webhookids:
+            return
+        sql = "DELETE FROM webhook WHERE id IN :ids"
+        self.execute(sql, {"ids": webhookids})
@@ -1,9 +1,9 @@
 import random
-from sqlalchemy import Table, Column, UniqueConstraint
+from sqlalchemy import Table, Column, Index, UniqueConstraint
 from sqlalchemy.types import String, Integer, JSON
 from sqlalchemy.dialects.mysql import BIGINT as BigInteger
 from sqlalchemy.exc import IntegrityError
-from typing import Optional, Dict, List, Tuple, Any
+from typing import Optional, Dict, List, Set, Tuple, Any
 from typing_extensions import Final
 from passlib.hash import pbkdf2_sha512  # type: ignore
 
@@ -90,6 +90,23 @@ profile = Table(
     mysql_charset="utf8mb4",
 )
 
+"""
+Table for storing copies of a few top-level fields from profile JSON blobs, indexed
+by refid. Games register which fields they want copied, and the copies are kept up
+to date whenever a profile is saved, so that users can be looked up by those fields
+without loading and parsing every profile for a game.
+"""
+profile_field = Table(
+    "profile_field",
+    metadata,
+    Column("refid", String(16), nullable=False),
+    Column("name", String(32), nullable=False),
+    Column("value", String(255), nullable=False),
+    UniqueConstraint("refid", "name", name="refid_name"),
+    Index("name_value", "name", "value"),
+    mysql_charset="utf8mb4",
+)
+
 """
 Table for storing game achievements. An achievement is just a blob of data
 with a unique ID and type. Games are free to store a JSON blob for each
@@ -174,6 +191,24 @@ class AccountCreationException(Exception):
 class UserData(BaseData):
     REF_ID_LENGTH: Final[int] = 16
 
+    # Longest profile field value that can be copied into the profile_field table.
+    PROFILE_FIELD_LENGTH: Final[int] = 255
+
+    __profile_fields: Dict[GameConstants, Set[str]] = {}
+
+    @classmethod
+    def register_profile_fields(cls, game: GameConstants, fields: Tuple[str, ...]) -> None:
+        """
+        Ask for some top-level profile fields for a game series to be copied into the
+        profile_field table whenever a profile is saved, so that they can be looked up
+        with get_userids_by_profile_field(). Only string and integer values are copied.
+
+        Parameters:
+            game - Enum value identifier of the game series.
+            fields - Tuple of top-level profile keys to copy.
+        """
+        UserData.__profile_fields.setdefault(game, set()).update(fields)
+
     def from_cardid(self, cardid: str) -> Optional[UserID]:
         """
         Given a 16 digit card ID, look up a user ID.
@@ -197,6 +232,23 @@ class UserData(BaseData):
         result = cursor.fetchone()
         return UserID(result["userid"])
 
+    def from_cardids(self, cardids: List[str]) -> Dict[str, UserID]:
+        """
+        Given a list of 16 digit card IDs, look up the user ID for each of them in a single query.
+
+        Parameters:
+            cardids - List of 16-digit card IDs to look for.
+
+        Returns:
+            A dictionary mapping each card ID that was found, upper-cased, to the user ID it
+            belongs to. Cards that aren't associated with any user are left out.
+        """
+        if not cardids:
+            return {}
+        sql = "SELECT id, userid FROM card WHERE id IN :ids"
+        cursor = self.execute(sql, {"ids": cardids})
+        return {str(result["id"]).upper(): UserID(result["userid"]) for result in cursor}
+
     def from_username(self, username: str) -> Optional[UserID]:
         """
         Given a username, look up a user ID.
@@ -358,6 +410,27 @@ class UserData(BaseData):
         cursor = self.execute(sql, {"userid": userid})
         return [str(res["id"]).upper() for res in cursor]
 
+    def get_cards_for_users(self, userids: List[UserID]) -> Dict[UserID, List[str]]:
+        """
+        Does the exact same thing as get_cards but across a list of users instead of one,
+        in a single query.
+
+        Parameters:
+            userids - List of integer user IDs, as looked up by one of the above functions.
+
+        Returns:
+            A dictionary mapping each user ID to a list of strings representing card IDs.
+            Users without any cards map to an empty list.
+        """
+        cards: Dict[UserID, List[str]] = {userid: [] for userid in userids}
+        if not userids:
+            return cards
+        sql = "SELECT id, userid FROM card WHERE userid IN :userids"
+        cursor = self.execute(sql, {"userids": userids})
+        for result in cursor:
+            cards[UserID(result["userid"])].append(str(result["id"]).upper())
+        return cards
+
     def add_card(self, userid: UserID, cardid: str) -> None:
         """
         Given a user ID and a card ID, link that card with that user.
@@ -555,7 +628,8 @@ class UserData(BaseData):
     ) -> List[Tuple[UserID, Optional[Profile]]]:
         """
         Does the exact same thing as get_any_profile but across a list of users instead of one.
-        Provided purely as a convenience function.
+        Looks up every profile in two queries no matter how many users are asked for, so this
+        should be preferred over calling get_any_profile in a loop.
 
         Parameters:
             game - Enum value identifier of the game looking up the user.
@@ -569,13 +643,13 @@ class UserData(BaseData):
         if not userids:
             return []
         sql = """
-            SELECT refid.version AS version, refid.userid AS userid
+            SELECT refid.version AS version, refid.userid AS userid, refid.refid AS refid
             FROM refid
             INNER JOIN profile ON refid.refid = profile.refid
             WHERE refid.game = :game AND refid.userid IN :userids
         """
         cursor = self.execute(sql, {"game": game.value, "userids": userids})
-        profilever: Dict[UserID, int] = {}
+        profilever: Dict[UserID, Tuple[int, str]] = {}
 
         for result in cursor:
             tuid = UserID(result["userid"])
@@ -583,24 +657,41 @@ class UserData(BaseData):
 
             if tuid not in profilever:
                 # Just assign it the first profile we find
-                profilever[tuid] = tver
+                profilever[tuid] = (tver, result["refid"])
             else:
                 # If the profile for this version exists, prioritize it
                 if tver == version:
-                    profilever[tuid] = tver
+                    profilever[tuid] = (tver, result["refid"])
 
                 # Only update the profile version with the newest game profile if the game
                 # profile for this version doesn't exist.
-                elif profilever[tuid] != version:
-                    profilever[tuid] = max(profilever[tuid], tver)
+                elif profilever[tuid][0] != version and tver > profilever[tuid][0]:
+                    profilever[tuid] = (tver, result["refid"])
+
+        profiles: Dict[UserID, Profile] = {}
+        if profilever:
+            # Now, grab the chosen profile for every user at once.
+            sql = """
+                SELECT refid.userid AS userid, refid.refid AS refid, extid.extid AS extid, profile.data AS data
+                FROM refid, extid, profile
+                WHERE
+                    refid.refid IN :refids AND
+                    extid.userid = refid.userid AND
+                    extid.game = refid.game AND
+                    profile.refid = refid.refid
+            """
+            cursor = self.execute(sql, {"refids": [refid for (_, refid) in profilever.values()]})
+            for result in cursor:
+                tuid = UserID(result["userid"])
+                profiles[tuid] = Profile(
+                    game,
+                    profilever[tuid][0],
+                    result["refid"],
+                    result["extid"],
+                    self.deserialize(result["data"]),
+                )
 
-        return [
-            (
-                uid,
-                self.get_profile(game, profilever[uid], uid) if uid in profilever else None,
-            )
-            for uid in userids
-        ]
+        return [(uid, profiles.get(uid)) for uid in userids]
 
     def get_games_played(self, userid: UserID, game: Optional[GameConstants] = None) -> List[Tuple[GameConstants, int]]:
         """
@@ -755,6 +846,11 @@ class UserData(BaseData):
         """
         self.execute(sql, {"refid": refid, "json": self.serialize(profile)})
 
+        # Keep any copies of fields we look users up by in sync with the profile.
+        fields = UserData.__profile_fields.get(game)
+        if fields:
+            self.__put_profile_fields(refid, profile, fields)
+
         # Update profile details just in case this was a new profile that was just saved.
         profile.game = game
         profile.version = version
@@ -776,6 +872,62 @@ class UserData(BaseData):
         # Delete profile JSON to unlink the profile for this game/version.
         sql = "DELETE FROM profile WHERE refid = :refid LIMIT 1"
         self.execute(sql, {"refid": refid})
+        sql = "DELETE FROM profile_field WHERE refid = :refid"
+        self.execute(sql, {"refid": refid})
+
+    def __put_profile_fields(self, refid: str, profile: Profile, fields: Set[str]) -> None:
+        values: Dict[str, str] = {}
+        for name in fields:
+            value = profile.get(name)
+            if type(value) in (int, str) and len(str(value)) <= UserData.PROFILE_FIELD_LENGTH:
+                values[name] = str(value)
+        missing = [name for name in fields if name not in values]
+
+        if values:
+            params: Dict[str, Any] = {"refid": refid}
+            rows: List[str] = []
+            for i, name in enumerate(sorted(values)):
+                rows.append(f"(:refid, :name{i}, :value{i})")
+                params[f"name{i}"] = name
+                params[f"value{i}"] = values[name]
+            sql = f"""
+                INSERT INTO profile_field (refid, name, value)
+                VALUES {", ".join(rows)}
+                ON DUPLICATE KEY UPDATE value = VALUES(value)
+            """
+            self.execute(sql, params)
+        if missing:
+            sql = "DELETE FROM profile_field WHERE refid = :refid AND name IN :names"
+            self.execute(sql, {"refid": refid, "names": missing})
+
+    def get_userids_by_profile_field(self, game: GameConstants, version: int, name: str, value: Any) -> List[UserID]:
+        """
+        Given a game/version and a profile field registered with register_profile_fields(),
+        look up every user whose profile for that game/version has the given value for it.
+
+        Parameters:
+            game - Enum value identifier of the game looking up the users.
+            version - Integer version of the game looking up the users.
+            name - String name of a top-level profile field.
+            value - String or integer value the field should have.
+
+        Returns:
+            A list of UserIDs for users whose profile has that value.
+        """
+        if name not in UserData.__profile_fields.get(game, set()):
+            raise Exception(f"Profile field {name} is not registered for {game.value}!")
+        sql = """
+            SELECT refid.userid AS userid
+            FROM profile_field, refid
+            WHERE
+                profile_field.name = :name AND
+                profile_field.value = :value AND
+                refid.refid = profile_field.refid AND
+                refid.game = :game AND
+                refid.version = :version
+        """
+        cursor = self.execute(sql, {"name": name, "value": str(value), "game": game.value, "version": version})
+        return [UserID(result["userid"]) for result in cursor]
 
     def get_achievement(
         self,
@@ -1281,6 +1433,42 @@ class UserData(BaseData):
             else:
                 raise AccountCreationException("Failed to cteate a new refid/extid pair!")
 
+    def get_refids_and_extids(
+        self, game: GameConstants, version: int, userids: List[UserID]
+    ) -> Dict[UserID, Tuple[str, int]]:
+        """
+        Given a game/version and a list of user IDs, look up the RefID and ExtID for each profile.
+        Existing IDs are looked up in a single query, and any that don't exist yet are created
+        in the same manner as get_refid() above.
+
+        Parameters:
+            game - Enum value identifier of the game looking up the users.
+            version - Integer version of the game looking up the users.
+            userids - List of integer user IDs, as looked up by one of the above functions.
+
+        Returns:
+            A dictionary keyed by user ID whose values are tuples of RefID and ExtID.
+        """
+        if not userids:
+            return {}
+        sql = """
+            SELECT refid.userid AS userid, refid.refid AS refid, extid.extid AS extid
+            FROM refid, extid
+            WHERE
+                refid.userid IN :userids AND
+                refid.game = :game AND
+                refid.version = :version AND
+                extid.userid = refid.userid AND
+                extid.game = refid.game
+        """
+        cursor = self.execute(sql, {"userids": userids, "game": game.value, "version": version})
+        ids = {UserID(result["userid"]): (result["refid"], result["extid"]) for result in cursor}
+
+        for userid in userids:
+            if userid not in ids:
+                ids[userid] = (self.get_refid(game, version, userid), self.get_extid(game, version, userid))
+        return ids
+
     def create_session(self, userid: UserID, expiration: int = (30 * 86400)) -> str:
         """
         Given a user ID, create a session string.
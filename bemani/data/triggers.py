@@ -1,19 +1,28 @@
+import random
+import threading
+import traceback
 from datetime import datetime
 from discord_webhook import DiscordWebhook, DiscordEmbed
-from typing import Dict
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
 
 from bemani.common.constants import GameConstants, BroadcastConstants
+from bemani.common.time import Time
 from bemani.data.config import Config
-from bemani.data.types import Song
+from bemani.data.mysql.network import NetworkData
+from bemani.data.types import Song, Webhook
 
 
 class Triggers:
     """
-    Class for broadcasting data to some outside service
+    Class for broadcasting data to some outside service. Broadcasts are queued in the
+    DB and delivered by a WebhookSender, so that games never wait on outside services.
     """
 
-    def __init__(self, config: Config) -> None:
+    def __init__(self, config: Config, network: NetworkData) -> None:
         self.config = config
+        self.network = network
 
     def __gameconst_to_series(self, game: GameConstants) -> str:
         return {
@@ -69,4 +78,145 @@ class Triggers:
                     inline = False
                 scoreembed.add_embed_field(name=item.value, value=value, inline=inline)
             webhook.add_embed(scoreembed)
-            webhook.execute()
+            self.network.put_webhook(webhook.url, {"embeds": webhook.json["embeds"]})
+
+
+class WebhookSender:
+    """
+    Class for delivering messages queued by Triggers to outside services. Messages to the
+    same destination are sent together where possible, and are sent on their own instead if
+    the destination rejects them together. Messages that fail to send are retried with
+    exponential backoff until MAX_ATTEMPTS is reached. Use send_pending() to send whatever
+    is waiting, or run() to keep sending until told to stop.
+    """
+
+    # Discord allows at most this many embeds in a single message.
+    MAX_EMBEDS: int = 10
+
+    # Discord allows at most this many characters of text across every embed in a single message.
+    MAX_EMBED_CHARACTERS: int = 6000
+
+    # How many times to try sending a message before giving up on it.
+    MAX_ATTEMPTS: int = 8
+
+    # Delay in seconds before the first retry, doubling on each further retry up to the maximum.
+    RETRY_DELAY: int = 5
+    MAX_RETRY_DELAY: int = 3600
+
+    # How long in seconds to wait for a destination to respond.
+    TIMEOUT: int = 10
+
+    def __init__(self, network: NetworkData) -> None:
+        self.network = network
+        self.session = requests.Session()
+
+    def __backoff(self, attempts: int) -> int:
+        delay = min(self.RETRY_DELAY * (2**attempts), self.MAX_RETRY_DELAY)
+        # Spread retries out a bit so that messages that failed together don't retry together.
+        return Time.now() + delay + random.randint(0, self.RETRY_DELAY)
+
+    @staticmethod
+    def __characters(embed: Dict[str, Any]) -> int:
+        """
+        Count the characters in an embed that Discord counts towards its per-message limit.
+        """
+        count = len(embed.get("title") or "") + len(embed.get("description") or "")
+        count += len((embed.get("author") or {}).get("name") or "")
+        count += len((embed.get("footer") or {}).get("text") or "")
+        for field in embed.get("fields") or []:
+            count += len(field.get("name") or "") + len(field.get("value") or "")
+        return count
+
+    def __batches(self, messages: List[Webhook]) -> List[Tuple[str, List[Webhook]]]:
+        batches: List[Tuple[str, List[Webhook]]] = []
+        current: Dict[str, Tuple[List[Webhook], int, int]] = {}
+        for message in messages:
+            embeds = message.data.get("embeds", [])
+            characters = sum(self.__characters(embed) for embed in embeds)
+            batch, count, length = current.get(message.destination, ([], 0, 0))
+            if batch and (count + len(embeds) > self.MAX_EMBEDS or length + characters > self.MAX_EMBED_CHARACTERS):
+                batches.append((message.destination, batch))
+                batch, count, length = [], 0, 0
+            batch.append(message)
+            current[message.destination] = (batch, count + len(embeds), length + characters)
+        for destination, (batch, _, _) in current.items():
+            batches.append((destination, batch))
+        return batches
+
+    def __send(self, destination: str, messages: List[Webhook]) -> Optional[int]:
+        """
+        Send a batch of messages to a destination. Returns None on success, or the time to retry
+        at if the destination asked us to slow down.
+        """
+        body: Dict[str, Any] = {"embeds": [embed for message in messages for embed in message.data.get("embeds", [])]}
+        response = self.session.post(destination, json=body, timeout=self.TIMEOUT)
+        if response.status_code == 429:
+            # Rate limited, so wait as long as we were asked to.
+            retry_after = float(response.json().get("retry_after", self.RETRY_DELAY))
+            return Time.now() + int(retry_after) + 1
+        response.raise_for_status()
+        return None
+
+    def send_pending(self, limit: int = 100) -> int:
+        """
+        Send any messages that are due to be sent.
+
+        Parameters:
+            limit - Maximum number of messages to send in one go.
+
+        Returns:
+            The number of messages that were delivered.
+        """
+        messages = self.network.claim_webhooks(limit, self.TIMEOUT * 3)
+        sent = 0
+        pending = self.__batches(messages)
+        while pending:
+            destination, batch = pending.pop(0)
+            try:
+                retry_at = self.__send(destination, batch)
+            except Exception as e:
+                status = e.response.status_code if isinstance(e, requests.HTTPError) and e.response is not None else 0
+                if len(batch) > 1 and 400 <= status < 500:
+                    # The destination rejected the batch, which could be because of a single message
+                    # in it, so try sending each message on its own instead.
+                    pending.extend((destination, [message]) for message in batch)
+                    continue
+
+                print(traceback.format_exc())
+                retry_at = self.__backoff(max(message.attempts for message in batch))
+
+            if retry_at is None:
+                self.network.delete_webhooks([message.id for message in batch])
+                sent += len(batch)
+                continue
+
+            # Give up on anything that has failed too many times, and retry the rest later.
+            expired = [message.id for message in batch if message.attempts + 1 >= self.MAX_ATTEMPTS]
+            if expired:
+                self.network.delete_webhooks(expired)
+                self.network.put_event(
+                    "exception",
+                    {
+                        "service": "webhooks",
+                        "message": f"Gave up sending {len(expired)} messages to {destination}",
+                    },
+                )
+            self.network.retry_webhooks([message.id for message in batch if message.id not in expired], retry_at)
+        return sent
+
+    def run(self, stop: threading.Event, interval: float = 1.0) -> None:
+        """
+        Keep sending messages as they are queued until the stop event is set.
+
+        Parameters:
+            stop - Event which should be set to stop sending.
+            interval - Number of seconds to wait between checks when there is nothing to send.
+        """
+        while not stop.is_set():
+            try:
+                sent = self.send_pending()
+            except Exception:
+                print(traceback.format_exc())
+                sent = 0
+            if sent == 0:
+                stop.wait(interval)
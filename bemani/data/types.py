@@ -460,3 +460,40 @@ class Server:
 
     def __repr__(self) -> str:
         return f"Server(serverid={self.id}, timestamp={self.timestamp}, uri={self.uri}, token={self.token}, allow_stats={self.allow_stats}, allow_scores={self.allow_scores})"
+
+
+class Webhook:
+    """
+    An object representing a message waiting to be sent to an outside service,
+    such as a score broadcast to a Discord webhook.
+    """
+
+    def __init__(
+        self,
+        webhookid: int,
+        timestamp: int,
+        destination: str,
+        data: Dict[str, Any],
+        attempts: int,
+        next_attempt: int,
+    ) -> None:
+        """
+        Initialize the webhook object.
+
+        Parameters:
+            webhookid - Integer identifier for the message.
+            timestamp - Integer representing unix timestamp of when the message was queued.
+            destination - URI that the message should be sent to.
+            data - Dictionary representing the message body.
+            attempts - Number of times sending this message has failed so far.
+            next_attempt - Integer representing unix timestamp of when to next try sending this message.
+        """
+        self.id = webhookid
+        self.timestamp = timestamp
+        self.destination = destination
+        self.data = data
+        self.attempts = attempts
+        self.next_attempt = next_attempt
+
+    def __repr__(self) -> str:
+        return f"Webhook(webhookid={self.id}, timestamp={self.timestamp}, destination={self.destination}, attempts={self.attempts}, next_attempt={self.next_attempt})"
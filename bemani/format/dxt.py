@@ -5,12 +5,24 @@ Adapted from https://github.com/leamsii/Python-DXT-Decompress to add types
 and take in bytes instead of file pointers. Inspired by Benjamin Dobell.
 
 Original C++ code https://github.com/Benjamin-Dobell/s3tc-dxt-decompression
+
+If numpy is installed, every block in a texture is decoded at once instead of one
+pixel at a time, which is several orders of magnitude faster for large textures.
+Both paths produce identical output.
 """
 
 import io
 import struct
 
-from typing import List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
+
+try:
+    import numpy
+
+    HAS_NUMPY: bool = True
+except ImportError:
+    # Fall back to the pure python implementation below.
+    HAS_NUMPY = False
 
 
 class DXTBuffer:
@@ -41,6 +53,98 @@ class DXTBuffer:
         return data
 
     def DXT5Decompress(self, filedata: bytes, swap: bool = False) -> bytes:
+        if HAS_NUMPY and len(filedata) >= self.block_countx * self.block_county * 16:
+            return self.DXT5DecompressNumpy(filedata, swap)
+        return self.DXT5DecompressPython(filedata, swap)
+
+    def DXT1Decompress(self, filedata: bytes, swap: bool = False) -> bytes:
+        if HAS_NUMPY and len(filedata) >= self.block_countx * self.block_county * 8:
+            return self.DXT1DecompressNumpy(filedata, swap)
+        return self.DXT1DecompressPython(filedata, swap)
+
+    def DXT5DecompressNumpy(self, filedata: bytes, swap: bool = False) -> bytes:
+        blocks = self.__blocks(filedata, 16, swap)
+
+        # Alpha endpoints followed by 16 3-bit codes packed into the next 48 bits.
+        a0 = blocks[:, 0].astype(numpy.int32)
+        a1 = blocks[:, 1].astype(numpy.int32)
+        acode = numpy.zeros(len(blocks), dtype=numpy.uint64)
+        for byte in range(6):
+            acode |= blocks[:, 2 + byte].astype(numpy.uint64) << numpy.uint64(8 * byte)
+        acodes = (acode[:, None] >> (3 * numpy.arange(16, dtype=numpy.uint64))) & numpy.uint64(0x07)
+
+        # Build the 8 possible alpha values for each block, and then look each pixel up.
+        interpolate = (a0 > a1)[:, None]
+        code = numpy.arange(2, 8)[None, :]
+        alphas = numpy.empty((len(blocks), 8), dtype=numpy.int32)
+        alphas[:, 0] = a0
+        alphas[:, 1] = a1
+        alphas[:, 2:] = numpy.where(
+            interpolate,
+            ((8 - code) * a0[:, None] + (code - 1) * a1[:, None]) // 7,
+            numpy.where(
+                code == 6,
+                0,
+                numpy.where(code == 7, 255, ((6 - code) * a0[:, None] + (code - 1) * a1[:, None]) // 5),
+            ),
+        )
+        alpha = numpy.take_along_axis(alphas, acodes.astype(numpy.intp), axis=1)
+
+        return self.__pixels(blocks[:, 8:], alpha)
+
+    def DXT1DecompressNumpy(self, filedata: bytes, swap: bool = False) -> bytes:
+        blocks = self.__blocks(filedata, 8, swap)
+        return self.__pixels(blocks, numpy.full((len(blocks), 16), 255, dtype=numpy.int32))
+
+    def __blocks(self, filedata: bytes, size: int, swap: bool) -> Any:
+        # Returns an array with one row of raw bytes for every block in the texture.
+        count = self.block_countx * self.block_county
+        data = numpy.frombuffer(filedata, dtype=numpy.uint8, count=count * size)
+        if swap:
+            data = data.reshape(-1, 2)[:, ::-1]
+        return data.reshape(count, size)
+
+    def __pixels(self, colors: Any, alpha: Any) -> bytes:
+        # Given the 8 bytes of color data for every block and the alpha of every pixel in
+        # each block, returns the RGBA pixels for the texture in row order.
+        c0 = colors[:, 0].astype(numpy.int32) | (colors[:, 1].astype(numpy.int32) << 8)
+        c1 = colors[:, 2].astype(numpy.int32) | (colors[:, 3].astype(numpy.int32) << 8)
+        ctable = numpy.zeros(len(colors), dtype=numpy.uint32)
+        for byte in range(4):
+            ctable |= colors[:, 4 + byte].astype(numpy.uint32) << numpy.uint32(8 * byte)
+        codes = (ctable[:, None] >> (2 * numpy.arange(16, dtype=numpy.uint32))) & numpy.uint32(0x03)
+
+        # Build the 4 possible colors for each block, and then look each pixel up.
+        rgb0 = self.__unpackRGBs(c0)
+        rgb1 = self.__unpackRGBs(c1)
+        interpolate = (c0 > c1)[:, None]
+        palette = numpy.empty((len(colors), 4, 3), dtype=numpy.int32)
+        palette[:, 0] = rgb0
+        palette[:, 1] = rgb1
+        palette[:, 2] = numpy.where(interpolate, (2 * rgb0 + rgb1) // 3, (rgb0 + rgb1) // 2)
+        palette[:, 3] = numpy.where(interpolate, (rgb0 + 2 * rgb1) // 3, 0)
+
+        pixels = numpy.empty((len(colors), 16, 4), dtype=numpy.uint8)
+        pixels[:, :, 0:3] = numpy.take_along_axis(palette, codes.astype(numpy.intp)[:, :, None], axis=1)
+        pixels[:, :, 3] = alpha
+
+        # Each block is 4 rows of 4 pixels, so interleave the rows of every block in a row of blocks.
+        pixels = pixels.reshape(self.block_county, self.block_countx, 4, 4, 4).transpose(0, 2, 1, 3, 4)
+        return pixels.tobytes()
+
+    def __unpackRGBs(self, packed: Any) -> Any:
+        # Same as unpackRGB, but for an array of RGB565 colors at once.
+        R = (packed >> 11) & 0x1F
+        G = (packed >> 5) & 0x3F
+        B = (packed) & 0x1F
+
+        R = (R << 3) | (R >> 2)
+        G = (G << 2) | (G >> 4)
+        B = (B << 3) | (B >> 2)
+
+        return numpy.stack([R, G, B], axis=1)
+
+    def DXT5DecompressPython(self, filedata: bytes, swap: bool = False) -> bytes:
         # Loop through each block and decompress it
         file = io.BytesIO(filedata)
         for row in range(self.block_county):
@@ -64,7 +168,7 @@ class DXTBuffer:
 
         return b"".join([x for x in self.decompressed_buffer if x is not None])
 
-    def DXT1Decompress(self, filedata: bytes, swap: bool = False) -> bytes:
+    def DXT1DecompressPython(self, filedata: bytes, swap: bool = False) -> bytes:
         # Loop through each block and decompress it
         file = io.BytesIO(filedata)
         for row in range(self.block_county):
@@ -1,9 +1,10 @@
 import hashlib
 import io
+import mmap
 import os
 import struct
 from PIL import Image
-from typing import Callable, Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 from bemani.format.dxt import DXTBuffer
 from bemani.protocol.binary import BinaryEncoding
@@ -17,17 +18,26 @@ class IFS:
     Best-effort utility for decoding the `.ifs` file format. There are better tools out
     there, but this was developed before their existence. This should work with most of
     the games out there including non-rhythm games that use this format.
+
+    Only the header is parsed up front. File data is sliced out of the archive when it
+    is read, and other IFS files that this one references are only loaded the first time
+    a file stored in them is read. Use IFS.open() to read an archive straight from disk
+    without loading the whole thing into memory.
     """
 
     def __init__(
         self,
-        data: bytes,
+        data: Union[bytes, mmap.mmap],
         decode_binxml: bool = False,
         decode_textures: bool = False,
         keep_hex_names: bool = False,
         reference_loader: Optional[Callable[[str], Optional["IFS"]]] = None,
     ) -> None:
-        self.__files: Dict[str, bytes] = {}
+        # Each file is the name of the IFS it is stored in (None for this one), its offset and its size.
+        self.__files: Dict[str, Tuple[Optional[str], int, int]] = {}
+        self.__supers: Dict[str, IFS] = {}
+        self.__mmap = data if isinstance(data, mmap.mmap) else None
+        self.__data = memoryview(data)
         self.__formats: Dict[str, str] = {}
         self.__compressed: Dict[str, bool] = {}
         self.__imgsize: Dict[str, Tuple[int, int, int, int]] = {}
@@ -36,7 +46,39 @@ class IFS:
         self.__keep_hex_names = keep_hex_names
         self.__decode_textures = decode_textures
         self.__loader = reference_loader
-        self.__parse_file(data)
+        self.__parse_file(self.__data)
+
+    @staticmethod
+    def open(
+        filename: str,
+        decode_binxml: bool = False,
+        decode_textures: bool = False,
+        keep_hex_names: bool = False,
+        reference_loader: Optional[Callable[[str], Optional["IFS"]]] = None,
+    ) -> "IFS":
+        """
+        Open an IFS file on disk by memory-mapping it, so that only the parts of it that
+        are actually read take up memory. Call close() when done with it.
+        """
+        with open(filename, "rb") as fp:
+            data = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        return IFS(
+            data,
+            decode_binxml=decode_binxml,
+            decode_textures=decode_textures,
+            keep_hex_names=keep_hex_names,
+            reference_loader=reference_loader,
+        )
+
+    def close(self) -> None:
+        """
+        Release the memory-mapped file opened with IFS.open(). Any views previously returned
+        by read_view() must be released first.
+        """
+        self.__data.release()
+        if self.__mmap is not None:
+            self.__mmap.close()
+            self.__mmap = None
 
     def __fix_name(self, filename: str) -> str:
         if filename[0] == "_" and filename[1].isdigit():
@@ -45,7 +87,7 @@ class IFS:
         filename = filename.replace("__", "_")
         return filename
 
-    def __parse_file(self, data: bytes) -> None:
+    def __parse_file(self, data: memoryview) -> None:
         # Grab the magic values and make sure this is an IFS
         (
             signature,
@@ -72,12 +114,12 @@ class IFS:
 
         # First, try as binary
         benc = BinaryEncoding()
-        header = benc.decode(data[header_offset:data_index])
+        header = benc.decode(bytes(data[header_offset:data_index]))
 
         if header is None:
             # Now, try as XML
             xenc = XmlEncoding()
-            header = xenc.decode(b'<?xml encoding="ascii"?>' + data[header_offset:data_index].split(b"\0")[0])
+            header = xenc.decode(b'<?xml encoding="ascii"?>' + bytes(data[header_offset:data_index]).split(b"\0")[0])
 
             if header is None:
                 raise Exception("Invalid IFS file!")
@@ -129,32 +171,11 @@ class IFS:
         # Recursively walk the entire filesystem extracting files and their locations.
         get_children(os.sep, header)
 
-        # Cache of other file data.
-        otherdata: Dict[str, IFS] = {}
-
         for fn in files:
-            (start, size, pack_time, external_file) = files[fn]
-            if external_file is not None:
-                if external_file not in otherdata:
-                    if self.__loader is None:
-                        ifsdata = None
-                    else:
-                        ifsdata = self.__loader(external_file)
-
-                    if ifsdata is None:
-                        raise Exception(f"Couldn't extract file data for {fn} referencing IFS file {external_file}!")
-                    else:
-                        otherdata[external_file] = ifsdata
-
-                if fn in otherdata[external_file].filenames:
-                    filedata = otherdata[external_file].read_file(fn)
-                else:
-                    raise Exception(f"{fn} not found in {external_file} IFS!")
-            else:
-                filedata = data[start : (start + size)]
-                if len(filedata) != size:
-                    raise Exception(f"Couldn't extract file data for {fn}!")
-            self.__files[fn] = filedata
+            start, size, pack_time, external_file = files[fn]
+            if external_file is None and start + size > len(data):
+                raise Exception(f"Couldn't extract file data for {fn}!")
+            self.__files[fn] = (external_file, start, size)
 
         # Now, find all of the index files that are available.
         for filename in list(self.__files.keys()):
@@ -165,13 +186,14 @@ class IFS:
                 texdir = os.path.dirname(filename)
 
                 benc = BinaryEncoding()
-                texdata = benc.decode(self.__files[filename])
+                indexdata = bytes(self.__read_raw(filename))
+                texdata = benc.decode(indexdata)
 
                 if texdata is None:
                     # Now, try as XML
                     xenc = XmlEncoding()
                     encoding = "ascii"
-                    texdata = xenc.decode(b'<?xml encoding="ascii"?>' + self.__files[filename])
+                    texdata = xenc.decode(b'<?xml encoding="ascii"?>' + indexdata)
 
                     if texdata is None:
                         continue
@@ -254,13 +276,14 @@ class IFS:
                 geodir = os.path.join(os.path.dirname(afpdir), "geo")
 
                 benc = BinaryEncoding()
-                afpdata = benc.decode(self.__files[filename])
+                indexdata = bytes(self.__read_raw(filename))
+                afpdata = benc.decode(indexdata)
 
                 if afpdata is None:
                     # Now, try as XML
                     xenc = XmlEncoding()
                     encoding = "ascii"
-                    afpdata = xenc.decode(b'<?xml encoding="ascii"?>' + self.__files[filename])
+                    afpdata = xenc.decode(b'<?xml encoding="ascii"?>' + indexdata)
 
                     if afpdata is None:
                         continue
@@ -312,12 +335,43 @@ class IFS:
     def filenames(self) -> List[str]:
         return [f for f in self.__files]
 
+    def __read_raw(self, filename: str) -> memoryview:
+        # Look up the data for a file as it is stored, loading the IFS it lives in if needed.
+        external_file, start, size = self.__files[filename]
+        if external_file is None:
+            return self.__data[start : (start + size)]
+
+        if external_file not in self.__supers:
+            ifsdata = None if self.__loader is None else self.__loader(external_file)
+            if ifsdata is None:
+                raise Exception(f"Couldn't extract file data for {filename} referencing IFS file {external_file}!")
+            self.__supers[external_file] = ifsdata
+
+        if filename not in self.__supers[external_file].__files:
+            raise Exception(f"{filename} not found in {external_file} IFS!")
+        return self.__supers[external_file].read_view(filename)
+
     def read_file(self, filename: str) -> bytes:
+        filedata = self.__read(filename)
+        return bytes(filedata) if isinstance(filedata, memoryview) else filedata
+
+    def read_view(self, filename: str) -> memoryview:
+        """
+        Same as read_file(), but files that don't need to be decompressed or converted are
+        returned as a view of the archive instead of a copy. This is what should be used for
+        copying large files out of an archive opened with IFS.open().
+        """
+        filedata = self.__read(filename)
+        return filedata if isinstance(filedata, memoryview) else memoryview(filedata)
+
+    def __read(self, filename: str) -> Union[bytes, memoryview]:
+        filedata: Union[bytes, memoryview] = self.__read_raw(filename)
+
         # First, figure out if this file is stored compressed or not. If it is, decompress
         # it so that we have the raw data available to us.
         decompress = self.__compressed.get(filename, False)
-        filedata = self.__files[filename]
         if decompress:
+            filedata = bytes(filedata)
             uncompressed_size, compressed_size = struct.unpack(">II", filedata[0:8])
             if len(filedata) == compressed_size + 8:
                 lz77 = Lz77()
@@ -327,7 +381,7 @@ class IFS:
 
         if self.__decode_binxml and os.path.splitext(filename)[1] == ".xml":
             benc = BinaryEncoding()
-            filexml = benc.decode(filedata)
+            filexml = benc.decode(bytes(filedata))
             if filexml is not None:
                 filedata = str(filexml).encode("utf-8")
 
@@ -337,6 +391,7 @@ class IFS:
             and filename in self.__imgsize
             and filename in self.__uvsize
         ):
+            filedata = bytes(filedata)
             fmt = self.__formats[filename]
             img = self.__imgsize[filename]
             crop = self.__uvsize[filename]
@@ -1,11 +1,34 @@
 import struct
 from PIL import Image
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from bemani.format.dxt import DXTBuffer
 
+try:
+    import numpy
+
+    HAS_NUMPY: bool = True
+except ImportError:
+    # Fall back to converting one pixel at a time below.
+    HAS_NUMPY = False
+
 
 class TDXT:
+    """
+    Formats that pack every pixel into a little-endian 16-bit integer, along with the PIL mode
+    of the image and the shift and bit count of each channel in that mode, in channel order.
+    These are converted a whole texture at a time with numpy when it is installed.
+    """
+
+    PACKED_FORMATS: Dict[int, Tuple[str, List[Tuple[int, int]]]] = {
+        # 16-bit 565 color RGB format. Game references D3D9 texture format 23 (R5G6B5).
+        0x0B: ("RGB", [(11, 5), (5, 6), (0, 5)]),
+        # Some 16-bit texture format. Game references D3D9 texture format 25 (A1R5G5B5).
+        0x13: ("RGBA", [(10, 5), (5, 5), (0, 5), (15, 1)]),
+        # 16-bit 4-4-4-4 RGBA format. Game references D3D9 texture format 26 (A4R4G4B4).
+        0x1F: ("RGBA", [(8, 4), (4, 4), (0, 4), (12, 4)]),
+    }
+
     def __init__(
         self,
         header_flags1: int,
@@ -153,7 +176,9 @@ class TDXT:
         # generically. However, what's here has been tested across a broad range of games
         # and does seem to work.
 
-        if fmt == 0x01:
+        if HAS_NUMPY and fmt in TDXT.PACKED_FORMATS:
+            img = TDXT.__unpackPixels(width, height, fmt, invert, raw_data)
+        elif fmt == 0x01:
             # As far as I can tell, this is 8 bit grayscale. Decoding as such results in
             # images that are recognizeable and look correct.
             img = Image.frombytes(
@@ -371,7 +396,14 @@ class TDXT:
         else:
             order = (0, 1, 2)
 
-        if self.fmt == 0x0B:
+        if HAS_NUMPY and self.fmt in TDXT.PACKED_FORMATS:
+            raw = TDXT.__packPixels(self.fmt, self.invert_channels, imgdata)
+        elif self.fmt == 0x20:
+            # 32-bit RGBA format, stored in BGRA order.
+            if imgdata.mode != "RGBA":
+                imgdata = imgdata.convert("RGBA")
+            raw = imgdata.tobytes("raw", "RGBA" if self.invert_channels else "BGRA")
+        elif self.fmt == 0x0B:
             # 16-bit 565 color RGB format.
             raw = b"".join(
                 struct.pack(
@@ -412,19 +444,47 @@ class TDXT:
                 )
                 for pixel in imgdata.getdata()
             )
-        elif self.fmt == 0x20:
-            # 32-bit RGBA format, stored in BGRA order.
-            raw = b"".join(
-                struct.pack(
-                    "<BBBB",
-                    pixel[order[2]],
-                    pixel[order[1]],
-                    pixel[order[0]],
-                    pixel[3],
-                )
-                for pixel in imgdata.getdata()
-            )
         else:
             raise Exception(f"Unsupported format {hex(self.fmt)} for TDXT file!")
 
         return raw
+
+    @staticmethod
+    def __channels(fmt: int, invert: bool) -> List[Tuple[int, int]]:
+        # Inverting channels swaps red and blue, alpha is always in the right place.
+        channels = list(TDXT.PACKED_FORMATS[fmt][1])
+        if invert:
+            channels[0], channels[2] = channels[2], channels[0]
+        return channels
+
+    @staticmethod
+    def __unpackPixels(width: int, height: int, fmt: int, invert: bool, raw_data: bytes) -> Image.Image:
+        mode = TDXT.PACKED_FORMATS[fmt][0]
+        pixels = numpy.frombuffer(raw_data, dtype="<u2", count=width * height)
+        channels = TDXT.__channels(fmt, invert)
+
+        rgba = numpy.empty((height, width, len(channels)), dtype=numpy.uint8)
+        for i, (shift, bits) in enumerate(channels):
+            # Scale the values so they fill the entire 8 bit range, looking every pixel up at once.
+            if bits == 1:
+                scale = numpy.array([0, 255], dtype=numpy.uint8)
+            else:
+                values = numpy.arange(1 << bits, dtype=numpy.uint16) << (8 - bits)
+                scale = (values | (values >> bits)).astype(numpy.uint8)
+            rgba[:, :, i] = scale[((pixels >> shift) & ((1 << bits) - 1)).reshape(height, width)]
+
+        return Image.frombytes(mode, (width, height), rgba.tobytes())
+
+    @staticmethod
+    def __packPixels(fmt: int, invert: bool, imgdata: Image.Image) -> bytes:
+        mode = TDXT.PACKED_FORMATS[fmt][0]
+        if imgdata.mode not in (mode, "RGBA"):
+            imgdata = imgdata.convert(mode)
+        rgba = numpy.asarray(imgdata, dtype=numpy.uint16)
+
+        pixels = numpy.zeros(rgba.shape[:2], dtype="<u2")
+        for i, (shift, bits) in enumerate(TDXT.__channels(fmt, invert)):
+            # Keep only the top bits of each channel.
+            pixels |= (rgba[:, :, i] >> (8 - bits)) << shift
+
+        return pixels.tobytes()
@@ -0,0 +1,10 @@
+# Augmenting declarations for the compiled build of binary.py. See stream.pxd
+# for details on how these are used.
+
+cdef class PackedOrdering:
+    cdef public list order
+    cdef public bint expand
+    cdef Py_ssize_t __orderlen
+    cdef Py_ssize_t __lastbyte
+    cdef Py_ssize_t __lastshort
+    cdef Py_ssize_t __lastint
@@ -1,8 +1,8 @@
 import struct
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 from typing_extensions import Final
 
-from bemani.protocol.stream import InputStream, OutputStream
+from bemani.protocol.stream import OutputStream
 from bemani.protocol.node import Node
 
 
@@ -52,11 +52,8 @@ class PackedOrdering:
             size - Number of bytes to work with as an integer
             allow_expansion - Boolean describing whether to add to the end of the order when needed
         """
-        self.order: List[Optional[int]] = []
+        self.order: List[Optional[int]] = [None] * size
         self.expand = allow_expansion
-
-        for _ in range(size):
-            self.order.append(None)
         self.__orderlen = size
         self.__lastbyte = 0
         self.__lastshort = 0
@@ -85,8 +82,9 @@ class PackedOrdering:
                 self.__append_empty()
 
         # Mark buffer as used
-        for i in range(size):
-            self.order[i + offset] = size
+        if size + offset > self.__orderlen:
+            raise IndexError("list assignment index out of range")
+        self.order[offset : (offset + size)] = [size] * size
 
     def get_next_byte(self) -> Optional[int]:
         """
@@ -251,9 +249,28 @@ class PackedOrdering:
 
 class BinaryDecoder:
     """
-    A class capable of taking a binary blob and decoding it to a Node tree.
+    A class capable of taking a binary blob and decoding it to a Node tree. The header
+    is walked directly over the input bytes and values are unpacked from zero-copy
+    memoryview slices of the body using precomputed per-type struct formats.
     """
 
+    # Per-type decoding information, keyed by node type without the array bit. Each
+    # entry is the fixed size of the type (None for variable-length strings and blobs),
+    # the alignment used when locating it in the body, and a precompiled struct.
+    TYPE_FORMATS: Final[Dict[int, Tuple[Optional[int], int, Optional[struct.Struct]]]] = {
+        nodetype: (
+            None if info["name"] in {"bin", "str"} else struct.calcsize(info["enc"]),
+            4 if info["name"] in {"bin", "str"} else min(struct.calcsize(info["enc"]), 4),
+            None if info["name"] in {"bin", "str"} else struct.Struct(f">{info['enc']}"),
+        )
+        for nodetype, info in Node.NODE_TYPES.items()
+    }
+
+    # Node names repeat constantly across packets, so remember the decoded version of
+    # each raw packed name we see. This is bounded so that garbage can't grow it forever.
+    NAME_CACHE_SIZE: Final[int] = 4096
+    name_cache: Dict[bytes, str] = {}
+
     def __init__(self, data: bytes, encoding: str, compressed: bool) -> None:
         """
         Initialize the object.
@@ -263,11 +280,23 @@ class BinaryDecoder:
             - encoding - A string representing the text encoding for string elements. Should be either
                          'shift-jis', 'euc-jp' or 'utf-8'
         """
-        self.stream = InputStream(data)
+        self.data = data
+        self.pos = 0
         self.encoding = encoding
         self.compressed = compressed
         self.executed = False
 
+    def __read_byte(self, error: str) -> int:
+        """
+        Read the next byte from the header as an integer, raising with the given
+        error message if we ran out of data.
+        """
+        pos = self.pos
+        if pos >= len(self.data):
+            raise BinaryEncodingException(error)
+        self.pos = pos + 1
+        return self.data[pos]
+
     def __read_node_name(self) -> str:
         """
         Given the current position in the stream, read the 6-bit-byte packed string name of the
@@ -276,9 +305,9 @@ class BinaryDecoder:
         Returns:
             A string representing the name in ascii
         """
-        length = self.stream.read_int()
-        if length is None:
-            raise BinaryEncodingException("Ran out of data when attempting to read node name length!")
+        data = self.data
+        start = self.pos
+        length = self.__read_byte("Ran out of data when attempting to read node name length!")
 
         if not self.compressed:
             if length < 0x40:
@@ -286,46 +315,45 @@ class BinaryDecoder:
             elif length < 0x80:
                 length -= 0x3F
             else:
-                length_ex = self.stream.read_int()
-                if length_ex is None:
-                    raise BinaryEncodingException("Ran out of data when attempting to read node name length!")
+                length_ex = self.__read_byte("Ran out of data when attempting to read node name length!")
                 length = (length << 8) | length_ex
                 length -= 0x7FBF
 
             if length > BinaryEncoding.NAME_MAX_DECOMPRESSED:
                 raise BinaryEncodingException("Node name length over decompressed limit")
 
-            name = self.stream.read_blob(length)
-            if name is None:
+            end = self.pos + length
+            if end > len(data):
                 raise BinaryEncodingException("Ran out of data when attempting to read node name!")
+            raw = data[self.pos : end]
+            self.pos = end
 
-            return name.decode(self.encoding)
+            return raw.decode(self.encoding)
 
         if length > BinaryEncoding.NAME_MAX_COMPRESSED:
             raise BinaryEncodingException("Node name length over compressed limit")
 
-        binary_length = int(((length * 6) + 7) / 8)
-
-        def int_to_bin(integer: int) -> str:
-            val = bin(integer)[2:]
-            while len(val) < 8:
-                val = "0" + val
-
-            return val
-
-        data = ""
-        for _ in range(binary_length):
-            next_byte = self.stream.read_int()
-            if next_byte is None:
-                raise BinaryEncodingException("Ran out of data when attempting to read node name!")
-            data = data + int_to_bin(next_byte)
-        data_str = [data[i : (i + 6)] for i in range(0, len(data), 6)]
-        data_int = [int(val, 2) for val in data_str]
-        ret = "".join([Node.NODE_NAME_CHARS[val] for val in data_int])
-        ret = ret[:length]
-        return ret
-
-    def __read_node(self, node_type: int) -> Node:
+        end = self.pos + ((length * 6) + 7) // 8
+        if end > len(data):
+            raise BinaryEncodingException("Ran out of data when attempting to read node name!")
+        self.pos = end
+
+        # Look up the raw bytes including the length, since the same packed bytes
+        # could be a different name with a different length.
+        packed = data[start:end]
+        cached = BinaryDecoder.name_cache.get(packed)
+        if cached is None:
+            # Pull each 6-bit character out of the packed bits, most significant first.
+            bits = int.from_bytes(packed[1:], "big")
+            shift = (len(packed) - 1) * 8
+            chars = Node.NODE_NAME_CHARS
+            name = "".join(chars[(bits >> (shift - (6 * (i + 1)))) & 0x3F] for i in range(length))
+            if len(BinaryDecoder.name_cache) < BinaryDecoder.NAME_CACHE_SIZE:
+                BinaryDecoder.name_cache[packed] = name
+            return name
+        return cached
+
+    def __read_header(self, node_type: int) -> Node:
         """
         Given an integer node type, read the node's name, possible attributes
         and children. Will return a Node representing this node. Note
@@ -334,89 +362,83 @@ class BinaryDecoder:
         Returns:
             Node object
         """
-        name = self.__read_node_name()
-        node = Node(name=name, type=node_type)
+        data = self.data
+        datalen = len(data)
+        root = Node(name=self.__read_node_name(), type=node_type)
+        stack = [root]
 
-        while True:
-            child_type = self.stream.read_int()
-            if child_type is None:
+        while stack:
+            if self.pos >= datalen:
                 raise BinaryEncodingException("Ran out of data when attempting to read node type!")
+            child_type = data[self.pos]
+            self.pos += 1
 
             if child_type == Node.END_OF_NODE:
-                return node
+                stack.pop()
             elif child_type == Node.ATTR_TYPE:
-                key = self.__read_node_name()
-                node.set_attribute(key)
+                stack[-1].set_attribute(self.__read_node_name())
             else:
-                child = self.__read_node(child_type)
-                node.add_child(child)
+                child = Node(name=self.__read_node_name(), type=child_type)
+                stack[-1].add_child(child)
+                stack.append(child)
 
-    def get_tree(self) -> Node:
-        """
-        Parse the header and body such that we can return a Node tree
-        representing the data passed to us.
+        return root
 
-        Returns:
-            Node object
+    def __read_body(self, root: Node, body: memoryview) -> None:
         """
-        if self.executed:
-            raise BinaryEncodingException("Logic error, should only call this once per instance")
-        self.executed = True
-
-        # Read the header first
-        header_length = self.stream.read_int(4)
-        if header_length is None:
-            raise BinaryEncodingException("Ran out of data when attempting to read header length!")
-
-        node_type = self.stream.read_int()
-        if node_type is None:
-            raise BinaryEncodingException("Ran out of data when attempting to read root node type!")
-        root = self.__read_node(node_type)
-
-        eod = self.stream.read_int()
-        if eod != Node.END_OF_DOCUMENT:
-            raise BinaryEncodingException(f"Unknown node type {eod} at end of document")
-
-        # Skip by any padding
-        while self.stream.pos < header_length + 4:
-            self.stream.read_byte()
+        Given a parsed header tree and the body of the packet, fill in every
+        node value and attribute by walking the tree in body order.
 
-        # Read the body next
-        body_length = self.stream.read_int(4)
-
-        if body_length is not None and body_length > 0:
-            # We have a body
-            body = self.stream.read_blob(body_length)
-            if body is None:
-                raise BinaryEncodingException("Body has insufficient data")
-
-            ordering = PackedOrdering(body_length)
+        Parameters:
+            root - The root Node as returned from parsing the header.
+            body - A memoryview over exactly the body of the packet.
+        """
+        ordering = PackedOrdering(len(body))
+        type_formats = BinaryDecoder.TYPE_FORMATS
+        encoding = self.encoding
+        uint = struct.Struct(">I")
+        loc: Optional[int] = None
+
+        def read_string(loc: int) -> bytes:
+            # The size should be read from the first 4 bytes
+            size = uint.unpack(body[loc : (loc + 4)])[0]
+            ordering.mark_used(size + 4, loc, round_to=4)
+            loc = loc + 4
+            return struct.unpack(f">{size}s", body[loc : (loc + size)])[0]
+
+        def decode_string(val: bytes) -> str:
+            # Need to convert this from encoding to standard string.
+            # Also, need to lob off the trailing null.
+            return val[:-1].decode(encoding, "replace")
+
+        stack = [root]
+        while stack:
+            node = stack.pop()
+            nodetype = node.type
+            size, alignment, fmt = type_formats[nodetype & (~Node.ARRAY_BIT)]
+
+            if size != 0:
+                if node.is_array:
+                    if node.is_composite:
+                        raise Exception("Logic error, no support for composite arrays!")
+                    if size is None:
+                        raise Exception("Logic error, node size not set yet this is not an attribute!")
 
-            values = PackedOrdering.node_to_body_ordering(root)
+                    # Array value
+                    loc = ordering.get_next_int()
+                    if loc is None:
+                        raise BinaryEncodingException("Ran out of data when attempting to read array length location!")
 
-            for value in values:
-                node = value["node"]
+                    # The raw size in bytes
+                    length = uint.unpack(body[loc : (loc + 4)])[0]
+                    elems = int(length / size)
 
-                if value["type"] == "attribute":
-                    size = None
-                    enc = "s"
-                    dtype = "str"
-                    array = False
-                    composite = False
+                    ordering.mark_used(length + 4, loc, round_to=4)
+                    loc = loc + 4
+                    val = struct.unpack(f">{node.data_encoding * elems}", body[loc : (loc + length)])
+                    node.set_value(list(val))
                 else:
-                    size = node.data_length
-                    enc = node.data_encoding
-                    dtype = node.data_type
-                    array = node.is_array
-                    composite = node.is_composite
-
-                if composite and array:
-                    raise Exception("Logic error, no support for composite arrays!")
-
-                if not array:
                     # Scalar value
-                    alignment = value["alignment"]
-
                     if alignment == 1:
                         loc = ordering.get_next_byte()
                     elif alignment == 2:
@@ -426,60 +448,64 @@ class BinaryDecoder:
                     if loc is None:
                         raise BinaryEncodingException("Ran out of data when attempting to read node data location!")
 
-                    if size is None:
-                        # The size should be read from the first 4 bytes
-                        size = struct.unpack(">I", body[loc : (loc + 4)])[0]
-                        ordering.mark_used(size + 4, loc, round_to=4)
-                        loc = loc + 4
-
-                        decode_data = body[loc : (loc + size)]
-                        decode_value = f">{size}{enc}"
+                    if fmt is None:
+                        blob = read_string(loc)
+                        node.set_value(decode_string(blob) if node.data_type == "str" else blob)
                     else:
                         # The size is built-in
                         ordering.mark_used(size, loc)
+                        unpacked = fmt.unpack(body[loc : (loc + size)])
+                        node.set_value(list(unpacked) if node.is_composite else unpacked[0])
 
-                        decode_data = body[loc : (loc + size)]
-                        decode_value = f">{enc}"
+            for attr in sorted(node.attributes.keys()):
+                loc = ordering.get_next_int()
+                if loc is None:
+                    raise BinaryEncodingException("Ran out of data when attempting to read node data location!")
+                node.set_attribute(attr, decode_string(read_string(loc)))
 
-                    if composite:
-                        val_list = list(struct.unpack(decode_value, decode_data))
-                        if value["type"] == "attribute":
-                            raise Exception("Logic error, shouldn't have composite attribute type!")
-                        node.set_value(val_list)
-                        continue
+            # Walk children in order, so push them backwards onto the stack.
+            stack.extend(reversed(node.children))
 
-                    val = struct.unpack(decode_value, decode_data)[0]
+    def get_tree(self) -> Node:
+        """
+        Parse the header and body such that we can return a Node tree
+        representing the data passed to us.
 
-                    if dtype == "str":
-                        # Need to convert this from encoding to standard string.
-                        # Also, need to lob off the trailing null.
-                        try:
-                            val = val[:-1].decode(self.encoding, "replace")
-                        except UnicodeDecodeError:
-                            # Nothing we can do here
-                            pass
+        Returns:
+            Node object
+        """
+        if self.executed:
+            raise BinaryEncodingException("Logic error, should only call this once per instance")
+        self.executed = True
 
-                    if value["type"] == "attribute":
-                        node.set_attribute(value["name"], val)
-                    else:
-                        node.set_value(val)
-                else:
-                    # Array value
-                    loc = ordering.get_next_int()
-                    if loc is None:
-                        raise BinaryEncodingException("Ran out of data when attempting to read array length location!")
+        # Read the header first
+        if len(self.data) < 4:
+            raise BinaryEncodingException("Ran out of data when attempting to read header length!")
+        header_length = struct.unpack_from(">I", self.data, 0)[0]
+        self.pos = 4
 
-                    # The raw size in bytes
-                    length = struct.unpack(">I", body[loc : (loc + 4)])[0]
-                    elems = int(length / size)
+        node_type = self.__read_byte("Ran out of data when attempting to read root node type!")
+        root = self.__read_header(node_type)
 
-                    ordering.mark_used(length + 4, loc, round_to=4)
-                    loc = loc + 4
-                    decode_data = body[loc : (loc + length)]
-                    decode_value = f">{enc * elems}"
+        eod = self.data[self.pos] if self.pos < len(self.data) else None
+        self.pos += 1
+        if eod != Node.END_OF_DOCUMENT:
+            raise BinaryEncodingException(f"Unknown node type {eod} at end of document")
 
-                    val = struct.unpack(decode_value, decode_data)
-                    node.set_value([v for v in val])
+        # Skip by any padding
+        self.pos = max(self.pos, header_length + 4)
+
+        # Read the body next
+        if self.pos + 4 > len(self.data):
+            return root
+        body_length = struct.unpack_from(">I", self.data, self.pos)[0]
+        self.pos += 4
+
+        if body_length > 0:
+            # We have a body
+            if self.pos + body_length > len(self.data):
+                raise BinaryEncodingException("Body has insufficient data")
+            self.__read_body(root, memoryview(self.data)[self.pos : (self.pos + body_length)])
 
         return root
 
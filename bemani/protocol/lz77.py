@@ -1,7 +1,7 @@
 import ctypes
 import os
 from collections import defaultdict
-from typing import Generator, List, MutableMapping, Optional, Set, Tuple
+from typing import List, MutableMapping, Optional, Set
 from typing_extensions import Final
 
 from .. import package_root
@@ -43,7 +43,9 @@ class Lz77Decompress:
     A class that can decompress an Lz77 stream of data. Notably, this is a different
     variant to the Lz77 found in firebeat executables and BIOS. This is used for
     over-the-wire compression of XML data, as well as compression inside a decent
-    amount of file formats found in various Konami games.
+    amount of file formats found in various Konami games. Instead of maintaining a
+    separate backref ring, the last ring length bytes of the output buffer serve as
+    the ring, so backrefs are a single slice copy within one growing bytearray.
     """
 
     RING_LENGTH: Final[int] = 0x1000
@@ -58,170 +60,104 @@ class Lz77Decompress:
         Parameters:
             data - Binary blob representing the data to be decompressed.
         """
-        self.eof: bool = False
         self.data: bytes = data
         self.read_pos: int = 0
         self.left: int = len(self.data)
-        self.flags: int = 1
-        self.write_pos: int = 0
-        self.pending_copy_amount: int = 0
-        self.pending_copy_pos: int = 0
-        self.pending_copy_max: int = 0
         self.ringlength: int = backref or self.RING_LENGTH
-        self.ring: bytes = b"\x00" * self.ringlength
-
-    def _ring_read(self, copy_pos: int, copy_len: int) -> Generator[bytes, None, None]:
-        """
-        Read the next bytes from the backref ring at the current copy position.
-
-        Returns:
-            a generator which yields bytes.
-        """
-        while copy_len > 0:
-            if copy_pos + copy_len > self.ringlength:
-                # Copy first chunk, let subsequent loop handle the next chunks
-                amount = self.ringlength - copy_pos
-            else:
-                # Copy the whole thing out, we have enough space to do so
-                amount = copy_len
 
-            ret = self.ring[copy_pos : (copy_pos + amount)]
-            self._ring_write(ret)
-            yield ret
-
-            copy_pos = (copy_pos + amount) % self.ringlength
-            copy_len -= amount
+        # The output is prefixed with a zeroed ring's worth of data so that backrefs
+        # reaching before the start of the output read zeros, just like a fresh ring.
+        self.output: bytearray = bytearray(self.ringlength)
 
-    def _ring_write(self, bytedata: bytes) -> None:
+    def _copy_backref(self, copy_pos: int, copy_len: int) -> None:
         """
-        Write bytes into the backref ring.
+        Copy bytes from a given distance back in the output to the end of the output.
+        A backref can reference bytes that it is in the process of writing, so copy in
+        chunks no larger than the backref distance.
 
         Parameters:
-            byte - A byte to be written at the current write offset
+            copy_pos - The distance backwards from the current output position to copy from.
+            copy_len - The number of bytes to copy.
         """
-        while True:
-            amount = len(bytedata)
-            if amount == 0:
-                return
-            if amount > (self.ringlength - self.write_pos):
-                amount = self.ringlength - self.write_pos
-
-            self.ring = self.ring[: self.write_pos] + bytedata[:amount] + self.ring[(self.write_pos + amount) :]
-            bytedata = bytedata[amount:]
-            self.write_pos = (self.write_pos + amount) % self.ringlength
+        distance = copy_pos % self.ringlength or self.ringlength
+        output = self.output
+        start = len(output) - distance
+        while copy_len > 0:
+            amount = min(copy_len, distance)
+            output += output[start : (start + amount)]
+            start += amount
+            copy_len -= amount
 
-    def decompress_bytes(self) -> Generator[bytes, None, None]:
+    def decompress(self) -> bytes:
         """
-        Yield the next byte from the decompressed output. If we are
-        in a backref copy, read the next byte from the backref. If
-        we aren't, read the next flag to see if we should decode
-        a byte directly or if we should start another backref read.
-        If we don't have any flags, exit reporting EOF (None). If
-        we hit the end of the stream, stop yielding to signify EOF.
-        In all cases, whatever byte we read should be added back to
-        the backref buffer.
+        Decompress the entire stream. For each flag, either copy a run of bytes
+        directly from the input, or copy a backref out of the previous output. If
+        we run out of flags or hit an end of stream backref, return what we have
+        decompressed so far.
 
         Returns:
-            a generator that yields bytes.
+            the decompressed data.
         """
-        while not self.eof:
-            if self.pending_copy_amount > 0:
-                # We had a backref that would have copied more data than we had available
-                # in the ringbuffer (because every read, even a backref, adds to the
-                # ringbuffer). So, since we read that last time and wrote it to the backbuffer
-                # we are safe to read again.
-                amount = min(self.pending_copy_amount, self.pending_copy_max)
-                yield from self._ring_read(self.pending_copy_pos, amount)
-
-                # We read this many bytes and are about to write them to the ringbuffer,
-                # so bookkeep that.
-                self.pending_copy_amount -= amount
-                self.pending_copy_max = amount
-            else:
-                if self.flags == 1:
-                    # Load the next byte for processing
-                    if self.left == 0:
-                        # We have nothing left to read, so skip the
-                        # ringbuffer write below and exit early.
-                        return
-                    else:
-                        self.flags = 0x100 | self.data[self.read_pos]
-                        self.read_pos += 1
-                        self.left -= 1
+        data = self.data
+        output = self.output
+        ringlength = self.ringlength
+        read_pos = self.read_pos
+        left = self.left
+        flags = 1
 
-                # Shift the lowest bit out to be retrieved as a flag
-                flag = self.flags & 1
-                self.flags >>= 1
-
-                if flag == self.FLAG_COPY:
-                    # Figure out how much to pull at once
-                    amount = 1
-                    while self.flags != 1 and (self.flags & 1) == self.FLAG_COPY:
-                        # We would do a copy next time, so pop that flag and just add to our read amount
-                        self.flags >>= 1
-                        amount += 1
-
-                    # Grab chunk right out of the data source
-                    b = self.data[self.read_pos : (self.read_pos + amount)]
-                    self._ring_write(b)
-                    yield b
-
-                    self.read_pos += amount
-                    self.left -= amount
-                elif flag == self.FLAG_BACKREF:
-                    yield from self._read_backref()
+        while True:
+            if flags == 1:
+                # Load the next byte for processing
+                if left == 0:
+                    # We have nothing left to read, so we're done.
+                    break
+                flags = 0x100 | data[read_pos]
+                read_pos += 1
+                left -= 1
+
+            # Shift the lowest bit out to be retrieved as a flag
+            flag = flags & 1
+            flags >>= 1
+
+            if flag == self.FLAG_COPY:
+                # Figure out how much to pull at once
+                amount = 1
+                while flags != 1 and (flags & 1) == self.FLAG_COPY:
+                    # We would do a copy next time, so pop that flag and just add to our read amount
+                    flags >>= 1
+                    amount += 1
+
+                # Grab chunk right out of the data source
+                output += data[read_pos : (read_pos + amount)]
+                read_pos += amount
+                left -= amount
+            else:
+                # Grab the copy length and copy position from the next two bytes.
+                if left == 0:
+                    break
+                if left == 1:
+                    raise LzException("Unexpected EOF mid-backref")
+
+                hi = data[read_pos]
+                lo = data[read_pos + 1]
+                read_pos += 2
+                left -= 2
+
+                copy_pos = (hi << 4) | (lo >> 4)
+                copy_len = (lo & 0xF) + 3
+                if copy_pos == 0:
+                    # This is the end of stream marker.
+                    break
+                elif copy_len <= copy_pos < ringlength:
+                    # Non-overlapping backref, which is the common case, so do it inline.
+                    start = len(output) - copy_pos
+                    output += output[start : (start + copy_len)]
                 else:
-                    raise Exception("Logic error!")
+                    self._copy_backref(copy_pos, copy_len)
 
-    def _read_backref(self) -> Generator[bytes, None, None]:
-        """
-        Read a backref chunk. Grab the copy length and copy position
-        from the first two bytes and then read the first byte from
-        the backref. Sets up variables such that Lz77Decompress.__read()
-        can finish copying out of the backref on subsequent calls. Should
-        only be called by Lz77Decompress.__read(). If we discover the end
-        of stream, we don't generate any bytes and instead set the eof
-        flag which terminates the main decompression loop above.
-
-        Returns:
-            a generator that yields bytes.
-        """
-        if self.left == 0:
-            self.eof = True
-            return
-        if self.left == 1:
-            raise LzException("Unexpected EOF mid-backref")
-
-        hi = self.data[self.read_pos]
-        lo = self.data[self.read_pos + 1]
-        self.read_pos += 2
-        self.left -= 2
-
-        copy_len = lo & 0xF
-        copy_pos = (hi << 4) | (lo >> 4)
-
-        if copy_pos > 0:
-            copy_len += 3
-            if copy_len > copy_pos:
-                # Remember what we have to do left, and the safe
-                # amount to copy next time (which is our length,
-                # since we are about to write that many butes to
-                # the ringbuffer right after reading them).
-                self.pending_copy_amount = copy_len - copy_pos
-                self.pending_copy_pos = self.write_pos
-                self.pending_copy_max = copy_pos
-
-                # Only copy the available bytes
-                copy_len = copy_pos
-
-            copy_pos = self.write_pos - copy_pos
-            while copy_pos < 0:
-                copy_pos += self.ringlength
-            copy_pos = copy_pos % self.ringlength
-            yield from self._ring_read(copy_pos, copy_len)
-        else:
-            self.eof = True
-            return
+        self.read_pos = read_pos
+        self.left = left
+        return bytes(memoryview(output)[self.ringlength :])
 
 
 class Lz77Compress:
@@ -257,74 +193,67 @@ class Lz77Compress:
         self.ringlength: int = backref or self.RING_LENGTH
         self.locations: MutableMapping[int, Set[int]] = defaultdict(set)
         self.starts: MutableMapping[bytes, Set[int]] = defaultdict(set)
-        self.last_start: Tuple[int, int, int] = (0, 0, 0)
+        self.track_locations: bool = len(data) <= self.LOOSE_COMPRESS_THRESHOLD
 
-        if len(data) > self.LOOSE_COMPRESS_THRESHOLD:
-            self._ring_write = self._ring_write_starts_only
-        else:
-            self._ring_write = self._ring_write_both
-
-    def _ring_write_starts_only(self, bytedata: bytes) -> None:
+    def _ring_write(self, amount: int) -> None:
         """
-        Write bytes into the backref ring.
+        Write bytes into the backref ring. Every byte we output, whether copied or
+        backref'd, is the next byte of the input, so we only need to track how many
+        bytes were written and can index the input directly.
 
         Parameters:
-            byte - A byte to be written at the current write offset
+            amount - The number of bytes to be written at the current write offset
         """
-        for byte in bytedata:
-            # Update the start locations hashmap if we're past the beginning
-            self.last_start = (self.last_start[1], self.last_start[2], byte)
-            if self.bytes_written >= 2:
-                self.starts[bytes(self.last_start)].add(self.bytes_written - 2)
+        data = self.data
+        starts = self.starts
+        start = self.bytes_written
+        end = start + amount
 
-            # Keep track of the fact that we wrote this byte.
-            self.bytes_written += 1
+        # Update the start locations hashmap if we're past the beginning
+        for pos in range(max(start, 2), end):
+            starts[data[(pos - 2) : (pos + 1)]].add(pos - 2)
 
-    def _ring_write_both(self, bytedata: bytes) -> None:
-        """
-        Write bytes into the backref ring.
+        # Update the rest of the location hashmaps
+        if self.track_locations:
+            locations = self.locations
+            for pos in range(start, end):
+                locations[data[pos]].add(pos)
 
-        Parameters:
-            byte - A byte to be written at the current write offset
-        """
-        for byte in bytedata:
-            # Update the start locations hashmap if we're past the beginning
-            self.last_start = (self.last_start[1], self.last_start[2], byte)
-            if self.bytes_written >= 2:
-                self.starts[bytes(self.last_start)].add(self.bytes_written - 2)
-
-            # Update the rest of the location hashmaps
-            self.locations[byte].add(self.bytes_written)
+        # Keep track of the fact that we wrote these bytes.
+        self.bytes_written = end
 
-            # Keep track of the fact that we wrote this byte.
-            self.bytes_written += 1
-
-    def compress_bytes(self) -> Generator[bytes, None, None]:
+    def compress(self) -> bytes:
         """
-        Given the current stream, go through and assemble the next flag byte
-        followed by the next chunk of compressed data.
+        Compress the entire stream. Go through and assemble each flag byte
+        followed by its chunk of compressed data directly into the output.
+
+        Returns:
+            the compressed data.
         """
+        output = bytearray()
+        data = self.data
+        starts = self.starts
+        locations_by_byte = self.locations
+
         while not self.eof:
             if self.left == 0:
                 # Output a dummy flag and an end of stream marker.
                 self.eof = True
-                yield b"\x00\x00\x00"
+                output += b"\x00\x00\x00"
             else:
-                # Need to assemble and return the next chunk, which is a flag
-                # byte and then 8 instructions.
+                # Need to assemble the next chunk, which is a flag byte and then
+                # 8 instructions. Reserve a spot for the flag byte and fill it in
+                # once we know what the instructions are.
                 flags = 0x0
-                flagpos = -1
-                data: List[bytes] = [b""] * 8
-
-                for _ in range(8):
-                    # Track what flag we're generating data for
-                    flagpos += 1
+                flagloc = len(output)
+                output.append(0)
 
+                for flagpos in range(8):
                     if self.left == 0:
                         # Output the end of stream marker, set EOF since we've succeeded
                         # in outputting all flags.
                         flags |= self.FLAG_BACKREF << flagpos
-                        data[flagpos] = b"\x00\x00"
+                        output += b"\x00\x00"
                         self.eof = True
                         break
                     elif self.left < 3 or self.bytes_written < 3:
@@ -333,9 +262,8 @@ class Lz77Compress:
                         # a backref.
                         flags |= self.FLAG_COPY << flagpos
 
-                        chunk = self.data[self.read_pos : (self.read_pos + 1)]
-                        data[flagpos] = chunk
-                        self._ring_write(chunk)
+                        output.append(data[self.read_pos])
+                        self._ring_write(1)
 
                         self.read_pos += 1
                         self.left -= 1
@@ -346,20 +274,19 @@ class Lz77Compress:
 
                     # Iterate over all spots where the first byte equals, and is in range.
                     earliest = max(0, self.bytes_written - (self.ringlength - 1))
-                    index = self.data[self.read_pos : (self.read_pos + 3)]
-                    updated_backref_locations: Set[int] = set(
-                        absolute_pos for absolute_pos in self.starts[index] if absolute_pos >= earliest
-                    )
-                    self.starts[index] = updated_backref_locations
+                    index = data[self.read_pos : (self.read_pos + 3)]
+                    updated_backref_locations: Set[int] = {
+                        absolute_pos for absolute_pos in starts[index] if absolute_pos >= earliest
+                    }
+                    starts[index] = updated_backref_locations
                     possible_backref_locations: List[int] = list(updated_backref_locations)
 
                     # Output the data as a copy if we couldn't find a backref
                     if not possible_backref_locations:
                         flags |= self.FLAG_COPY << flagpos
 
-                        chunk = self.data[self.read_pos : (self.read_pos + 1)]
-                        data[flagpos] = chunk
-                        self._ring_write(chunk)
+                        output.append(data[self.read_pos])
+                        self._ring_write(1)
 
                         self.read_pos += 1
                         self.left -= 1
@@ -369,12 +296,12 @@ class Lz77Compress:
                     # we're going to write at least these three bytes, so append it to the
                     # output buffer.
                     start_write_size = self.bytes_written
-                    self._ring_write(index)
+                    self._ring_write(3)
                     copy_amount = 3
                     while copy_amount < backref_amount:
                         # First, let's see if we have any 3-wide chunks to consume.
-                        index = self.data[(self.read_pos + copy_amount) : (self.read_pos + copy_amount + 3)]
-                        locations = self.starts[index]
+                        index = data[(self.read_pos + copy_amount) : (self.read_pos + copy_amount + 3)]
+                        locations = starts[index]
                         new_backref_locations: List[int] = [
                             absolute_pos
                             for absolute_pos in possible_backref_locations
@@ -383,14 +310,14 @@ class Lz77Compress:
 
                         if new_backref_locations:
                             # Mark that we're copying an extra byte from the backref.
-                            self._ring_write(index)
+                            self._ring_write(3)
                             copy_amount += 3
                             possible_backref_locations = new_backref_locations
                         else:
                             # Check our existing locations to figure out if we still have
                             # longest prefixes of 1 or 2 left.
                             while copy_amount < backref_amount:
-                                locations = self.locations[self.data[self.read_pos + copy_amount]]
+                                locations = locations_by_byte[data[self.read_pos + copy_amount]]
                                 new_backref_locations = [
                                     absolute_pos
                                     for absolute_pos in possible_backref_locations
@@ -403,9 +330,7 @@ class Lz77Compress:
                                     break
 
                                 # Mark that we're copying an extra byte from the backref.
-                                self._ring_write(
-                                    self.data[(self.read_pos + copy_amount) : (self.read_pos + copy_amount + 1)]
-                                )
+                                self._ring_write(1)
                                 copy_amount += 1
                                 possible_backref_locations = new_backref_locations
 
@@ -422,11 +347,14 @@ class Lz77Compress:
                     lo = (copy_amount - 3) & 0xF | ((backref_pos & 0xF) << 4)
                     hi = (backref_pos >> 4) & 0xFF
                     flags |= self.FLAG_BACKREF << flagpos
-                    data[flagpos] = bytes([hi, lo])
+                    output.append(hi)
+                    output.append(lo)
                     self.read_pos += copy_amount
                     self.left -= copy_amount
 
-                yield bytes([flags]) + b"".join(data)
+                output[flagloc] = flags
+
+        return bytes(output)
 
 
 class Lz77:
@@ -469,7 +397,7 @@ class Lz77:
                 raise LzException("Unknown exception in C++ code!")
         else:
             lz = Lz77Decompress(data, backref=self.backref)
-            return b"".join(lz.decompress_bytes())
+            return lz.decompress()
 
     def compress(self, data: bytes) -> bytes:
         """
@@ -499,4 +427,4 @@ class Lz77:
                 raise LzException("Unknown exception in C++ code!")
         else:
             lz = Lz77Compress(data, backref=self.backref)
-            return b"".join(lz.compress_bytes())
+            return lz.compress()
@@ -0,0 +1,13 @@
+# Augmenting declarations for the compiled build of node.py. See stream.pxd
+# for details on how these are used.
+
+cdef class Node:
+    cdef object __name
+    cdef bint __array
+    cdef object __translated_type
+    cdef object __type
+    cdef dict __attrs
+    cdef object __value
+    cdef list __children
+    cdef dict __child_index
+    cdef Py_ssize_t __child_index_size
@@ -22,6 +22,18 @@ class Node:
     constructor helper classmethods to make constructing a tree from source code easier.
     """
 
+    __slots__ = (
+        "__name",
+        "__array",
+        "__translated_type",
+        "__type",
+        "__attrs",
+        "__value",
+        "__children",
+        "__child_index",
+        "__child_index_size",
+    )
+
     NODE_NAME_CHARS: Final[str] = "0123456789:ABCDEFGHIJKLMNOPQRSTUVWXYZ_abcdefghijklmnopqrstuvwxyz"
 
     NODE_TYPE_VOID: Final[int] = 1
@@ -358,6 +370,10 @@ class Node:
     END_OF_NODE: Final[int] = 0xFE
     END_OF_DOCUMENT: Final[int] = 0xFF
 
+    # Nodes with at least this many children build a name lookup index the first
+    # time a child is looked up by name, instead of scanning the list each time.
+    CHILD_INDEX_THRESHOLD: Final[int] = 16
+
     @staticmethod
     def void(name: str) -> "Node":
         return Node(name=name, type=Node.NODE_TYPE_VOID)
@@ -566,6 +582,8 @@ class Node:
         self.__attrs: Dict[str, str] = {}
         self.__value: Any = None
         self.__children: List[Node] = []
+        self.__child_index: Optional[Dict[str, Node]] = None
+        self.__child_index_size = 0
 
         if name is not None:
             self.set_name(name)
@@ -711,6 +729,50 @@ class Node:
             raise NodeException("Invalid child")
 
         self.__children.append(child)
+        self.__child_index = None
+
+    def __build_child_index(self) -> Dict[str, "Node"]:
+        """
+        Build the name to first child index for this node.
+        """
+        # Typed so that the compiled build can access private fields of the children.
+        child: Node
+        index: Dict[str, Node] = {}
+        for child in reversed(self.__children):
+            index[child.__name] = child
+        self.__child_index = index
+        self.__child_index_size = len(self.__children)
+        return index
+
+    def __lookup_child(self, name: str) -> Optional["Node"]:
+        """
+        Find the first direct child with a given name, using the name index
+        when this node has enough children to make it worthwhile.
+
+        The index is rebuilt if children were added or removed without going through
+        add_child(), or if the child it found has since been renamed. Replacing a child
+        in place or renaming a child to a name that was previously missing is not
+        noticed, so modify large nodes through add_child() rather than the children list.
+        """
+        # Typed so that the compiled build can access private fields of the children.
+        child: Node
+        found: Optional[Node]
+        children = self.__children
+        if len(children) < Node.CHILD_INDEX_THRESHOLD:
+            for child in children:
+                if child.__name == name:
+                    return child
+            return None
+
+        index = self.__child_index
+        if index is None or self.__child_index_size != len(children):
+            index = self.__build_child_index()
+        found = index.get(name)
+        if found is not None:
+            child = found
+            if child.__name != name:
+                found = self.__build_child_index().get(name)
+        return found
 
     def child(self, name: str) -> Optional["Node"]:
         """
@@ -725,17 +787,17 @@ class Node:
             A Node if a child was found by name, or None if not.
         """
         tree = name.split("/", 1)
-        for child in self.__children:
-            if child.name == tree[0]:
-                if len(tree) == 1:
-                    # We don't have any more nodes to traverse.
-                    return child
-                else:
-                    # We have more nodes, try to get the next.
-                    return child.child(tree[1])
+        child = self.__lookup_child(tree[0])
+        if child is None:
+            # There was no child by this name, return None.
+            return None
 
-        # There was no child by this name, return None.
-        return None
+        if len(tree) == 1:
+            # We don't have any more nodes to traverse.
+            return child
+        else:
+            # We have more nodes, try to get the next.
+            return child.child(tree[1])
 
     def child_value(self, name: str) -> Optional[Any]:
         """
@@ -757,7 +819,10 @@ class Node:
     @property
     def children(self) -> List["Node"]:
         """
-        Wrapper for accessing children.
+        Wrapper for accessing children. Use add_child() rather than modifying
+        this list directly so that lookups by name stay consistent. Nodes with
+        CHILD_INDEX_THRESHOLD or more children index them by name, and that index
+        does not see children that are replaced in place in this list.
 
         Returns:
             A list of Node instances which are children of this Node.
@@ -1008,37 +1073,40 @@ class Node:
         if not isinstance(other, Node):
             return False
 
+        # Typed so that the compiled build can access private fields of the other node.
+        node: Node = other
+
         try:
-            if self.__name != other.__name:
+            if self.__name != node.__name:
                 return False
-            if self.__array != other.__array:
+            if self.__array != node.__array:
                 return False
-            if self.__type != other.__type:
+            if self.__type != node.__type:
                 return False
 
             if not self.__array:
-                if self.__value != other.__value:
+                if self.__value != node.__value:
                     return False
             else:
-                if len(self.__value) != len(other.__value):
+                if len(self.__value) != len(node.__value):
                     return False
 
                 for i in range(len(self.__value)):
-                    if self.__value[i] != other.__value[i]:
+                    if self.__value[i] != node.__value[i]:
                         return False
 
             for attr in self.__attrs:
-                if other.attribute(attr) != self.attribute(attr):
+                if node.attribute(attr) != self.attribute(attr):
                     return False
-            for attr in other.__attrs:
-                if self.attribute(attr) != other.attribute(attr):
+            for attr in node.__attrs:
+                if self.attribute(attr) != node.attribute(attr):
                     return False
 
-            if len(self.__children) != len(other.__children):
+            if len(self.__children) != len(node.__children):
                 return False
 
             for i in range(len(self.__children)):
-                if self.__children[i] != other.__children[i]:
+                if self.__children[i] != node.__children[i]:
                     return False
 
             return True
@@ -1,14 +1,38 @@
 import binascii
+import ctypes
 import hashlib
+import os
+from functools import lru_cache
 from typing import Optional
 from typing_extensions import Final
 
+from bemani import package_root
 from bemani.protocol.lz77 import Lz77
 from bemani.protocol.binary import BinaryEncoding
 from bemani.protocol.xml import XmlEncoding
 from bemani.protocol.node import Node
 
 
+# Attempt to use the faster C++ RC4 implementation if it is available
+try:
+    clib = None
+    clib_path = os.path.join(package_root, "protocol")
+    files = [f for f in os.listdir(clib_path) if f.startswith("rc4cpp") and f.endswith(".so")]
+    if len(files) > 0:
+        clib = ctypes.cdll.LoadLibrary(os.path.join(clib_path, files[0]))
+        clib.rc4_crypt.argtypes = (
+            ctypes.c_char_p,
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_int,
+        )
+        clib.rc4_crypt.restype = ctypes.c_int
+except Exception:
+    clib = None
+
+
 class EAmuseException(Exception):
     """
     An exception thrown when we encounter an error with E-Amusement encapsulation.
@@ -41,9 +65,61 @@ class EAmuseProtocol:
         self.last_text_encoding: Optional[str] = None
         self.last_packet_encoding: Optional[int] = None
 
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _derive_key(encryption_key: str) -> bytes:
+        """
+        Given an encryption key as found in the X-Eamuse-Info header, derive the
+        RC4 key used to encrypt/decrypt the packet. Since a response is always
+        encrypted with the same key as its request, derived keys are cached so
+        that repeated keys skip the MD5 entirely.
+
+        Parameters:
+            encryption_key - A string encryption key in the form 1-xxyyzzww-aabb.
+
+        Returns:
+            binary string representing the RC4 key.
+        """
+        # Key is concatenated with the shared secret above
+        version, first, second = encryption_key.split("-")
+        key = binascii.unhexlify((first + second).encode("ascii")) + EAmuseProtocol.SHARED_SECRET
+
+        # Next, key is sent through MD5 to derive the real key
+        m = hashlib.md5()
+        m.update(key)
+        return m.digest()
+
     def _rc4_crypt(self, data: bytes, key: bytes) -> bytes:
         """
         Given a data blob and a key blob, perform RC4 encryption/decryption.
+        Uses the C++ implementation if it was compiled, and falls back to the
+        pure python implementation otherwise.
+
+        Parameters:
+            data - Binary string representing data to be encrypted/decrypted
+            key - Binary string representing the key to use
+
+        Returns:
+            binary string representing the encrypted/decrypted data
+        """
+        if clib is not None:
+            outbuf = ctypes.create_string_buffer(len(data))
+            result = clib.rc4_crypt(key, len(key), data, len(data), outbuf, len(data))
+            if result >= 0:
+                return outbuf.raw[:result]
+            elif result == -1:
+                raise EAmuseException("Not enough room in output buffer!")
+            elif result == -2:
+                raise EAmuseException("Invalid RC4 key!")
+            else:
+                raise EAmuseException("Unknown exception in C++ code!")
+        else:
+            return self._rc4_crypt_python(data, key)
+
+    def _rc4_crypt_python(self, data: bytes, key: bytes) -> bytes:
+        """
+        Given a data blob and a key blob, perform RC4 encryption/decryption
+        using the pure python implementation.
 
         Parameters:
             data - Binary string representing data to be encrypted/decrypted
@@ -84,20 +160,9 @@ class EAmuseProtocol:
         Returns:
             binary string representing transformed data
         """
-        key: Optional[bytes] = None
         if encryption_key:
-            # Key is concatenated with the shared secret above
-            version, first, second = encryption_key.split("-")
-            key = binascii.unhexlify((first + second).encode("ascii")) + EAmuseProtocol.SHARED_SECRET
-
-            # Next, key is sent through MD5 to derive the real key
-            m = hashlib.md5()
-            m.update(key)
-            key = m.digest()
-
-        if key:
             # This is an encrypted old-style packet
-            return self._rc4_crypt(data, key)
+            return self._rc4_crypt(data, EAmuseProtocol._derive_key(encryption_key))
 
         # No encryption
         return data
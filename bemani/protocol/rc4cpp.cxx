@@ -0,0 +1,49 @@
+#include <stdint.h>
+
+extern "C"
+{
+    int rc4_crypt(uint8_t *key, unsigned int keylen, uint8_t *indata, unsigned int inlen, uint8_t *outdata, unsigned int outlen)
+    {
+        // RC4 is a stream cipher, so we need exactly as much room in the output
+        // as we have in the input.
+        if (outlen < inlen)
+        {
+            return -1;
+        }
+        if (keylen == 0)
+        {
+            return -2;
+        }
+
+        uint8_t S[256];
+        for (unsigned int i = 0; i < 256; i++)
+        {
+            S[i] = (uint8_t)i;
+        }
+
+        // KSA Phase
+        uint8_t j = 0;
+        for (unsigned int i = 0; i < 256; i++)
+        {
+            j = (uint8_t)(j + S[i] + key[i % keylen]);
+            uint8_t tmp = S[i];
+            S[i] = S[j];
+            S[j] = tmp;
+        }
+
+        // PRGA Phase
+        uint8_t i = 0;
+        j = 0;
+        for (unsigned int pos = 0; pos < inlen; pos++)
+        {
+            i = (uint8_t)(i + 1);
+            j = (uint8_t)(j + S[i]);
+            uint8_t tmp = S[i];
+            S[i] = S[j];
+            S[j] = tmp;
+            outdata[pos] = indata[pos] ^ S[(uint8_t)(S[i] + S[j])];
+        }
+
+        return inlen;
+    }
+}
@@ -0,0 +1,14 @@
+# Augmenting declarations for the compiled build of stream.py. These turn the
+# pure python classes into typed cdef classes when cythonized, while stream.py
+# remains the drop-in implementation for PURE_PYTHON=1 installs.
+
+cdef class InputStream:
+    cdef public object data
+    cdef public Py_ssize_t pos
+    cdef public Py_ssize_t left
+
+
+cdef class OutputStream:
+    cdef list __data
+    cdef Py_ssize_t __data_len
+    cdef object __formatted_data
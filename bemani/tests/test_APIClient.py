@@ -1,10 +1,92 @@
 # vim: set fileencoding=utf-8
+import gzip
+import json
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Set, Tuple
+from unittest.mock import patch
+from freezegun import freeze_time
 
-from bemani.data.api.client import APIClient
+from bemani.common import APIConstants, GameConstants, VersionConstants, cache
+from bemani.data.api.client import APIClient, APIException
+
+
+class FakeServer(BaseHTTPRequestHandler):
+    """
+    A stand-in for a remote BEMAPI server which serves a fixed set of records.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    broken: bool = False
+    records: List[Dict[str, Any]] = []
+    requests: List[Dict[str, Any]] = []
+    connections: Set[Tuple[str, int]] = set()
+
+    def do_GET(self) -> None:
+        length = int(self.headers["Content-Length"])
+        request = json.loads(self.rfile.read(length))
+        FakeServer.requests.append(request)
+        FakeServer.connections.add(self.client_address)
+
+        if FakeServer.broken:
+            # Looks like what a reverse proxy says when the server behind it is down.
+            self.respond(502, "text/html", b"<html>Bad Gateway</html>")
+            return
+
+        if self.path == "/":
+            body: Dict[str, Any] = {"name": "Fake Server", "email": "nobody@example.com", "versions": ["v1"]}
+        else:
+            since = request.get("since")
+            body = {"records": [r for r in FakeServer.records if since is None or r["updated"] >= since]}
+        data = json.dumps(body).encode("utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            data = gzip.compress(data)
+            self.respond(200, "application/json; charset=utf-8", data, {"Content-Encoding": "gzip"})
+        else:
+            self.respond(200, "application/json; charset=utf-8", data)
+
+    def respond(self, code: int, content_type: str, data: bytes, headers: Dict[str, str] = {}) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
 
 
 class TestAPIClient(unittest.TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+        FakeServer.broken = False
+        FakeServer.records = []
+        FakeServer.requests = []
+        FakeServer.connections = set()
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeServer)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.uri = f"http://127.0.0.1:{self.server.server_address[1]}/"
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def record(self, song: int, points: int, updated: int, card: str = "E004000000000001") -> Dict[str, Any]:
+        return {
+            "cards": [card],
+            "song": song,
+            "chart": 0,
+            "points": points,
+            "timestamp": updated,
+            "updated": updated,
+        }
+
     def test_content_type(self) -> None:
         client = APIClient("https://127.0.0.1", "token", False, False)
         self.assertFalse(client._content_type_valid("application/text"))
@@ -18,3 +100,110 @@ class TestAPIClient(unittest.TestCase):
         self.assertTrue(client._content_type_valid("application/json;charset=UTF-8"))
         self.assertTrue(client._content_type_valid("application/json;charset = UTF-8"))
         self.assertTrue(client._content_type_valid("application/json; charset = UTF-8"))
+
+    def test_keepalive(self) -> None:
+        client = APIClient(self.uri, "token", True, True)
+        for _ in range(3):
+            self.assertEqual(client.get_server_info()["name"], "Fake Server")
+
+        # Another client for the same server shares the connection.
+        other = APIClient(self.uri, "token", True, True)
+        self.assertEqual(other.get_server_info()["name"], "Fake Server")
+
+        self.assertEqual(len(FakeServer.requests), 4)
+        self.assertEqual(len(FakeServer.connections), 1)
+
+    def test_circuit_breaker(self) -> None:
+        client = APIClient(self.uri, "token", True, True)
+        FakeServer.broken = True
+
+        with freeze_time("2016-01-01 12:00:00"):
+            for _ in range(APIClient.CIRCUIT_FAILURES):
+                with self.assertRaises(APIException):
+                    client.get_server_info()
+            self.assertEqual(len(FakeServer.requests), APIClient.CIRCUIT_FAILURES)
+
+            # We stop asking a server that keeps failing.
+            with self.assertRaises(APIException):
+                client.get_server_info()
+            self.assertEqual(len(FakeServer.requests), APIClient.CIRCUIT_FAILURES)
+
+        with freeze_time("2016-01-01 12:01:00"):
+            # After a while we try once more, and go back to failing quickly when it's still down.
+            with self.assertRaises(APIException):
+                client.get_server_info()
+            with self.assertRaises(APIException):
+                client.get_server_info()
+            self.assertEqual(len(FakeServer.requests), APIClient.CIRCUIT_FAILURES + 1)
+
+        with freeze_time("2016-01-01 12:02:00"):
+            # Once it's back, we talk to it like normal.
+            FakeServer.broken = False
+            self.assertEqual(client.get_server_info()["name"], "Fake Server")
+            self.assertEqual(client.get_server_info()["name"], "Fake Server")
+            self.assertEqual(len(FakeServer.requests), APIClient.CIRCUIT_FAILURES + 3)
+
+    def test_incremental_records(self) -> None:
+        client = APIClient(self.uri, "token", True, True)
+        FakeServer.records = [self.record(1, 500, 1451649000), self.record(2, 600, 1451649100)]
+
+        def fetch() -> List[Dict[str, Any]]:
+            records = client.get_records(
+                GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, APIConstants.ID_TYPE_SERVER, []
+            )
+            return sorted(records, key=lambda r: r["song"])
+
+        with freeze_time("2016-01-01 12:00:00"):
+            self.assertEqual(fetch(), FakeServer.records)
+        self.assertNotIn("since", FakeServer.requests[-1])
+
+        # A new record holder for one song, and a brand new song.
+        FakeServer.records = [
+            self.record(1, 500, 1451649000),
+            self.record(2, 700, 1451649700, card="E004000000000002"),
+            self.record(3, 800, 1451649800),
+        ]
+        with freeze_time("2016-01-01 12:05:00"):
+            self.assertEqual(fetch(), FakeServer.records)
+        self.assertEqual(FakeServer.requests[-1]["since"], 1451649100)
+
+        # Eventually we fetch everything again, in case records were removed.
+        FakeServer.records = FakeServer.records[1:]
+        with freeze_time("2016-01-01 13:05:00"):
+            self.assertEqual(fetch(), FakeServer.records)
+        self.assertNotIn("since", FakeServer.requests[-1])
+
+        # Asking for specific times always goes straight to the server.
+        with freeze_time("2016-01-01 13:10:00"):
+            records = client.get_records(
+                GameConstants.IIDX,
+                VersionConstants.IIDX_PENDUAL,
+                APIConstants.ID_TYPE_SERVER,
+                [],
+                since=1451649750,
+            )
+            self.assertEqual(records, [self.record(3, 800, 1451649800)])
+        self.assertEqual(FakeServer.requests[-1]["since"], 1451649750)
+
+    def test_incremental_records_key(self) -> None:
+        client = APIClient(self.uri, "token", True, True)
+        FakeServer.records = [self.record(1, 500, 1451649000)]
+        cards = [f"E0040000000000{i:02X}" for i in range(50)]
+
+        with freeze_time("2016-01-01 12:00:00"), patch.object(cache, "set", wraps=cache.set) as cache_set:
+            records = client.get_records(
+                GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, APIConstants.ID_TYPE_CARD, cards
+            )
+            self.assertEqual(records, FakeServer.records)
+
+        # The key for a long list of cards must still be usable with memcached.
+        keys = [call[0][0] for call in cache_set.call_args_list if call[0][0].startswith("records-")]
+        self.assertEqual(len(keys), 1)
+        self.assertNotIn(" ", keys[0])
+        self.assertLess(len(keys[0]), 250)
+
+        # Asking for the same cards again reuses what we already fetched.
+        with freeze_time("2016-01-01 12:05:00"):
+            cache.delete_memoized(client.get_records)
+            client.get_records(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, APIConstants.ID_TYPE_CARD, cards)
+        self.assertEqual(FakeServer.requests[-1]["since"], 1451649000)
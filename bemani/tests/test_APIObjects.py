@@ -0,0 +1,133 @@
+# vim: set fileencoding=utf-8
+import json
+import unittest
+from typing import Any, Dict, List, Optional
+from unittest.mock import Mock
+
+from bemani.api.objects import ProfileObject, RecordsObject, StatisticsObject
+from bemani.common import APIConstants, GameConstants, VersionConstants
+from bemani.data.mysql.game import GameData
+from bemani.data.mysql.music import MusicData
+from bemani.data.mysql.user import UserData
+from bemani.tests.helpers import FakeCursor
+
+
+class FakeDB:
+    """
+    Stands in for the DB behind UserData, MusicData and GameData, where every user has one
+    card, one profile, one score and game settings, and counts how many queries are made.
+    """
+
+    def __init__(self, users: int) -> None:
+        self.cards = {f"E0040000{userid:08X}": userid for userid in range(1, users + 1)}
+        self.queries = 0
+
+    def execute(self, sql: str, params: Optional[Dict[str, Any]] = None) -> FakeCursor:
+        self.queries += 1
+        params = params or {}
+        if "FROM card WHERE id IN" in sql:
+            return FakeCursor(
+                [{"id": card, "userid": self.cards[card]} for card in params["ids"] if card in self.cards]
+            )
+        if "FROM card WHERE userid IN" in sql:
+            return FakeCursor(
+                [{"id": card, "userid": userid} for card, userid in self.cards.items() if userid in params["userids"]]
+            )
+        if "FROM score, music" in sql:
+            return FakeCursor([self.row(userid) for userid in params["userids"]])
+        if "INNER JOIN profile" in sql:
+            return FakeCursor(
+                [
+                    {"version": VersionConstants.IIDX_PENDUAL, "userid": userid, "refid": f"R{userid}"}
+                    for userid in params["userids"]
+                ]
+            )
+        if "FROM refid, extid, profile" in sql:
+            return FakeCursor(
+                [
+                    {"userid": int(refid[1:]), "refid": refid, "extid": int(refid[1:]), "data": '{"name": "PLAYER"}'}
+                    for refid in params["refids"]
+                ]
+            )
+        if "FROM game_settings" in sql:
+            return FakeCursor(
+                [{"userid": userid, "data": json.dumps({"total_plays": userid})} for userid in params["userids"]]
+            )
+        if "FROM score_history" in sql:
+            return FakeCursor([dict(self.row(userid), new_record=1) for userid in params["userids"]])
+        raise Exception(f"Unexpected query {sql}")
+
+    def row(self, userid: int) -> Dict[str, Any]:
+        return {
+            "songid": 1000,
+            "chart": 0,
+            "scorekey": userid,
+            "userid": userid,
+            "timestamp": 1451606400,
+            "update": 1451606400,
+            "lid": 1,
+            "plays": 1,
+            "points": 500,
+            "data": json.dumps({"clear_status": 4}),
+        }
+
+
+class TestAPIObjects(unittest.TestCase):
+    def build(self, users: int) -> Any:
+        db = FakeDB(users)
+        data = Mock()
+        data.local.user = UserData(Mock(), None)
+        data.local.user.execute = db.execute
+        data.local.music = MusicData(Mock(), None)
+        data.local.music.execute = db.execute
+        data.local.game = GameData(Mock(), None)
+        data.local.game.execute = db.execute
+        data.db = db
+        return data
+
+    def fetch(self, cls: Any, users: int, cards: List[str]) -> Any:
+        data = self.build(users)
+        obj = cls(data, GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, False)
+        return obj.fetch_v1(APIConstants.ID_TYPE_CARD, cards, {}), data.db.queries
+
+    def test_records_queries(self) -> None:
+        one, one_queries = self.fetch(RecordsObject, 1, ["E004000000000001"])
+        self.assertEqual(len(one), 1)
+        self.assertEqual(one[0]["cards"], ["E004000000000001"])
+
+        # Unknown cards and repeats of the same card don't add anything.
+        cards = [f"E0040000{userid:08X}" for userid in range(1, 201)]
+        many, many_queries = self.fetch(RecordsObject, 200, cards + ["E0040000FFFFFFFF", cards[0].lower()])
+        self.assertEqual(len(many), 200)
+        self.assertEqual(one_queries, many_queries)
+
+    def test_statistics_queries(self) -> None:
+        one, one_queries = self.fetch(StatisticsObject, 1, ["E004000000000001"])
+        self.assertEqual(len(one), 1)
+        self.assertEqual(one[0]["plays"], 1)
+
+        cards = [f"E0040000{userid:08X}" for userid in range(1, 201)]
+        many, many_queries = self.fetch(StatisticsObject, 200, cards)
+        self.assertEqual(len(many), 200)
+        self.assertEqual(one_queries, many_queries)
+
+    def test_profile_queries(self) -> None:
+        one, one_queries = self.fetch(ProfileObject, 1, ["E004000000000001"])
+        self.assertEqual(len(one), 1)
+        self.assertEqual(one[0]["name"], "PLAYER")
+        self.assertEqual(one[0]["plays"], 1)
+        self.assertEqual(one[0]["match"], "exact")
+
+        cards = [f"E0040000{userid:08X}" for userid in range(1, 201)]
+        many, many_queries = self.fetch(ProfileObject, 200, cards + [cards[0].lower()])
+        self.assertEqual(len(many), 200)
+        self.assertEqual(many[199]["plays"], 200)
+        self.assertEqual(one_queries, many_queries)
+
+    def test_no_cards(self) -> None:
+        records, _ = self.fetch(RecordsObject, 5, ["E0040000FFFFFFFF"])
+        self.assertEqual(records, [])
+        statistics, _ = self.fetch(StatisticsObject, 5, [])
+        self.assertEqual(statistics, [])
+        profiles, _ = self.fetch(ProfileObject, 5, ["E0040000FFFFFFFF"])
+        self.assertEqual(profiles, [])
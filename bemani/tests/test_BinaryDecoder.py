@@ -0,0 +1,65 @@
+# vim: set fileencoding=utf-8
+import unittest
+
+from bemani.protocol.binary import BinaryEncoding
+from bemani.protocol.node import Node
+from bemani.utils.benchmark import ReferenceDecoder
+
+
+class TestBinaryDecoder(unittest.TestCase):
+    def build_tree(self, entries: int) -> Node:
+        root = Node.void("response")
+        game = Node.void("game")
+        root.add_child(game)
+        game.set_attribute("status", "0")
+        game.set_attribute("method", "save")
+        game.add_child(Node.string("name", "ＤＲＡＧＯＮ"))
+        game.add_child(Node.binary("blob", b"\x00\x01\x02\x03\x04"))
+        game.add_child(Node.ipv4("ip", "127.0.0.1"))
+        game.add_child(Node.bool("flag", True))
+        game.add_child(Node.s64("bignum", -123456789012))
+        game.add_child(Node.float("rate", 0.5))
+        game.add_child(Node.u16_array("counts", [1, 2, 3, 4, 5]))
+        game.add_child(Node.bool_array("flags", [True, False, True]))
+        game.add_child(Node.s8_array("empty", []))
+
+        for i in range(entries):
+            music = Node.void("music")
+            music.set_attribute("id", str(i))
+            music.add_child(Node.u32("music_id", i))
+            music.add_child(Node.u8("chart", i % 5))
+            music.add_child(Node.s16("rank", -i))
+            music.add_child(Node.s32_array("score", [i, i * 2, i * 3]))
+            music.add_child(Node.u16_array("ghost", list(range(i % 30))))
+            music.add_child(Node.string("comment", f"comment {i}"))
+            game.add_child(music)
+
+        return root
+
+    def test_parity(self) -> None:
+        root = self.build_tree(50)
+
+        for compressed in [True, False]:
+            for encoding in ["shift-jis", "euc-jp", "utf-8"]:
+                data = BinaryEncoding().encode(root, encoding=encoding, compressed=compressed)
+                newroot = BinaryEncoding().decode(data)
+                self.assertEqual(newroot, root)
+
+                if compressed:
+                    reference = ReferenceDecoder(data[4:], encoding).get_tree()
+                    self.assertEqual(newroot, reference)
+
+    def test_all_name_lengths(self) -> None:
+        for length in range(BinaryEncoding.NAME_MAX_COMPRESSED + 1):
+            name = (Node.NODE_NAME_CHARS * 2)[length : (length * 2)]
+            root = Node.void("root")
+            root.add_child(Node.u8(name, length))
+            root.set_attribute(name, name)
+
+            data = BinaryEncoding().encode(root, encoding="ascii")
+            self.assertEqual(BinaryEncoding().decode(data), root)
+
+    def test_truncated(self) -> None:
+        data = BinaryEncoding().encode(self.build_tree(5), encoding="shift-jis")
+        self.assertIsNone(BinaryEncoding().decode(data[:6], skip_on_exceptions=True))
+        self.assertIsNone(BinaryEncoding().decode(data[:-8], skip_on_exceptions=True))
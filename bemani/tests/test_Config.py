@@ -0,0 +1,77 @@
+# vim: set fileencoding=utf-8
+import unittest
+
+from bemani.data import Config
+
+
+class TestConfig(unittest.TestCase):
+    def build_config(self) -> Config:
+        return Config(
+            {
+                "database": {"address": "localhost", "read_only": False},
+                "server": {"uri": "https://eagate.573.jp", "enforce_pcbid": True},
+                "paseli": {"enabled": True, "infinite": False},
+                "webhooks": {"discord": {"iidx": "https://discord.com/hook"}},
+                "verbose": False,
+            }
+        )
+
+    def test_overlay_reads(self) -> None:
+        config = self.build_config()
+        overlay = config.overlay()
+
+        self.assertIsInstance(overlay, Config)
+        self.assertEqual(overlay.server.uri, "https://eagate.573.jp")
+        self.assertTrue(overlay.server.enforce_pcbid)
+        self.assertTrue(overlay.paseli.enabled)
+        self.assertEqual(overlay["verbose"], False)
+
+    def test_overlay_writes(self) -> None:
+        config = self.build_config()
+        overlay = config.overlay()
+
+        overlay["client"] = {"address": "10.0.0.1"}
+        overlay["paseli"]["enabled"] = False
+        overlay["server"]["uri"] = None
+        overlay["verbose"] = True
+
+        self.assertEqual(overlay.client.address, "10.0.0.1")
+        self.assertFalse(overlay.paseli.enabled)
+        self.assertIsNone(overlay.server.uri)
+        self.assertTrue(overlay["verbose"])
+
+        # None of the above should have leaked into the original.
+        self.assertNotIn("client", config)
+        self.assertTrue(config.paseli.enabled)
+        self.assertEqual(config.server.uri, "https://eagate.573.jp")
+        self.assertFalse(config["verbose"])
+
+        # Sections that weren't written to are still shared.
+        self.assertIs(overlay.get("webhooks"), config.get("webhooks"))
+
+    def test_nested_overlay(self) -> None:
+        config = self.build_config()
+        requestconfig = config.overlay()
+        requestconfig["client"] = {"address": "10.0.0.1"}
+
+        dispatchconfig = requestconfig.overlay()
+        dispatchconfig["machine"] = {"pcbid": "0101020304050607", "arcade": None}
+        dispatchconfig["paseli"]["infinite"] = True
+
+        self.assertEqual(dispatchconfig.client.address, "10.0.0.1")
+        self.assertEqual(dispatchconfig.machine.pcbid, "0101020304050607")
+        self.assertTrue(dispatchconfig.paseli.infinite)
+        self.assertNotIn("machine", requestconfig)
+        self.assertFalse(requestconfig.paseli.infinite)
+        self.assertFalse(config.paseli.infinite)
+
+    def test_overlay_clone(self) -> None:
+        config = self.build_config()
+        overlay = config.overlay()
+        overlay["paseli"]["enabled"] = False
+
+        clone = overlay.clone()
+        clone["paseli"]["infinite"] = True
+        self.assertFalse(clone.paseli.enabled)
+        self.assertFalse(overlay.paseli.infinite)
+        self.assertFalse(config.paseli.infinite)
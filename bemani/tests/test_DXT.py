@@ -0,0 +1,56 @@
+# vim: set fileencoding=utf-8
+import random
+import struct
+import unittest
+
+from bemani.format import dxt
+from bemani.format.dxt import DXTBuffer
+
+
+class TestDXT(unittest.TestCase):
+    def test_dxt1_block(self) -> None:
+        # A block with pure red and pure blue endpoints, using each of the four codes in turn.
+        block = struct.pack("<HHI", 0xF800, 0x001F, 0b11100100 * 0x01010101)
+        data = DXTBuffer(4, 4).DXT1DecompressPython(block)
+        self.assertEqual(
+            data[0:16],
+            bytes([255, 0, 0, 255, 0, 0, 255, 255, 170, 0, 85, 255, 85, 0, 170, 255]),
+        )
+
+        # With endpoints the other way around, the last code is black instead of a blend.
+        block = struct.pack("<HHI", 0x001F, 0xF800, 0b11100100 * 0x01010101)
+        data = DXTBuffer(4, 4).DXT1DecompressPython(block)
+        self.assertEqual(
+            data[0:16],
+            bytes([0, 0, 255, 255, 255, 0, 0, 255, 127, 0, 127, 255, 0, 0, 0, 255]),
+        )
+
+    @unittest.skipIf(not dxt.HAS_NUMPY, "numpy is not installed")
+    def test_numpy_matches_python(self) -> None:
+        rng = random.Random(0)
+
+        # Sizes that aren't a multiple of the block size only decode whole blocks.
+        for width, height in [(0, 0), (4, 4), (16, 8), (12, 20), (10, 6), (3, 9)]:
+            blocks = (width // 4) * (height // 4)
+            for swap in [False, True]:
+                data = rng.randbytes(blocks * 16)
+                self.assertEqual(
+                    DXTBuffer(width, height).DXT5DecompressNumpy(data, swap),
+                    DXTBuffer(width, height).DXT5DecompressPython(data, swap),
+                )
+
+                # Also make sure blocks with equal endpoints take the non-interpolated path.
+                data = b"".join(
+                    struct.pack("<BB", 7, 7) + rng.randbytes(6) + struct.pack("<HH", 5, 5) + rng.randbytes(4)
+                    for _ in range(blocks)
+                )
+                self.assertEqual(
+                    DXTBuffer(width, height).DXT5DecompressNumpy(data, swap),
+                    DXTBuffer(width, height).DXT5DecompressPython(data, swap),
+                )
+
+                data = rng.randbytes(blocks * 8)
+                self.assertEqual(
+                    DXTBuffer(width, height).DXT1DecompressNumpy(data, swap),
+                    DXTBuffer(width, height).DXT1DecompressPython(data, swap),
+                )
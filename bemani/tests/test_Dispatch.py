@@ -0,0 +1,47 @@
+# vim: set fileencoding=utf-8
+import unittest
+
+from bemani.backend.base import Base
+from bemani.backend.dispatch import Dispatch
+from bemani.protocol import Node
+
+
+class FakeGame(Base):
+    def handle_shop_get_request(self, request: Node) -> Node:
+        return Node.void("shop_get")
+
+    def handle_game_3_save_e_request(self, request: Node) -> Node:
+        return Node.void("game_3_save_e")
+
+    def handle_lobby_requests(self, request: Node) -> Node:
+        return Node.void("lobby")
+
+    def handle_unrelated(self, request: Node) -> Node:
+        return Node.void("unrelated")
+
+
+class TestDispatch(unittest.TestCase):
+    def test_routes(self) -> None:
+        routes = FakeGame.routes()
+        self.assertEqual(
+            set(routes),
+            {"handle_shop_get_request", "handle_game_3_save_e_request", "handle_lobby_requests"},
+        )
+        self.assertIs(routes, FakeGame.routes())
+        self.assertEqual(Base.routes(), {})
+
+    def test_resolve(self) -> None:
+        method_handler, service_handler = Dispatch.resolve(FakeGame, "shop", "get")
+        self.assertIs(method_handler, FakeGame.handle_shop_get_request)
+        self.assertIsNone(service_handler)
+
+        method_handler, service_handler = Dispatch.resolve(FakeGame, "game_3", "save_e")
+        self.assertIs(method_handler, FakeGame.handle_game_3_save_e_request)
+        self.assertIsNone(service_handler)
+
+        method_handler, service_handler = Dispatch.resolve(FakeGame, "lobby", "entry")
+        self.assertIsNone(method_handler)
+        self.assertIs(service_handler, FakeGame.handle_lobby_requests)
+
+        self.assertEqual(Dispatch.resolve(FakeGame, "shop", "put"), (None, None))
+        self.assertEqual(Dispatch.resolve(Base, "shop", "get"), (None, None))
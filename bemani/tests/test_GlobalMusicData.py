@@ -0,0 +1,132 @@
+# vim: set fileencoding=utf-8
+import unittest
+from typing import Any, Dict, List, Optional
+from unittest.mock import MagicMock, Mock, patch
+from freezegun import freeze_time
+
+from bemani.common import APIConstants, GameConstants, VersionConstants, cache
+from bemani.data.api.client import APIClient
+from bemani.data.api.music import GlobalMusicData
+from bemani.data.types import Server, UserID
+
+
+class TestGlobalMusicData(unittest.TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def record(self, song: int, points: int, updated: int) -> Dict[str, Any]:
+        return {
+            "cards": ["E004000000000001"],
+            "song": song,
+            "chart": 0,
+            "points": points,
+            "status": "nc",
+            "timestamp": updated,
+            "updated": updated,
+        }
+
+    def build(self, mirror: Any) -> GlobalMusicData:
+        api = Mock()
+        api.get_all_servers.return_value = [
+            Server(1, 0, "https://one.example.com", "token", True, True),
+            Server(2, 0, "https://two.example.com", "token", True, True),
+            Server(3, 0, "https://three.example.com", "token", True, False),
+        ]
+        user = Mock()
+        user.get_all_cards.return_value = [("E004000000000002", UserID(5))]
+        music = Mock()
+        music.get_all_records.return_value = []
+        return GlobalMusicData(api, user, music, mirror)
+
+    def test_records_from_mirror(self) -> None:
+        mirror = MagicMock()
+        mirror.get_records.return_value = [self.record(1000, 1500, 1451649000)]
+        music = self.build(mirror)
+
+        with patch.object(APIClient, "get_records") as get_records:
+            records = music.get_all_records(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL)
+            music.get_all_records(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL)
+            get_records.assert_not_called()
+
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0][1].id, 1000)
+        self.assertEqual(records[0][1].points, 1500)
+
+        # We only note that these are wanted once in a while, not on every request.
+        mirror.want.assert_called_once_with(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, None)
+
+    def test_refresh_mirror(self) -> None:
+        mirror = MagicMock()
+        progress: Dict[str, Any] = {}
+        mirror.get_syncs.return_value = [(GameConstants.IIDX, VersionConstants.IIDX_PENDUAL, None, progress)]
+        music = self.build(mirror)
+        responses: Dict[str, Optional[List[Dict[str, Any]]]] = {
+            "https://one.example.com": [self.record(1000, 1500, 1451649000), self.record(1001, 1200, 1451649100)],
+            "https://two.example.com": None,
+        }
+        calls: List[Any] = []
+
+        def get_updated_records(
+            client: APIClient,
+            game: GameConstants,
+            version: int,
+            idtype: APIConstants,
+            ids: List[str],
+            since: Optional[int],
+        ) -> Optional[List[Dict[str, Any]]]:
+            calls.append((client.base_uri, idtype, since))
+            return responses[client.base_uri]
+
+        with patch.object(APIClient, "get_updated_records", autospec=True, side_effect=get_updated_records):
+            with freeze_time("2016-01-01 12:00:00"):
+                music.refresh_mirror()
+
+            # Servers that don't share scores aren't asked, and lose anything we had from them.
+            mirror.delete_servers.assert_called_once_with([1, 2])
+            self.assertEqual(
+                sorted(calls),
+                [
+                    ("https://one.example.com", APIConstants.ID_TYPE_SERVER, None),
+                    ("https://two.example.com", APIConstants.ID_TYPE_SERVER, None),
+                ],
+            )
+
+            # Only the server we reached is saved, and the other is tried from scratch next time.
+            mirror.put_records.assert_called_once_with(
+                1,
+                GameConstants.IIDX,
+                VersionConstants.IIDX_PENDUAL,
+                None,
+                responses["https://one.example.com"],
+                True,
+            )
+            self.assertEqual(progress, {"1": {"since": 1451649100, "full": 1451649600}})
+
+            calls.clear()
+            mirror.put_records.reset_mock()
+            responses["https://one.example.com"] = [self.record(1000, 1700, 1451649900)]
+            with freeze_time("2016-01-01 12:30:00"):
+                music.refresh_mirror()
+
+            self.assertEqual(
+                sorted(calls),
+                [
+                    ("https://one.example.com", APIConstants.ID_TYPE_SERVER, 1451649100),
+                    ("https://two.example.com", APIConstants.ID_TYPE_SERVER, None),
+                ],
+            )
+            mirror.put_records.assert_called_once_with(
+                1,
+                GameConstants.IIDX,
+                VersionConstants.IIDX_PENDUAL,
+                None,
+                responses["https://one.example.com"],
+                False,
+            )
+            self.assertEqual(progress, {"1": {"since": 1451649900, "full": 1451649600}})
+
+            # Once a day we copy everything again.
+            calls.clear()
+            with freeze_time("2016-01-02 12:00:00"):
+                music.refresh_mirror()
+            self.assertIn(("https://one.example.com", APIConstants.ID_TYPE_SERVER, None), calls)
@@ -0,0 +1,84 @@
+# vim: set fileencoding=utf-8
+import mmap
+import os
+import struct
+import tempfile
+import unittest
+from typing import Dict
+from unittest.mock import Mock
+
+from bemani.format import IFS
+from bemani.protocol.binary import BinaryEncoding
+from bemani.protocol.node import Node
+
+
+def build_ifs(files: Dict[str, bytes], supers: Dict[str, str] = {}) -> bytes:
+    """
+    Build an IFS archive containing the given files, as well as files that are stored in
+    other IFS archives, given as a mapping of file name to archive name.
+    """
+    header = Node.void("imgfs")
+    for name in sorted(set(supers.values())):
+        super_node = Node.string("_super_", name)
+        super_node.add_child(Node.binary("md5", b"\0" * 16))
+        header.add_child(super_node)
+
+    body = b""
+    for name, data in files.items():
+        header.add_child(Node(name=name, type=Node.NODE_TYPE_3S32, value=[len(body), len(data), 0]))
+        body += data
+    for name, super_name in supers.items():
+        node = Node(name=name, type=Node.NODE_TYPE_3S32, value=[0, 0, 0])
+        node.add_child(Node.s32("i", sorted(set(supers.values())).index(super_name) + 1))
+        header.add_child(node)
+
+    encoded = BinaryEncoding().encode(header, encoding="ascii")
+    return struct.pack(">IHHIII", 0x6CAD8F89, 1, 0xFFFE, 0, len(encoded), 20 + len(encoded)) + encoded + body
+
+
+class TestIFS(unittest.TestCase):
+    def test_read_file(self) -> None:
+        ifs = IFS(build_ifs({"first_Ebin": b"first file", "second_Ebin": b"second"}))
+        self.assertEqual(sorted(ifs.filenames), ["first.bin", "second.bin"])
+        self.assertEqual(ifs.read_file("first.bin"), b"first file")
+        self.assertEqual(ifs.read_file("second.bin"), b"second")
+        self.assertIsInstance(ifs.read_file("second.bin"), bytes)
+        self.assertEqual(bytes(ifs.read_view("second.bin")), b"second")
+
+    def test_truncated(self) -> None:
+        with self.assertRaises(Exception):
+            IFS(build_ifs({"first_Ebin": b"first file"})[:-1])
+
+    def test_open(self) -> None:
+        with tempfile.TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "test.ifs")
+            with open(filename, "wb") as fp:
+                fp.write(build_ifs({"first_Ebin": b"first file", "second_Ebin": b"second"}))
+
+            ifs = IFS.open(filename)
+            self.assertEqual(ifs.read_file("first.bin"), b"first file")
+
+            # Views are of the memory-mapped file itself, not copies of it.
+            with ifs.read_view("second.bin") as view:
+                self.assertIsInstance(view.obj, mmap.mmap)
+                self.assertEqual(bytes(view), b"second")
+            ifs.close()
+
+    def test_lazy_references(self) -> None:
+        other = IFS(build_ifs({"shared_Ebin": b"shared data"}))
+        loader = Mock(return_value=other)
+        ifs = IFS(build_ifs({"local_Ebin": b"local data"}, {"shared_Ebin": "other.ifs"}), reference_loader=loader)
+        self.assertEqual(sorted(ifs.filenames), ["local.bin", "shared.bin"])
+
+        # Referenced archives are only loaded once a file in them is read.
+        self.assertEqual(ifs.read_file("local.bin"), b"local data")
+        loader.assert_not_called()
+        self.assertEqual(ifs.read_file("shared.bin"), b"shared data")
+        self.assertEqual(ifs.read_file("shared.bin"), b"shared data")
+        loader.assert_called_once_with("other.ifs")
+
+        # Missing references are reported when they're read.
+        ifs = IFS(build_ifs({"local_Ebin": b"local data"}, {"shared_Ebin": "other.ifs"}))
+        self.assertEqual(ifs.read_file("local.bin"), b"local data")
+        with self.assertRaises(Exception):
+            ifs.read_file("shared.bin")
@@ -0,0 +1,116 @@
+# vim: set fileencoding=utf-8
+import unittest
+from unittest.mock import Mock
+from freezegun import freeze_time
+
+from bemani.common import GameConstants
+from bemani.data.mysql.machine import MachineData
+from bemani.data.types import ArcadeID, UserID
+from bemani.tests.helpers import FakeCursor
+
+
+class TestMachineData(unittest.TestCase):
+    MACHINE_ROW = {
+        "name": "なし",
+        "description": "",
+        "arcadeid": 5,
+        "id": 1,
+        "port": 10000,
+        "game": None,
+        "version": None,
+        "data": '{"key": "value"}',
+    }
+
+    def setUp(self) -> None:
+        MachineData.clear_cache()
+
+    def test_machine_cache(self) -> None:
+        machine = MachineData(Mock(), None)
+        machine.execute = Mock(return_value=FakeCursor([self.MACHINE_ROW]))  # type: ignore
+        before = MachineData.get_cache_stats()["machine"]
+
+        first = machine.get_machine("0101020304050607")
+        second = machine.get_machine("0101020304050607")
+        self.assertEqual(machine.execute.call_count, 1)
+        self.assertEqual(first.arcade, 5)
+        self.assertEqual(second.data.get_str("key"), "value")
+
+        # Cached rows should never share mutable state between callers.
+        first.data.replace_str("key", "changed")
+        self.assertEqual(machine.get_machine("0101020304050607").data.get_str("key"), "value")
+        self.assertIsNot(first.data, second.data)
+
+        # A second request should be served from the process-wide cache.
+        other = MachineData(Mock(), None)
+        other.execute = Mock(return_value=FakeCursor([self.MACHINE_ROW]))  # type: ignore
+        self.assertEqual(other.get_machine("0101020304050607").id, 1)
+        self.assertEqual(other.execute.call_count, 0)
+
+        after = MachineData.get_cache_stats()["machine"]
+        self.assertEqual(after["hits"] - before["hits"], 3)
+        self.assertEqual(after["misses"] - before["misses"], 1)
+
+        # Writing the machine should invalidate everywhere.
+        machine.put_machine(first)
+        other.execute = Mock(return_value=FakeCursor([self.MACHINE_ROW]))  # type: ignore
+        other.get_machine("0101020304050607")
+        self.assertEqual(other.execute.call_count, 1)
+
+    def test_missing_machine_not_cached(self) -> None:
+        machine = MachineData(Mock(), None)
+        machine.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        self.assertIsNone(machine.get_machine("0101020304050607"))
+        self.assertIsNone(machine.get_machine("0101020304050607"))
+        self.assertEqual(machine.execute.call_count, 2)
+
+    def test_cache_expiration(self) -> None:
+        with freeze_time("2016-01-01 12:00:00") as frozen:
+            machine = MachineData(Mock(), None)
+            machine.execute = Mock(return_value=FakeCursor([self.MACHINE_ROW]))  # type: ignore
+            machine.get_machine("0101020304050607")
+            machine.get_machine("0101020304050607")
+            self.assertEqual(machine.execute.call_count, 1)
+
+            frozen.tick(MachineData.CACHE_TTL + 1)
+            machine.get_machine("0101020304050607")
+            self.assertEqual(machine.execute.call_count, 2)
+
+    def test_arcade_cache(self) -> None:
+        machine = MachineData(Mock(), None)
+        machine.execute = Mock(  # type: ignore
+            side_effect=[
+                FakeCursor(
+                    [{"name": "Arcade", "description": "", "pin": "1234", "pref": 1, "area": None, "data": "{}"}]
+                ),
+                FakeCursor([{"userid": 7}, {"userid": 8}]),
+            ]
+        )
+
+        arcade = machine.get_arcade(ArcadeID(5))
+        self.assertEqual(arcade.owners, [7, 8])
+        arcade.owners.append(UserID(9))
+        self.assertEqual(machine.get_arcade(ArcadeID(5)).owners, [7, 8])
+        self.assertEqual(machine.execute.call_count, 2)
+
+        machine.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        machine.put_arcade(arcade)
+        self.assertIsNone(machine.get_arcade(ArcadeID(5)))
+
+    def test_settings_cache(self) -> None:
+        machine = MachineData(Mock(), None)
+        machine.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+
+        # Missing settings are cached as well.
+        self.assertIsNone(machine.get_settings(ArcadeID(5), GameConstants.IIDX, 25, "game_config"))
+        self.assertIsNone(machine.get_settings(ArcadeID(5), GameConstants.IIDX, 25, "game_config"))
+        self.assertEqual(machine.execute.call_count, 1)
+
+        machine.put_settings(ArcadeID(5), GameConstants.IIDX, 25, "game_config", {"event": True})
+        machine.execute = Mock(return_value=FakeCursor([{"data": '{"event": true}'}]))  # type: ignore
+        settings = machine.get_settings(ArcadeID(5), GameConstants.IIDX, 25, "game_config")
+        self.assertTrue(settings.get_bool("event"))
+        self.assertEqual(machine.execute.call_count, 1)
+
+        # Other games and arcades are cached separately.
+        self.assertTrue(machine.get_settings(ArcadeID(5), GameConstants.IIDX, 24, "game_config").get_bool("event"))
+        self.assertEqual(machine.execute.call_count, 2)
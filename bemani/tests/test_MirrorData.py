@@ -0,0 +1,68 @@
+# vim: set fileencoding=utf-8
+import unittest
+from unittest.mock import Mock
+
+from bemani.common import GameConstants
+from bemani.data.mysql.mirror import MirrorData
+from bemani.tests.helpers import FakeCursor
+
+
+class TestMirrorData(unittest.TestCase):
+    def test_put_records(self) -> None:
+        mirror = MirrorData(Mock(), Mock())
+        mirror.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        records = [
+            {"cards": ["e004000000000002", "E004000000000001"], "song": song, "chart": 0, "points": 5, "updated": 10}
+            for song in range(MirrorData.CHUNK_SIZE + 1)
+        ]
+
+        # Replacing the copy of a song's scores removes the old copy first, and writes in chunks.
+        mirror.put_records(3, GameConstants.IIDX, 22, 1000, records, True)
+        self.assertEqual(mirror.execute.call_count, 3)
+        sql, params = mirror.execute.call_args_list[0][0]
+        self.assertIn("DELETE FROM remote_score", sql)
+        self.assertEqual(params["songid"], 1000)
+        sql, params = mirror.execute.call_args_list[2][0]
+        self.assertIn("INSERT INTO remote_score", sql)
+        self.assertEqual(params["songid0"], MirrorData.CHUNK_SIZE)
+        self.assertEqual(params["cardid0"], "E004000000000001")
+
+        # Updating server records only writes.
+        mirror.execute.reset_mock()
+        mirror.put_records(3, GameConstants.IIDX, 22, None, records[:2], False)
+        self.assertEqual(mirror.execute.call_count, 1)
+        sql, params = mirror.execute.call_args_list[0][0]
+        self.assertIn("INSERT INTO remote_record", sql)
+        self.assertEqual((params["songid0"], params["songid1"]), (0, 1))
+
+    def test_want_read_only(self) -> None:
+        config = Mock()
+        config.database.read_only = True
+        conn = Mock()
+        mirror = MirrorData(config, conn)
+
+        # Noting what to copy happens on lookups, so it must work in read-only mode.
+        mirror.want(GameConstants.IIDX, 22, None)
+        self.assertEqual(conn.execute.call_count, 1)
+        self.assertEqual(conn.execute.call_args[0][1]["songid"], -1)
+        with self.assertRaises(Exception):
+            mirror.put_sync(GameConstants.IIDX, 22, None, {})
+
+    def test_get_syncs(self) -> None:
+        mirror = MirrorData(Mock(), None)
+        mirror.execute = Mock(  # type: ignore
+            return_value=FakeCursor(
+                [
+                    {"game": "iidx", "version": 22, "songid": -1, "data": '{"1": {"since": 5}}'},
+                    {"game": "iidx", "version": 22, "songid": 1000, "data": "{}"},
+                    {"game": "removed", "version": 1, "songid": -1, "data": "{}"},
+                ]
+            )
+        )
+        self.assertEqual(
+            mirror.get_syncs(),
+            [
+                (GameConstants.IIDX, 22, None, {"1": {"since": 5}}),
+                (GameConstants.IIDX, 22, 1000, {}),
+            ],
+        )
@@ -0,0 +1,449 @@
+# vim: set fileencoding=utf-8
+import unittest
+from freezegun import freeze_time
+from typing import Any, Dict
+from unittest.mock import Mock
+from sqlalchemy.exc import IntegrityError
+
+from bemani.common import GameConstants
+from bemani.data.clearrates import ClearRates
+from bemani.data.exceptions import ScoreSaveException
+from bemani.data.mysql.music import MusicData
+from bemani.data.types import Attempt, UserID
+from bemani.tests.helpers import FakeCursor
+
+
+class TestMusicData(unittest.TestCase):
+    MUSIC_ROWS = [
+        {"id": 1, "songid": 1000, "chart": 0},
+        {"id": 2, "songid": 1000, "chart": 1},
+        {"id": 3, "songid": 1001, "chart": 0},
+    ]
+
+    def setUp(self) -> None:
+        MusicData.invalidate_musicids()
+
+    def test_get_musicids(self) -> None:
+        music = MusicData(Mock(), None)
+        music.execute = Mock(return_value=FakeCursor(self.MUSIC_ROWS))  # type: ignore
+
+        self.assertEqual(
+            music.get_musicids(GameConstants.IIDX, 25, [(1000, 0), (1001, 0)]),
+            {(1000, 0): 1, (1001, 0): 3},
+        )
+        self.assertEqual(music.execute.call_count, 1)
+
+        # Another object in this process should share the loaded map.
+        other = MusicData(Mock(), None)
+        other.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        self.assertEqual(other.get_musicids(GameConstants.IIDX, 25, [(1000, 1)]), {(1000, 1): 2})
+        self.assertEqual(other.execute.call_count, 0)
+
+        # Songs that aren't in the map are looked up once, and left out if missing.
+        other.execute = Mock(return_value=FakeCursor([{"id": 4, "songid": 1002, "chart": 2}]))  # type: ignore
+        self.assertEqual(
+            other.get_musicids(GameConstants.IIDX, 25, [(1002, 2), (1003, 0), (1000, 0)]),
+            {(1002, 2): 4, (1000, 0): 1},
+        )
+        self.assertEqual(other.execute.call_count, 1)
+        self.assertEqual(other.get_musicids(GameConstants.IIDX, 25, [(1002, 2)]), {(1002, 2): 4})
+        self.assertEqual(other.execute.call_count, 1)
+
+    def test_put_score(self) -> None:
+        music = MusicData(Mock(), Mock())
+        music.execute = Mock(  # type: ignore
+            side_effect=[
+                FakeCursor(self.MUSIC_ROWS),
+                FakeCursor([]),
+                FakeCursor([]),
+            ]
+        )
+
+        # The first score loads the map, afterwards each score only needs its insert.
+        music.put_score(GameConstants.IIDX, 25, UserID(1), 1000, 1, 5, 1234, {}, False, 1)
+        music.put_score(GameConstants.IIDX, 25, UserID(1), 1001, 0, 5, 1234, {}, False, 1)
+        self.assertEqual(music.execute.call_count, 3)
+        self.assertEqual(music.execute.call_args_list[1][0][1]["musicid"], 2)
+        self.assertEqual(music.execute.call_args_list[2][0][1]["musicid"], 3)
+
+        # Missing songs still fail to save.
+        music.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        with self.assertRaises(Exception):
+            music.put_score(GameConstants.IIDX, 25, UserID(1), 1005, 0, 5, 1234, {}, True, 1)
+
+    def test_invalidate(self) -> None:
+        music = MusicData(Mock(), None)
+        music.execute = Mock(return_value=FakeCursor(self.MUSIC_ROWS))  # type: ignore
+        music.get_musicids(GameConstants.IIDX, 25, [(1000, 0)])
+        music.get_musicids(GameConstants.IIDX, 26, [(1000, 0)])
+        music.get_musicids(GameConstants.SDVX, 5, [(1000, 0)])
+        self.assertEqual(music.execute.call_count, 3)
+
+        # Only the game that was imported is reloaded.
+        MusicData.invalidate_musicids(GameConstants.IIDX)
+        music.get_musicids(GameConstants.IIDX, 25, [(1000, 0)])
+        music.get_musicids(GameConstants.IIDX, 26, [(1000, 0)])
+        music.get_musicids(GameConstants.SDVX, 5, [(1000, 0)])
+        self.assertEqual(music.execute.call_count, 5)
+
+        MusicData.invalidate_musicids(GameConstants.IIDX, 26)
+        music.get_musicids(GameConstants.IIDX, 25, [(1000, 0)])
+        music.get_musicids(GameConstants.IIDX, 26, [(1000, 0)])
+        self.assertEqual(music.execute.call_count, 6)
+
+    def test_put_scores(self) -> None:
+        music = MusicData(Mock(), Mock())
+        music.execute = Mock(  # type: ignore
+            side_effect=[
+                FakeCursor(self.MUSIC_ROWS),
+                FakeCursor([]),
+                FakeCursor([]),
+                FakeCursor([]),
+                FakeCursor([]),
+                FakeCursor([]),
+            ]
+        )
+
+        music.put_scores(
+            GameConstants.IIDX,
+            25,
+            UserID(1),
+            [
+                Attempt(0, 1000, 0, 100, 10, 5, True, {"medal": 1}),
+                Attempt(0, 1000, 1, 200, 20, 5, False, {}),
+                Attempt(0, 1001, 0, 300, 30, 5, True, {}),
+            ],
+        )
+
+        # One statement for new records, the record holder updates, and one for everything else.
+        self.assertEqual(music.execute.call_count, 6)
+        sql, params = music.execute.call_args_list[1][0]
+        self.assertIn("lid = VALUES(lid)", sql)
+        self.assertEqual(params["musicid0"], 1)
+        self.assertEqual(params["data0"], '{"medal": 1}')
+        self.assertEqual(params["musicid1"], 3)
+        self.assertEqual(params["points1"], 300)
+        self.assertNotIn("musicid2", params)
+        sql, params = music.execute.call_args_list[2][0]
+        self.assertIn("INSERT INTO `record`", sql)
+        self.assertEqual(params["musicid1"], 3)
+        sql, params = music.execute.call_args_list[5][0]
+        self.assertNotIn("lid = VALUES(lid)", sql)
+        self.assertEqual(params["musicid0"], 2)
+        self.assertEqual(params["timestamp0"], 20)
+
+        # Nothing is written if any of the songs don't exist.
+        music.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        with self.assertRaises(Exception):
+            music.put_scores(
+                GameConstants.IIDX,
+                25,
+                UserID(1),
+                [
+                    Attempt(0, 1000, 0, 100, 10, 5, True, {}),
+                    Attempt(0, 1005, 0, 100, 10, 5, True, {}),
+                ],
+            )
+        self.assertEqual(music.execute.call_count, 1)
+
+    def test_put_attempts(self) -> None:
+        music = MusicData(Mock(), Mock())
+        music.execute = Mock(  # type: ignore
+            side_effect=[FakeCursor(self.MUSIC_ROWS), FakeCursor([]), FakeCursor([]), FakeCursor([])]
+        )
+
+        music.put_attempts(
+            GameConstants.IIDX,
+            25,
+            None,
+            [
+                Attempt(0, 1000, 0, 100, 10, 5, True, {}),
+                Attempt(0, 1000, 0, 50, 11, 5, False, {}),
+            ],
+        )
+        self.assertEqual(music.execute.call_count, 4)
+        _, params = music.execute.call_args_list[1][0]
+        self.assertEqual(params["userid"], 0)
+        self.assertEqual(params["musicid1"], 1)
+        self.assertEqual(params["new_record0"], 1)
+        self.assertEqual(params["new_record1"], 0)
+
+        # Anonymous attempts only count towards the song's plays.
+        sql, params = music.execute.call_args_list[2][0]
+        self.assertIn("play_count", sql)
+        self.assertEqual(params, {"musicid0": 1, "plays0": 2})
+        sql, params = music.execute.call_args_list[3][0]
+        self.assertIn("hit_chart", sql)
+
+        music.execute = Mock(side_effect=IntegrityError("", {}, Exception()))  # type: ignore
+        with self.assertRaises(ScoreSaveException):
+            music.put_attempts(GameConstants.IIDX, 25, UserID(1), [Attempt(0, 1000, 0, 100, 10, 5, True, {})])
+
+    def test_put_attempt_clear_rate(self) -> None:
+        music = MusicData(Mock(), Mock())
+        music.execute = Mock(return_value=FakeCursor(self.MUSIC_ROWS))  # type: ignore
+
+        # Games that don't track clears only write score history and play counts.
+        music.put_attempt(GameConstants.SDVX, 5, UserID(1), 1000, 0, 5, 100, {}, True, 10)
+        self.assertEqual(music.execute.call_count, 5)
+
+        music.put_attempt(GameConstants.SDVX, 5, UserID(1), 1000, 1, 5, 100, {}, True, 11, cleared=True)
+        self.assertEqual(music.execute.call_count, 10)
+        sql, params = music.execute.call_args[0]
+        self.assertIn("clear_rate", sql)
+        self.assertEqual(params, {"musicid": 2, "clears": 1, "combos": 0, "points": 100})
+
+        # A failed attempt shouldn't touch clear rates.
+        music.execute = Mock(side_effect=IntegrityError("", {}, Exception()))  # type: ignore
+        with self.assertRaises(ScoreSaveException):
+            music.put_attempt(GameConstants.SDVX, 5, UserID(1), 1000, 1, 5, 100, {}, True, 11, cleared=True)
+        self.assertEqual(music.execute.call_count, 1)
+
+    def test_get_clear_rates(self) -> None:
+        music = MusicData(Mock(), None)
+        music.execute = Mock(  # type: ignore
+            return_value=FakeCursor(
+                [
+                    {"songid": 1000, "chart": 0, "plays": 4, "clears": 3, "combos": 1, "points": 400},
+                    {"songid": 1000, "chart": 1, "plays": 2, "clears": 0, "combos": 0, "points": 50},
+                ]
+            )
+        )
+        self.assertEqual(
+            music.get_clear_rates(GameConstants.SDVX, 5),
+            {
+                1000: {
+                    0: {"plays": 4, "clears": 3, "combos": 1, "points": 400},
+                    1: {"plays": 2, "clears": 0, "combos": 0, "points": 50},
+                },
+            },
+        )
+
+    def test_rebuild_clear_rates(self) -> None:
+        music = MusicData(Mock(), Mock())
+        music.execute = Mock(  # type: ignore
+            side_effect=[
+                FakeCursor([{"id": 1}, {"id": 2}, {"id": 3}]),
+                FakeCursor(
+                    [
+                        {"musicid": 1, "points": 100, "data": '{"clear_type": 100}'},
+                        {"musicid": 1, "points": 200, "data": '{"clear_type": 200}'},
+                        {"musicid": 2, "points": 300, "data": '{"clear_type": 500}'},
+                    ]
+                ),
+                FakeCursor([]),
+                FakeCursor([]),
+                FakeCursor([]),
+                FakeCursor([{"musicid": 3, "points": 400, "data": "{}"}]),
+                FakeCursor([]),
+                FakeCursor([]),
+            ]
+        )
+
+        counted = music.rebuild_clear_rates(GameConstants.SDVX, ClearRates.sdvx, chunk=2)
+        self.assertEqual(counted, 4)
+        inserts = [call[0][1] for call in music.execute.call_args_list if "INSERT" in call[0][0]]
+        self.assertEqual(
+            inserts,
+            [
+                {"musicid": 1, "plays": 2, "clears": 1, "combos": 0, "points": 300},
+                {"musicid": 2, "plays": 1, "clears": 1, "combos": 1, "points": 300},
+                {"musicid": 3, "plays": 1, "clears": 0, "combos": 0, "points": 400},
+            ],
+        )
+
+    def test_put_score_records(self) -> None:
+        music = MusicData(Mock(), Mock())
+        music.execute = Mock(return_value=FakeCursor(self.MUSIC_ROWS))  # type: ignore
+        music.get_musicids(GameConstants.IIDX, 25, [])
+
+        # Scores that aren't a new record can't change who holds a record.
+        music.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        music.put_score(GameConstants.IIDX, 25, UserID(1), 1000, 0, 5, 1234, {}, False, 10)
+        self.assertEqual(music.execute.call_count, 1)
+
+        music.execute = Mock(  # type: ignore
+            side_effect=[
+                FakeCursor([]),
+                FakeCursor([]),
+                FakeCursor([]),
+                FakeCursor([{"musicid": 1, "lid": 5}, {"musicid": 1, "lid": 3}]),
+                FakeCursor([]),
+                FakeCursor([]),
+            ]
+        )
+        music.put_score(GameConstants.IIDX, 25, UserID(1), 1000, 0, 5, 1234, {}, True, 10)
+        statements = [call[0][0] for call in music.execute.call_args_list]
+        self.assertIn("INSERT INTO `record`", statements[1])
+        self.assertIn("INSERT INTO `location_record`", statements[2])
+        self.assertEqual(music.execute.call_args_list[1][0][1]["points0"], 1234)
+
+        # The user used to hold the record at location 3, so somebody else gets it now.
+        self.assertIn("DELETE FROM location_record", statements[4])
+        self.assertEqual(music.execute.call_args_list[4][0][1], {"musicid": 1, "location": 3})
+        self.assertIn("SELECT musicid, lid, userid, points, timestamp FROM score", statements[5])
+
+    def test_get_all_records(self) -> None:
+        music = MusicData(Mock(), None)
+        row = {
+            "songid": 1000,
+            "chart": 0,
+            "points": 1234,
+            "userid": 1,
+            "scorekey": 99,
+            "data": "{}",
+            "timestamp": 10,
+            "update": 10,
+            "lid": 5,
+            "plays": 3,
+        }
+
+        music.execute = Mock(return_value=FakeCursor([row]))  # type: ignore
+        records = music.get_all_records(GameConstants.IIDX, 25)
+        self.assertEqual(records[0][0], UserID(1))
+        self.assertEqual(records[0][1].points, 1234)
+        self.assertIn("FROM record", music.execute.call_args[0][0])
+        self.assertNotIn("location_record", music.execute.call_args[0][0])
+
+        music.get_all_records(GameConstants.IIDX, 25, locationlist=[5])
+        self.assertIn("FROM location_record", music.execute.call_args[0][0])
+
+        # A list of users can't be served from the record tables.
+        music.get_all_records(GameConstants.IIDX, 25, userlist=[UserID(1)])
+        self.assertNotIn("record.", music.execute.call_args[0][0])
+
+    def test_check_records(self) -> None:
+        def row(userid: int, points: int) -> Dict[str, Any]:
+            return {
+                "songid": 1000,
+                "chart": 0,
+                "points": points,
+                "userid": userid,
+                "scorekey": 99,
+                "data": "{}",
+                "timestamp": 10,
+                "update": 10,
+                "lid": 5,
+                "plays": 3,
+            }
+
+        music = MusicData(Mock(), None)
+        music.execute = Mock(  # type: ignore
+            side_effect=[
+                FakeCursor([{"lid": 5}]),
+                FakeCursor([row(1, 1234)]),
+                FakeCursor([row(1, 1234)]),
+                FakeCursor([row(1, 1234)]),
+                FakeCursor([row(2, 1000)]),
+            ]
+        )
+        self.assertEqual(music.check_records(GameConstants.IIDX, 25), [(5, 1000, 0, UserID(1), UserID(2))])
+
+    def test_put_attempt_plays(self) -> None:
+        music = MusicData(Mock(), Mock())
+        music.execute = Mock(return_value=FakeCursor(self.MUSIC_ROWS))  # type: ignore
+
+        music.put_attempt(GameConstants.IIDX, 25, UserID(1), 1000, 0, 5, 100, {}, True, 10)
+        self.assertEqual(music.execute.call_count, 5)
+        sql, params = music.execute.call_args_list[2][0]
+        self.assertIn("INSERT INTO `play_count`", sql)
+        self.assertEqual(params, {"musicid0": 1, "plays0": 1})
+        sql, params = music.execute.call_args_list[4][0]
+        self.assertIn("UPDATE `score` SET plays = plays + :plays", sql)
+        self.assertEqual(params, {"userid": UserID(1), "plays": 1, "musicids": [1]})
+
+        # Attempts on the same chart are counted together.
+        music.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        music.put_attempts(
+            GameConstants.IIDX,
+            25,
+            UserID(1),
+            [
+                Attempt(0, 1000, 0, 100, 10, 5, True, {}),
+                Attempt(0, 1000, 0, 50, 11, 5, False, {}),
+                Attempt(0, 1001, 0, 50, 12, 5, False, {}),
+                Attempt(0, 1000, 1, 50, 13, 5, False, {}),
+            ],
+        )
+        self.assertEqual(music.execute.call_count, 5)
+        _, params = music.execute.call_args_list[1][0]
+        self.assertEqual(params, {"musicid0": 1, "plays0": 2, "musicid1": 3, "plays1": 1, "musicid2": 2, "plays2": 1})
+        _, params = music.execute.call_args_list[3][0]
+        self.assertEqual(params, {"userid": UserID(1), "plays": 2, "musicids": [1]})
+        _, params = music.execute.call_args_list[4][0]
+        self.assertEqual(params, {"userid": UserID(1), "plays": 1, "musicids": [3, 2]})
+
+    def test_get_scores_plays(self) -> None:
+        music = MusicData(Mock(), None)
+        music.execute = Mock(  # type: ignore
+            return_value=FakeCursor(
+                [
+                    {
+                        "songid": 1000,
+                        "chart": 0,
+                        "scorekey": 99,
+                        "timestamp": 10,
+                        "update": 10,
+                        "lid": 5,
+                        "plays": 7,
+                        "points": 1234,
+                        "data": "{}",
+                    },
+                ]
+            )
+        )
+        scores = music.get_scores(GameConstants.IIDX, 25, UserID(1))
+        self.assertEqual(scores[0].plays, 7)
+        self.assertNotIn("score_history", music.execute.call_args[0][0])
+
+    def test_put_attempt_hit_chart(self) -> None:
+        music = MusicData(Mock(), Mock())
+        music.execute = Mock(return_value=FakeCursor(self.MUSIC_ROWS))  # type: ignore
+        music.get_musicids(GameConstants.IIDX, 25, [])
+
+        # Attempts are counted on the day they happened.
+        music.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+        music.put_attempts(
+            GameConstants.IIDX,
+            25,
+            None,
+            [
+                Attempt(0, 1000, 0, 100, 86399, 5, True, {}),
+                Attempt(0, 1000, 0, 50, 86400, 5, False, {}),
+                Attempt(0, 1000, 0, 50, 86401, 5, False, {}),
+            ],
+        )
+        sql, params = music.execute.call_args_list[2][0]
+        self.assertIn("INSERT INTO `hit_chart`", sql)
+        self.assertEqual(params, {"musicid0": 1, "day0": 0, "plays0": 1, "musicid1": 1, "day1": 1, "plays1": 2})
+
+    def test_get_hit_chart(self) -> None:
+        music = MusicData(Mock(), None)
+        music.execute = Mock(return_value=FakeCursor([{"songid": 1000, "plays": 5}]))  # type: ignore
+
+        with freeze_time("2016-01-10"):
+            self.assertEqual(music.get_hit_chart(GameConstants.REFLEC_BEAT, 1, 10), [(1000, 5)])
+            self.assertIn("FROM hit_chart", music.execute.call_args[0][0])
+            self.assertIsNone(music.execute.call_args[0][1]["day"])
+
+            music.get_hit_chart(GameConstants.REFLEC_BEAT, 1, 10, 7)
+            self.assertIn("FROM hit_chart", music.execute.call_args[0][0])
+            self.assertEqual(music.execute.call_args[0][1]["day"], 16803)
+
+            # Periods longer than we keep daily counts for fall back to counting attempts.
+            music.get_hit_chart(GameConstants.REFLEC_BEAT, 1, 10, MusicData.HIT_CHART_DAYS + 1)
+            self.assertIn("FROM score_history", music.execute.call_args[0][0])
+
+    def test_compact_hit_chart(self) -> None:
+        music = MusicData(Mock(), Mock())
+        music.execute = Mock(return_value=FakeCursor([]))  # type: ignore
+
+        with freeze_time("2016-01-10"):
+            music.compact_hit_chart()
+        self.assertEqual(music.execute.call_count, 2)
+        sql, params = music.execute.call_args_list[0][0]
+        self.assertIn("SELECT musicid, 0, SUM(plays)", sql)
+        self.assertEqual(params, {"cutoff": 16810 - MusicData.HIT_CHART_DAYS})
+        sql, params = music.execute.call_args_list[1][0]
+        self.assertIn("DELETE FROM hit_chart", sql)
+        self.assertEqual(params, {"cutoff": 16810 - MusicData.HIT_CHART_DAYS})
@@ -49,3 +49,38 @@ class TestNetworkData(unittest.TestCase):
 
             network.execute = Mock(return_value=FakeCursor([{"year": None, "day": 16790}]))  # type: ignore
             self.assertTrue(network.should_schedule(GameConstants.BISHI_BASHI, 1, "work", "weekly"))
+
+    def test_claim_webhooks(self) -> None:
+        network = NetworkData(Mock(), None)
+
+        with freeze_time("2016-01-01"):
+            due = [
+                {
+                    "id": 1,
+                    "timestamp": 1451606000,
+                    "destination": "https://example.com/hook",
+                    "data": '{"embeds": [{"title": "one"}]}',
+                    "attempts": 0,
+                    "next_attempt": 1451606000,
+                },
+                {
+                    "id": 2,
+                    "timestamp": 1451606100,
+                    "destination": "https://example.com/hook",
+                    "data": '{"embeds": [{"title": "two"}]}',
+                    "attempts": 2,
+                    "next_attempt": 1451606200,
+                },
+            ]
+
+            # Another sender claims the second message between our select and update.
+            network.execute = Mock(side_effect=[FakeCursor(due), FakeCursor([{}]), FakeCursor([])])  # type: ignore
+            claimed = network.claim_webhooks(10, 30)
+            self.assertEqual(len(claimed), 1)
+            self.assertEqual(claimed[0].id, 1)
+            self.assertEqual(claimed[0].data, {"embeds": [{"title": "one"}]})
+            self.assertEqual(claimed[0].next_attempt, 1451606400 + 30)
+
+            # We only take over a message if it still has the lease we saw.
+            _, params = network.execute.call_args_list[2][0]
+            self.assertEqual(params, {"id": 2, "next_attempt": 1451606200, "lease": 1451606400 + 30})
@@ -0,0 +1,58 @@
+# vim: set fileencoding=utf-8
+import unittest
+
+from bemani.protocol.node import Node
+
+
+class TestNode(unittest.TestCase):
+    def build_node(self, count: int) -> Node:
+        root = Node.void("root")
+        for i in range(count):
+            root.add_child(Node.u32(f"child{i}", i))
+        # Duplicate names should always resolve to the first child added.
+        root.add_child(Node.u32("child0", 1000))
+        return root
+
+    def test_child_lookup(self) -> None:
+        for count in [1, Node.CHILD_INDEX_THRESHOLD - 2, Node.CHILD_INDEX_THRESHOLD, 100]:
+            root = self.build_node(count)
+            for i in range(count):
+                self.assertEqual(root.child_value(f"child{i}"), i)
+            self.assertIsNone(root.child("missing"))
+            self.assertIsNone(root.child_value("missing"))
+
+    def test_child_path_lookup(self) -> None:
+        root = Node.void("root")
+        for i in range(Node.CHILD_INDEX_THRESHOLD * 2):
+            entry = self.build_node(i)
+            entry.set_name(f"entry{i}")
+            root.add_child(entry)
+
+        self.assertEqual(root.child_value("entry5/child3"), 3)
+        self.assertEqual(root.child_value("entry20/child0"), 0)
+        self.assertIsNone(root.child("entry5/child5"))
+        self.assertIsNone(root.child("missing/child0"))
+
+    def test_child_index_invalidation(self) -> None:
+        root = self.build_node(Node.CHILD_INDEX_THRESHOLD * 2)
+        self.assertIsNone(root.child("late"))
+
+        root.add_child(Node.string("late", "value"))
+        self.assertEqual(root.child_value("late"), "value")
+        root.add_child(Node.string("late", "ignored"))
+        self.assertEqual(root.child_value("late"), "value")
+
+        # Modifying the children directly or renaming a child is also picked up.
+        root.children.append(Node.string("direct", "value"))
+        self.assertEqual(root.child_value("direct"), "value")
+        root.children.remove(root.child("child1"))
+        self.assertIsNone(root.child("child1"))
+        root.child("child2").set_name("renamed")
+        self.assertIsNone(root.child("child2"))
+        self.assertEqual(root.child_value("renamed"), 2)
+
+    def test_slots(self) -> None:
+        node = Node.u8("byte", 5)
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = 5  # type: ignore
@@ -1,6 +1,9 @@
 # vim: set fileencoding=utf-8
 from abc import ABC
+import threading
+import time
 import unittest
+from typing import List, Set
 
 from bemani.common import Parallel
 
@@ -100,3 +103,84 @@ class TestParallel(unittest.TestCase):
     def test_flatten(self) -> None:
         results = Parallel.flatten([[1, 2, 3], [4, 5, 6], [7, 8, 9], []])
         self.assertEqual(results, [1, 2, 3, 4, 5, 6, 7, 8, 9])
+
+    def test_exception(self) -> None:
+        def fun(x: int) -> int:
+            if x == 3:
+                raise ValueError("bad value")
+            return x
+
+        with self.assertRaises(ValueError):
+            Parallel.map(fun, [1, 2, 3, 4, 5])
+
+    def test_bounded_threads(self) -> None:
+        threads: Set[int] = set()
+
+        def fun(x: int) -> int:
+            threads.add(threading.get_ident())
+            time.sleep(0.001)
+            return x
+
+        results = Parallel.map(fun, list(range(200)))
+        self.assertEqual(results, list(range(200)))
+        self.assertLessEqual(len(threads), Parallel.DEFAULT_CONCURRENCY)
+
+    def test_concurrency(self) -> None:
+        lock = threading.Lock()
+        running = [0]
+        most: List[int] = [0]
+
+        def fun(x: int) -> int:
+            with lock:
+                running[0] += 1
+                most[0] = max(most[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+            return x
+
+        results = Parallel.map(fun, list(range(20)), concurrency=2)
+        self.assertEqual(results, list(range(20)))
+        self.assertLessEqual(most[0], 2)
+
+    def test_nested(self) -> None:
+        # More outer operations than pool threads, each waiting on inner operations,
+        # must still finish instead of waiting on each other forever.
+        def inner(x: int) -> int:
+            time.sleep(0.001)
+            return x * 2
+
+        def outer(x: int) -> List[int]:
+            return Parallel.map(inner, [x, x + 1, x + 2])
+
+        results: List[List[List[int]]] = []
+        thread = threading.Thread(
+            target=lambda: results.append(
+                Parallel.map(outer, list(range(Parallel.MAX_WORKERS * 2)), concurrency=Parallel.MAX_WORKERS * 2)
+            )
+        )
+        thread.start()
+        thread.join(10.0)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results, [[[x * 2, x * 2 + 2, x * 2 + 4] for x in range(Parallel.MAX_WORKERS * 2)]])
+
+    def test_timeout(self) -> None:
+        release = threading.Event()
+
+        def slow() -> str:
+            release.wait(5.0)
+            return "slow"
+
+        before = Parallel.stats()
+        start = time.monotonic()
+        results = Parallel.execute([lambda: "fast", slow], timeout=0.1, default="late")
+        release.set()
+
+        self.assertEqual(results, ["fast", "late"])
+        self.assertLess(time.monotonic() - start, 2.0)
+
+        after = Parallel.stats()
+        self.assertEqual(after["tasks"] - before["tasks"], 2)
+        self.assertEqual(after["timeouts"] - before["timeouts"], 1)
+        self.assertGreaterEqual(after["wait_max"], 0.0)
@@ -0,0 +1,187 @@
+# vim: set fileencoding=utf-8
+import importlib.util
+import os
+import struct
+import sys
+import unittest
+from types import ModuleType
+from typing import Any, Dict
+
+import bemani.protocol
+from bemani.protocol import binary, lz77, node, protocol, stream, xml
+from bemani.tests.helpers import get_fixture
+
+# Modules that are compiled in a normal install, in the order that they import each other.
+COMPILED_MODULES = ["stream", "node", "lz77", "binary", "xml", "protocol"]
+
+
+def load_pure_python() -> Dict[str, ModuleType]:
+    """
+    Load a second, independent copy of the protocol stack straight from the python
+    sources, so that a compiled build can be checked against the pure python fallback.
+    The already imported modules are left untouched.
+    """
+    location = os.path.dirname(os.path.abspath(bemani.protocol.__file__))
+    saved = {name: sys.modules.get(f"bemani.protocol.{name}") for name in COMPILED_MODULES}
+    modules: Dict[str, ModuleType] = {}
+
+    try:
+        for name in COMPILED_MODULES:
+            spec = importlib.util.spec_from_file_location(
+                f"bemani.protocol.{name}", os.path.join(location, f"{name}.py")
+            )
+            if spec is None or spec.loader is None:
+                raise Exception(f"Cannot load pure python source for {name}!")
+            module = importlib.util.module_from_spec(spec)
+
+            # Later modules must import the pure python versions of earlier ones.
+            sys.modules[spec.name] = module
+            spec.loader.exec_module(module)
+            modules[name] = module
+    finally:
+        for name, module in saved.items():
+            if module is not None:
+                sys.modules[f"bemani.protocol.{name}"] = module
+
+    return modules
+
+
+@unittest.skipUnless(
+    all(
+        os.path.isfile(os.path.join(os.path.dirname(bemani.protocol.__file__), f"{name}.py"))
+        for name in COMPILED_MODULES
+    ),
+    "Pure python protocol sources are not installed",
+)
+class TestProtocolParity(unittest.TestCase):
+    pure: Dict[str, ModuleType]
+    native: Dict[str, ModuleType]
+    rawdata: bytes
+
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.pure = load_pure_python()
+        cls.native = {
+            "stream": stream,
+            "node": node,
+            "lz77": lz77,
+            "binary": binary,
+            "xml": xml,
+            "protocol": protocol,
+        }
+        cls.rawdata = get_fixture("rawdata")
+
+    def build_tree(self, impl: Dict[str, ModuleType]) -> Any:
+        Node = impl["node"].Node
+        data = self.rawdata
+
+        root = Node.void("call")
+        root.set_attribute("model", "LDJ:J:A:A:2021101300")
+        root.set_attribute("srcid", "012010000000DEADBEEF")
+        root.add_child(Node.binary("raw", data))
+        root.add_child(Node.string("text", get_fixture("lorem.txt").decode("utf-8")))
+        root.add_child(Node.u8_array("bytes", list(data[:1024])))
+        root.add_child(Node.s32_array("ints", list(struct.unpack(">256i", data[:1024]))))
+        root.add_child(Node.bool_array("bits", [b & 1 == 1 for b in data[:64]]))
+
+        for i in range(0, 512, 8):
+            entry = Node.void("entry")
+            entry.set_attribute("id", str(i))
+            entry.add_child(Node.u16("short", struct.unpack(">H", data[i : (i + 2)])[0]))
+            entry.add_child(Node.s64("long", struct.unpack(">q", data[i : (i + 8)])[0]))
+            entry.add_child(Node.u8_array("half", list(data[i : (i + 4)])))
+            entry.add_child(Node.bool("odd", data[i] & 1 == 1))
+            root.add_child(entry)
+
+        return root
+
+    def test_implementations(self) -> None:
+        for name in COMPILED_MODULES:
+            self.assertEqual(os.path.splitext(self.pure[name].__file__ or "")[1], ".py")
+            self.assertIsNot(self.pure[name], self.native[name])
+        self.assertIsNot(self.pure["node"].Node, self.native["node"].Node)
+
+    def test_stream(self) -> None:
+        outputs = []
+        for impl in [self.pure, self.native]:
+            instream = impl["stream"].InputStream(self.rawdata + b"tail")
+            outstream = impl["stream"].OutputStream()
+            while instream.left >= 8:
+                outstream.write_int(instream.read_int(1), 1)
+                outstream.write_int(instream.read_int(2, is_unsigned=False), 2, is_unsigned=False)
+                outstream.write_int(instream.read_int(4), 4)
+                outstream.write_byte(instream.read_byte())
+                outstream.write_pad(4)
+            self.assertIsNone(instream.read_blob(instream.left + 1))
+            outstream.write_blob(instream.read_blob(instream.left))
+            outputs.append(outstream.data)
+
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_lz77(self) -> None:
+        for data in [self.rawdata, get_fixture("lorem.txt"), get_fixture("declaration.txt")]:
+            pure = self.pure["lz77"].Lz77()
+            native = self.native["lz77"].Lz77()
+
+            compressed = pure.compress(data)
+            self.assertEqual(compressed, native.compress(data))
+            self.assertEqual(pure.decompress(compressed), data)
+            self.assertEqual(native.decompress(compressed), data)
+
+    def test_binary(self) -> None:
+        pure_tree = self.build_tree(self.pure)
+        native_tree = self.build_tree(self.native)
+        self.assertEqual(str(pure_tree), str(native_tree))
+
+        for compressed in [True, False]:
+            pure = self.pure["binary"].BinaryEncoding()
+            native = self.native["binary"].BinaryEncoding()
+
+            data = pure.encode(pure_tree, encoding="shift-jis", compressed=compressed)
+            self.assertEqual(data, native.encode(native_tree, encoding="shift-jis", compressed=compressed))
+            self.assertEqual(str(pure.decode(data)), str(native_tree))
+            self.assertEqual(str(native.decode(data)), str(pure_tree))
+
+    def test_xml(self) -> None:
+        pure_tree = self.build_tree(self.pure)
+        native_tree = self.build_tree(self.native)
+
+        pure = self.pure["xml"].XmlEncoding()
+        native = self.native["xml"].XmlEncoding()
+
+        data = pure.encode(pure_tree, encoding="shift-jis")
+        self.assertEqual(data, native.encode(native_tree, encoding="shift-jis"))
+        self.assertEqual(str(pure.decode(data)), str(native_tree))
+        self.assertEqual(str(native.decode(data)), str(pure_tree))
+
+    def test_protocol(self) -> None:
+        pure_tree = self.build_tree(self.pure)
+        native_tree = self.build_tree(self.native)
+
+        for packet_encoding in [
+            protocol.EAmuseProtocol.BINARY,
+            protocol.EAmuseProtocol.BINARY_DECOMPRESSED,
+            protocol.EAmuseProtocol.XML,
+        ]:
+            pure = self.pure["protocol"].EAmuseProtocol()
+            native = self.native["protocol"].EAmuseProtocol()
+
+            data = pure.encode(
+                "lz77",
+                "1-5c8c8c7d-1a3b",
+                pure_tree,
+                text_encoding="shift-jis",
+                packet_encoding=packet_encoding,
+            )
+            self.assertEqual(
+                data,
+                native.encode(
+                    "lz77",
+                    "1-5c8c8c7d-1a3b",
+                    native_tree,
+                    text_encoding="shift-jis",
+                    packet_encoding=packet_encoding,
+                ),
+            )
+            self.assertEqual(str(pure.decode("lz77", "1-5c8c8c7d-1a3b", data)), str(native_tree))
+            self.assertEqual(str(native.decode("lz77", "1-5c8c8c7d-1a3b", data)), str(pure_tree))
@@ -39,3 +39,24 @@ class TestRC4Cipher(unittest.TestCase):
 
         plaintext = proto._rc4_crypt(cyphertext, key)
         self.assertEqual(data, plaintext)
+
+    def test_python_parity(self) -> None:
+        data = bytes([random.randint(0, 255) for _ in range(10 * 1024)])
+        key = bytes([random.randint(0, 255) for _ in range(16)])
+        proto = EAmuseProtocol()
+
+        # Whether or not the C++ implementation is compiled, it must match the pure python one.
+        self.assertEqual(proto._rc4_crypt(data, key), proto._rc4_crypt_python(data, key))
+        self.assertEqual(proto._rc4_crypt(b"", key), b"")
+
+    def test_derive_key(self) -> None:
+        EAmuseProtocol._derive_key.cache_clear()
+
+        key = EAmuseProtocol._derive_key("1-5c8c8c7d-1a3b")
+        self.assertEqual(len(key), 16)
+        self.assertEqual(EAmuseProtocol._derive_key("1-5c8c8c7d-1a3b"), key)
+        self.assertNotEqual(EAmuseProtocol._derive_key("1-5c8c8c7d-1a3c"), key)
+
+        info = EAmuseProtocol._derive_key.cache_info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 2)
@@ -0,0 +1,134 @@
+# vim: set fileencoding=utf-8
+import unittest
+from freezegun import freeze_time
+from typing import Dict, List
+from unittest.mock import MagicMock, Mock, patch
+
+from bemani.backend.base import Base
+from bemani.common import GameConstants, cache
+from bemani.data import Score, UserID
+
+
+class FakeGame(Base):
+    game = GameConstants.REFLEC_BEAT
+    version = 1
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self) -> None:
+        cache.clear()
+
+    def stats(self, name: str) -> Dict[str, int]:
+        return Base.cached_result_stats().get(name, {"hits": 0, "stale": 0, "waits": 0, "misses": 0})
+
+    def test_cached(self) -> None:
+        game = FakeGame(MagicMock(), Mock(), Mock())
+        other = FakeGame(MagicMock(), Mock(), Mock())
+        calls: List[int] = []
+
+        def compute(songid: int) -> List[int]:
+            calls.append(songid)
+            return [songid, len(calls)]
+
+        before = self.stats("test_cached")
+        self.assertEqual(game.cached_result("test_cached", compute, 1000), [1000, 1])
+        self.assertEqual(other.cached_result("test_cached", compute, 1000), [1000, 1])
+        self.assertEqual(game.cached_result("test_cached", compute, 1001), [1001, 2])
+        self.assertEqual(calls, [1000, 1001])
+
+        after = self.stats("test_cached")
+        self.assertEqual(after["hits"] - before["hits"], 1)
+        self.assertEqual(after["misses"] - before["misses"], 2)
+
+    def test_expired(self) -> None:
+        game = FakeGame(MagicMock(), Mock(), Mock())
+        calls: List[int] = []
+
+        def compute() -> int:
+            calls.append(1)
+            return len(calls)
+
+        with freeze_time("2016-01-01 12:00:00"):
+            self.assertEqual(game.cached_result("test_expired", compute), 1)
+        with freeze_time("2016-01-01 12:00:20"):
+            # Somebody else is already recomputing, so we get the old result.
+            key = f"result-{GameConstants.REFLEC_BEAT.value}-1-test_expired"
+            cache.add(f"{key}-lock", True)
+            self.assertEqual(game.cached_result("test_expired", compute), 1)
+            self.assertEqual(calls, [1])
+
+            # Nobody is recomputing, so we do it ourselves.
+            cache.delete(f"{key}-lock")
+            self.assertEqual(game.cached_result("test_expired", compute), 2)
+            self.assertEqual(game.cached_result("test_expired", compute), 2)
+            self.assertEqual(calls, [1, 1])
+
+    def test_wait(self) -> None:
+        game = FakeGame(MagicMock(), Mock(), Mock())
+        compute = Mock(return_value=5)
+        key = f"result-{GameConstants.REFLEC_BEAT.value}-1-test_wait"
+        cache.add(f"{key}-lock", True)
+
+        def finish(_: float) -> None:
+            # Pretend another worker finished computing the result while we slept.
+            cache.set(key, (0, 10))
+
+        before = self.stats("test_wait")
+        with patch("bemani.backend.base.time.sleep", side_effect=finish):
+            self.assertEqual(game.cached_result("test_wait", compute), 10)
+        compute.assert_not_called()
+        self.assertEqual(self.stats("test_wait")["waits"] - before["waits"], 1)
+
+    def test_records(self) -> None:
+        data = MagicMock()
+        game = FakeGame(data, Mock(), Mock())
+        data.local.music.get_hit_chart.return_value = [(1000, 5)]
+        data.local.music.get_all_scores.return_value = [(UserID(5), Score(1, 1000, 0, 100, 10, 10, 1, 1, {}))]
+        data.remote.music.get_all_records.return_value = [(UserID(6), Score(2, 1000, 0, 500, 10, 10, 1, 1, {}))]
+
+        def lookup() -> None:
+            game.get_hit_chart(1, 10, 7)
+            game.get_all_scores(1, 1000, 0)
+            game.get_all_scores(1, 1000)
+            game.get_all_scores(1, 1001, 0)
+            game.get_all_records(1)
+
+        def calls() -> List[int]:
+            return [
+                data.local.music.get_hit_chart.call_count,
+                data.local.music.get_all_scores.call_count,
+                data.remote.music.get_all_records.call_count,
+            ]
+
+        with freeze_time("2016-01-01 12:00:00"):
+            lookup()
+            lookup()
+            self.assertEqual(calls(), [1, 3, 1])
+
+            # Scores that aren't records don't change anything.
+            game.put_score(1, UserID(5), 1000, 0, 1, 150, {}, False, timestamp=10)
+            lookup()
+            self.assertEqual(calls(), [1, 3, 1])
+
+            # A personal best only throws away the scores for that song.
+            game.put_score(1, UserID(5), 1000, 0, 1, 200, {}, True, timestamp=20)
+            lookup()
+            self.assertEqual(calls(), [1, 5, 1])
+
+            # Beating the network record also throws away the records, once the batch is written.
+            with game.score_batch():
+                game.put_score(1, UserID(5), 1000, 0, 1, 600, {}, True, timestamp=30)
+                lookup()
+                self.assertEqual(calls(), [1, 5, 1])
+            lookup()
+            self.assertEqual(calls(), [1, 7, 2])
+
+            # A first score on another chart leaves this chart's scores alone, but is a new network record.
+            game.put_score(1, UserID(5), 1000, 1, 1, 100, {}, True, timestamp=40)
+            lookup()
+            self.assertEqual(calls(), [1, 8, 3])
+
+        # Everything else shows up once the result expires.
+        with freeze_time("2016-01-01 12:00:20"):
+            game.get_hit_chart(1, 10, 7)
+            self.assertEqual(calls(), [2, 8, 3])
@@ -0,0 +1,123 @@
+# vim: set fileencoding=utf-8
+import unittest
+from unittest.mock import MagicMock, Mock
+
+from bemani.backend.base import Base
+from bemani.common import GameConstants
+from bemani.data import ScoreSaveException, UserID
+
+
+class FakeGame(Base):
+    game = GameConstants.JUBEAT
+    version = 1
+
+
+class TestScoreBatch(unittest.TestCase):
+    def test_unbatched(self) -> None:
+        data = MagicMock()
+        game = FakeGame(data, Mock(), Mock())
+        game.put_score(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10)
+        game.put_attempt(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10)
+
+        data.local.music.put_score.assert_called_once_with(
+            GameConstants.JUBEAT, 1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10
+        )
+        data.local.music.put_attempt.assert_called_once_with(
+            GameConstants.JUBEAT, 1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10
+        )
+        data.local.music.put_scores.assert_not_called()
+
+    def test_batched(self) -> None:
+        data = MagicMock()
+        game = FakeGame(data, Mock(), Mock())
+
+        with game.score_batch():
+            for songid in [1000, 1001, 1002]:
+                game.get_score(1, UserID(5), songid, 0)
+                game.put_score(1, UserID(5), songid, 0, 1, songid, {}, True, timestamp=10)
+                game.put_attempt(1, UserID(5), songid, 0, 1, songid, {}, True, timestamp=10)
+            data.local.music.put_scores.assert_not_called()
+
+        # Everything is written at once at the end.
+        self.assertEqual(data.local.music.get_score.call_count, 3)
+        data.local.music.put_score.assert_not_called()
+        data.local.music.put_attempt.assert_not_called()
+        data.local.music.put_scores.assert_called_once()
+        data.local.music.put_attempts.assert_called_once()
+        gamecode, version, userid, scores = data.local.music.put_scores.call_args[0]
+        self.assertEqual((gamecode, version, userid), (GameConstants.JUBEAT, 1, UserID(5)))
+        self.assertEqual([score.id for score in scores], [1000, 1001, 1002])
+        self.assertEqual([score.points for score in scores], [1000, 1001, 1002])
+
+    def test_batched_duplicates(self) -> None:
+        data = MagicMock()
+        game = FakeGame(data, Mock(), Mock())
+
+        with game.score_batch():
+            game.get_score(1, UserID(5), 1000, 0)
+            game.put_score(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10)
+            game.put_attempt(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10)
+
+            # Reading back a chart saved in this batch writes out the batch first.
+            game.get_score(1, UserID(5), 1000, 0)
+            self.assertEqual(data.local.music.put_scores.call_count, 1)
+            self.assertEqual(data.local.music.put_attempts.call_count, 1)
+
+            # Saving the same attempt twice still fails right away so games can retry.
+            game.put_score(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10)
+            with self.assertRaises(ScoreSaveException):
+                game.put_attempt(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10)
+            game.put_score(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=11)
+            game.put_attempt(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=11)
+
+        self.assertEqual(data.local.music.put_scores.call_count, 2)
+        self.assertEqual(data.local.music.put_attempts.call_count, 2)
+        _, _, _, attempts = data.local.music.put_attempts.call_args[0]
+        self.assertEqual([attempt.timestamp for attempt in attempts], [11])
+
+    def test_batched_duplicates_in_db(self) -> None:
+        data = MagicMock()
+        game = FakeGame(data, Mock(), Mock())
+
+        # The second attempt collides with one that was saved before this batch, twice over.
+        data.local.music.put_attempts.side_effect = ScoreSaveException("Duplicate")
+        data.local.music.put_attempt.side_effect = [
+            None,
+            ScoreSaveException("Duplicate"),
+            ScoreSaveException("Duplicate"),
+            None,
+        ]
+
+        with game.score_batch():
+            game.put_attempt(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10)
+            game.put_attempt(1, UserID(5), 1001, 0, 1, 100, {}, True, timestamp=10)
+
+        # The attempts are written one at a time instead, bumping the colliding one into the future.
+        data.local.music.put_attempts.assert_called_once()
+        self.assertEqual(
+            [(call[0][3], call[1]["timestamp"]) for call in data.local.music.put_attempt.call_args_list],
+            [(1000, 10), (1001, 10), (1001, 11), (1001, 12)],
+        )
+
+        # Giving up eventually still fails the request.
+        data.local.music.put_attempt.side_effect = ScoreSaveException("Duplicate")
+        with self.assertRaises(ScoreSaveException):
+            with game.score_batch():
+                game.put_attempt(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10)
+
+    def test_batch_discarded_on_exception(self) -> None:
+        data = MagicMock()
+        game = FakeGame(data, Mock(), Mock())
+
+        def bad_packet() -> None:
+            raise Exception("Bad packet")
+
+        with self.assertRaises(Exception):
+            with game.score_batch():
+                game.put_score(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10)
+                bad_packet()
+        data.local.music.put_scores.assert_not_called()
+
+        # Once the batch is over, scores are written immediately again.
+        game.put_score(1, UserID(5), 1000, 0, 1, 100, {}, True, timestamp=10)
+        data.local.music.put_score.assert_called_once()
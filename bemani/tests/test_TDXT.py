@@ -0,0 +1,64 @@
+# vim: set fileencoding=utf-8
+import unittest
+from unittest.mock import patch
+
+from bemani.format import tdxt
+from bemani.format.tdxt import TDXT
+from bemani.tests.helpers import get_fixture
+
+
+class TestTDXT(unittest.TestCase):
+    # Every format we can decode, along with how many bytes each pixel takes up.
+    FORMATS = {
+        0x01: 1,
+        0x0B: 2,
+        0x0E: 3,
+        0x10: 4,
+        0x13: 2,
+        0x15: 4,
+        0x16: 0.5,
+        0x1A: 1,
+        0x1F: 2,
+        0x20: 4,
+    }
+
+    # Every format we can encode.
+    ENCODABLE = [0x0B, 0x13, 0x1F, 0x20]
+
+    def texture(self, fmt: int, invert: bool) -> TDXT:
+        raw = get_fixture("rawdata")
+        width = 64
+        height = int(len(raw) // (width * self.FORMATS[fmt]))
+        return TDXT(0, 0, 3, width, height, fmt, 0, "<", False, raw, None, invert_channels=invert)
+
+    @unittest.skipIf(not tdxt.HAS_NUMPY, "numpy is not installed")
+    def test_numpy_matches_python(self) -> None:
+        for fmt in self.FORMATS:
+            for invert in [False, True]:
+                texture = self.texture(fmt, invert)
+                img = TDXT._rawToImg(texture.width, texture.height, fmt, "<", invert, texture.raw)
+                with patch.object(tdxt, "HAS_NUMPY", False):
+                    expected = TDXT._rawToImg(texture.width, texture.height, fmt, "<", invert, texture.raw)
+
+                self.assertEqual(img.mode, expected.mode, hex(fmt))
+                self.assertEqual(img.size, expected.size, hex(fmt))
+                self.assertEqual(img.tobytes(), expected.tobytes(), hex(fmt))
+
+                if fmt in self.ENCODABLE:
+                    raw = texture._imgToRaw(img)
+                    with patch.object(tdxt, "HAS_NUMPY", False):
+                        self.assertEqual(raw, texture._imgToRaw(img), hex(fmt))
+
+    def test_round_trip(self) -> None:
+        for fmt in self.ENCODABLE:
+            for invert in [False, True]:
+                texture = self.texture(fmt, invert)
+                raw = texture.raw
+
+                # Decoding and then encoding again gives back exactly what we started with.
+                texture.img = TDXT._rawToImg(texture.width, texture.height, fmt, "<", invert, raw)
+                self.assertEqual(texture.raw, raw, hex(fmt))
+
+                # As does encoding with a fresh copy of the image.
+                texture.raw = raw
+                self.assertEqual(texture._imgToRaw(texture.img.copy()), raw, hex(fmt))
@@ -0,0 +1,191 @@
+# vim: set fileencoding=utf-8
+import json
+import unittest
+from typing import Any, Dict, List, Optional
+from unittest.mock import Mock, PropertyMock, patch
+
+from bemani.backend.sdvx.base import SoundVoltexBase
+from bemani.common import GameConstants, Profile
+from bemani.data.api.user import GlobalUserData
+from bemani.data.mysql.user import UserData
+from bemani.data.remoteuser import RemoteUser
+from bemani.data.types import UserID
+from bemani.tests.helpers import FakeCursor
+
+
+class FakeDB:
+    """
+    Stands in for the DB behind UserData, where every user has a profile for a different
+    set of versions, and counts how many queries are made.
+    """
+
+    def __init__(self, users: List[UserID]) -> None:
+        self.users = users
+        self.queries = 0
+
+    @staticmethod
+    def versions(userid: UserID) -> List[int]:
+        # Some users have the version asked for, some only have older and newer versions,
+        # and some have no profile at all.
+        return [[1, 2, 3], [3, 1], []][userid % 3]
+
+    @staticmethod
+    def refid(userid: UserID, version: int) -> str:
+        return f"{userid:016X}{version:02X}"
+
+    def execute(self, sql: str, params: Optional[Dict[str, Any]] = None) -> FakeCursor:
+        self.queries += 1
+        params = params or {}
+        if "INNER JOIN profile" in sql:
+            return FakeCursor(
+                [
+                    {"version": version, "userid": userid, "refid": self.refid(userid, version)}
+                    for userid in params["userids"]
+                    for version in self.versions(userid)
+                ]
+            )
+        if "refid.refid IN :refids" in sql:
+            return FakeCursor(
+                [
+                    {
+                        "userid": userid,
+                        "refid": self.refid(userid, version),
+                        "extid": userid,
+                        "data": json.dumps({"version": version}),
+                    }
+                    for userid in self.users
+                    for version in self.versions(userid)
+                    if self.refid(userid, version) in params["refids"]
+                ]
+            )
+        if "FROM refid, extid" in sql:
+            return FakeCursor(
+                [
+                    {"userid": userid, "refid": self.refid(userid, params["version"]), "extid": userid}
+                    for userid in params["userids"]
+                ]
+            )
+        raise Exception(f"Unexpected query {sql}")
+
+
+class TestUserData(unittest.TestCase):
+    def build(self, users: List[UserID]) -> UserData:
+        user = UserData(Mock(), None)
+        user.execute = FakeDB(users).execute  # type: ignore
+        return user
+
+    def test_get_any_profiles(self) -> None:
+        userids = [UserID(userid) for userid in range(1, 7)]
+        user = self.build(userids)
+        profiles = dict(user.get_any_profiles(GameConstants.IIDX, 2, userids))
+
+        self.assertEqual(list(profiles.keys()), userids)
+        for userid in userids:
+            versions = FakeDB.versions(userid)
+            if not versions:
+                self.assertIsNone(profiles[userid])
+                continue
+
+            # The version asked for is preferred, and otherwise the newest version is used.
+            expected = 2 if 2 in versions else max(versions)
+            self.assertEqual(profiles[userid].version, expected)
+            self.assertEqual(profiles[userid].refid, FakeDB.refid(userid, expected))
+            self.assertEqual(profiles[userid].extid, userid)
+            self.assertEqual(profiles[userid].get_int("version"), expected)
+
+        self.assertEqual(user.get_any_profiles(GameConstants.IIDX, 2, []), [])
+
+    def test_get_any_profiles_queries(self) -> None:
+        counts = []
+        for count in [1, 10, 1000]:
+            userids = [UserID(userid) for userid in range(3, count + 3)]
+            db = FakeDB(userids)
+            user = UserData(Mock(), None)
+            user.execute = db.execute  # type: ignore
+            profiles = user.get_any_profiles(GameConstants.IIDX, 2, userids)
+            self.assertEqual(len(profiles), count)
+            counts.append(db.queries)
+
+        self.assertEqual(counts, [2, 2, 2])
+
+    def test_global_get_any_profiles_queries(self) -> None:
+        counts = []
+        for count in [1, 10, 1000]:
+            local = [UserID(userid) for userid in range(3, count + 3)]
+            remote = [RemoteUser.card_to_userid(f"E0041234{userid:08X}") for userid in range(1, count + 1)]
+            db = FakeDB(local + remote)
+            user = UserData(Mock(), None)
+            user.execute = db.execute  # type: ignore
+
+            client = Mock()
+            client.get_profiles.return_value = [
+                {"cards": [RemoteUser.userid_to_card(userid)], "name": "REMOTE", "match": "exact"} for userid in remote
+            ]
+            with patch.object(GlobalUserData, "clients", new_callable=PropertyMock, return_value=[client]):
+                profiles = dict(GlobalUserData(Mock(), user).get_any_profiles(GameConstants.IIDX, 2, local + remote))
+
+            self.assertEqual(len(profiles), count * 2)
+            for userid in remote:
+                self.assertEqual(profiles[userid].get_str("name"), "REMOTE")
+                self.assertEqual(profiles[userid].refid, FakeDB.refid(userid, 2))
+            client.get_profiles.assert_called_once()
+            counts.append(db.queries)
+
+        self.assertEqual(counts, [3, 3, 3])
+
+    def test_profile_fields(self) -> None:
+        # Game classes register the fields they look players up by when they're defined.
+        self.assertEqual(SoundVoltexBase.PROFILE_FIELDS, ("loc",))
+
+        user = UserData(Mock(), None)
+        user.execute = Mock(return_value=FakeCursor([{"refid": "0123456789ABCDEF", "extid": 12345678}]))  # type: ignore
+        user.put_profile(GameConstants.SDVX, 4, UserID(1), Profile(GameConstants.SDVX, 4, "", 0, {"loc": 5}))
+        inserts = [call for call in user.execute.call_args_list if "INSERT INTO profile_field" in call[0][0]]
+        (sql, params), _ = inserts[0]
+        self.assertEqual(params, {"refid": "0123456789ABCDEF", "name0": "loc", "value0": "5"})
+
+        # Profiles without the field don't leave a stale copy behind.
+        user.execute.reset_mock()
+        user.put_profile(GameConstants.SDVX, 4, UserID(1), Profile(GameConstants.SDVX, 4, "", 0, {"name": "PLAYER"}))
+        queries = [call[0][0] for call in user.execute.call_args_list]
+        self.assertFalse(any("INSERT INTO profile_field" in sql for sql in queries))
+        self.assertTrue(any("DELETE FROM profile_field" in sql for sql in queries))
+
+        # Games that don't register any fields don't write any copies.
+        user.execute.reset_mock()
+        user.put_profile(GameConstants.IIDX, 20, UserID(1), Profile(GameConstants.IIDX, 20, "", 0, {"loc": 5}))
+        queries = [call[0][0] for call in user.execute.call_args_list]
+        self.assertFalse(any("profile_field" in sql for sql in queries))
+
+        user.execute = Mock(return_value=FakeCursor([{"userid": 1}, {"userid": 2}]))  # type: ignore
+        self.assertEqual(user.get_userids_by_profile_field(GameConstants.SDVX, 4, "loc", 5), [1, 2])
+        self.assertEqual(user.execute.call_args[0][1]["value"], "5")
+        with self.assertRaises(Exception):
+            user.get_userids_by_profile_field(GameConstants.IIDX, 20, "loc", 5)
+
+    def test_global_get_any_profiles_unmatched(self) -> None:
+        local = [UserID(3)]
+        remote = [RemoteUser.card_to_userid(f"E0041234{userid:08X}") for userid in range(1, 5)]
+        db = FakeDB(local + remote)
+        user = UserData(Mock(), None)
+        user.execute = db.execute  # type: ignore
+
+        client = Mock()
+        client.get_profiles.return_value = [
+            {"cards": [RemoteUser.userid_to_card(userid)], "name": "REMOTE", "match": "exact"} for userid in remote[:2]
+        ]
+        with patch.object(GlobalUserData, "clients", new_callable=PropertyMock, return_value=[client]):
+            with patch.object(user, "get_refids_and_extids", wraps=user.get_refids_and_extids) as lookup:
+                profiles = dict(GlobalUserData(Mock(), user).get_any_profiles(GameConstants.IIDX, 2, local + remote))
+
+                # Only users that a remote server knows about get IDs looked up or created.
+                lookup.assert_called_once_with(GameConstants.IIDX, 2, remote[:2])
+                self.assertEqual([profiles[userid].get_str("name") for userid in remote[:2]], ["REMOTE", "REMOTE"])
+                self.assertEqual([profiles[userid] for userid in remote[2:]], [None, None])
+
+                # When the remote servers are down, nothing is looked up for remote users at all.
+                db.queries = 0
+                client.get_profiles.return_value = []
+                profiles = dict(GlobalUserData(Mock(), user).get_any_profiles(GameConstants.IIDX, 2, local + remote))
+                self.assertEqual([profiles[userid] for userid in remote], [None, None, None, None])
+                self.assertEqual(db.queries, 2)
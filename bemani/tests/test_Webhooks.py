@@ -0,0 +1,213 @@
+# vim: set fileencoding=utf-8
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Tuple
+from unittest.mock import Mock
+
+from freezegun import freeze_time
+
+from bemani.common import BroadcastConstants, GameConstants
+from bemani.data import Config, Song, Webhook
+from bemani.data.triggers import Triggers, WebhookSender
+
+
+class FakeDestination(BaseHTTPRequestHandler):
+    """
+    A stand-in for an outside service that is slow to respond, and that answers
+    with whatever status the test asked for.
+    """
+
+    delay: float = 0.0
+    status: int = 204
+    response: Dict[str, Any] = {}
+    bodies: List[Dict[str, Any]] = []
+
+    def do_POST(self) -> None:
+        length = int(self.headers["Content-Length"])
+        FakeDestination.bodies.append(json.loads(self.rfile.read(length)))
+        time.sleep(FakeDestination.delay)
+
+        body = json.dumps(FakeDestination.response).encode("utf-8")
+        self.send_response(FakeDestination.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+class FakeOutbox:
+    """
+    An in-memory version of the webhook table, standing in for NetworkData.
+    """
+
+    def __init__(self) -> None:
+        self.messages: Dict[int, Webhook] = {}
+        self.events: List[Tuple[str, Dict[str, Any]]] = []
+
+    def put_webhook(self, destination: str, data: Dict[str, Any]) -> None:
+        webhookid = len(self.messages) + 1
+        self.messages[webhookid] = Webhook(webhookid, 0, destination, data, 0, 0)
+
+    def claim_webhooks(self, limit: int, lease: int) -> List[Webhook]:
+        return [message for message in self.messages.values() if message.next_attempt <= time.time()][:limit]
+
+    def retry_webhooks(self, webhookids: List[int], next_attempt: int) -> None:
+        for webhookid in webhookids:
+            self.messages[webhookid].attempts += 1
+            self.messages[webhookid].next_attempt = next_attempt
+
+    def delete_webhooks(self, webhookids: List[int]) -> None:
+        for webhookid in webhookids:
+            del self.messages[webhookid]
+
+    def put_event(self, event: str, data: Dict[str, Any]) -> None:
+        self.events.append((event, data))
+
+
+class TestWebhooks(unittest.TestCase):
+    def setUp(self) -> None:
+        FakeDestination.delay = 0.0
+        FakeDestination.status = 204
+        FakeDestination.response = {}
+        FakeDestination.bodies = []
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FakeDestination)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/hook"
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_broadcast_does_not_wait(self) -> None:
+        FakeDestination.delay = 1.0
+        config = Config({"name": "Test Network", "server": {}, "webhooks": {"discord": {"iidx": self.url}}})
+        outbox = FakeOutbox()
+        triggers = Triggers(config, outbox)  # type: ignore
+        song = Song(GameConstants.IIDX, 1, 1000, 0, "Song", "Artist", "Genre", {})
+
+        start = time.monotonic()
+        triggers.broadcast_score({BroadcastConstants.SONG_NAME: "Song"}, GameConstants.IIDX, song)
+        self.assertLess(time.monotonic() - start, FakeDestination.delay / 2)
+
+        # Nothing was sent yet, it was only queued for the sender.
+        self.assertEqual(FakeDestination.bodies, [])
+        self.assertEqual(len(outbox.messages), 1)
+        self.assertEqual(outbox.messages[1].destination, self.url)
+        self.assertEqual(outbox.messages[1].data["embeds"][0]["title"], "New Beatmania IIDX Score!")
+
+        # The sender delivers it, waiting on the slow destination so the game doesn't have to.
+        self.assertEqual(WebhookSender(outbox).send_pending(), 1)  # type: ignore
+        self.assertEqual(len(FakeDestination.bodies), 1)
+        self.assertEqual(outbox.messages, {})
+
+    def test_batches_messages(self) -> None:
+        outbox = FakeOutbox()
+        for i in range(WebhookSender.MAX_EMBEDS + 2):
+            outbox.put_webhook(self.url, {"embeds": [{"title": f"Score {i}"}]})
+
+        self.assertEqual(WebhookSender(outbox).send_pending(), WebhookSender.MAX_EMBEDS + 2)  # type: ignore
+        self.assertEqual(
+            [[embed["title"] for embed in body["embeds"]] for body in FakeDestination.bodies],
+            [
+                [f"Score {i}" for i in range(WebhookSender.MAX_EMBEDS)],
+                [f"Score {i}" for i in range(WebhookSender.MAX_EMBEDS, WebhookSender.MAX_EMBEDS + 2)],
+            ],
+        )
+        self.assertEqual(outbox.messages, {})
+
+    def test_batches_by_length(self) -> None:
+        outbox = FakeOutbox()
+        field = {"name": "Field", "value": "x" * 995}
+        for i in range(4):
+            outbox.put_webhook(self.url, {"embeds": [{"title": f"Score {i}", "fields": [field, field]}]})
+
+        # Each message is just over 2000 characters, so only two fit under Discord's limit.
+        self.assertEqual(WebhookSender(outbox).send_pending(), 4)  # type: ignore
+        self.assertEqual(
+            [[embed["title"] for embed in body["embeds"]] for body in FakeDestination.bodies],
+            [["Score 0", "Score 1"], ["Score 2", "Score 3"]],
+        )
+
+    def test_splits_rejected_batches(self) -> None:
+        FakeDestination.status = 400
+        outbox = FakeOutbox()
+        for i in range(3):
+            outbox.put_webhook(self.url, {"embeds": [{"title": f"Score {i}"}]})
+
+        # A rejected batch is tried again one message at a time before anything is retried later.
+        self.assertEqual(WebhookSender(outbox).send_pending(), 0)  # type: ignore
+        self.assertEqual(
+            [[embed["title"] for embed in body["embeds"]] for body in FakeDestination.bodies],
+            [["Score 0", "Score 1", "Score 2"], ["Score 0"], ["Score 1"], ["Score 2"]],
+        )
+        self.assertEqual([message.attempts for message in outbox.messages.values()], [1, 1, 1])
+
+    def test_destinations(self) -> None:
+        self.assertEqual(Config({"webhooks": {}}).webhooks.discord.destinations, [])
+        self.assertEqual(Config({"webhooks": {"discord": {"iidx": None}}}).webhooks.discord.destinations, [])
+        self.assertEqual(
+            Config({"webhooks": {"discord": {"iidx": self.url}}}).webhooks.discord.destinations,
+            [self.url],
+        )
+
+    def test_retries_failures(self) -> None:
+        FakeDestination.status = 500
+        outbox = FakeOutbox()
+        outbox.put_webhook(self.url, {"embeds": [{"title": "Score"}]})
+        sender = WebhookSender(outbox)  # type: ignore
+
+        with freeze_time("2016-01-01 12:00:00"):
+            self.assertEqual(sender.send_pending(), 0)
+        self.assertEqual(outbox.messages[1].attempts, 1)
+        self.assertGreaterEqual(outbox.messages[1].next_attempt, 1451649600 + WebhookSender.RETRY_DELAY)
+
+        # Rate limits are honored instead of our own backoff.
+        FakeDestination.status = 429
+        FakeDestination.response = {"retry_after": 30.5}
+        outbox.messages[1].next_attempt = 0
+        with freeze_time("2016-01-01 12:00:00"):
+            self.assertEqual(sender.send_pending(), 0)
+        self.assertEqual(outbox.messages[1].attempts, 2)
+        self.assertEqual(outbox.messages[1].next_attempt, 1451649600 + 31)
+
+        # Once we've tried enough times, we give up on the message.
+        FakeDestination.status = 500
+        outbox.messages[1].attempts = WebhookSender.MAX_ATTEMPTS - 1
+        outbox.messages[1].next_attempt = 0
+        self.assertEqual(sender.send_pending(), 0)
+        self.assertEqual(outbox.messages, {})
+        self.assertEqual(len(outbox.events), 1)
+        self.assertEqual(outbox.events[0][0], "exception")
+
+    def test_run_stops(self) -> None:
+        outbox = FakeOutbox()
+        outbox.put_webhook(self.url, {"embeds": [{"title": "Score"}]})
+        stop = threading.Event()
+        sender = WebhookSender(outbox)  # type: ignore
+        thread = threading.Thread(target=sender.run, args=(stop, 0.01))
+        thread.start()
+
+        deadline = time.monotonic() + 5.0
+        while outbox.messages and time.monotonic() < deadline:
+            time.sleep(0.01)
+        stop.set()
+        thread.join(5.0)
+
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(outbox.messages, {})
+        self.assertEqual(len(FakeDestination.bodies), 1)
+
+    def test_invalid_network(self) -> None:
+        outbox = Mock()
+        outbox.claim_webhooks.return_value = [Webhook(1, 0, "http://127.0.0.1:1/hook", {"embeds": []}, 0, 0)]
+        WebhookSender(outbox).send_pending()
+        outbox.delete_webhooks.assert_not_called()
+        outbox.retry_webhooks.assert_called_once()
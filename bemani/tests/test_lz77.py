@@ -8,23 +8,26 @@ from bemani.tests.helpers import get_fixture
 
 
 class TestLZ77Decompressor(unittest.TestCase):
-    def test_ringbuffer_fuzz(self) -> None:
+    def test_backref_fuzz(self) -> None:
         dec = Lz77Decompress(b"")
+        expected = bytearray(Lz77Decompress.RING_LENGTH)
 
         for _ in range(100):
             amount = random.randint(1, Lz77Decompress.RING_LENGTH)
             data = os.urandom(amount)
 
-            # Save our ring position, write a chunk of data
-            readpos = dec.write_pos
-            dec._ring_write(data)
+            # Write a chunk of data, then copy a random backref out of it
+            dec.output += data
+            expected += data
 
-            # Read a chunk of data back from that buffer, see its the same
-            newdata = b"".join(dec._ring_read(readpos, amount))
-            self.assertEqual(data, newdata)
+            copy_pos = random.randint(1, Lz77Decompress.RING_LENGTH - 1)
+            copy_len = random.randint(3, 18)
+            dec._copy_backref(copy_pos, copy_len)
 
-            # Verify integrity of ringbuffer
-            self.assertEqual(len(dec.ring), Lz77Decompress.RING_LENGTH)
+            # Verify against a naive byte-at-a-time copy, which handles overlaps
+            for _ in range(copy_len):
+                expected.append(expected[-copy_pos])
+            self.assertEqual(dec.output, expected)
 
 
 class TestLz77RealCompressor(unittest.TestCase):
@@ -0,0 +1,545 @@
+import argparse
+import os
+import random
+import sqlite3
+import struct
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, List, Optional, Tuple
+
+from bemani.common import Time
+from bemani.data.mysql.music import MusicData
+from bemani.format import dxt
+from bemani.protocol import lz77, protocol
+from bemani.protocol.binary import BinaryEncoding, PackedOrdering
+from bemani.protocol.node import Node
+from bemani.protocol.stream import InputStream
+
+
+def _time(func: Callable[[], object], iterations: int) -> float:
+    """
+    Run a function the given number of times, returning the average time in
+    seconds that a single call took.
+    """
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations
+
+
+def _print_results(title: str, results: List[Tuple[str, int, float]]) -> None:
+    print(title)
+    for name, size, duration in results:
+        rate = (size / duration) / (1024 * 1024) if duration > 0 else 0.0
+        print(f"  {name:<24} {size:>10} bytes {duration * 1000:>12.3f} ms {rate:>10.2f} MiB/s")
+
+
+def benchmark_rc4(iterations: int) -> int:
+    proto = protocol.EAmuseProtocol()
+    key = protocol.EAmuseProtocol._derive_key("1-5c8c8c7d-1a3b")
+
+    implementations: List[Tuple[str, Callable[[bytes], bytes]]] = [
+        ("python", lambda data: proto._rc4_crypt_python(data, key)),
+    ]
+    if protocol.clib is not None:
+        implementations.append(("c++", lambda data: proto._rc4_crypt(data, key)))
+    else:
+        print("C++ RC4 implementation is not compiled, only benchmarking pure python implementation!")
+
+    results: List[Tuple[str, int, float]] = []
+    for size in [1024, 16 * 1024, 128 * 1024, 1024 * 1024]:
+        data = os.urandom(size)
+        for name, impl in implementations:
+            results.append((name, size, _time(lambda: impl(data), iterations)))
+    _print_results("RC4 encrypt/decrypt", results)
+
+    # Also time deriving the key, once uncached and then cached.
+    protocol.EAmuseProtocol._derive_key.cache_clear()
+    uncached = _time(lambda: protocol.EAmuseProtocol._derive_key("1-5c8c8c7d-1a3c"), 1)
+    cached = _time(lambda: protocol.EAmuseProtocol._derive_key("1-5c8c8c7d-1a3c"), max(iterations, 1000))
+    print("RC4 key derivation")
+    print(f"  {'uncached':<24} {uncached * 1000000:>12.3f} us")
+    print(f"  {'cached':<24} {cached * 1000000:>12.3f} us")
+
+    return 0
+
+
+def _load_samples(files: Optional[List[str]]) -> List[Tuple[str, bytes]]:
+    """
+    Load the given files to benchmark against, or if none are given, fall back to
+    generated samples of text, an encoded packet and incompressible random data.
+    """
+    if files:
+        samples: List[Tuple[str, bytes]] = []
+        for filename in files:
+            with open(filename, "rb") as fp:
+                samples.append((os.path.basename(filename), fp.read()))
+        return samples
+
+    rng = random.Random(0)
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do"]
+    text = " ".join(rng.choice(words) for _ in range(16 * 1024)).encode("ascii")
+    packet = BinaryEncoding().encode(_sample_tree(1000), encoding="shift-jis")
+    return [("text", text), ("packet", packet), ("random", rng.randbytes(64 * 1024))]
+
+
+def benchmark_lz77(files: Optional[List[str]], iterations: int) -> int:
+    compressors: List[Tuple[str, Callable[[bytes], bytes]]] = [
+        ("python", lambda data: lz77.Lz77Compress(data).compress()),
+    ]
+    decompressors: List[Tuple[str, Callable[[bytes], bytes]]] = [
+        ("python", lambda data: lz77.Lz77Decompress(data).decompress()),
+    ]
+    if lz77.clib is not None:
+        compressors.append(("c++", lz77.Lz77().compress))
+        decompressors.append(("c++", lz77.Lz77().decompress))
+    else:
+        print("C++ LZ77 implementation is not compiled, only benchmarking pure python implementation!")
+
+    compress_results: List[Tuple[str, int, float]] = []
+    decompress_results: List[Tuple[str, int, float]] = []
+    for filename, data in _load_samples(files):
+        compressed = lz77.Lz77().compress(data)
+        for name, compressor in compressors:
+            compress_results.append((f"{name} {filename}", len(data), _time(lambda: compressor(data), iterations)))
+        for name, decompressor in decompressors:
+            decompress_results.append(
+                (f"{name} {filename}", len(data), _time(lambda: decompressor(compressed), iterations))
+            )
+    _print_results("LZ77 compress", compress_results)
+    _print_results("LZ77 decompress", decompress_results)
+
+    return 0
+
+
+def _sample_tree(entries: int) -> Node:
+    """
+    Build a tree that looks like a typical profile save, with a number of per-song
+    entries each containing a handful of scalar and array values.
+    """
+    root = Node.void("call")
+    game = Node.void("game")
+    root.add_child(game)
+    game.set_attribute("method", "save")
+    game.set_attribute("ver", "0")
+    game.add_child(Node.string("refid", "0123456789ABCDEF"))
+    game.add_child(Node.string("name", "PLAYER"))
+    game.add_child(Node.u32("gamecoin_packet", 100))
+    game.add_child(Node.s16_array("hidden_param", list(range(20))))
+    for i in range(entries):
+        music = Node.void("music")
+        music.set_attribute("id", str(i))
+        music.add_child(Node.u32("music_id", i))
+        music.add_child(Node.u32("music_type", i % 5))
+        music.add_child(Node.u32("score", i * 1000))
+        music.add_child(Node.u32("clear_type", i % 7))
+        music.add_child(Node.u32("score_grade", i % 10))
+        music.add_child(Node.u32_array("param", [i, i + 1, i + 2, i + 3]))
+        music.add_child(Node.bool("is_new", i % 2 == 0))
+        game.add_child(music)
+    return root
+
+
+class ReferenceDecoder:
+    """
+    A straightforward stream-based decoder, kept as a reference implementation to
+    check the optimized BinaryDecoder against for speed here and for correctness
+    in the unit tests.
+    """
+
+    def __init__(self, data: bytes, encoding: str) -> None:
+        self.stream = InputStream(data)
+        self.encoding = encoding
+
+    def read_node_name(self) -> str:
+        length = self.stream.read_int()
+        bits = ""
+        for _ in range(((length * 6) + 7) // 8):
+            bits = bits + bin(self.stream.read_int())[2:].rjust(8, "0")
+        return "".join(Node.NODE_NAME_CHARS[int(bits[i : (i + 6)], 2)] for i in range(0, length * 6, 6))
+
+    def read_node(self, node_type: int) -> Node:
+        node = Node(name=self.read_node_name(), type=node_type)
+        while True:
+            child_type = self.stream.read_int()
+            if child_type == Node.END_OF_NODE:
+                return node
+            elif child_type == Node.ATTR_TYPE:
+                node.set_attribute(self.read_node_name())
+            else:
+                node.add_child(self.read_node(child_type))
+
+    def get_tree(self) -> Node:
+        header_length = self.stream.read_int(4)
+        root = self.read_node(self.stream.read_int())
+        self.stream.read_blob(header_length + 4 - self.stream.pos)
+        body_length = self.stream.read_int(4)
+        body = self.stream.read_blob(body_length)
+        ordering = PackedOrdering(body_length)
+
+        for value in PackedOrdering.node_to_body_ordering(root):
+            node = value["node"]
+            loc: Optional[int]
+
+            if value["type"] == "attribute" or node.data_length is None:
+                loc = ordering.get_next_int()
+                size = struct.unpack(">I", body[loc : (loc + 4)])[0]
+                ordering.mark_used(size + 4, loc, round_to=4)
+                blob = body[(loc + 4) : (loc + 4 + size)]
+                if value["type"] == "attribute":
+                    node.set_attribute(value["name"], blob[:-1].decode(self.encoding, "replace"))
+                elif node.data_type == "str":
+                    node.set_value(blob[:-1].decode(self.encoding, "replace"))
+                else:
+                    node.set_value(blob)
+            elif node.is_array:
+                loc = ordering.get_next_int()
+                length = struct.unpack(">I", body[loc : (loc + 4)])[0]
+                ordering.mark_used(length + 4, loc, round_to=4)
+                elems = length // node.data_length
+                val = struct.unpack(f">{node.data_encoding * elems}", body[(loc + 4) : (loc + 4 + length)])
+                node.set_value(list(val))
+            else:
+                if value["alignment"] == 1:
+                    loc = ordering.get_next_byte()
+                elif value["alignment"] == 2:
+                    loc = ordering.get_next_short()
+                else:
+                    loc = ordering.get_next_int()
+                ordering.mark_used(node.data_length, loc)
+                val = struct.unpack(f">{node.data_encoding}", body[loc : (loc + node.data_length)])
+                node.set_value(list(val) if node.is_composite else val[0])
+
+        return root
+
+
+def benchmark_binary(iterations: int) -> int:
+    results: List[Tuple[str, int, float]] = []
+    for entries in [10, 100, 1000]:
+        data = BinaryEncoding().encode(_sample_tree(entries), encoding="shift-jis")
+        results.append(
+            (f"decode {entries} entries", len(data), _time(lambda: BinaryEncoding().decode(data), iterations))
+        )
+        results.append(
+            (
+                f"reference {entries} entries",
+                len(data),
+                _time(lambda: ReferenceDecoder(data[4:], "shift-jis").get_tree(), iterations),
+            )
+        )
+    _print_results("Binary packet decode", results)
+
+    return 0
+
+
+def _sample_save(entries: int) -> Node:
+    """
+    Build a tree that looks like an SDVX profile save, with a large number of top-level
+    values alongside item, story and param lists that each have their own entries.
+    """
+    root = Node.void("call")
+    game = Node.void("game")
+    root.add_child(game)
+    game.set_attribute("method", "sv4_save")
+    game.add_child(Node.string("refid", "0123456789ABCDEF"))
+    game.add_child(Node.string("name", "PLAYER"))
+    for name in [
+        "earned_gamecoin_packet",
+        "earned_gamecoin_block",
+        "earned_blaster_energy",
+        "blaster_count",
+        "skill_name_id",
+        "headphone",
+        "appeal_id",
+        "comment_id",
+        "music_id",
+        "music_type",
+        "sort_type",
+        "narrow_down",
+        "gauge_option",
+        "creator_id",
+        "akaname_id",
+        "nemsys",
+        "sysbg",
+        "subbg",
+        "bgm",
+        "effector",
+        "start_option",
+        "arrow_speed",
+        "lanespeed",
+        "draw_adjust",
+        "eff_time",
+        "play_cnt",
+        "day_cnt",
+        "today_cnt",
+        "play_chain",
+        "max_play_chain",
+        "week_cnt",
+        "week_play_cnt",
+        "week_chain",
+        "max_week_chain",
+    ]:
+        game.add_child(Node.u32(name, len(name)))
+    game.add_child(Node.s16_array("hidden_param", list(range(20))))
+    for listname, fields in [
+        ("item", ["id", "type", "param"]),
+        ("story", ["story_id", "progress_id", "progress_param", "clear_cnt", "route_flg"]),
+        ("param", ["id", "type", "param"]),
+    ]:
+        container = Node.void(listname)
+        game.add_child(container)
+        for i in range(entries):
+            info = Node.void("info")
+            container.add_child(info)
+            for field in fields:
+                info.add_child(Node.u32(field, i))
+    return root
+
+
+def _walk_save(root: Node, lookup: Callable[[Node, str], Any]) -> int:
+    """
+    Walk a profile save the way a game backend would, looking up every top-level value
+    and then every value in each entry. Returns the number of lookups performed.
+    """
+    lookups = 0
+    game = lookup(root, "game")
+    for child in game.children:
+        lookup(game, child.name)
+        lookups = lookups + 1
+    for listname in ["item", "story", "param"]:
+        for info in lookup(game, listname).children:
+            for child in info.children:
+                lookup(info, child.name)
+                lookups = lookups + 1
+    return lookups
+
+
+def benchmark_node(iterations: int) -> int:
+    def indexed(node: Node, name: str) -> Any:
+        return node.child(name)
+
+    def baseline(node: Node, name: str) -> Any:
+        # How Node.child() looked children up before it indexed them by name.
+        tree = name.split("/", 1)
+        for child in node.children:
+            if child.name == tree[0]:
+                if len(tree) == 1:
+                    return child
+                else:
+                    return baseline(child, tree[1])
+        return None
+
+    results: List[Tuple[str, int, float]] = []
+    for entries in [10, 100, 1000]:
+        data = BinaryEncoding().encode(_sample_save(entries), encoding="shift-jis")
+        root = BinaryEncoding().decode(data)
+        if root is None:
+            raise Exception("Failed to decode sample save!")
+
+        results.append(
+            (f"decode {entries} entries", len(data), _time(lambda: BinaryEncoding().decode(data), iterations))
+        )
+        results.append((f"walk {entries} entries", len(data), _time(lambda: _walk_save(root, indexed), iterations)))
+        results.append(
+            (f"baseline {entries} entries", len(data), _time(lambda: _walk_save(root, baseline), iterations))
+        )
+    _print_results("Profile save decode and walk", results)
+
+    # Also measure how much memory a decoded tree takes up.
+    print("Decoded tree memory")
+    for entries in [10, 100, 1000]:
+        data = BinaryEncoding().encode(_sample_save(entries), encoding="shift-jis")
+        tracemalloc.start()
+        root = BinaryEncoding().decode(data)
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"  {f'{entries} entries':<24} {len(data):>10} bytes {size:>12} bytes in memory")
+
+    return 0
+
+
+def _sample_history(rows: int, songs: int) -> sqlite3.Connection:
+    """
+    Build an in-memory database with a score history of the given number of attempts spread
+    over the last two years, along with the daily hit chart rollups for that history, compacted
+    the same way that the scheduler would.
+    """
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE music (id INTEGER, songid INTEGER, chart INTEGER, game TEXT, version INTEGER)")
+    conn.execute("CREATE TABLE score_history (musicid INTEGER, timestamp INTEGER)")
+    conn.execute("CREATE TABLE hit_chart (musicid INTEGER, day INTEGER, plays INTEGER, UNIQUE (musicid, day))")
+    conn.executemany(
+        "INSERT INTO music VALUES (?, ?, ?, 'reflec', 1)",
+        [(songid * 4 + chart, songid, chart) for songid in range(songs) for chart in range(4)],
+    )
+
+    now = Time.now()
+    rng = random.Random(0)
+    conn.executemany(
+        "INSERT INTO score_history VALUES (?, ?)",
+        ((rng.randrange(songs * 4), now - rng.randrange(Time.SECONDS_IN_DAY * 365 * 2)) for _ in range(rows)),
+    )
+    conn.execute("CREATE INDEX ix_score_history_musicid ON score_history (musicid)")
+    conn.execute("CREATE INDEX ix_score_history_timestamp ON score_history (timestamp)")
+
+    cutoff = (now // Time.SECONDS_IN_DAY) - MusicData.HIT_CHART_DAYS
+    conn.execute(
+        "INSERT INTO hit_chart SELECT musicid, CASE WHEN day < :cutoff THEN 0 ELSE day END AS bucket, COUNT(*) "
+        + "FROM (SELECT musicid, timestamp / 86400 AS day FROM score_history) GROUP BY musicid, bucket",
+        {"cutoff": cutoff},
+    )
+    return conn
+
+
+def benchmark_hitchart(rows: int, iterations: int) -> int:
+    print(f"Building a score history of {rows} attempts...")
+    conn = _sample_history(rows, 1000)
+    now = Time.now()
+
+    def history(days: Optional[int]) -> list:
+        sql = """
+            SELECT music.songid AS songid, COUNT(score_history.timestamp) AS plays
+            FROM score_history, music
+            WHERE score_history.musicid = music.id AND music.game = 'reflec' AND music.version = 1
+        """
+        if days is not None:
+            sql = sql + "AND score_history.timestamp > :timestamp "
+        sql = sql + "GROUP BY songid ORDER BY plays DESC LIMIT 1024"
+        return conn.execute(sql, {"timestamp": now - (Time.SECONDS_IN_DAY * (days or 0))}).fetchall()
+
+    def rollup(days: Optional[int]) -> list:
+        sql = """
+            SELECT music.songid AS songid, SUM(hit_chart.plays) AS plays
+            FROM hit_chart, music
+            WHERE hit_chart.musicid = music.id AND music.game = 'reflec' AND music.version = 1
+        """
+        if days is not None:
+            sql = sql + "AND hit_chart.day >= :day "
+        sql = sql + "GROUP BY songid ORDER BY plays DESC LIMIT 1024"
+        return conn.execute(sql, {"day": (now - (Time.SECONDS_IN_DAY * (days or 0))) // Time.SECONDS_IN_DAY}).fetchall()
+
+    print("Hit chart lookup")
+    for days in [None, 365, 30, 7]:
+        name = "all time" if days is None else f"{days} days"
+        slow = _time(lambda: history(days), iterations)
+        fast = _time(lambda: rollup(days), iterations)
+        print(f"  {name:<24} {slow * 1000:>12.3f} ms history {fast * 1000:>12.3f} ms rollup {slow / fast:>8.1f}x")
+
+    return 0
+
+
+def benchmark_dxt(sizes: List[int], iterations: int) -> int:
+    if not dxt.HAS_NUMPY:
+        print("numpy is not installed, only benchmarking pure python implementation!")
+
+    results: List[Tuple[str, int, float]] = []
+    for size in sizes:
+        buffer = dxt.DXTBuffer(size, size)
+        for name, blocksize, python, vectorized in [
+            ("DXT1", 8, buffer.DXT1DecompressPython, buffer.DXT1DecompressNumpy),
+            ("DXT5", 16, buffer.DXT5DecompressPython, buffer.DXT5DecompressNumpy),
+        ]:
+            data = random.Random(0).randbytes((size // 4) * (size // 4) * blocksize)
+
+            # The pure python implementation takes a long time on large textures, so only run it once.
+            results.append((f"python {name} {size}x{size}", len(data), _time(lambda: python(data), 1)))
+            if dxt.HAS_NUMPY:
+                if vectorized(data) != python(data):
+                    raise Exception(f"numpy {name} implementation does not match pure python implementation!")
+                results.append((f"numpy {name} {size}x{size}", len(data), _time(lambda: vectorized(data), iterations)))
+    _print_results("DXT texture decompress", results)
+
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Micro-benchmarks for various hot code paths.")
+    parser.add_argument(
+        "-n",
+        "--iterations",
+        help="Number of times to run each benchmark. Defaults to 5.",
+        type=int,
+        default=5,
+    )
+    subparsers = parser.add_subparsers(help="Benchmark to run", dest="action")
+
+    subparsers.add_parser(
+        "rc4",
+        help="Benchmark RC4 packet encryption",
+        description="Benchmark RC4 packet encryption across 1KB to 1MB payloads, comparing pure python and C++ implementations.",
+    )
+
+    lz77_parser = subparsers.add_parser(
+        "lz77",
+        help="Benchmark LZ77 packet compression",
+        description="Benchmark LZ77 compression and decompression, comparing pure python and C++ implementations.",
+    )
+    lz77_parser.add_argument(
+        "file",
+        metavar="FILE",
+        nargs="*",
+        help="Raw packets or files to benchmark against. Defaults to generated text, packet and random samples.",
+    )
+
+    subparsers.add_parser(
+        "binary",
+        help="Benchmark binary packet decoding",
+        description=(
+            "Benchmark decoding binary packets of various sizes that look like typical profile saves, "
+            "against a simple stream-based reference decoder."
+        ),
+    )
+
+    subparsers.add_parser(
+        "node",
+        help="Benchmark decoding and walking a profile save",
+        description="Benchmark decoding a profile save packet and looking up every value in it the way a game backend would.",
+    )
+
+    hitchart_parser = subparsers.add_parser(
+        "hitchart",
+        help="Benchmark hit chart lookups",
+        description="Benchmark looking up a hit chart from a large score history, comparing counting every attempt against summing daily rollups.",
+    )
+    hitchart_parser.add_argument(
+        "-r",
+        "--rows",
+        help="Number of attempts in the synthetic score history. Defaults to 2000000.",
+        type=int,
+        default=2000000,
+    )
+
+    dxt_parser = subparsers.add_parser(
+        "dxt",
+        help="Benchmark DXT texture decompression",
+        description="Benchmark decompressing DXT1 and DXT5 textures, comparing pure python and numpy implementations.",
+    )
+    dxt_parser.add_argument(
+        "-s",
+        "--size",
+        help="Width and height of the textures to decompress. Can be given more than once. Defaults to 1024 and 2048.",
+        type=int,
+        action="append",
+    )
+
+    args = parser.parse_args()
+
+    if args.action == "rc4":
+        return benchmark_rc4(args.iterations)
+    elif args.action == "lz77":
+        return benchmark_lz77(args.file, args.iterations)
+    elif args.action == "binary":
+        return benchmark_binary(args.iterations)
+    elif args.action == "node":
+        return benchmark_node(args.iterations)
+    elif args.action == "hitchart":
+        return benchmark_hitchart(args.rows, args.iterations)
+    elif args.action == "dxt":
+        return benchmark_dxt(args.size or [1024, 2048], args.iterations)
+    else:
+        raise Exception(f"Invalid action {args.action}!")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
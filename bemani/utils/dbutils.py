@@ -3,7 +3,8 @@ import getpass
 import sys
 from typing import Optional
 
-from bemani.data import Config, Data, DBCreateException
+from bemani.common import GameConstants
+from bemani.data import ClearRates, Config, Data, DBCreateException
 from bemani.utils.config import load_config
 
 
@@ -68,11 +69,32 @@ def remove_admin(config: Config, username: Optional[str]) -> None:
     print(f"User {username} lost admin rights.")
 
 
+def backfill_clear_rates(config: Config) -> None:
+    data = Data(config)
+    counted = data.local.music.rebuild_clear_rates(GameConstants.SDVX, ClearRates.sdvx)
+    print(f"Recalculated clear rates from {counted} attempts.")
+    data.close()
+
+
+def check_records(config: Config) -> None:
+    data = Data(config)
+    mismatches = 0
+    for game in GameConstants:
+        for location, songid, chart, expected, actual in data.local.music.check_records(game):
+            where = f"location {location}" if location is not None else "overall"
+            print(f"{game.value} song {songid} chart {chart} {where}: record held by {actual}, should be {expected}")
+            mismatches += 1
+    data.close()
+    if mismatches > 0:
+        raise Exception(f"Found {mismatches} records that don't match scores!")
+    print("All records match scores.")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="A utility for working with databases created with this codebase.")
     parser.add_argument(
         "operation",
-        help="Operation to perform, options include 'create', 'generate', 'upgrade', 'change-password', 'add-admin' and 'remove-admin'.",
+        help="Operation to perform, options include 'create', 'generate', 'upgrade', 'change-password', 'add-admin', 'remove-admin', 'backfill-clear-rates' and 'check-records'.",
         type=str,
     )
     parser.add_argument(
@@ -118,6 +140,10 @@ def main() -> None:
             remove_admin(config, args.username)
         elif args.operation == "change-password":
             change_password(config, args.username)
+        elif args.operation == "backfill-clear-rates":
+            backfill_clear_rates(config)
+        elif args.operation == "check-records":
+            check_records(config)
         else:
             raise Exception(f"Unknown operation '{args.operation}'")
     except DBCreateException as e:
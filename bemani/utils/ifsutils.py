@@ -41,12 +41,10 @@ def main() -> None:
     def load_ifs(fname: str, root: bool = False) -> Optional[IFS]:
         fname = os.path.join(fileroot, fname)
         if os.path.isfile(fname):
-            fp = open(fname, "rb")
-            data = fp.read()
-            fp.close()
-
-            return IFS(
-                data,
+            # Memory-map the file instead of reading it, so that extracting huge files
+            # only ever needs enough memory for the file currently being extracted.
+            return IFS.open(
+                fname,
                 decode_binxml=root and args.convert_xml_files,
                 decode_textures=root and args.convert_texture_files,
                 keep_hex_names=not root,
@@ -64,8 +62,8 @@ def main() -> None:
         realfn = os.path.join(root, fn)
         dirof = os.path.dirname(realfn)
         os.makedirs(dirof, exist_ok=True)
-        with open(realfn, "wb") as fp:
-            fp.write(ifs.read_file(fn))
+        with open(realfn, "wb") as fp, ifs.read_view(fn) as filedata:
+            fp.write(filedata)
 
 
 if __name__ == "__main__":
@@ -83,6 +83,9 @@ class ImportBase:
         self.__session.commit()
         self.__batch = False
 
+        # Make sure anything in this process sees the songs we just imported.
+        MusicData.invalidate_musicids(self.game)
+
     def execute(self, sql: str, params: Optional[Dict[str, Any]] = None) -> CursorResult:
         if not self.__batch:
             raise Exception("Logic error, cannot execute outside of a batch!")
@@ -66,6 +66,12 @@ def run_scheduled_work(config: Config) -> None:
     for cache in enabled_caches:
         cache.preload(data, config)
 
+    # Now, roll up old daily play counts for hit charts
+    data.local.music.compact_hit_chart()
+
+    # Now, copy anything new from remote servers so requests never wait on them
+    data.remote.music.refresh_mirror()
+
     # Now, possibly delete old log entries
     keep_duration = config.get("event_log_duration", 0)
     if keep_duration > 0:
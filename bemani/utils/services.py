@@ -1,22 +1,61 @@
 import argparse
+import os
+import sys
+import threading
 import traceback
 from flask import Flask, request, redirect, Response, make_response
 from typing import Any
 
 
 from bemani.protocol import EAmuseProtocol
-from bemani.backend import Dispatch, UnrecognizedPCBIDException
+from bemani.backend import Base, Dispatch, UnrecognizedPCBIDException
 from bemani.data import Config, Data
+from bemani.data.triggers import WebhookSender
 from bemani.utils.config import (
     load_config as base_load_config,
     instantiate_cache as base_instantiate_cache,
     register_games as base_register_games,
 )
 
-
 app = Flask(__name__)
 config = Config()
 
+# Constructing a Data object is relatively expensive, so every worker thread keeps
+# one around and resets it between requests instead of creating one per packet.
+local = threading.local()
+
+
+# Score broadcasts and other webhooks are queued by games and sent by a background thread,
+# started once in each worker process since uWSGI forks workers after loading the app.
+webhook_sender_pid: int = 0
+webhook_sender_lock = threading.Lock()
+
+
+def get_data() -> Data:
+    global config
+    data = getattr(local, "data", None)
+    if data is None:
+        data = Data(config)
+        local.data = data
+    return data
+
+
+def start_webhook_sender() -> None:
+    global config
+    global webhook_sender_pid
+    if webhook_sender_pid == os.getpid() or not config.webhooks.send_from_services:
+        return
+    if not config.webhooks.discord.destinations:
+        # No destinations are configured, so there is nothing to poll for.
+        return
+
+    with webhook_sender_lock:
+        if webhook_sender_pid == os.getpid():
+            return
+        webhook_sender_pid = os.getpid()
+        sender = WebhookSender(Data(config).local.network)
+        threading.Thread(target=sender.run, args=(threading.Event(),), daemon=True).start()
+
 
 @app.route("/", defaults={"path": ""}, methods=["GET"])
 @app.route("/<path:path>", methods=["GET"])
@@ -54,12 +93,13 @@ def receive_request(path: str) -> Response:
 
     # Create and format config
     global config
-    requestconfig = config.clone()
+    requestconfig = config.overlay()
     requestconfig["client"] = {
         "address": remote_address or request.remote_addr,
     }
 
-    dataprovider = Data(requestconfig)
+    start_webhook_sender()
+    dataprovider = get_data()
     try:
         dispatch = Dispatch(requestconfig, dataprovider, config["verbose"])
         resp = dispatch.handle(req)
@@ -115,7 +155,7 @@ def receive_request(path: str) -> Response:
         )
         return Response("Crash when handling packet!", 500)
     finally:
-        dataprovider.close()
+        dataprovider.reset()
 
 
 def register_games() -> None:
@@ -123,6 +163,15 @@ def register_games() -> None:
     base_register_games(config)
 
 
+def list_routes() -> None:
+    for gamecode, game, handler in Base.all_routes():
+        if handler.endswith("_requests"):
+            call = handler[len("handle_") : -len("_requests")] + " (any method)"
+        else:
+            call = handler[len("handle_") : -len("_request")]
+        print(f"{gamecode} {game.name} {call}")
+
+
 def load_config(filename: str) -> None:
     global config
     base_load_config(filename, config)
@@ -155,6 +204,12 @@ if __name__ == "__main__":
         action="store_true",
         help="Force the database into read-only mode.",
     )
+    parser.add_argument(
+        "-l",
+        "--list-routes",
+        action="store_true",
+        help="List every game code, game and call that requests can be routed to, and then exit.",
+    )
     args = parser.parse_args()
 
     # Set up global configuration, overriding config port for convenience in debugging.
@@ -169,6 +224,10 @@ if __name__ == "__main__":
     # Register game handlers
     register_games()
 
+    if args.list_routes:
+        list_routes()
+        sys.exit(0)
+
     if args.profile:
         from werkzeug.contrib.profiler import ProfilerMiddleware
 
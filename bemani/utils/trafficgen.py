@@ -1,6 +1,8 @@
 import argparse
 import sys
-from typing import Any, Dict, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
 import yaml
 
 from bemani.client import ClientProtocol, BaseClient
@@ -312,6 +314,35 @@ def get_client(proto: ClientProtocol, pcbid: str, game: str, config: Dict[str, A
     raise Exception(f"Unknown game {game}")
 
 
+def loadtest(create_client: Callable[[], BaseClient], count: int, threads: int) -> None:
+    """
+    Send a stream of lightweight boot packets from a number of concurrent clients and report
+    how many requests per second the server handled. Every one of these packets goes through
+    the full request path (decoding, dispatch, machine lookup and encoding) while doing very
+    little game-specific work, so this is mostly a measure of per-request overhead.
+    """
+
+    def run(requests: int) -> int:
+        emu = create_client()
+        calls: List[Callable[[], Any]] = [emu.verify_services_get, emu.verify_pcbtracker_alive, emu.verify_message_get]
+        for i in range(requests):
+            calls[i % len(calls)]()
+        return requests
+
+    # Make sure the machine exists before we start timing anything.
+    create_client().verify_pcbtracker_alive()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        shares = [count // threads + (1 if i < count % threads else 0) for i in range(threads)]
+        total = sum(executor.map(run, shares))
+    duration = time.perf_counter() - start
+
+    print(
+        f"Sent {total} requests over {threads} threads in {duration:.2f} seconds, {total / duration:.2f} requests/second"
+    )
+
+
 def mainloop(
     address: str,
     port: int,
@@ -320,6 +351,8 @@ def mainloop(
     game: str,
     cardid: Optional[str],
     verbose: bool,
+    count: Optional[int] = None,
+    threads: int = 1,
 ) -> None:
     games = {
         "pnm-tune-street": {
@@ -547,21 +580,25 @@ def mainloop(
 
         config = yaml.safe_load(open(configfile))
 
-        print(f'Emulating {games[game]["name"]}')
-        emu = get_client(
-            ClientProtocol(
-                address,
-                port,
-                config["core"]["encryption"],
-                config["core"]["compression"],
-                verbose,
-            ),
-            config["core"]["pcbid"],
-            game,
-            games[game],
-        )
+        def create_client() -> BaseClient:
+            return get_client(
+                ClientProtocol(
+                    address,
+                    port,
+                    config["core"]["encryption"],
+                    config["core"]["compression"],
+                    verbose,
+                ),
+                config["core"]["pcbid"],
+                game,
+                games[game],
+            )
 
-        emu.verify(cardid)
+        print(f'Emulating {games[game]["name"]}')
+        if count is not None:
+            loadtest(create_client, count, threads)
+        else:
+            create_client().verify(cardid)
 
 
 def main() -> None:
@@ -605,6 +642,20 @@ def main() -> None:
         action="store_true",
         default=False,
     )
+    parser.add_argument(
+        "-n",
+        "--requests",
+        help="Instead of verifying the game, load test the server by sending this many boot packets and reporting requests/second.",
+        type=int,
+        default=None,
+    )
+    parser.add_argument(
+        "-t",
+        "--threads",
+        help="Number of concurrent clients to use when load testing. Defaults to 1.",
+        type=int,
+        default=1,
+    )
     args = parser.parse_args()
 
     if args.list:
@@ -658,7 +709,17 @@ def main() -> None:
         "mga": "metal-gear-arcade",
     }.get(game, game)
 
-    mainloop(args.address, args.port, args.config, action, game, args.cardid, args.verbose)
+    mainloop(
+        args.address,
+        args.port,
+        args.config,
+        action,
+        game,
+        args.cardid,
+        args.verbose,
+        count=args.requests,
+        threads=args.threads,
+    )
 
 
 if __name__ == "__main__":
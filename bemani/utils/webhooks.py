@@ -0,0 +1,41 @@
+import argparse
+import threading
+
+from bemani.data import Config, Data
+from bemani.data.triggers import WebhookSender
+from bemani.utils.config import load_config
+
+
+def send_webhooks(config: Config, once: bool) -> None:
+    sender = WebhookSender(Data(config).local.network)
+    if once:
+        # Send everything that is currently due, and then exit.
+        while sender.send_pending() > 0:
+            pass
+    else:
+        sender.run(threading.Event())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="A sender for score broadcasts and other queued webhooks.")
+    parser.add_argument(
+        "-c",
+        "--config",
+        help="Core configuration. Defaults to server.yaml",
+        type=str,
+        default="server.yaml",
+    )
+    parser.add_argument(
+        "-1",
+        "--once",
+        action="store_true",
+        help="Send any webhooks that are due and then exit, instead of running forever.",
+    )
+    args = parser.parse_args()
+
+    # Set up global configuration
+    config = Config()
+    load_config(args.config, config)
+
+    # Send webhooks until we are killed
+    send_webhooks(config, args.once)
@@ -30,6 +30,17 @@ def extensions():
             extra_compile_args=["-std=c++14"],
             extra_link_args=["-std=c++14"],
         ),
+        # Alternative, orders of magnitude faster version of the RC4 cipher used to
+        # encrypt and decrypt older-style packets on every request and response.
+        Extension(
+            "bemani.protocol.rc4cpp",
+            [
+                "bemani/protocol/rc4cpp.cxx",
+            ],
+            language="c++",
+            extra_compile_args=["-std=c++14"],
+            extra_link_args=["-std=c++14"],
+        ),
         # This is a memory-unsafe, orders of magnitude faster threaded implementation
         # of the pure python blend code which takes rendering rough animations down
         # from over an hour to around a minute.
@@ -109,7 +120,8 @@ def extensions():
                         ]
                     ),
                     # Every single backend service uses this class for construction and
-                    # parsing, so compiling this makes sense.
+                    # parsing, so compiling this makes sense. This, along with binary and
+                    # stream, has a .pxd file which compiles the hot classes to cdef classes.
                     Extension(
                         "bemani.protocol.node",
                         [